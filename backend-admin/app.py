@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, send_file, after_this_request, g
 from flask_cors import CORS
 from pymongo import MongoClient
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -7,12 +7,38 @@ from functools import wraps
 from datetime import datetime, timedelta
 import pytz
 import os
+import atexit
+import time
+import tempfile
 from dotenv import load_dotenv
+from utils.compression import init_flask_compression
+from utils.profiling import init_flask_profiling, init_mongo_profiling
+from utils.log import setup_logging, init_flask_request_id
+from utils.ratelimit import make_bucket_store, RateLimiter, rate_limited
+from repositories import get_repositories, storage_engine, DEFAULT_SITE
+from repositories.base import MEALS, MENU_FIELDS, COUNT_LIST_FIELDS, department_view, parse_fields, project
+from utils.export import MEAL_COUNT_SCHEMA, FORMATS, iter_meal_count_chunks, stream_csv_gzip, write_file
+from utils.dish_index import DishCatalog, dish_names
+from utils.bulk_import import parse_roster, import_employees
+from utils.menu_templates import TemplateExpander, menu_document, resolve_menu, validate_template
+from utils.meal_pass import verify_pass
+from utils.redemption import RedemptionDesk, LedgerNotReady, OK, ALREADY_REDEEMED, NOT_BOOKED
+from utils.bitmaps import PreferenceBitmapIndex
+from utils.waste import waste_report
+from utils.sites import PerSite
+from utils.sync import parse_since, delta
+from utils.health import HealthProber, PoolMonitor, DEGRADED, DOWN, OK as HEALTHY
 
 load_dotenv()
 
+logger = setup_logging('admin-backend')
+
 app = Flask(__name__)
 CORS(app, origins=['http://localhost:3000', 'http://localhost:5173'])
+init_flask_request_id(app)
+init_flask_compression(app, min_size=int(os.getenv('COMPRESSION_MIN_SIZE', 1024)))
+# PROFILE_TOKEN / PROFILE_SAMPLE_RATE turn on per-request profiles (utils/profiling.py)
+profiling = init_flask_profiling(app)
 
 # Configuration
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
@@ -20,12 +46,39 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-in-pr
 # Timezone setup - India Standard Time
 IST = pytz.timezone('Asia/Kolkata')
 
-# Database connection
-client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
-db = client['canteen_system']
-admins_collection = db['admins']
-menu_collection = db['menus']
-meal_counts_collection = db['meal_counts']
+# Database connection (STORAGE_ENGINE=memory runs without a mongod)
+STORAGE_ENGINE = storage_engine('mongo')
+pool_monitor = PoolMonitor()
+init_mongo_profiling(profiling)
+client = MongoClient(
+    os.getenv('MONGO_URI', 'mongodb://localhost:27017/'), event_listeners=[pool_monitor]
+) if STORAGE_ENGINE == 'mongo' else None
+db = client['canteen_system'] if client else None
+repos = get_repositories('mongo', mongo_db=db)
+
+# Admin accounts and employees are shared; menus, counts, bookings and reports
+# belong to a site, which SITE_DATABASES can route to a database of its own
+SITE_IDS = [site.strip() for site in os.getenv('SITE_IDS', DEFAULT_SITE).split(',') if site.strip()]
+
+def site_repos(site_id=None):
+    """Repositories of a site (default: the one this request is for)"""
+    return get_repositories('mongo', mongo_db=db, site_id=site_id or g.site_id)
+
+@app.before_request
+def resolve_site():
+    """Requests act on the site named by X-Site-Id (or ?site=), the default site otherwise"""
+    site_id = request.headers.get('X-Site-Id') or request.args.get('site') or DEFAULT_SITE
+    if site_id not in SITE_IDS:
+        return jsonify({'success': False, 'error': f'Unknown site: {site_id}'}), 400
+    g.site_id = site_id
+
+# Rate limiting - token buckets, in-process unless RATE_LIMIT_REDIS_URL is set
+rate_limit_store = make_bucket_store(os.getenv('RATE_LIMIT_REDIS_URL'))
+login_limiter = RateLimiter(
+    rate_limit_store, 'admin-login',
+    rate=float(os.getenv('LOGIN_RATE_PER_MINUTE', 10)) / 60,
+    capacity=int(os.getenv('LOGIN_BURST', 5))
+)
 
 def get_current_time():
     """Get current time in IST"""
@@ -45,7 +98,7 @@ def token_required(f):
                 token = token[7:]
             
             data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-            current_admin = admins_collection.find_one({'_id': data['admin_id']}, {'password': 0})
+            current_admin = repos.admins.get(data['admin_id'])
             
             if not current_admin:
                 return jsonify({'success': False, 'error': 'Admin not found'}), 401
@@ -72,7 +125,7 @@ def admin_register():
             return jsonify({'success': False, 'error': 'Missing required fields'}), 400
         
         # Check if admin already exists
-        if admins_collection.find_one({'$or': [{'username': data['username']}, {'email': data['email']}]}):
+        if repos.admins.exists(data['username'], data['email']):
             return jsonify({'success': False, 'error': 'Username or email already exists'}), 400
         
         # Create admin
@@ -83,18 +136,24 @@ def admin_register():
             'created_at': get_current_time()
         }
         
-        result = admins_collection.insert_one(admin_data)
+        admin_id = repos.admins.create(admin_data)
         
         return jsonify({
             'success': True,
             'message': 'Admin registered successfully',
-            'admin_id': str(result.inserted_id)
+            'admin_id': str(admin_id)
         }), 201
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def login_rate_key():
+    """Client address plus the account being tried"""
+    data = request.get_json(silent=True) or {}
+    return f"{request.remote_addr}:{data.get('username', '')}"
+
 @app.route('/api/admin/login', methods=['POST'])
+@rate_limited(login_limiter, login_rate_key)
 def admin_login():
     """Admin login"""
     try:
@@ -103,14 +162,14 @@ def admin_login():
         if not data.get('username') or not data.get('password'):
             return jsonify({'success': False, 'error': 'Username and password required'}), 400
         
-        admin = admins_collection.find_one({'username': data['username']})
+        admin = repos.admins.get_by_username(data['username'])
         
         if not admin or not check_password_hash(admin['password'], data['password']):
             return jsonify({'success': False, 'error': 'Invalid credentials'}), 401
         
         # Generate JWT token
         token = jwt.encode({
-            'admin_id': str(admin['_id']),
+            'admin_id': str(admin['id']),
             'username': admin['username'],
             'exp': datetime.utcnow() + timedelta(hours=24)
         }, app.config['SECRET_KEY'], algorithm='HS256')
@@ -140,6 +199,31 @@ def get_admin_profile(current_admin):
     }), 200
 
 # ============ MENU MANAGEMENT ============
+# Dishes seen on past menus, built on first use and kept current by menu writes
+dish_catalogs = PerSite(lambda site_id: DishCatalog())
+
+def get_dish_catalog():
+    dish_catalog = dish_catalogs(g.site_id)
+    if not dish_catalog.loaded:
+        with dish_catalog.lock:
+            if not dish_catalog.loaded:
+                dish_catalog.load((f"menu:{menu['date']}", dish_names(menu)) for menu in site_repos().menus.list_all())
+    return dish_catalog
+
+# Template expansions are cached; other workers pick up template edits within the TTL
+menu_templates = PerSite(lambda site_id: TemplateExpander(
+    site_repos(site_id).templates.list_all,
+    menu_document,
+    ttl=int(os.getenv('MENU_TEMPLATE_TTL', 60))
+))
+
+def refresh_menu_dishes(date):
+    """Re-index one date's dishes after a menu write"""
+    dish_catalog = dish_catalogs(g.site_id)
+    if dish_catalog.loaded:
+        menu = site_repos().menus.get(date)
+        dish_catalog.replace_source(f"menu:{date}", dish_names(menu) if menu else [])
+
 @app.route('/api/admin/menu', methods=['POST'])
 @token_required
 def create_menu(current_admin):
@@ -161,11 +245,8 @@ def create_menu(current_admin):
         }
         
         # Upsert menu (update if exists, insert if not)
-        menu_collection.update_one(
-            {'date': data.get('date')},
-            {'$set': menu_data},
-            upsert=True
-        )
+        site_repos().menus.upsert(menu_data)
+        refresh_menu_dishes(menu_data['date'])
         
         return jsonify({
             'success': True,
@@ -180,7 +261,7 @@ def create_menu(current_admin):
 def get_menu(date):
     """Get menu for a specific date (public endpoint for employees)"""
     try:
-        menu = menu_collection.find_one({'date': date}, {'_id': 0})
+        menu = resolve_menu(site_repos().menus, menu_templates(g.site_id), date)
         
         if not menu:
             return jsonify({
@@ -195,9 +276,14 @@ def get_menu(date):
 
 @app.route('/api/admin/menu/all', methods=['GET'])
 def get_all_menus():
-    """Get all menus (public endpoint)"""
+    """Get all menus (public endpoint); ?fields=date,lunch returns only those fields"""
     try:
-        menus = list(menu_collection.find({}, {'_id': 0}).sort('date', -1))
+        try:
+            fields = parse_fields(request.args.get('fields'), MENU_FIELDS)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        menus = site_repos().menus.list_all(fields)
         
         return jsonify({
             'success': True,
@@ -208,6 +294,22 @@ def get_all_menus():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/admin/menu/suggest', methods=['GET'])
+@token_required
+def suggest_dishes(current_admin):
+    """Autocomplete dish names from past menus, most served first"""
+    try:
+        query = request.args.get('q', '')
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+        
+        return jsonify({
+            'success': True,
+            'suggestions': get_dish_catalog().suggest(query, limit)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/admin/menu/<date>', methods=['PUT'])
 @token_required
 def update_menu(current_admin, date):
@@ -230,13 +332,9 @@ def update_menu(current_admin, date):
         # Remove None values
         update_data = {k: v for k, v in update_data.items() if v is not None}
         
-        result = menu_collection.update_one(
-            {'date': date},
-            {'$set': update_data}
-        )
-        
-        if result.matched_count == 0:
+        if not site_repos().menus.update(date, update_data):
             return jsonify({'success': False, 'message': 'Menu not found'}), 404
+        refresh_menu_dishes(date)
         
         return jsonify({
             'success': True,
@@ -251,10 +349,9 @@ def update_menu(current_admin, date):
 def delete_menu(current_admin, date):
     """Delete menu for a specific date"""
     try:
-        result = menu_collection.delete_one({'date': date})
-        
-        if result.deleted_count == 0:
+        if not site_repos().menus.delete(date):
             return jsonify({'success': False, 'message': 'Menu not found'}), 404
+        refresh_menu_dishes(date)
         
         return jsonify({
             'success': True,
@@ -264,24 +361,121 @@ def delete_menu(current_admin, date):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# ============ EMPLOYEE ONBOARDING ============
+@app.route('/api/admin/employees/import', methods=['POST'])
+@token_required
+def import_employee_roster(current_admin):
+    """Bulk-register employees from an uploaded CSV/JSON roster or a JSON body"""
+    try:
+        upload = request.files.get('file')
+        if upload:
+            fmt = request.args.get('format') or os.path.splitext(upload.filename or '')[1].lstrip('.').lower()
+            rows = parse_roster(upload.read().decode('utf-8-sig'), fmt)
+        else:
+            rows = parse_roster(request.get_data(as_text=True), 'json')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    try:
+        report = import_employees(
+            repos.employees, rows, get_current_time(),
+            dry_run=request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+        )
+        
+        return jsonify({'success': True, **report}), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# ============ MENU TEMPLATES ============
+@app.route('/api/admin/menu-templates', methods=['POST'])
+@token_required
+def save_menu_template(current_admin):
+    """Create or replace a recurring menu template"""
+    try:
+        data = request.json
+        
+        if not data:
+            return jsonify({'success': False, 'error': 'No data provided'}), 400
+        
+        template = {
+            'name': data.get('name'),
+            'start_date': data.get('start_date'),
+            'end_date': data.get('end_date'),
+            'weeks': data.get('weeks'),
+            'overrides': data.get('overrides') or {},
+            'updated_at': get_current_time(),
+            'updated_by': current_admin['username']
+        }
+        
+        error = validate_template(template)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
+        
+        site_repos().templates.upsert(template)
+        menu_templates(g.site_id).invalidate()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Menu template saved successfully',
+            'template': template
+        }), 201
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/admin/menu-templates', methods=['GET'])
+@token_required
+def get_menu_templates(current_admin):
+    """List recurring menu templates"""
+    try:
+        templates = site_repos().templates.list_all()
+        
+        return jsonify({
+            'success': True,
+            'count': len(templates),
+            'templates': templates
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/admin/menu-templates/<name>', methods=['DELETE'])
+@token_required
+def delete_menu_template(current_admin, name):
+    """Delete a recurring menu template"""
+    try:
+        if not site_repos().templates.delete(name):
+            return jsonify({'success': False, 'message': 'Template not found'}), 404
+        menu_templates(g.site_id).invalidate()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Menu template deleted successfully'
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # ============ MEAL COUNT TRACKING ============
 @app.route('/api/admin/meal-counts/<date>', methods=['GET'])
 @token_required
 def get_meal_counts(current_admin, date):
     """Get meal counts for a specific date"""
     try:
-        counts = meal_counts_collection.find_one({'date': date}, {'_id': 0})
+        department = request.args.get('department')
+        counts = site_repos().counts.get(date, department)
         
         if not counts:
-            return jsonify({
-                'success': True,
-                'counts': {
-                    'date': date,
-                    'breakfast_count': 0,
-                    'lunch_count': 0,
-                    'snacks_count': 0
-                }
-            }), 200
+            counts = {
+                'date': date,
+                'breakfast_count': 0,
+                'lunch_count': 0,
+                'snacks_count': 0
+            }
+        
+        if department is not None:
+            counts = department_view(counts, department)
             
         return jsonify({'success': True, 'counts': counts}), 200
         
@@ -291,20 +485,21 @@ def get_meal_counts(current_admin, date):
 @app.route('/api/admin/meal-counts/range', methods=['GET'])
 @token_required
 def get_meal_counts_range(current_admin):
-    """Get meal counts for a date range"""
+    """Get meal counts for a date range; ?fields= limits the fields of each day"""
     try:
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         
-        query = {}
-        if start_date and end_date:
-            query = {'date': {'$gte': start_date, '$lte': end_date}}
-        elif start_date:
-            query = {'date': {'$gte': start_date}}
-        elif end_date:
-            query = {'date': {'$lte': end_date}}
+        department = request.args.get('department')
+        try:
+            fields = parse_fields(request.args.get('fields'), COUNT_LIST_FIELDS)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        counts = list(meal_counts_collection.find(query, {'_id': 0}).sort('date', -1))
+        counts = site_repos().counts.list_range(start_date, end_date, department, fields)
+        if department is not None:
+            # The department slice is already all that is fetched; fields trim the view built from it
+            counts = [project(department_view(c, department), fields) for c in counts]
         
         return jsonify({
             'success': True,
@@ -315,6 +510,282 @@ def get_meal_counts_range(current_admin):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# ============ SYNC ============
+@app.route('/api/admin/sync', methods=['GET'])
+@token_required
+def sync(current_admin):
+    """Menus, menu deletions and meal counts of the site written since ?since= (the last response's rev)"""
+    try:
+        try:
+            since = parse_since(request.args.get('since'))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'since must be a non-negative revision'}), 400
+        
+        site = site_repos()
+        changes = delta(
+            since,
+            {'menus': site.menus.changed_since, 'counts': site.counts.changed_since},
+            {'deleted_menus': site.menus.deleted_since}
+        )
+        
+        return jsonify({'success': True, **changes}), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# ============ EXPORT ============
+@app.route('/api/admin/export/meal-counts', methods=['GET'])
+@token_required
+def export_meal_counts(current_admin):
+    """Stream meal counts for a date range as gzip CSV or Parquet"""
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        fmt = request.args.get('format', 'csv')
+        
+        if fmt not in FORMATS:
+            return jsonify({'success': False, 'error': f"format must be one of {', '.join(FORMATS)}"}), 400
+        
+        filename = f"meal_counts_{start_date or 'start'}_{end_date or 'end'}"
+        chunks = iter_meal_count_chunks(site_repos().counts.iter_range(start_date, end_date))
+        
+        if fmt == 'csv':
+            return Response(
+                stream_with_context(stream_csv_gzip(chunks, MEAL_COUNT_SCHEMA)),
+                mimetype='application/gzip',
+                headers={'Content-Disposition': f'attachment; filename="{filename}.csv.gz"'}
+            )
+        
+        # Parquet needs a seekable footer, so spool row groups to a temp file
+        fd, path = tempfile.mkstemp(suffix='.parquet')
+        os.close(fd)
+        try:
+            write_file(chunks, MEAL_COUNT_SCHEMA, path, fmt='parquet')
+        except Exception:
+            os.remove(path)
+            raise
+        
+        @after_this_request
+        def cleanup(response):
+            response.call_on_close(lambda: os.remove(path))
+            return response
+        
+        return send_file(path, mimetype='application/vnd.apache.parquet',
+                         as_attachment=True, download_name=f'{filename}.parquet')
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# ============ MEAL REDEMPTION ============
+# Scans are checked against an in-memory snapshot of the day's bookings;
+# redemptions are written behind in batches
+redemption_desks = PerSite(lambda site_id: RedemptionDesk(
+    site_repos(site_id).bookings, site_repos(site_id).redemptions, lambda: datetime.now(IST),
+    flush_interval=int(os.getenv('REDEMPTION_FLUSH_MS', 250)) / 1000
+).start())
+
+@atexit.register
+def stop_redemption_desks():
+    for desk in redemption_desks.values():
+        desk.stop()
+
+SCAN_STATUS_CODES = {OK: 200, ALREADY_REDEEMED: 409, NOT_BOOKED: 403}
+
+@app.route('/api/admin/redemptions/scan', methods=['POST'])
+@token_required
+def scan_meal_pass(current_admin):
+    """Redeem a meal from a QR pass token or an employee badge id"""
+    data = request.get_json(silent=True) or {}
+    meal = data.get('meal')
+    date = data.get('date') or datetime.now(IST).strftime('%Y-%m-%d')
+    
+    if data.get('token'):
+        verified = verify_pass(data['token'])
+        if not verified:
+            return jsonify({'success': False, 'status': 'invalid_token', 'error': 'Invalid meal pass'}), 400
+        employee_id, pass_site, pass_date = verified
+        if pass_site != g.site_id:
+            return jsonify({'success': False, 'status': 'wrong_site', 'error': f'Meal pass is for site {pass_site}'}), 400
+        if pass_date != date:
+            return jsonify({'success': False, 'status': 'wrong_date', 'error': f'Meal pass is for {pass_date}'}), 400
+        scan = {'employee_id': employee_id}
+    elif data.get('employee_id'):
+        scan = {'badge': data['employee_id']}
+    else:
+        return jsonify({'success': False, 'error': 'token or employee_id is required'}), 400
+    
+    try:
+        result = redemption_desks(g.site_id).redeem(date, meal, counter=data.get('counter'), **scan)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except LedgerNotReady as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    return jsonify({'success': result['status'] == OK, **result}), SCAN_STATUS_CODES.get(result['status'], 404)
+
+@app.route('/api/admin/redemptions/<date>/load', methods=['POST'])
+@token_required
+def load_redemption_ledger(current_admin, date):
+    """Snapshot (or refresh) a date's bookings ahead of service"""
+    try:
+        redemption_desks(g.site_id).load(date)
+        return jsonify({'success': True, **redemption_desks(g.site_id).summary(date)}), 200
+    except LedgerNotReady as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/admin/redemptions/<date>', methods=['GET'])
+@token_required
+def get_redemption_summary(current_admin, date):
+    """Booked vs served per meal for a date"""
+    try:
+        return jsonify({'success': True, **redemption_desks(g.site_id).summary(date)}), 200
+    except LedgerNotReady as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# ============ BOOKING QUERIES ============
+# Bitmaps per (date, meal) over dense employee ids; closed dates are persisted, one file per site
+preference_indexes = PerSite(lambda site_id: PreferenceBitmapIndex(
+    site_repos(site_id).bookings.iter_range,
+    lambda date: datetime.now(IST).replace(tzinfo=None) >= redemption_desks(site_id).deadline(date),
+    path=os.getenv('PREFERENCE_BITMAP_PATH', 'preference_bitmaps.{site}.bin').format(site=site_id),
+    ttl=int(os.getenv('PREFERENCE_BITMAP_TTL', 60))
+))
+MAX_QUERY_DAYS = 366
+
+def query_dates(start_date, end_date):
+    """Every date from start to end inclusive (ValueError when out of order or too long)"""
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date or start_date, '%Y-%m-%d')
+    days = (end - start).days + 1
+    if not 1 <= days <= MAX_QUERY_DAYS:
+        raise ValueError(f'end_date must be on or after start_date and within {MAX_QUERY_DAYS} days')
+    return [(start + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(days)]
+
+def meal_list(value, default=()):
+    meals = [meal.strip() for meal in value.split(',') if meal.strip()] if value else list(default)
+    unknown = [meal for meal in meals if meal not in MEALS]
+    if unknown:
+        raise ValueError(f"Unknown meals: {', '.join(unknown)}")
+    return meals
+
+@app.route('/api/admin/bookings/<date>/counts', methods=['GET'])
+@token_required
+def get_booking_counts(current_admin, date):
+    """Booked count per meal from the bitmap index"""
+    try:
+        return jsonify({'success': True, 'date': date, **preference_indexes(g.site_id).counts(date)}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/admin/bookings/query', methods=['GET'])
+@token_required
+def query_bookings(current_admin):
+    """Employees who booked any of ?meals= and none of ?exclude=, on all (or ?match=any) dates in the range"""
+    try:
+        dates = query_dates(request.args['start_date'], request.args.get('end_date'))
+        meals = meal_list(request.args.get('meals'), MEALS)
+        exclude = meal_list(request.args.get('exclude'))
+    except KeyError:
+        return jsonify({'success': False, 'error': 'start_date is required'}), 400
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    try:
+        preference_index = preference_indexes(g.site_id)
+        matched = preference_index.query(dates, meals, exclude, every_day=request.args.get('match', 'all') != 'any')
+        result = {'success': True, 'start_date': dates[0], 'end_date': dates[-1], 'count': len(matched)}
+        if request.args.get('list', '').lower() in ('1', 'true', 'yes'):
+            result['employee_ids'] = preference_index.employees(matched)
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/admin/bookings/index/rebuild', methods=['POST'])
+@token_required
+def rebuild_booking_index(current_admin):
+    """Rebuild the bitmap index for a date range from meal_preferences"""
+    try:
+        dates = query_dates(request.args['start_date'], request.args.get('end_date'))
+    except KeyError:
+        return jsonify({'success': False, 'error': 'start_date is required'}), 400
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    try:
+        preference_index = preference_indexes(g.site_id)
+        preference_index.rebuild(dates[0], dates[-1], set(dates))
+        return jsonify({'success': True, 'dates': len(dates), 'employees': len(preference_index.ids)}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+# ============ PRODUCTION & WASTE ============
+@app.route('/api/admin/production/<date>/<meal>', methods=['PUT'])
+@token_required
+def record_production(current_admin, date, meal):
+    """Record what the kitchen prepared (and optionally served) for one meal"""
+    data = request.get_json(silent=True) or {}
+    dishes = []
+    try:
+        if meal not in MEALS:
+            raise ValueError(f'Unknown meal: {meal}')
+        for entry in data.get('dishes', []):
+            dish = (entry.get('dish') or '').strip()
+            prepared = float(entry.get('prepared', 0))
+            served = entry.get('served')
+            served = None if served is None else float(served)
+            if not dish or prepared < 0 or (served is not None and served < 0):
+                raise ValueError('Each dish needs a name and non-negative prepared/served quantities')
+            dishes.append({'dish': dish, 'prepared': prepared, 'served': served, 'updated_at': get_current_time()})
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    try:
+        site_repos().production.replace(date, meal, dishes)
+        return jsonify({'success': True, 'date': date, 'meal': meal, 'dishes': dishes}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/admin/production/<date>', methods=['GET'])
+@token_required
+def get_production(current_admin, date):
+    """Recorded production for a date"""
+    try:
+        rows = site_repos().production.list_range(date, date)
+        return jsonify({'success': True, 'date': date, 'count': len(rows), 'production': rows}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/admin/reports/waste', methods=['GET'])
+@token_required
+def get_waste_report(current_admin):
+    """Prepared vs booked vs redeemed per meal and per dish over a date range"""
+    try:
+        dates = query_dates(request.args['start_date'], request.args.get('end_date'))
+    except KeyError:
+        return jsonify({'success': False, 'error': 'start_date is required'}), 400
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    try:
+        start_date, end_date = dates[0], dates[-1]
+        report = waste_report(
+            start_date, end_date,
+            site_repos().counts.list_range(start_date, end_date),
+            site_repos().redemptions.daily_counts(start_date, end_date),
+            site_repos().production.list_range(start_date, end_date)
+        )
+        return jsonify({'success': True, **report}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # ============ HEALTH CHECK ============
 @app.route('/', methods=['GET'])
 def home():
@@ -325,19 +796,59 @@ def home():
         'timestamp': get_current_time()
     }), 200
 
+# Probes are answered from a background prober's last results, never from the database
+DB_SLOW_MS = float(os.getenv('HEALTH_DB_SLOW_MS', 250))
+REDEMPTION_BACKLOG_DEGRADED = int(os.getenv('HEALTH_REDEMPTION_BACKLOG', 2000))
+
+def database_health():
+    started = time.perf_counter()
+    client.admin.command('ping')
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return {'status': DEGRADED if elapsed_ms > DB_SLOW_MS else HEALTHY, 'ping_ms': round(elapsed_ms, 2)}
+
+def redemption_health():
+    """The write-behind buffers of every site's redemption desk"""
+    desks = redemption_desks.values()
+    pending = sum(len(desk.pending) for desk in desks)
+    write_errors = sum(desk.stats['write_errors'] for desk in desks)
+    writers_alive = all(desk.writer is None or desk.writer.is_alive() for desk in desks)
+    return {
+        'status': DEGRADED if pending > REDEMPTION_BACKLOG_DEGRADED or not writers_alive else HEALTHY,
+        'pending_writes': pending,
+        'write_errors': write_errors
+    }
+
+health = HealthProber(interval=float(os.getenv('HEALTH_INTERVAL_SECONDS', 5)))
+if client is not None:
+    health.add('database', database_health)
+    health.add('pool', lambda: pool_monitor.check(client.options.pool_options.max_pool_size))
+health.add('redemptions', redemption_health, critical=False)
+health.start()
+
+@app.route('/live', methods=['GET'])
+def live():
+    """The process is serving and its prober is running"""
+    alive = health.live()
+    return jsonify({'status': 'alive' if alive else 'prober_stopped'}), 200 if alive else 503
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Ready unless a critical check is down or the last probe is stale; degraded still takes traffic"""
+    snapshot = health.snapshot()
+    return jsonify(snapshot), 503 if snapshot['status'] == DOWN else 200
+
 @app.route('/api/admin/health', methods=['GET'])
 def health_check():
-    try:
-        client.server_info()
-        db_status = 'connected'
-    except:
-        db_status = 'disconnected'
-    
+    snapshot = health.snapshot()
+    database = snapshot['checks'].get('database')
     return jsonify({
-        'status': 'healthy',
+        'status': 'healthy' if snapshot['status'] == HEALTHY else snapshot['status'],
         'service': 'admin-backend',
         'timestamp': get_current_time(),
-        'database': db_status
+        'database': STORAGE_ENGINE if client is None else (
+            'unknown' if database is None else 'disconnected' if database['status'] == DOWN else 'connected'
+        ),
+        'checks': snapshot['checks']
     }), 200
 
 if __name__ == '__main__':
@@ -0,0 +1,86 @@
+"""
+Bandwidth and latency impact of response compression on a large JSON
+payload shaped like /api/admin/meal-counts/range (a year of rollups with
+per-department breakdowns).
+
+    python bench_compression.py --days 365 --departments 12
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from utils.compression import CompressedBodyCache, available_encodings, compress, etag_for
+
+LINKS_MBPS = (2, 10, 100)
+
+
+def payload(days, departments):
+    rng = random.Random(42)
+    start = date(2025, 1, 1)
+    counts = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        breakdown = {
+            f"Department {d}": {
+                'breakfast_count': rng.randint(0, 80),
+                'lunch_count': rng.randint(20, 200),
+                'snacks_count': rng.randint(0, 120),
+                'total_employees': rng.randint(50, 220)
+            }
+            for d in range(departments)
+        }
+        counts.append({
+            'date': day.isoformat(),
+            'breakfast_count': sum(b['breakfast_count'] for b in breakdown.values()),
+            'lunch_count': sum(b['lunch_count'] for b in breakdown.values()),
+            'snacks_count': sum(b['snacks_count'] for b in breakdown.values()),
+            'total_employees': sum(b['total_employees'] for b in breakdown.values()),
+            'departments': breakdown,
+            'updated_at': f"{day.isoformat()} 21:00:00"
+        })
+    return json.dumps({'success': True, 'count': len(counts), 'counts': counts}).encode('utf-8')
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response compression benchmark")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--departments", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    body = payload(args.days, args.departments)
+    _, etag_seconds = timed(lambda: etag_for(body), args.repeat)
+    print(f"Payload: {len(body) / 1024:.1f} KiB, ETag {etag_seconds * 1000:.2f} ms")
+    print(f"{'encoding':<10}{'size KiB':>10}{'ratio':>8}{'encode ms':>11}{'cached ms':>11}"
+          + ''.join(f"{f'{mbps} Mbps ms':>14}" for mbps in LINKS_MBPS))
+
+    cache = CompressedBodyCache()
+    for encoding in ('identity',) + available_encodings():
+        if encoding == 'identity':
+            data, encode_seconds, cached_seconds = body, 0.0, 0.0
+        else:
+            data, encode_seconds = timed(lambda: compress(body, encoding), args.repeat)
+            etag = etag_for(body)
+            cache.get_or_compress(etag, encoding, body)
+            _, cached_seconds = timed(lambda: cache.get_or_compress(etag, encoding, body), args.repeat)
+
+        # Time to first full body on the wire: encode (or cache hit) plus transfer
+        transfer = ''.join(
+            f"{(cached_seconds + len(data) * 8 / (mbps * 1e6)) * 1000:>14.1f}"
+            for mbps in LINKS_MBPS
+        )
+        print(f"{encoding:<10}{len(data) / 1024:>10.1f}{len(body) / len(data):>8.1f}"
+              f"{encode_seconds * 1000:>11.2f}{cached_seconds * 1000:>11.3f}{transfer}")
+
+
+if __name__ == "__main__":
+    main()
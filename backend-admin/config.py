@@ -4,6 +4,9 @@ class Config:
     # Database
     DATABASE_PATH = "karmic_canteen.db"
     
+    # Archival - closed dates older than this move to monthly archive tables
+    ARCHIVE_HORIZON_DAYS = int(os.getenv("ARCHIVE_HORIZON_DAYS", 90))
+    
     # JWT Secret Key
     SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
     ALGORITHM = "HS256"
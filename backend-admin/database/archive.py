@@ -0,0 +1,124 @@
+import os
+import sqlite3
+import sys
+from datetime import date as date_cls, datetime, timedelta
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db import get_db
+
+try:
+    from config import Config
+    ARCHIVE_HORIZON_DAYS = Config.ARCHIVE_HORIZON_DAYS
+except (ImportError, AttributeError):
+    ARCHIVE_HORIZON_DAYS = 90
+
+SELECTION_COLUMNS = "id, employee_id, menu_item_id, date, meal_type, status, created_at"
+
+
+def archive_table_name(month):
+    """employee_selections_archive_YYYY_MM for a YYYY-MM month"""
+    return f"employee_selections_archive_{month.replace('-', '_')}"
+
+
+def archive_selections(conn, horizon_days=ARCHIVE_HORIZON_DAYS, today=None):
+    """
+    Move employee_selections rows older than the horizon into per-month
+    archive tables. Only closed dates (before today) are ever moved, and
+    each month is moved in its own transaction.
+    """
+    today = today or date_cls.today()
+    cutoff = (today - timedelta(days=max(horizon_days, 1))).isoformat()
+    cursor = conn.cursor()
+
+    cursor.execute(
+        "SELECT DISTINCT substr(date, 1, 7) FROM employee_selections WHERE date < ? ORDER BY 1",
+        (cutoff,)
+    )
+    months = [row[0] for row in cursor.fetchall()]
+
+    archived = []
+    for month in months:
+        table = archive_table_name(month)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY,
+                employee_id INTEGER NOT NULL,
+                menu_item_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                meal_type TEXT NOT NULL,
+                status TEXT DEFAULT 'confirmed',
+                created_at TIMESTAMP
+            )
+        """)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_date ON {table} (date, meal_type, status)")
+
+        params = (cutoff, f"{month}%")
+        cursor.execute(
+            f"INSERT OR REPLACE INTO {table} ({SELECTION_COLUMNS}) "
+            f"SELECT {SELECTION_COLUMNS} FROM employee_selections WHERE date < ? AND date LIKE ?",
+            params
+        )
+        moved = cursor.rowcount
+        cursor.execute("DELETE FROM employee_selections WHERE date < ? AND date LIKE ?", params)
+
+        cursor.execute(f"SELECT COUNT(*), MIN(date), MAX(date) FROM {table}")
+        row_count, first_date, last_date = cursor.fetchone()
+        cursor.execute(
+            """
+            INSERT INTO archive_partitions (month, table_name, first_date, last_date, row_count, archived_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(month) DO UPDATE SET
+                first_date = excluded.first_date,
+                last_date = excluded.last_date,
+                row_count = excluded.row_count,
+                archived_at = excluded.archived_at
+            """,
+            (month, table, first_date, last_date, row_count, datetime.utcnow().isoformat())
+        )
+        conn.commit()
+        archived.append({'month': month, 'table': table, 'moved': moved})
+
+    return archived
+
+
+def selection_source(conn, start_date=None, end_date=None):
+    """
+    FROM-clause source for employee_selections covering [start_date, end_date].
+    Archive tables are only unioned in when the range overlaps them, so
+    queries on recent dates keep hitting the live table alone.
+    """
+    query = "SELECT table_name FROM archive_partitions WHERE 1=1"
+    params = []
+
+    if start_date:
+        query += " AND last_date >= ?"
+        params.append(start_date)
+
+    if end_date:
+        query += " AND first_date <= ?"
+        params.append(end_date)
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+    except sqlite3.OperationalError:
+        # Database predates archival (no catalog table yet)
+        return "employee_selections"
+    tables = [row[0] for row in cursor.fetchall()]
+
+    if not tables:
+        return "employee_selections"
+
+    union = " UNION ALL ".join(
+        f"SELECT {SELECTION_COLUMNS} FROM {table}" for table in ["employee_selections"] + tables
+    )
+    return f"({union})"
+
+
+if __name__ == "__main__":
+    conn = get_db()
+    for entry in archive_selections(conn):
+        print(f"{entry['month']}: moved {entry['moved']} rows into {entry['table']}")
+    conn.close()
@@ -1,4 +1,5 @@
 import sqlite3
+import logging
 import os
 import sys
 
@@ -11,8 +12,15 @@ try:
 except ImportError:
     DATABASE_PATH = "karmic_canteen.db"
 
+from utils.profiling import ProfilingConfig, sqlite_connection_factory
+
+logger = logging.getLogger(__name__)
+
+# Statements are timed for request profiles only when profiling is configured
+CONNECTION_FACTORY = sqlite_connection_factory(ProfilingConfig.from_env())
+
 def get_db():
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = sqlite3.connect(DATABASE_PATH, factory=CONNECTION_FACTORY)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -58,9 +66,65 @@ def init_db():
         )
     """)
     
+    # Per-serving ingredient quantities, keyed by dish name so one recipe covers every date's menu item
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS recipe_ingredients (
+            dish TEXT NOT NULL COLLATE NOCASE,
+            ingredient TEXT NOT NULL,
+            unit TEXT NOT NULL,
+            quantity REAL NOT NULL,
+            PRIMARY KEY (dish, ingredient)
+        )
+    """)
+    
+    # Catalog of monthly employee_selections archive tables
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS archive_partitions (
+            month TEXT PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            first_date TEXT,
+            last_date TEXT,
+            row_count INTEGER DEFAULT 0,
+            archived_at TIMESTAMP
+        )
+    """)
+    
+    # Change log of menu_items for the employee store's puller. Triggers stamp every write
+    # with a monotonic seq; SQLite has one writer at a time, so seqs commit in order.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS menu_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_id INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_menu_changes_item
+        ON menu_changes (item_id, seq)
+    """)
+    for event, op, row in (("INSERT", "upsert", "NEW"), ("UPDATE", "upsert", "NEW"), ("DELETE", "delete", "OLD")):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS menu_items_log_{event.lower()}
+            AFTER {event} ON menu_items
+            BEGIN
+                INSERT INTO menu_changes (item_id, op) VALUES ({row}.id, '{op}');
+            END
+        """)
+    # Items that predate the log get one entry each so a fresh puller sees them
+    if cursor.execute("SELECT 1 FROM menu_changes LIMIT 1").fetchone() is None:
+        cursor.execute("INSERT INTO menu_changes (item_id, op) SELECT id, 'upsert' FROM menu_items ORDER BY id")
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_employee_selections_date
+        ON employee_selections (date, meal_type, status)
+    """)
+    
     conn.commit()
     conn.close()
-    print("Database initialized successfully!")
+    logger.info("Database initialized", extra={"event": "db.initialized", "path": DATABASE_PATH})
 
 if __name__ == "__main__":
+    from utils.log import setup_logging
+    setup_logging("admin-db")
     init_db()
\ No newline at end of file
@@ -0,0 +1,48 @@
+import argparse
+import os
+import time
+
+from repositories import get_repositories
+from utils.export import (
+    CHUNK_SIZE, FORMATS, PARTITIONS, SELECTION_SCHEMA, MEAL_COUNT_SCHEMA,
+    iter_selection_chunks, iter_meal_count_chunks, export_partitioned
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export meal history as partitioned Parquet / gzip CSV")
+    parser.add_argument("dataset", choices=["selections", "meal-counts"])
+    parser.add_argument("--start-date", help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--end-date", help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--partition", choices=sorted(PARTITIONS), default="month")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--out", default="exports")
+    args = parser.parse_args()
+
+    started = time.time()
+    out_dir = os.path.join(args.out, args.dataset)
+
+    if args.dataset == "selections":
+        repos = get_repositories("sql")
+        chunks = repos.selections.iter_chunks(args.start_date, args.end_date, args.chunk_size)
+        written = export_partitioned(chunks, SELECTION_SCHEMA, out_dir, args.format, args.partition)
+    else:
+        from pymongo import MongoClient
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+        repos = get_repositories("mongo", mongo_db=client['canteen_system'])
+        docs = repos.counts.iter_range(args.start_date, args.end_date, args.chunk_size)
+        chunks = iter_meal_count_chunks(docs, args.chunk_size)
+        written = export_partitioned(chunks, MEAL_COUNT_SCHEMA, out_dir, args.format, args.partition)
+
+    for part in written:
+        print(f"{part['path']}: {part['rows']} rows")
+    print(f"Exported {sum(p['rows'] for p in written)} rows in {len(written)} "
+          f"partition(s) in {time.time() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
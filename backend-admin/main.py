@@ -1,8 +1,19 @@
 from fastapi import FastAPI
+import os
 import uvicorn
 from flask_cors import CORS
+from utils.compression import CompressionMiddleware
+from utils.log import setup_logging, fastapi_request_id_middleware
+from utils.profiling import ProfilingConfig, ProfilingMiddleware
+
+logger = setup_logging("admin-api")
 
 app = FastAPI()
+app.middleware("http")(fastapi_request_id_middleware)
+app.add_middleware(CompressionMiddleware, min_size=int(os.getenv("COMPRESSION_MIN_SIZE", 1024)))
+profiling = ProfilingConfig.from_env()
+if profiling.enabled:
+    app.add_middleware(ProfilingMiddleware, config=profiling)
 
 @app.get("/")
 def root():
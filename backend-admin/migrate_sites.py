@@ -0,0 +1,56 @@
+"""
+One-off migration to multi-site storage. Documents written before sites
+existed are stamped with the default site, the old site-less unique index
+on meal_redemptions is dropped, and every configured site gets its
+site-prefixed indexes (in whichever database SITE_DATABASES routes it to).
+
+    python migrate_sites.py                  # SITE_IDS from the environment
+    python migrate_sites.py --sites main,blr --dry-run
+"""
+import argparse
+import json
+import os
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+from repositories import get_repositories, DEFAULT_SITE
+from repositories.mongo import SITE_COLLECTIONS
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Backfill site ids and build per-site indexes")
+    parser.add_argument("--sites", default=os.getenv('SITE_IDS', DEFAULT_SITE), help="comma-separated site ids")
+    parser.add_argument("--mongo-uri", default=os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument("--dry-run", action="store_true", help="report what would change")
+    args = parser.parse_args()
+
+    db = MongoClient(args.mongo_uri)['canteen_system']
+    missing = {'site_id': {'$exists': False}}
+    summary = {'backfilled': {}, 'dropped_indexes': [], 'indexed_sites': []}
+
+    for collection in SITE_COLLECTIONS + ('employees',):
+        if args.dry_run:
+            count = db[collection].count_documents(missing)
+        else:
+            count = db[collection].update_many(missing, {'$set': {'site_id': DEFAULT_SITE}}).modified_count
+        summary['backfilled'][collection] = count
+
+    # The pre-site index would reject the same employee redeeming at two sites
+    for name, info in db['meal_redemptions'].index_information().items():
+        if info.get('unique') and info['key'][0][0] != 'site_id':
+            summary['dropped_indexes'].append(name)
+            if not args.dry_run:
+                db['meal_redemptions'].drop_index(name)
+
+    if not args.dry_run:
+        for site_id in [site.strip() for site in args.sites.split(',') if site.strip()]:
+            get_repositories('mongo', mongo_db=db, site_id=site_id).ensure_indexes()
+            summary['indexed_sites'].append(site_id)
+
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class MenuItemCreate(BaseModel):
     name: str
@@ -20,4 +20,13 @@ class MenuItemResponse(BaseModel):
     category: str
     meal_type: str
     date: str
-    is_available: bool
\ No newline at end of file
+    is_available: bool
+
+class RecipeIngredient(BaseModel):
+    ingredient: str
+    unit: str  # kg, l, pcs, ...
+    quantity: float  # per serving
+
+class Recipe(BaseModel):
+    dish: str
+    ingredients: List[RecipeIngredient]
\ No newline at end of file
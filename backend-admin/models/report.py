@@ -14,4 +14,15 @@ class DailyReport(BaseModel):
 class HistoricalData(BaseModel):
     date: str
     total_meals: int
-    breakdown: Dict[str, int]
\ No newline at end of file
+    breakdown: Dict[str, int]
+
+class IngredientNeed(BaseModel):
+    ingredient: str
+    unit: str
+    quantity: float
+
+class ProcurementPlan(BaseModel):
+    start_date: str
+    end_date: str
+    ingredients: List[IngredientNeed]
+    missing_recipes: Dict[str, int]
\ No newline at end of file
@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+
+ENGINES = ('mongo', 'sql', 'memory')
+DEFAULT_SITE = os.getenv('DEFAULT_SITE_ID', 'main')
+
+_instances = {}
+_clients = {}
+_lock = threading.Lock()
+
+
+def site_databases():
+    """{site_id: Mongo URI} from SITE_DATABASES; sites not listed share the default database"""
+    return json.loads(os.getenv('SITE_DATABASES') or '{}')
+
+
+def _site_db(site_id, default_db):
+    """The database a site is routed to (one client per URI, shared by the sites on it)"""
+    uri = site_databases().get(site_id)
+    if not uri:
+        return default_db
+
+    from pymongo.uri_parser import parse_uri
+    return _client(uri)[parse_uri(uri).get('database') or default_db.name]
+
+
+def _client(uri):
+    from pymongo import MongoClient
+
+    if uri not in _clients:
+        _clients[uri] = MongoClient(uri)
+    return _clients[uri]
+
+
+def _read_db(site_db, routed):
+    """
+    The database report and menu reads go to. REPORTING_MONGO_URI points sites
+    in the default database at a separate reporting node; otherwise reads use
+    MONGO_READ_PREFERENCE (default primary) on the site's own deployment, with
+    staleness bounded by MONGO_MAX_STALENESS_SECONDS (at least 90, -1 for none).
+    """
+    uri = os.getenv('REPORTING_MONGO_URI')
+    if uri and not routed:
+        from pymongo.uri_parser import parse_uri
+        return _client(uri)[parse_uri(uri).get('database') or site_db.name]
+
+    mode = os.getenv('MONGO_READ_PREFERENCE', 'primary')
+    if mode == 'primary':
+        return site_db
+
+    from pymongo import read_preferences
+
+    modes = {
+        'primaryPreferred': read_preferences.PrimaryPreferred,
+        'secondary': read_preferences.Secondary,
+        'secondaryPreferred': read_preferences.SecondaryPreferred,
+        'nearest': read_preferences.Nearest
+    }
+    if mode not in modes:
+        raise ValueError(f"Unknown MONGO_READ_PREFERENCE: {mode}")
+    staleness = int(os.getenv('MONGO_MAX_STALENESS_SECONDS', 90))
+    return site_db.with_options(read_preference=modes[mode](max_staleness=staleness))
+
+
+def storage_engine(default_engine):
+    """
+    The engine a consumer runs on: its own default, unless STORAGE_ENGINE=memory
+    points every consumer at the shared in-memory store. Other values are
+    not honoured process-wide, since the Flask apps, the SQL services and the
+    routers each default to a different engine.
+    """
+    return 'memory' if os.getenv('STORAGE_ENGINE') == 'memory' else default_engine
+
+
+def get_repositories(default_engine, mongo_db=None, site_id=None):
+    """
+    Repositories for the consumer's storage_engine and one site. The Flask
+    app defaults to 'mongo' and the FastAPI routers to 'sql'; STORAGE_ENGINE=memory
+    points both at one shared in-memory store. Admin and employee accounts
+    are shared by every site; menus, counts, bookings and reports belong to
+    the site, which SITE_DATABASES can route to its own database.
+    """
+    engine = storage_engine(default_engine)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown storage engine: {engine}")
+    site_id = site_id or DEFAULT_SITE
+
+    if engine == 'sql':
+        site_id = DEFAULT_SITE  # the sqlite stack is single-site
+
+    with _lock:
+        key = (engine, site_id)
+        if key not in _instances:
+            if engine == 'memory':
+                from repositories.memory import MemoryRepositories
+                default = _instances.get((engine, DEFAULT_SITE))
+                if default is None and site_id != DEFAULT_SITE:
+                    default = _instances[(engine, DEFAULT_SITE)] = MemoryRepositories(DEFAULT_SITE)
+                _instances[key] = MemoryRepositories(site_id, shared=default)
+            elif engine == 'mongo':
+                from repositories.mongo import MongoRepositories
+                site_db = _site_db(site_id, mongo_db)
+                read_db = _read_db(site_db, routed=site_db is not mongo_db)
+                _instances[key] = MongoRepositories(mongo_db, site_id, site_db, read_db)
+            else:
+                from repositories.sql import SqlRepositories
+                _instances[key] = SqlRepositories()
+        return _instances[key]
@@ -0,0 +1,283 @@
+"""Storage interfaces implemented by the Mongo, SQL and in-memory engines"""
+import threading
+import time
+
+MENU_ITEM_COLUMNS = ("name", "category", "meal_type", "date", "is_available")
+MEALS = ('breakfast', 'lunch', 'snacks')
+COUNT_FIELDS = ('breakfast_count', 'lunch_count', 'snacks_count', 'total_employees')
+
+# What ?fields= may select on each list endpoint
+MENU_FIELDS = ('date', 'day', *MEALS, 'template', 'updated_at', 'updated_by')
+COUNT_LIST_FIELDS = ('date', 'department', *COUNT_FIELDS, 'departments', 'updated_at')
+
+
+def department_key(name):
+    """A department as a meal_counts.departments field name (matches the employee backend)"""
+    name = (name or '').strip().replace('.', '_').lstrip('$')
+    return name or 'Unassigned'
+
+
+def department_view(counts, department):
+    """One department's slice of a meal_counts document, shaped like the company-wide counts"""
+    slice_ = (counts.get('departments') or {}).get(department_key(department), {})
+    view = {'date': counts['date'], 'department': department}
+    view.update({field: slice_.get(field, 0) for field in COUNT_FIELDS})
+    if 'updated_at' in counts:
+        view['updated_at'] = counts['updated_at']
+    return view
+
+
+_revision_lock = threading.Lock()
+_last_revision = 0
+
+
+def next_revision():
+    """
+    Revision stamped on menus, preferences, counts and tombstones: microseconds
+    since the epoch, bumped past the last one this process handed out so it
+    never repeats or goes backwards. Workers share the wall clock, so their
+    revisions interleave in time order to within clock skew (see utils.sync).
+    """
+    global _last_revision
+    with _revision_lock:
+        _last_revision = max(_last_revision + 1, time.time_ns() // 1000)
+        return _last_revision
+
+
+def parse_fields(value, allowed):
+    """?fields=a,b as a tuple of field names (None when absent: every field); unknown names raise ValueError"""
+    if not value:
+        return None
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(allowed)})")
+    return fields or None
+
+
+def project(doc, fields):
+    """Only `fields` of a document, for engines with nothing to push the projection into"""
+    if fields is None:
+        return doc
+    return {field: doc[field] for field in fields if field in doc}
+
+
+class AdminRepository:
+    """Admin accounts. Rows carry their id under 'id'."""
+
+    def get(self, admin_id):
+        """Admin by id, without the password hash"""
+        raise NotImplementedError
+
+    def get_by_username(self, username):
+        """Admin by username, including the password hash"""
+        raise NotImplementedError
+
+    def exists(self, username, email):
+        raise NotImplementedError
+
+    def create(self, admin):
+        """Store a new admin and return its id"""
+        raise NotImplementedError
+
+
+class EmployeeRepository:
+    """Employee accounts in the shared database, for bulk onboarding"""
+
+    def existing(self, employee_ids, emails):
+        """(badge ids, emails) from the given lists that are already registered"""
+        raise NotImplementedError
+
+    def create_many(self, employees):
+        """Insert a batch; returns [(index in batch, error)] for rejected rows"""
+        raise NotImplementedError
+
+
+class MenuRepository:
+    """Menus stored as one document per date (breakfast/lunch/snacks lists)"""
+
+    def get(self, date):
+        raise NotImplementedError
+
+    def list_all(self, fields=None):
+        """Every menu, newest date first (only `fields` when given)"""
+        raise NotImplementedError
+
+    def list_range(self, start_date, end_date, fields=None):
+        """Menus between two dates (inclusive), oldest first (only `fields` when given)"""
+        raise NotImplementedError
+
+    def upsert(self, menu):
+        """Insert or update the menu for menu['date']"""
+        raise NotImplementedError
+
+    def update(self, date, fields):
+        """Update an existing menu; False if there is none for the date"""
+        raise NotImplementedError
+
+    def delete(self, date):
+        """Delete the menu for a date, leaving a tombstone; False if there was none"""
+        raise NotImplementedError
+
+    def changed_since(self, rev):
+        """Menus written after a revision (every menu for 0), oldest revision first"""
+        raise NotImplementedError
+
+    def deleted_since(self, rev):
+        """Tombstones [{'date', 'rev'}] of menus deleted after a revision"""
+        raise NotImplementedError
+
+
+class TemplateRepository:
+    """Recurring menu templates (utils.menu_templates), keyed by name"""
+
+    def list_all(self):
+        raise NotImplementedError
+
+    def get(self, name):
+        raise NotImplementedError
+
+    def upsert(self, template):
+        """Insert or replace the template called template['name']"""
+        raise NotImplementedError
+
+    def delete(self, name):
+        """Delete a template; False if there was none"""
+        raise NotImplementedError
+
+
+class CountRepository:
+    """
+    Per-date meal count rollups (written by the employee backend), with a
+    per-department breakdown under 'departments'. Passing a department lets
+    an engine fetch only that department's slice.
+    """
+
+    def get(self, date, department=None):
+        raise NotImplementedError
+
+    def list_range(self, start_date=None, end_date=None, department=None, fields=None):
+        """Rollups in an optional date range, newest first (only `fields` when given and no department)"""
+        raise NotImplementedError
+
+    def changed_since(self, rev):
+        """Rollups written after a revision (every rollup for 0)"""
+        raise NotImplementedError
+
+    def iter_range(self, start_date=None, end_date=None, batch_size=10000):
+        """Stream rollups oldest first without materialising the range"""
+        raise NotImplementedError
+
+
+class BookingRepository:
+    """Read side of employee meal_preferences, for the serving counter"""
+
+    def booked(self, date):
+        """Rows {'employee_id', 'badge', 'name', 'breakfast', 'lunch', 'snacks'} for employees who booked a meal"""
+        raise NotImplementedError
+
+    def iter_range(self, start_date, end_date, batch_size=10000):
+        """Stream preference rows {'date', 'employee_id', 'breakfast', 'lunch', 'snacks'} for a date range"""
+        raise NotImplementedError
+
+
+class RedemptionRepository:
+    """Meals handed out at the counter, one row per (date, meal, employee)"""
+
+    def list_for_date(self, date):
+        """Rows {'date', 'meal', 'employee_id', 'redeemed_at', 'counter'}"""
+        raise NotImplementedError
+
+    def insert_many(self, redemptions):
+        """Store a batch; returns how many were already recorded (redeemed elsewhere)"""
+        raise NotImplementedError
+
+    def daily_counts(self, start_date, end_date):
+        """[(date, meal, redeemed count)] for a date range"""
+        raise NotImplementedError
+
+
+class ProductionRepository:
+    """Quantities the kitchen prepared (and optionally served) per date, meal and dish"""
+
+    def replace(self, date, meal, dishes):
+        """Set a meal's dishes ({'dish', 'prepared', 'served'}) for a date, dropping ones not listed"""
+        raise NotImplementedError
+
+    def list_range(self, start_date, end_date):
+        """Rows {'date', 'meal', 'dish', 'prepared', 'served', 'updated_at'} ordered by date"""
+        raise NotImplementedError
+
+
+class MenuItemRepository:
+    """Individual menu items (SQL menu model)"""
+
+    def create(self, item):
+        """Insert an item and return it with its id"""
+        raise NotImplementedError
+
+    def get(self, item_id):
+        raise NotImplementedError
+
+    def list(self, date=None, meal_type=None):
+        """Items filtered by date and meal type, newest date first"""
+        raise NotImplementedError
+
+    def update(self, item_id, fields):
+        """Apply the given column values; returns the item or None if missing"""
+        raise NotImplementedError
+
+    def delete(self, item_id):
+        raise NotImplementedError
+
+    def changes_since(self, seq, limit=500):
+        """
+        {'changes': [{'seq', 'op', 'item', 'changed_at'}], 'latest': seq} for
+        writes after seq, oldest first. Only an item's newest change is
+        listed, carrying the item as it is now ({'id'} alone for a delete).
+        """
+        raise NotImplementedError
+
+
+class RecipeRepository:
+    """Per-serving ingredient quantities for each dish, matched to menu items by name"""
+
+    def list_all(self):
+        """[{'dish', 'ingredient', 'unit', 'quantity'}] for every recipe"""
+        raise NotImplementedError
+
+    def replace(self, dish, ingredients):
+        """Set a dish's ingredient list (each {'ingredient', 'unit', 'quantity'})"""
+        raise NotImplementedError
+
+    def delete(self, dish):
+        """Drop a dish's recipe; False if there was none"""
+        raise NotImplementedError
+
+
+class SelectionRepository:
+    """Read side of employee_selections used by the reports"""
+
+    def meal_types(self, date):
+        """Meal types with confirmed selections on a date"""
+        raise NotImplementedError
+
+    def item_counts(self, date, meal_type):
+        """[(menu item name, confirmed count)] for a date and meal type"""
+        raise NotImplementedError
+
+    def date_meal_counts(self, start_date, end_date):
+        """[(date, meal_type, confirmed count)] ordered by date"""
+        raise NotImplementedError
+
+    def dish_counts(self, start_date, end_date):
+        """[(date, menu item name, confirmed count)] for a date range"""
+        raise NotImplementedError
+
+    def meal_type_counts(self, date):
+        """{meal_type: confirmed count} for a date"""
+        raise NotImplementedError
+
+    def iter_chunks(self, start_date=None, end_date=None, chunk_size=10000):
+        """Stream selection rows (utils.export.SELECTION_SCHEMA order) by date"""
+        raise NotImplementedError
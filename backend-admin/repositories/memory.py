@@ -0,0 +1,470 @@
+"""
+Indexed in-memory engine for tests and benchmarks. Lookups are dict hits
+or bisects over sorted date lists; selections are indexed by date so
+report aggregations only touch the requested days.
+"""
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from datetime import datetime, timezone
+import itertools
+import threading
+from repositories import DEFAULT_SITE
+from repositories.base import (
+    AdminRepository, EmployeeRepository, MenuRepository, TemplateRepository, CountRepository,
+    BookingRepository, RedemptionRepository, ProductionRepository, MenuItemRepository, RecipeRepository, SelectionRepository,
+    MEALS, MENU_ITEM_COLUMNS, project, next_revision
+)
+
+
+class _DateIndexed:
+    """Documents keyed by 'YYYY-MM-DD' with a sorted date list for range scans"""
+
+    def __init__(self):
+        self.docs = {}
+        self.dates = []
+        self.lock = threading.Lock()
+
+    def _put(self, date, doc):
+        if date not in self.docs:
+            insort(self.dates, date)
+        self.docs[date] = doc
+
+    def _remove(self, date):
+        if self.docs.pop(date, None) is None:
+            return False
+        del self.dates[bisect_left(self.dates, date)]
+        return True
+
+    def _range(self, start_date=None, end_date=None):
+        lo = bisect_left(self.dates, start_date) if start_date else 0
+        hi = bisect_right(self.dates, end_date) if end_date else len(self.dates)
+        return self.dates[lo:hi]
+
+    def _changed(self, rev):
+        with self.lock:
+            docs = [dict(doc) for doc in self.docs.values() if doc.get('rev', 0) > rev or not rev]
+        return sorted(docs, key=lambda doc: doc.get('rev', 0))
+
+
+class MemoryAdminRepository(AdminRepository):
+
+    def __init__(self):
+        self.docs = {}
+        self.by_username = {}
+        self.emails = set()
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def get(self, admin_id):
+        try:
+            doc = self.docs.get(int(admin_id))
+        except (TypeError, ValueError):
+            return None
+        if doc is None:
+            return None
+        doc = dict(doc)
+        doc.pop('password', None)
+        return doc
+
+    def get_by_username(self, username):
+        admin_id = self.by_username.get(username)
+        return dict(self.docs[admin_id]) if admin_id else None
+
+    def exists(self, username, email):
+        return username in self.by_username or email in self.emails
+
+    def create(self, admin):
+        with self.lock:
+            admin_id = next(self.ids)
+            self.docs[admin_id] = dict(admin, id=admin_id)
+            self.by_username[admin['username']] = admin_id
+            self.emails.add(admin['email'])
+        return admin_id
+
+
+class MemoryEmployeeRepository(EmployeeRepository):
+
+    def __init__(self):
+        self.docs = []
+        self.employee_ids = set()
+        self.emails = set()
+        self.lock = threading.Lock()
+
+    def existing(self, employee_ids, emails):
+        return self.employee_ids.intersection(employee_ids), self.emails.intersection(emails)
+
+    def create_many(self, employees):
+        rejected = []
+        with self.lock:
+            for index, employee in enumerate(employees):
+                if employee['employee_id'] in self.employee_ids or employee['email'] in self.emails:
+                    rejected.append((index, 'Employee ID or email already exists'))
+                    continue
+                self.docs.append(dict(employee))
+                self.employee_ids.add(employee['employee_id'])
+                self.emails.add(employee['email'])
+        return rejected
+
+
+class MemoryMenuRepository(_DateIndexed, MenuRepository):
+
+    def __init__(self):
+        super().__init__()
+        self.tombstones = {}
+
+    def get(self, date):
+        doc = self.docs.get(date)
+        return dict(doc) if doc else None
+
+    def list_all(self, fields=None):
+        with self.lock:
+            return [dict(project(self.docs[date], fields)) for date in reversed(self.dates)]
+
+    def list_range(self, start_date, end_date, fields=None):
+        with self.lock:
+            return [dict(project(self.docs[date], fields)) for date in self._range(start_date, end_date)]
+
+    def upsert(self, menu):
+        with self.lock:
+            self._put(menu['date'], {**self.docs.get(menu['date'], {}), **menu, 'rev': next_revision()})
+            self.tombstones.pop(menu['date'], None)
+
+    def update(self, date, fields):
+        with self.lock:
+            if date not in self.docs:
+                return False
+            self.docs[date] = {**self.docs[date], **fields, 'rev': next_revision()}
+            return True
+
+    def delete(self, date):
+        with self.lock:
+            if not self._remove(date):
+                return False
+            self.tombstones[date] = next_revision()
+            return True
+
+    def changed_since(self, rev):
+        return self._changed(rev)
+
+    def deleted_since(self, rev):
+        with self.lock:
+            deleted = [{'date': date, 'rev': deleted_rev} for date, deleted_rev in self.tombstones.items() if deleted_rev > rev]
+        return sorted(deleted, key=lambda doc: doc['rev'])
+
+
+class MemoryTemplateRepository(TemplateRepository):
+
+    def __init__(self):
+        self.docs = {}
+        self.lock = threading.Lock()
+
+    def list_all(self):
+        with self.lock:
+            return sorted((dict(doc) for doc in self.docs.values()), key=lambda doc: doc['start_date'])
+
+    def get(self, name):
+        doc = self.docs.get(name)
+        return dict(doc) if doc else None
+
+    def upsert(self, template):
+        with self.lock:
+            self.docs[template['name']] = dict(template)
+
+    def delete(self, name):
+        with self.lock:
+            return self.docs.pop(name, None) is not None
+
+
+class MemoryCountRepository(_DateIndexed, CountRepository):
+
+    def put(self, counts):
+        """Seed a rollup (the employee backend owns writes)"""
+        with self.lock:
+            self._put(counts['date'], dict(counts, rev=next_revision()))
+
+    def get(self, date, department=None):
+        doc = self.docs.get(date)
+        return dict(doc) if doc else None
+
+    def list_range(self, start_date=None, end_date=None, department=None, fields=None):
+        fields = None if department is not None else fields
+        with self.lock:
+            return [dict(project(self.docs[date], fields)) for date in reversed(self._range(start_date, end_date))]
+
+    def changed_since(self, rev):
+        return self._changed(rev)
+
+    def iter_range(self, start_date=None, end_date=None, batch_size=10000):
+        with self.lock:
+            dates = self._range(start_date, end_date)
+        for date in dates:
+            doc = self.docs.get(date)
+            if doc:
+                yield dict(doc)
+
+
+class MemoryBookingRepository(_DateIndexed, BookingRepository):
+    """docs[date] maps employee id to that day's booking"""
+
+    def put(self, date, booking):
+        """Seed one employee's booking for a date"""
+        with self.lock:
+            if date not in self.docs:
+                self._put(date, {})
+            self.docs[date][booking['employee_id']] = dict(booking)
+
+    def booked(self, date):
+        return [
+            {key: booking.get(key) for key in ('employee_id', 'badge', 'name') + MEALS}
+            for booking in self.docs.get(date, {}).values()
+            if any(booking.get(meal) for meal in MEALS)
+        ]
+
+    def iter_range(self, start_date, end_date, batch_size=10000):
+        with self.lock:
+            dates = self._range(start_date, end_date)
+        for date in dates:
+            for booking in list(self.docs[date].values()):
+                yield dict({meal: bool(booking.get(meal)) for meal in MEALS},
+                           date=date, employee_id=booking['employee_id'])
+
+
+class MemoryRedemptionRepository(RedemptionRepository):
+
+    def __init__(self):
+        self.rows = {}  # (date, meal, employee_id) -> redemption
+        self.lock = threading.Lock()
+
+    def list_for_date(self, date):
+        with self.lock:
+            return [dict(row) for key, row in self.rows.items() if key[0] == date]
+
+    def insert_many(self, redemptions):
+        duplicates = 0
+        with self.lock:
+            for redemption in redemptions:
+                key = (redemption['date'], redemption['meal'], redemption['employee_id'])
+                if key in self.rows:
+                    duplicates += 1
+                else:
+                    self.rows[key] = dict(redemption)
+        return duplicates
+
+    def daily_counts(self, start_date, end_date):
+        with self.lock:
+            counts = Counter(key[:2] for key in self.rows if start_date <= key[0] <= end_date)
+        return [(date, meal, count) for (date, meal), count in counts.items()]
+
+
+class MemoryProductionRepository(_DateIndexed, ProductionRepository):
+    """docs[date] maps meal to that meal's dish rows"""
+
+    def replace(self, date, meal, dishes):
+        with self.lock:
+            if date not in self.docs:
+                self._put(date, {})
+            self.docs[date][meal] = [dict(dish, date=date, meal=meal) for dish in dishes]
+
+    def list_range(self, start_date, end_date):
+        with self.lock:
+            return [
+                dict(row)
+                for date in self._range(start_date, end_date)
+                for rows in self.docs[date].values()
+                for row in rows
+            ]
+
+
+class MemoryMenuItemRepository(MenuItemRepository):
+
+    def __init__(self):
+        self.items = {}
+        self.ids = itertools.count(1)
+        self.changes = {}  # item id -> (seq, op, changed_at), in seq order
+        self.seqs = itertools.count(1)
+        self.latest = 0
+        self.lock = threading.Lock()
+
+    def _log(self, item_id, op):
+        """Called under the lock; an item's newer change replaces its older one"""
+        self.latest = next(self.seqs)
+        self.changes.pop(item_id, None)
+        self.changes[item_id] = (self.latest, op, datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'))
+
+    def create(self, item):
+        with self.lock:
+            item_id = next(self.ids)
+            row = {column: item.get(column) for column in MENU_ITEM_COLUMNS}
+            row.update(id=item_id, is_available=item.get('is_available', True))
+            self.items[item_id] = row
+            self._log(item_id, 'upsert')
+            return dict(row)
+
+    def get(self, item_id):
+        item = self.items.get(item_id)
+        return dict(item) if item else None
+
+    def list(self, date=None, meal_type=None):
+        with self.lock:
+            rows = [
+                dict(item) for item in self.items.values()
+                if (not date or item['date'] == date) and (not meal_type or item['meal_type'] == meal_type)
+            ]
+        rows.sort(key=lambda item: item['meal_type'])
+        rows.sort(key=lambda item: item['date'], reverse=True)
+        return rows
+
+    def update(self, item_id, fields):
+        with self.lock:
+            item = self.items.get(item_id)
+            if item is None:
+                return None
+            item.update({column: fields[column] for column in MENU_ITEM_COLUMNS if column in fields})
+            item['is_available'] = bool(item['is_available'])
+            self._log(item_id, 'upsert')
+            return dict(item)
+
+    def delete(self, item_id):
+        with self.lock:
+            if self.items.pop(item_id, None) is None:
+                return False
+            self._log(item_id, 'delete')
+            return True
+
+    def changes_since(self, seq, limit=500):
+        with self.lock:
+            changes = [
+                {
+                    'seq': change_seq,
+                    'op': op,
+                    'item': dict(self.items[item_id]) if op == 'upsert' else {'id': item_id},
+                    'changed_at': changed_at
+                }
+                for item_id, (change_seq, op, changed_at) in self.changes.items() if change_seq > seq
+            ]
+            return {'changes': changes[:limit], 'latest': self.latest}
+
+
+class MemoryRecipeRepository(RecipeRepository):
+
+    def __init__(self):
+        self.dishes = {}  # lower-cased dish -> (dish, ingredient rows), matching SQL's NOCASE key
+        self.lock = threading.Lock()
+
+    def list_all(self):
+        with self.lock:
+            return [
+                dict(row, dish=dish)
+                for dish, rows in sorted(self.dishes.values())
+                for row in sorted(rows, key=lambda row: row['ingredient'])
+            ]
+
+    def replace(self, dish, ingredients):
+        rows = [{key: i[key] for key in ('ingredient', 'unit', 'quantity')} for i in ingredients]
+        with self.lock:
+            self.dishes[dish.lower()] = (dish, rows)
+
+    def delete(self, dish):
+        with self.lock:
+            return self.dishes.pop(dish.lower(), None) is not None
+
+
+class MemorySelectionRepository(_DateIndexed, SelectionRepository):
+    """Selections grouped per date: docs[date] is that day's list of rows"""
+
+    def __init__(self, menu_items):
+        super().__init__()
+        self.menu_items = menu_items
+        self.ids = itertools.count(1)
+
+    def add(self, employee_id, menu_item_id, date, meal_type, status='confirmed', created_at=None):
+        """Seed one selection row"""
+        with self.lock:
+            row = {
+                'id': next(self.ids),
+                'employee_id': employee_id,
+                'menu_item_id': menu_item_id,
+                'date': date,
+                'meal_type': meal_type,
+                'status': status,
+                'created_at': created_at
+            }
+            if date not in self.docs:
+                self._put(date, [])
+            self.docs[date].append(row)
+            return row['id']
+
+    def _confirmed(self, date):
+        return [row for row in self.docs.get(date, ()) if row['status'] == 'confirmed']
+
+    def meal_types(self, date):
+        return list(dict.fromkeys(row['meal_type'] for row in self._confirmed(date)))
+
+    def item_counts(self, date, meal_type):
+        counts = Counter()
+        for row in self._confirmed(date):
+            if row['meal_type'] == meal_type:
+                item = self.menu_items.items.get(row['menu_item_id'])
+                if item:
+                    counts[item['name']] += 1
+        return list(counts.items())
+
+    def date_meal_counts(self, start_date, end_date):
+        with self.lock:
+            dates = self._range(start_date, end_date)
+        result = []
+        for date in dates:
+            counts = Counter(row['meal_type'] for row in self._confirmed(date))
+            result.extend((date, meal_type, count) for meal_type, count in sorted(counts.items()))
+        return result
+
+    def dish_counts(self, start_date, end_date):
+        with self.lock:
+            dates = self._range(start_date, end_date)
+        result = []
+        for date in dates:
+            counts = Counter()
+            for row in self._confirmed(date):
+                item = self.menu_items.items.get(row['menu_item_id'])
+                if item:
+                    counts[item['name']] += 1
+            result.extend((date, name, count) for name, count in counts.items())
+        return result
+
+    def meal_type_counts(self, date):
+        return dict(Counter(row['meal_type'] for row in self._confirmed(date)))
+
+    def iter_chunks(self, start_date=None, end_date=None, chunk_size=10000):
+        with self.lock:
+            dates = self._range(start_date, end_date)
+        chunk = []
+        for date in dates:
+            for row in self.docs.get(date, ()):
+                item = self.menu_items.items.get(row['menu_item_id'])
+                chunk.append((
+                    row['id'], row['employee_id'], row['menu_item_id'], item['name'] if item else None,
+                    row['date'], row['meal_type'], row['status'], row['created_at']
+                ))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+
+class MemoryRepositories:
+    """All repositories of one site, held in process memory; `shared` lends its admin and employee directories"""
+
+    def __init__(self, site_id=DEFAULT_SITE, shared=None):
+        self.site_id = site_id
+        self.admins = shared.admins if shared else MemoryAdminRepository()
+        self.employees = shared.employees if shared else MemoryEmployeeRepository()
+        self.menus = MemoryMenuRepository()
+        self.templates = MemoryTemplateRepository()
+        self.counts = MemoryCountRepository()
+        self.bookings = MemoryBookingRepository()
+        self.redemptions = MemoryRedemptionRepository()
+        self.production = MemoryProductionRepository()
+        self.menu_items = MemoryMenuItemRepository()
+        self.recipes = MemoryRecipeRepository()
+        self.selections = MemorySelectionRepository(self.menu_items)
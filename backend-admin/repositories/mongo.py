@@ -0,0 +1,397 @@
+from datetime import datetime
+import os
+import threading
+import time
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import BulkWriteError
+from repositories.base import (
+    AdminRepository, EmployeeRepository, MenuRepository, TemplateRepository, CountRepository,
+    BookingRepository, RedemptionRepository, ProductionRepository, MEALS, department_key, next_revision
+)
+
+
+def object_id(value):
+    """Tokens carry ids as strings; turn them back into ObjectIds where valid"""
+    if isinstance(value, ObjectId):
+        return value
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return value
+
+
+def with_id(doc):
+    """Expose Mongo's _id as a string 'id'"""
+    if doc is None:
+        return None
+    doc['id'] = str(doc.pop('_id'))
+    return doc
+
+
+def projection(fields):
+    """Mongo projection for a parse_fields() result"""
+    if fields is None:
+        return {'_id': 0}
+    return {'_id': 0, **dict.fromkeys(fields, 1)}
+
+
+def since_query(site_id, rev):
+    """Documents of a site written after a revision (all of them, including pre-revision ones, for 0)"""
+    query = {'site_id': site_id}
+    if rev:
+        query['rev'] = {'$gt': rev}
+    return query
+
+
+def date_range_query(start_date, end_date, site_id=None):
+    query = {} if site_id is None else {'site_id': site_id}
+    if start_date and end_date:
+        query['date'] = {'$gte': start_date, '$lte': end_date}
+    elif start_date:
+        query['date'] = {'$gte': start_date}
+    elif end_date:
+        query['date'] = {'$lte': end_date}
+    return query
+
+
+STICKY_SECONDS = float(os.getenv('READ_STICKY_SECONDS', 5))
+
+
+class ReadRouter:
+    """
+    Sends report and menu reads to read_db (a secondary or reporting node)
+    and everything else to the primary. For `sticky` seconds after this
+    worker writes a collection its reads go back to the primary, so an
+    admin's next page load shows their own edit.
+    """
+
+    def __init__(self, primary, read_db=None, sticky=STICKY_SECONDS):
+        self.primary = primary
+        self.read_db = primary if read_db is None else read_db
+        self.sticky = sticky
+        self.written = {}
+        self.lock = threading.Lock()
+
+    def wrote(self, name):
+        with self.lock:
+            self.written[name] = time.monotonic()
+
+    def collection(self, name):
+        if self.read_db is not self.primary:
+            with self.lock:
+                written = self.written.get(name)
+            if written is None or time.monotonic() - written >= self.sticky:
+                return self.read_db[name]
+        return self.primary[name]
+
+
+class MongoAdminRepository(AdminRepository):
+
+    def __init__(self, db):
+        self.collection = db['admins']
+
+    def get(self, admin_id):
+        return with_id(self.collection.find_one({'_id': object_id(admin_id)}, {'password': 0}))
+
+    def get_by_username(self, username):
+        return with_id(self.collection.find_one({'username': username}))
+
+    def exists(self, username, email):
+        return self.collection.find_one(
+            {'$or': [{'username': username}, {'email': email}]},
+            {'_id': 1}
+        ) is not None
+
+    def create(self, admin):
+        return str(self.collection.insert_one(dict(admin)).inserted_id)
+
+
+class MongoEmployeeRepository(EmployeeRepository):
+
+    def __init__(self, db):
+        self.collection = db['employees']
+
+    def existing(self, employee_ids, emails):
+        taken_ids, taken_emails = set(), set()
+        for doc in self.collection.find(
+            {'$or': [{'employee_id': {'$in': list(employee_ids)}}, {'email': {'$in': list(emails)}}]},
+            {'_id': 0, 'employee_id': 1, 'email': 1}
+        ):
+            taken_ids.add(doc.get('employee_id'))
+            taken_emails.add(doc.get('email'))
+        return taken_ids, taken_emails
+
+    def create_many(self, employees):
+        if not employees:
+            return []
+        try:
+            self.collection.insert_many([dict(employee) for employee in employees], ordered=False)
+        except BulkWriteError as e:
+            return [(error['index'], error['errmsg']) for error in e.details.get('writeErrors', [])]
+        return []
+
+
+class MongoMenuRepository(MenuRepository):
+
+    def __init__(self, db, site_id, reads=None):
+        self.collection = db['menus']
+        self.tombstones = db['tombstones']
+        self.site_id = site_id
+        self.reads = reads or ReadRouter(db)
+
+    def get(self, date):
+        return self.reads.collection('menus').find_one({'site_id': self.site_id, 'date': date}, {'_id': 0})
+
+    def list_all(self, fields=None):
+        return list(self.reads.collection('menus').find(
+            {'site_id': self.site_id}, projection(fields)
+        ).sort('date', -1))
+
+    def list_range(self, start_date, end_date, fields=None):
+        return list(self.reads.collection('menus').find(
+            date_range_query(start_date, end_date, self.site_id), projection(fields)
+        ).sort('date', 1))
+
+    def upsert(self, menu):
+        self.collection.update_one(
+            {'site_id': self.site_id, 'date': menu['date']},
+            {'$set': dict(menu, site_id=self.site_id, rev=next_revision())},
+            upsert=True
+        )
+        # A date deleted earlier and recreated is no longer gone
+        self.tombstones.delete_one({'site_id': self.site_id, 'kind': 'menu', 'key': menu['date']})
+        self.reads.wrote('menus')
+
+    def update(self, date, fields):
+        matched = self.collection.update_one(
+            {'site_id': self.site_id, 'date': date}, {'$set': dict(fields, rev=next_revision())}
+        ).matched_count > 0
+        self.reads.wrote('menus')
+        return matched
+
+    def delete(self, date):
+        deleted = self.collection.delete_one({'site_id': self.site_id, 'date': date}).deleted_count > 0
+        if deleted:
+            self.tombstones.update_one(
+                {'site_id': self.site_id, 'kind': 'menu', 'key': date},
+                {'$set': {'rev': next_revision(), 'deleted_at': datetime.utcnow()}},
+                upsert=True
+            )
+        self.reads.wrote('menus')
+        return deleted
+
+    def changed_since(self, rev):
+        # From the primary: a lagging secondary could hold back a write past the sync overlap
+        return list(self.reads.primary['menus'].find(since_query(self.site_id, rev), {'_id': 0}).sort('rev', 1))
+
+    def deleted_since(self, rev):
+        return [
+            {'date': doc['key'], 'rev': doc['rev']}
+            for doc in self.tombstones.find(
+                dict(since_query(self.site_id, rev), kind='menu'), {'_id': 0, 'key': 1, 'rev': 1}
+            ).sort('rev', 1)
+        ]
+
+
+class MongoTemplateRepository(TemplateRepository):
+
+    def __init__(self, db, site_id):
+        self.collection = db['menu_templates']
+        self.site_id = site_id
+
+    def list_all(self):
+        return list(self.collection.find({'site_id': self.site_id}, {'_id': 0}).sort('start_date', 1))
+
+    def get(self, name):
+        return self.collection.find_one({'site_id': self.site_id, 'name': name}, {'_id': 0})
+
+    def upsert(self, template):
+        self.collection.replace_one(
+            {'site_id': self.site_id, 'name': template['name']},
+            dict(template, site_id=self.site_id),
+            upsert=True
+        )
+
+    def delete(self, name):
+        return self.collection.delete_one({'site_id': self.site_id, 'name': name}).deleted_count > 0
+
+
+class MongoCountRepository(CountRepository):
+    """Counts are written by the employee app, so every read here is a report read"""
+
+    def __init__(self, db, site_id, reads=None):
+        self.site_id = site_id
+        self.reads = reads or ReadRouter(db)
+
+    @staticmethod
+    def projection(department, fields=None):
+        if department is None:
+            return projection(fields)
+        return {'_id': 0, 'date': 1, 'updated_at': 1, f'departments.{department_key(department)}': 1}
+
+    def get(self, date, department=None):
+        return self.reads.collection('meal_counts').find_one(
+            {'site_id': self.site_id, 'date': date}, self.projection(department)
+        )
+
+    def list_range(self, start_date=None, end_date=None, department=None, fields=None):
+        return list(self.reads.collection('meal_counts').find(
+            date_range_query(start_date, end_date, self.site_id),
+            self.projection(department, fields)
+        ).sort('date', -1))
+
+    def changed_since(self, rev):
+        # From the primary: a lagging secondary could hold back a write past the sync overlap
+        return list(self.reads.primary['meal_counts'].find(since_query(self.site_id, rev), {'_id': 0}).sort('rev', 1))
+
+    def iter_range(self, start_date=None, end_date=None, batch_size=10000):
+        return self.reads.collection('meal_counts').find(
+            date_range_query(start_date, end_date, self.site_id),
+            {'_id': 0}
+        ).sort('date', 1).batch_size(batch_size)
+
+
+class MongoBookingRepository(BookingRepository):
+
+    def __init__(self, db, site_id, directory):
+        self.preferences = db['meal_preferences']
+        self.employees = directory['employees']
+        self.site_id = site_id
+
+    def booked(self, date):
+        rows = list(self.preferences.find(
+            {'site_id': self.site_id, 'date': date, '$or': [{meal: True} for meal in MEALS]},
+            {'_id': 0, 'employee_id': 1, 'employee_name': 1, **{meal: 1 for meal in MEALS}}
+        ))
+        badges = {
+            str(doc['_id']): doc.get('employee_id')
+            for doc in self.employees.find(
+                {'_id': {'$in': [object_id(row['employee_id']) for row in rows]}},
+                {'employee_id': 1}
+            )
+        }
+        return [
+            {
+                'employee_id': row['employee_id'],
+                'badge': badges.get(row['employee_id']),
+                'name': row.get('employee_name'),
+                **{meal: bool(row.get(meal)) for meal in MEALS}
+            }
+            for row in rows
+        ]
+
+    def iter_range(self, start_date, end_date, batch_size=10000):
+        return self.preferences.find(
+            date_range_query(start_date, end_date, self.site_id),
+            {'_id': 0, 'date': 1, 'employee_id': 1, **{meal: 1 for meal in MEALS}}
+        ).batch_size(batch_size)
+
+
+class MongoRedemptionRepository(RedemptionRepository):
+
+    def __init__(self, db, site_id, reads=None):
+        self.collection = db['meal_redemptions']
+        self.site_id = site_id
+        self.reads = reads or ReadRouter(db)
+        self.indexed = False
+
+    def list_for_date(self, date):
+        return list(self.collection.find({'site_id': self.site_id, 'date': date}, {'_id': 0}))
+
+    def insert_many(self, redemptions):
+        if not redemptions:
+            return 0
+        if not self.indexed:
+            # Another admin worker redeeming the same meal loses at the index
+            self.collection.create_index(SITE_INDEXES['meal_redemptions'], unique=True)
+            self.indexed = True
+        try:
+            self.collection.insert_many(
+                [dict(redemption, site_id=self.site_id) for redemption in redemptions], ordered=False
+            )
+        except BulkWriteError as e:
+            return sum(1 for error in e.details.get('writeErrors', []) if error.get('code') == 11000)
+        return 0
+
+    def daily_counts(self, start_date, end_date):
+        return [
+            (row['_id']['date'], row['_id']['meal'], row['count'])
+            for row in self.reads.collection('meal_redemptions').aggregate([
+                {'$match': date_range_query(start_date, end_date, self.site_id)},
+                {'$group': {'_id': {'date': '$date', 'meal': '$meal'}, 'count': {'$sum': 1}}}
+            ])
+        ]
+
+
+class MongoProductionRepository(ProductionRepository):
+
+    def __init__(self, db, site_id, reads=None):
+        self.collection = db['meal_production']
+        self.site_id = site_id
+        self.reads = reads or ReadRouter(db)
+
+    def replace(self, date, meal, dishes):
+        self.collection.delete_many({'site_id': self.site_id, 'date': date, 'meal': meal})
+        if dishes:
+            self.collection.insert_many([dict(dish, site_id=self.site_id, date=date, meal=meal) for dish in dishes])
+        self.reads.wrote('meal_production')
+
+    def list_range(self, start_date, end_date):
+        return list(self.reads.collection('meal_production').find(
+            date_range_query(start_date, end_date, self.site_id), {'_id': 0}
+        ).sort('date', 1))
+
+
+# Every site-scoped query leads with site_id, so each collection gets a site-prefixed index
+SITE_INDEXES = {
+    'menus': [('site_id', 1), ('date', 1)],
+    'menu_templates': [('site_id', 1), ('name', 1)],
+    'meal_preferences': [('site_id', 1), ('date', 1), ('employee_id', 1)],
+    'meal_counts': [('site_id', 1), ('date', 1)],
+    'meal_redemptions': [('site_id', 1), ('date', 1), ('meal', 1), ('employee_id', 1)],
+    'meal_production': [('site_id', 1), ('date', 1), ('meal', 1)],
+    'reminder_dispatches': [('site_id', 1), ('date', 1), ('status', 1)],
+    'tombstones': [('site_id', 1), ('kind', 1), ('key', 1)]
+}
+SITE_COLLECTIONS = tuple(SITE_INDEXES)
+
+# Delta sync reads by revision; tombstones expire once clients that old must reload anyway
+REVISION_INDEXES = {
+    'menus': [('site_id', 1), ('rev', 1)],
+    'meal_counts': [('site_id', 1), ('rev', 1)],
+    'tombstones': [('site_id', 1), ('rev', 1)]
+}
+TOMBSTONE_SECONDS = int(os.getenv('SYNC_TOMBSTONE_DAYS', 30)) * 86400
+
+
+class MongoRepositories:
+    """
+    Mongo-backed repositories (admin Flask app) for one site. Admins and
+    employees live in the default database; the site's documents in
+    site_db, which is the default database unless the site is routed
+    elsewhere. Menu and report reads go through read_db when one is set;
+    bookings stay on the primary because closed dates are snapshotted once.
+    """
+
+    def __init__(self, db, site_id, site_db=None, read_db=None):
+        site_db = db if site_db is None else site_db
+        self.db = site_db
+        self.site_id = site_id
+        self.reads = ReadRouter(site_db, read_db)
+        self.admins = MongoAdminRepository(db)
+        self.employees = MongoEmployeeRepository(db)
+        self.menus = MongoMenuRepository(site_db, site_id, self.reads)
+        self.templates = MongoTemplateRepository(site_db, site_id)
+        self.counts = MongoCountRepository(site_db, site_id, self.reads)
+        self.bookings = MongoBookingRepository(site_db, site_id, db)
+        self.redemptions = MongoRedemptionRepository(site_db, site_id, self.reads)
+        self.production = MongoProductionRepository(site_db, site_id, self.reads)
+
+    def ensure_indexes(self):
+        for collection, keys in SITE_INDEXES.items():
+            self.db[collection].create_index(keys, unique=collection in ('meal_redemptions', 'tombstones'))
+        for collection, keys in REVISION_INDEXES.items():
+            self.db[collection].create_index(keys)
+        self.db['tombstones'].create_index('deleted_at', expireAfterSeconds=TOMBSTONE_SECONDS)
@@ -0,0 +1,276 @@
+from database.db import get_db
+from database.archive import selection_source
+from repositories.base import (
+    AdminRepository, MenuItemRepository, RecipeRepository, SelectionRepository, MENU_ITEM_COLUMNS
+)
+from utils.export import iter_selection_chunks
+
+
+def menu_item_row(row):
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "category": row["category"],
+        "meal_type": row["meal_type"],
+        "date": row["date"],
+        "is_available": bool(row["is_available"])
+    }
+
+
+class SqlAdminRepository(AdminRepository):
+
+    def get(self, admin_id):
+        conn = get_db()
+        row = conn.execute("SELECT id, username, email FROM admins WHERE id = ?", (admin_id,)).fetchone()
+        conn.close()
+        return dict(row) if row else None
+
+    def get_by_username(self, username):
+        conn = get_db()
+        row = conn.execute("SELECT * FROM admins WHERE username = ?", (username,)).fetchone()
+        conn.close()
+        return dict(row) if row else None
+
+    def exists(self, username, email):
+        conn = get_db()
+        row = conn.execute("SELECT 1 FROM admins WHERE username = ? OR email = ?", (username, email)).fetchone()
+        conn.close()
+        return row is not None
+
+    def create(self, admin):
+        conn = get_db()
+        cursor = conn.execute(
+            "INSERT INTO admins (username, email, password) VALUES (?, ?, ?)",
+            (admin["username"], admin["email"], admin["password"])
+        )
+        conn.commit()
+        admin_id = cursor.lastrowid
+        conn.close()
+        return admin_id
+
+
+class SqlMenuItemRepository(MenuItemRepository):
+
+    def create(self, item):
+        conn = get_db()
+        cursor = conn.execute(
+            "INSERT INTO menu_items (name, category, meal_type, date) VALUES (?, ?, ?, ?)",
+            (item["name"], item["category"], item["meal_type"], item["date"])
+        )
+        conn.commit()
+        row = conn.execute("SELECT * FROM menu_items WHERE id = ?", (cursor.lastrowid,)).fetchone()
+        conn.close()
+        return menu_item_row(row)
+
+    def get(self, item_id):
+        conn = get_db()
+        row = conn.execute("SELECT * FROM menu_items WHERE id = ?", (item_id,)).fetchone()
+        conn.close()
+        return menu_item_row(row) if row else None
+
+    def list(self, date=None, meal_type=None):
+        query = "SELECT * FROM menu_items WHERE 1=1"
+        params = []
+
+        if date:
+            query += " AND date = ?"
+            params.append(date)
+
+        if meal_type:
+            query += " AND meal_type = ?"
+            params.append(meal_type)
+
+        query += " ORDER BY date DESC, meal_type"
+
+        conn = get_db()
+        rows = conn.execute(query, params).fetchall()
+        conn.close()
+        return [menu_item_row(r) for r in rows]
+
+    def update(self, item_id, fields):
+        updates = [(column, fields[column]) for column in MENU_ITEM_COLUMNS if column in fields]
+
+        conn = get_db()
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT 1 FROM menu_items WHERE id = ?", (item_id,))
+        if not cursor.fetchone():
+            conn.close()
+            return None
+
+        if updates:
+            query = f"UPDATE menu_items SET {', '.join(f'{column} = ?' for column, _ in updates)} WHERE id = ?"
+            cursor.execute(query, [value for _, value in updates] + [item_id])
+            conn.commit()
+
+        row = cursor.execute("SELECT * FROM menu_items WHERE id = ?", (item_id,)).fetchone()
+        conn.close()
+        return menu_item_row(row)
+
+    def delete(self, item_id):
+        conn = get_db()
+        cursor = conn.execute("DELETE FROM menu_items WHERE id = ?", (item_id,))
+        deleted = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return deleted
+
+    def changes_since(self, seq, limit=500):
+        conn = get_db()
+        rows = conn.execute(
+            """
+            SELECT c.seq, c.op, c.item_id, c.changed_at, m.*
+            FROM menu_changes c
+            LEFT JOIN menu_items m ON m.id = c.item_id
+            WHERE c.seq > ?
+              AND NOT EXISTS (SELECT 1 FROM menu_changes n WHERE n.item_id = c.item_id AND n.seq > c.seq)
+            ORDER BY c.seq
+            LIMIT ?
+            """,
+            (seq, limit)
+        ).fetchall()
+        latest = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM menu_changes").fetchone()[0]
+        conn.close()
+        return {
+            "changes": [
+                {
+                    "seq": row["seq"],
+                    "op": row["op"],
+                    "item": menu_item_row(row) if row["op"] == "upsert" else {"id": row["item_id"]},
+                    "changed_at": row["changed_at"]
+                }
+                for row in rows
+            ],
+            "latest": latest
+        }
+
+
+class SqlRecipeRepository(RecipeRepository):
+
+    def list_all(self):
+        conn = get_db()
+        rows = conn.execute(
+            "SELECT dish, ingredient, unit, quantity FROM recipe_ingredients ORDER BY dish, ingredient"
+        ).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def replace(self, dish, ingredients):
+        conn = get_db()
+        with conn:
+            conn.execute("DELETE FROM recipe_ingredients WHERE dish = ?", (dish,))
+            conn.executemany(
+                "INSERT INTO recipe_ingredients (dish, ingredient, unit, quantity) VALUES (?, ?, ?, ?)",
+                [(dish, i["ingredient"], i["unit"], i["quantity"]) for i in ingredients]
+            )
+        conn.close()
+
+    def delete(self, dish):
+        conn = get_db()
+        with conn:
+            deleted = conn.execute("DELETE FROM recipe_ingredients WHERE dish = ?", (dish,)).rowcount > 0
+        conn.close()
+        return deleted
+
+
+class SqlSelectionRepository(SelectionRepository):
+
+    def meal_types(self, date):
+        conn = get_db()
+        source = selection_source(conn, date, date)
+        rows = conn.execute(
+            f"""
+            SELECT DISTINCT meal_type
+            FROM {source}
+            WHERE date = ? AND status = 'confirmed'
+            """,
+            (date,)
+        ).fetchall()
+        conn.close()
+        return [row[0] for row in rows]
+
+    def item_counts(self, date, meal_type):
+        conn = get_db()
+        source = selection_source(conn, date, date)
+        rows = conn.execute(
+            f"""
+            SELECT m.name, COUNT(e.id) as count
+            FROM {source} e
+            JOIN menu_items m ON e.menu_item_id = m.id
+            WHERE e.date = ? AND e.meal_type = ? AND e.status = 'confirmed'
+            GROUP BY m.name
+            """,
+            (date, meal_type)
+        ).fetchall()
+        conn.close()
+        return [(row[0], row[1]) for row in rows]
+
+    def date_meal_counts(self, start_date, end_date):
+        conn = get_db()
+        source = selection_source(conn, start_date, end_date)
+        rows = conn.execute(
+            f"""
+            SELECT
+                date,
+                meal_type,
+                COUNT(*) as count
+            FROM {source}
+            WHERE date BETWEEN ? AND ? AND status = 'confirmed'
+            GROUP BY date, meal_type
+            ORDER BY date
+            """,
+            (start_date, end_date)
+        ).fetchall()
+        conn.close()
+        return [tuple(row) for row in rows]
+
+    def dish_counts(self, start_date, end_date):
+        conn = get_db()
+        source = selection_source(conn, start_date, end_date)
+        rows = conn.execute(
+            f"""
+            SELECT e.date, m.name, COUNT(e.id) as count
+            FROM {source} e
+            JOIN menu_items m ON e.menu_item_id = m.id
+            WHERE e.date BETWEEN ? AND ? AND e.status = 'confirmed'
+            GROUP BY e.date, m.name
+            """,
+            (start_date, end_date)
+        ).fetchall()
+        conn.close()
+        return [tuple(row) for row in rows]
+
+    def meal_type_counts(self, date):
+        conn = get_db()
+        source = selection_source(conn, date, date)
+        rows = conn.execute(
+            f"""
+            SELECT
+                meal_type,
+                COUNT(*) as count
+            FROM {source}
+            WHERE date = ? AND status = 'confirmed'
+            GROUP BY meal_type
+            """,
+            (date,)
+        ).fetchall()
+        conn.close()
+        return {row[0]: row[1] for row in rows}
+
+    def iter_chunks(self, start_date=None, end_date=None, chunk_size=10000):
+        conn = get_db()
+        try:
+            source = selection_source(conn, start_date, end_date)
+            yield from iter_selection_chunks(conn, start_date, end_date, chunk_size, source)
+        finally:
+            conn.close()
+
+
+class SqlRepositories:
+    """sqlite-backed repositories (FastAPI routers)"""
+
+    def __init__(self):
+        self.admins = SqlAdminRepository()
+        self.menu_items = SqlMenuItemRepository()
+        self.recipes = SqlRecipeRepository()
+        self.selections = SqlSelectionRepository()
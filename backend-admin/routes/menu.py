@@ -1,131 +1,114 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List
-from models.menu import MenuItemCreate, MenuItemUpdate, MenuItemResponse
-from database.db import get_db
+from models.menu import MenuItemCreate, MenuItemUpdate, MenuItemResponse, Recipe, RecipeIngredient
+from repositories import get_repositories
 from routes.auth import get_current_admin
+from utils.dish_index import DishCatalog
 
 router = APIRouter(prefix="/menu", tags=["Menu Management"])
+repos = get_repositories("sql")
+
+# Names of every menu item ever created, keyed by item id so edits re-index one row
+dish_catalog = DishCatalog()
+
+def get_dish_catalog():
+    if not dish_catalog.loaded:
+        with dish_catalog.lock:
+            if not dish_catalog.loaded:
+                dish_catalog.load((f"item:{r['id']}", [r["name"]]) for r in repos.menu_items.list())
+    return dish_catalog
+
+def refresh_item_dish(item_id, name=None):
+    if dish_catalog.loaded:
+        dish_catalog.replace_source(f"item:{item_id}", [name] if name else [])
 
 @router.post("/", response_model=MenuItemResponse)
 def create_menu_item(item: MenuItemCreate, admin: dict = Depends(get_current_admin)):
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "INSERT INTO menu_items (name, category, meal_type, date) VALUES (?, ?, ?, ?)",
-        (item.name, item.category, item.meal_type, item.date)
-    )
-    conn.commit()
-    
-    item_id = cursor.lastrowid
-    cursor.execute("SELECT * FROM menu_items WHERE id = ?", (item_id,))
-    result = cursor.fetchone()
-    conn.close()
+    result = repos.menu_items.create(item.model_dump())
+    refresh_item_dish(result["id"], result["name"])
     
-    return MenuItemResponse(
-        id=result[0],
-        name=result[1],
-        category=result[2],
-        meal_type=result[3],
-        date=result[4],
-        is_available=bool(result[5])
-    )
+    return MenuItemResponse(**result)
 
 @router.get("/", response_model=List[MenuItemResponse])
 def get_menu_items(date: str = None, meal_type: str = None):
-    conn = get_db()
-    cursor = conn.cursor()
+    results = repos.menu_items.list(date, meal_type)
     
-    query = "SELECT * FROM menu_items WHERE 1=1"
-    params = []
-    
-    if date:
-        query += " AND date = ?"
-        params.append(date)
+    return [MenuItemResponse(**r) for r in results]
+
+@router.get("/suggest")
+def suggest_dishes(
+    q: str = "",
+    limit: int = Query(10, ge=1, le=50),
+    admin: dict = Depends(get_current_admin)
+):
+    """Autocomplete dish names from past menu items, most used first"""
+    return {"suggestions": get_dish_catalog().suggest(q, limit)}
+
+@router.get("/changes")
+def get_menu_changes(since: int = Query(0, ge=0), limit: int = Query(500, ge=1, le=5000)):
+    """Menu item writes after `since` for the employee store's puller; resume from `next`"""
+    result = repos.menu_items.changes_since(since, limit)
+    changes = result["changes"]
+
+    return {
+        "changes": changes,
+        "next": changes[-1]["seq"] if changes else max(since, result["latest"]),
+        "latest": result["latest"]
+    }
+
+@router.get("/recipes", response_model=List[Recipe])
+def get_recipes(admin: dict = Depends(get_current_admin)):
+    recipes = {}
+    for row in repos.recipes.list_all():
+        recipes.setdefault(row["dish"], []).append(RecipeIngredient(**row))
     
-    if meal_type:
-        query += " AND meal_type = ?"
-        params.append(meal_type)
+    return [Recipe(dish=dish, ingredients=ingredients) for dish, ingredients in recipes.items()]
+
+@router.put("/recipes/{dish}", response_model=Recipe)
+def set_recipe(dish: str, ingredients: List[RecipeIngredient], admin: dict = Depends(get_current_admin)):
+    """Per-serving ingredient quantities for a dish, matched to menu items by name"""
+    if any(i.quantity < 0 for i in ingredients):
+        raise HTTPException(status_code=400, detail="Quantities must not be negative")
     
-    query += " ORDER BY date DESC, meal_type"
+    repos.recipes.replace(dish, [i.model_dump() for i in ingredients])
     
-    cursor.execute(query, params)
-    results = cursor.fetchall()
-    conn.close()
+    return Recipe(dish=dish, ingredients=ingredients)
+
+@router.delete("/recipes/{dish}")
+def delete_recipe(dish: str, admin: dict = Depends(get_current_admin)):
+    if not repos.recipes.delete(dish):
+        raise HTTPException(status_code=404, detail="Recipe not found")
     
-    return [
-        MenuItemResponse(
-            id=r[0],
-            name=r[1],
-            category=r[2],
-            meal_type=r[3],
-            date=r[4],
-            is_available=bool(r[5])
-        ) for r in results
-    ]
+    return {"message": "Recipe deleted successfully"}
 
 @router.put("/{item_id}", response_model=MenuItemResponse)
 def update_menu_item(item_id: int, item: MenuItemUpdate, admin: dict = Depends(get_current_admin)):
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Check if item exists
-    cursor.execute("SELECT * FROM menu_items WHERE id = ?", (item_id,))
-    if not cursor.fetchone():
-        conn.close()
-        raise HTTPException(status_code=404, detail="Menu item not found")
-    
-    # Build update query
-    updates = []
-    params = []
+    # Only fields that were provided are updated
+    fields = {}
     
     if item.name:
-        updates.append("name = ?")
-        params.append(item.name)
+        fields["name"] = item.name
     if item.category:
-        updates.append("category = ?")
-        params.append(item.category)
+        fields["category"] = item.category
     if item.meal_type:
-        updates.append("meal_type = ?")
-        params.append(item.meal_type)
+        fields["meal_type"] = item.meal_type
     if item.date:
-        updates.append("date = ?")
-        params.append(item.date)
+        fields["date"] = item.date
     if item.is_available is not None:
-        updates.append("is_available = ?")
-        params.append(int(item.is_available))
+        fields["is_available"] = int(item.is_available)
     
-    if updates:
-        params.append(item_id)
-        query = f"UPDATE menu_items SET {', '.join(updates)} WHERE id = ?"
-        cursor.execute(query, params)
-        conn.commit()
+    result = repos.menu_items.update(item_id, fields)
     
-    cursor.execute("SELECT * FROM menu_items WHERE id = ?", (item_id,))
-    result = cursor.fetchone()
-    conn.close()
+    if not result:
+        raise HTTPException(status_code=404, detail="Menu item not found")
+    refresh_item_dish(item_id, result["name"])
     
-    return MenuItemResponse(
-        id=result[0],
-        name=result[1],
-        category=result[2],
-        meal_type=result[3],
-        date=result[4],
-        is_available=bool(result[5])
-    )
+    return MenuItemResponse(**result)
 
 @router.delete("/{item_id}")
 def delete_menu_item(item_id: int, admin: dict = Depends(get_current_admin)):
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute("DELETE FROM menu_items WHERE id = ?", (item_id,))
-    
-    if cursor.rowcount == 0:
-        conn.close()
+    if not repos.menu_items.delete(item_id):
         raise HTTPException(status_code=404, detail="Menu item not found")
-    
-    conn.commit()
-    conn.close()
+    refresh_item_dish(item_id)
     
     return {"message": "Menu item deleted successfully"}
\ No newline at end of file
@@ -1,46 +1,35 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse, FileResponse
+from starlette.background import BackgroundTask
 from typing import List
-from models.report import DailyReport, MealCount, HistoricalData
-from database.db import get_db
+from datetime import date as date_cls
+import os
+import tempfile
+from models.report import DailyReport, MealCount, HistoricalData, ProcurementPlan
+from repositories import get_repositories
 from routes.auth import get_current_admin
+from utils.export import SELECTION_SCHEMA, FORMATS, stream_csv_gzip, write_file
+from utils.procurement import ProcurementPlanner, date_range
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
+repos = get_repositories("sql")
+procurement = ProcurementPlanner(repos.recipes, repos.selections)
+
+MAX_PROCUREMENT_DAYS = 366
 
 @router.get("/daily/{date}", response_model=List[DailyReport])
 def get_daily_report(date: str, admin: dict = Depends(get_current_admin)):
     """
     Get consolidated report for a specific date showing meal counts
     """
-    conn = get_db()
-    cursor = conn.cursor()
-    
     # Get all meal types for the date
-    cursor.execute(
-        """
-        SELECT DISTINCT meal_type 
-        FROM employee_selections 
-        WHERE date = ? AND status = 'confirmed'
-        """,
-        (date,)
-    )
-    meal_types = [row[0] for row in cursor.fetchall()]
+    meal_types = repos.selections.meal_types(date)
     
     reports = []
     
     for meal_type in meal_types:
         # Get counts for each menu item
-        cursor.execute(
-            """
-            SELECT m.name, COUNT(e.id) as count
-            FROM employee_selections e
-            JOIN menu_items m ON e.menu_item_id = m.id
-            WHERE e.date = ? AND e.meal_type = ? AND e.status = 'confirmed'
-            GROUP BY m.name
-            """,
-            (date, meal_type)
-        )
-        
-        results = cursor.fetchall()
+        results = repos.selections.item_counts(date, meal_type)
         meals = [MealCount(menu_item_name=r[0], count=r[1]) for r in results]
         total = sum(m.count for m in meals)
         
@@ -53,7 +42,6 @@ def get_daily_report(date: str, admin: dict = Depends(get_current_admin)):
             )
         )
     
-    conn.close()
     return reports
 
 @router.get("/historical", response_model=List[HistoricalData])
@@ -61,25 +49,7 @@ def get_historical_data(start_date: str, end_date: str, admin: dict = Depends(ge
     """
     Get historical data for planning and analysis
     """
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """
-        SELECT 
-            date,
-            meal_type,
-            COUNT(*) as count
-        FROM employee_selections
-        WHERE date BETWEEN ? AND ? AND status = 'confirmed'
-        GROUP BY date, meal_type
-        ORDER BY date
-        """,
-        (start_date, end_date)
-    )
-    
-    results = cursor.fetchall()
-    conn.close()
+    results = repos.selections.date_meal_counts(start_date, end_date)
     
     # Group by date
     data_by_date = {}
@@ -104,29 +74,66 @@ def get_date_summary(date: str, admin: dict = Depends(get_current_admin)):
     """
     Get quick summary for a date
     """
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """
-        SELECT 
-            meal_type,
-            COUNT(*) as count
-        FROM employee_selections
-        WHERE date = ? AND status = 'confirmed'
-        GROUP BY meal_type
-        """,
-        (date,)
-    )
-    
-    results = cursor.fetchall()
-    conn.close()
-    
-    summary = {row[0]: row[1] for row in results}
+    summary = repos.selections.meal_type_counts(date)
     total = sum(summary.values())
     
     return {
         "date": date,
         "total_meals": total,
         "breakdown": summary
-    }
\ No newline at end of file
+    }
+
+@router.get("/procurement", response_model=ProcurementPlan)
+def get_procurement_plan(start_date: str, end_date: str, admin: dict = Depends(get_current_admin)):
+    """
+    Total ingredient needs for confirmed meals in a date range
+    """
+    try:
+        days = len(date_range(start_date, end_date))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+    
+    if not 1 <= days <= MAX_PROCUREMENT_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"end_date must be on or after start_date and within {MAX_PROCUREMENT_DAYS} days"
+        )
+    
+    # Selections for a date close the evening before, so today and earlier are final
+    return procurement.plan(start_date, end_date, closed_through=date_cls.today().isoformat())
+
+
+@router.get("/export")
+def export_selections(start_date: str = None, end_date: str = None, format: str = "csv",
+                      admin: dict = Depends(get_current_admin)):
+    """
+    Stream employee_selections for a date range as gzip CSV or Parquet
+    """
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+
+    filename = f"employee_selections_{start_date or 'start'}_{end_date or 'end'}"
+    chunks = repos.selections.iter_chunks(start_date, end_date)
+
+    if format == "csv":
+        return StreamingResponse(
+            stream_csv_gzip(chunks, SELECTION_SCHEMA),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.csv.gz"'}
+        )
+
+    # Parquet needs a seekable footer, so spool row groups to a temp file
+    fd, path = tempfile.mkstemp(suffix=".parquet")
+    os.close(fd)
+    try:
+        write_file(chunks, SELECTION_SCHEMA, path, fmt="parquet")
+    except Exception:
+        os.remove(path)
+        raise
+
+    return FileResponse(
+        path,
+        media_type="application/vnd.apache.parquet",
+        filename=f"{filename}.parquet",
+        background=BackgroundTask(os.remove, path)
+    )
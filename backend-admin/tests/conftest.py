@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Tests import the app's packages (utils, repositories) the way the app does, from backend-admin/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests that import app.py run it on the in-memory store with two sites
+os.environ.setdefault('STORAGE_ENGINE', 'memory')
+os.environ.setdefault('SITE_IDS', 'main,north')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
@@ -0,0 +1,121 @@
+import random
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+
+from utils.bitmaps import ARRAY_LIMIT, PreferenceBitmapIndex, RoaringBitmap
+
+SPARSE = [1, 5, 70000, 70001, 1 << 20]
+DENSE = list(range(0, 3 * ARRAY_LIMIT, 2))   # past ARRAY_LIMIT in container 0: a bitset
+
+
+def test_membership_and_order():
+    bitmap = RoaringBitmap([70001, 5, 1, 5, 1 << 20, 70000])
+    assert list(bitmap) == SPARSE
+    assert len(bitmap) == 5
+    assert 70000 in bitmap and 70002 not in bitmap and (2 << 20) not in bitmap
+
+
+def test_dense_containers_become_bitsets():
+    bitmap = RoaringBitmap(DENSE)
+    assert isinstance(bitmap.containers[0], int)
+    assert len(bitmap) == len(DENSE)
+    assert list(bitmap) == DENSE
+
+
+@pytest.mark.parametrize('left, right', [
+    (SPARSE, [5, 70001, 9]),
+    (DENSE, SPARSE),
+    (DENSE, list(range(1, 3 * ARRAY_LIMIT, 3))),
+    (random.Random(7).sample(range(200000), 6000), random.Random(8).sample(range(200000), 6000)),
+])
+def test_algebra_matches_python_sets(left, right):
+    a, b = RoaringBitmap(left), RoaringBitmap(right)
+    assert list(a & b) == sorted(set(left) & set(right))
+    assert list(a | b) == sorted(set(left) | set(right))
+    assert list(a - b) == sorted(set(left) - set(right))
+
+
+def test_bytes_round_trip():
+    bitmap = RoaringBitmap(DENSE + SPARSE[2:])
+    assert list(RoaringBitmap.from_bytes(bitmap.to_bytes())) == sorted(set(DENSE + SPARSE[2:]))
+    assert len(RoaringBitmap.from_bytes(RoaringBitmap().to_bytes())) == 0
+
+
+ROWS = [
+    {'date': '2026-03-09', 'employee_id': 'a', 'breakfast': True, 'lunch': True},
+    {'date': '2026-03-09', 'employee_id': 'b', 'lunch': True, 'snacks': True},
+    {'date': '2026-03-10', 'employee_id': 'a', 'lunch': True},
+    {'date': '2026-03-10', 'employee_id': 'c', 'snacks': True},
+]
+
+
+def make_index(rows=ROWS, closed=('2026-03-09',), path=None, ttl=60):
+    reads = []
+
+    def load_range(start, end):
+        reads.append((start, end))
+        return [row for row in rows if start <= row['date'] <= end]
+
+    return PreferenceBitmapIndex(load_range, lambda date: date in closed, path=path, ttl=ttl), reads
+
+
+def test_counts_are_popcounts():
+    index, _ = make_index()
+    assert index.counts('2026-03-09') == {
+        'breakfast_count': 1, 'lunch_count': 2, 'snacks_count': 1, 'total_employees': 2
+    }
+    assert index.counts('2026-03-11')['total_employees'] == 0
+
+
+def test_queries():
+    index, _ = make_index()
+    days = ['2026-03-09', '2026-03-10']
+    assert index.employees(index.query(['2026-03-09'], ['lunch'], exclude=['snacks'])) == ['a']
+    assert index.employees(index.query(days, ['lunch'])) == ['a']
+    assert sorted(index.employees(index.query(days, ['lunch', 'snacks'], every_day=False))) == ['a', 'b', 'c']
+
+
+def test_dates_are_read_in_one_range_and_closed_ones_once():
+    index, reads = make_index(ttl=0)
+    index.ensure(['2026-03-09', '2026-03-10'])
+    assert reads == [('2026-03-09', '2026-03-10')]
+    index.ensure(['2026-03-09', '2026-03-10'])
+    assert reads[1:] == [('2026-03-10', '2026-03-10')]     # only the open date, past its TTL
+
+
+def test_closed_dates_persist(tmp_path):
+    path = str(tmp_path / 'bitmaps.bin')
+    index, _ = make_index(path=path)
+    index.ensure(['2026-03-09', '2026-03-10'])
+
+    reloaded, reads = make_index(rows=[], path=path)
+    assert reloaded.counts('2026-03-09')['lunch_count'] == 2
+    assert '2026-03-10' not in reloaded.closed
+    assert reads == []
+
+
+def test_a_foreign_file_is_refused(tmp_path):
+    path = tmp_path / 'bitmaps.bin'
+    path.write_bytes(b'not an index')
+    with pytest.raises(ValueError):
+        make_index(path=str(path))
+
+
+@pytest.mark.parametrize('query, error', [
+    ('', 'start_date is required'),
+    ('?start_date=2026-03-09&meals=dinner', 'Unknown meals: dinner'),
+    ('?start_date=2026-03-09&end_date=2026-03-01', 'end_date must be on or after start_date'),
+    ('?start_date=2025-01-01&end_date=2026-03-01', 'within 366 days'),
+])
+def test_query_route_rejects_bad_arguments(query, error):
+    import app as admin_app
+
+    admin_id = admin_app.repos.admins.create({'username': 'bitmaps', 'email': 'bitmaps@example.com', 'password': 'x'})
+    token = jwt.encode({'admin_id': admin_id, 'exp': datetime.utcnow() + timedelta(hours=1)},
+                       admin_app.app.config['SECRET_KEY'], algorithm='HS256')
+    response = admin_app.app.test_client().get(f'/api/admin/bookings/query{query}',
+                                               headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 400
+    assert error in response.get_json()['error']
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+
+from repositories.memory import MemoryBookingRepository, MemoryRedemptionRepository
+from utils.meal_pass import issue_pass, verify_pass
+from utils.redemption import (
+    ALREADY_REDEEMED, NOT_BOOKED, OK, UNKNOWN_EMPLOYEE, LedgerNotReady, RedemptionDesk
+)
+
+DATE = '2026-03-10'
+SERVICE = datetime(2026, 3, 10, 12, 30)
+
+
+def test_pass_round_trip():
+    assert verify_pass(issue_pass('65f0c0ffee', 'main', DATE)) == ('65f0c0ffee', 'main', DATE)
+
+
+def test_pass_for_an_employee_id_with_dots():
+    assert verify_pass(issue_pass('emp.42.a', 'north', DATE)) == ('emp.42.a', 'north', DATE)
+
+
+@pytest.mark.parametrize('token', [
+    None, '', 'garbage', f'65f0c0ffee.{DATE}.AAAAAAAAAAAAAAAA',
+    issue_pass('65f0c0ffee', 'main', DATE).replace('65f0c0ffee', '65f0c0fffe'),
+    issue_pass('65f0c0ffee', 'main', DATE).replace('.main.', '.north.'),
+    issue_pass('65f0c0ffee', 'main', DATE).replace(DATE, '2026-03-11'),
+])
+def test_forged_or_altered_passes_fail(token):
+    assert verify_pass(token) is None
+
+
+def test_pass_secret_matters(monkeypatch):
+    token = issue_pass('65f0c0ffee', 'main', DATE)
+    monkeypatch.setenv('MEAL_PASS_SECRET', 'another-secret')
+    assert verify_pass(token) is None
+
+
+def make_desk(now=SERVICE, redemptions=None):
+    bookings = MemoryBookingRepository()
+    bookings.put(DATE, {'employee_id': 'e1', 'badge': 'B1', 'name': 'Asha', 'breakfast': True, 'lunch': True})
+    bookings.put(DATE, {'employee_id': 'e2', 'badge': 'B2', 'name': 'Ravi', 'lunch': True})
+    return RedemptionDesk(bookings, redemptions or MemoryRedemptionRepository(), lambda: now)
+
+
+def test_ledger_waits_for_the_booking_deadline():
+    desk = make_desk(now=datetime(2026, 3, 9, 20, 59))
+    with pytest.raises(LedgerNotReady):
+        desk.redeem(DATE, 'lunch', employee_id='e1')
+    assert make_desk(now=datetime(2026, 3, 9, 21, 0)).redeem(DATE, 'lunch', employee_id='e1')['status'] == OK
+
+
+def test_scan_outcomes():
+    desk = make_desk()
+    assert desk.redeem(DATE, 'lunch', employee_id='e1')['status'] == OK
+    second = desk.redeem(DATE, 'lunch', employee_id='e1')
+    assert second['status'] == ALREADY_REDEEMED
+    assert second['redeemed_at'] == '2026-03-10 12:30:00'
+    assert desk.redeem(DATE, 'breakfast', employee_id='e2')['status'] == NOT_BOOKED
+    assert desk.redeem(DATE, 'lunch', badge='B2')['status'] == OK
+    assert desk.redeem(DATE, 'lunch', badge='nobody')['status'] == UNKNOWN_EMPLOYEE
+    with pytest.raises(ValueError):
+        desk.redeem(DATE, 'dinner', employee_id='e1')
+    assert desk.summary(DATE)['meals']['lunch'] == {'booked': 2, 'redeemed': 2}
+
+
+def test_flush_writes_behind_and_survives_a_restart():
+    redemptions = MemoryRedemptionRepository()
+    desk = make_desk(redemptions=redemptions)
+    desk.redeem(DATE, 'lunch', employee_id='e1')
+    assert redemptions.list_for_date(DATE) == []
+    assert desk.flush() == 1
+    assert [row['employee_id'] for row in redemptions.list_for_date(DATE)] == ['e1']
+
+    restarted = make_desk(redemptions=redemptions)
+    assert restarted.redeem(DATE, 'lunch', employee_id='e1')['status'] == ALREADY_REDEEMED
+
+
+def test_two_counters_inside_one_flush_count_as_a_conflict():
+    redemptions = MemoryRedemptionRepository()
+    first, second = make_desk(redemptions=redemptions), make_desk(redemptions=redemptions)
+    first.redeem(DATE, 'lunch', employee_id='e1')
+    second.redeem(DATE, 'lunch', employee_id='e1')
+    assert first.flush() == 1
+    assert second.flush() == 0
+    assert second.stats['conflicts'] == 1
+
+
+class FailingRedemptions(MemoryRedemptionRepository):
+
+    def insert_many(self, redemptions):
+        raise ConnectionError('store down')
+
+
+def test_failed_flush_keeps_the_buffer():
+    desk = make_desk(redemptions=FailingRedemptions())
+    desk.redeem(DATE, 'lunch', employee_id='e1')
+    assert desk.flush() == 0
+    assert len(desk.pending) == 1
+    assert desk.stats['write_errors'] == 1
+
+
+def test_scan_rejects_a_pass_from_another_site():
+    import app as admin_app
+
+    admin_id = admin_app.repos.admins.create({'username': 'counter', 'email': 'counter@example.com', 'password': 'x'})
+    token = jwt.encode({'admin_id': admin_id, 'exp': datetime.utcnow() + timedelta(hours=1)},
+                       admin_app.app.config['SECRET_KEY'], algorithm='HS256')
+    today = datetime.now(admin_app.IST).strftime('%Y-%m-%d')
+
+    response = admin_app.app.test_client().post(
+        '/api/admin/redemptions/scan',
+        headers={'Authorization': f'Bearer {token}', 'X-Site-Id': 'north'},
+        json={'token': issue_pass('e1', 'main', today), 'meal': 'lunch', 'date': today}
+    )
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'wrong_site'
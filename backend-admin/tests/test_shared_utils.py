@@ -0,0 +1,10 @@
+import os
+import runpy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_shared_utils_match_the_employee_source():
+    # The copies here are generated; edit backend-employee/utils and run sync_utils.py
+    sync_utils = runpy.run_path(os.path.join(ROOT, 'sync_utils.py'))
+    assert sync_utils['drifted']() == []
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import jwt
+
+from utils.waste import waste_report
+
+COUNTS = [
+    {'date': '2026-03-09', 'lunch_count': 10},
+    {'date': '2026-03-10', 'lunch_count': 8},
+]
+REDEMPTIONS = [('2026-03-10', 'lunch', 6)]  # the counter scanned on the 10th only
+PRODUCTION = [
+    {'date': '2026-03-09', 'meal': 'lunch', 'dish': 'Dal', 'prepared': 12, 'served': None},
+    {'date': '2026-03-09', 'meal': 'lunch', 'dish': 'Rice', 'prepared': 11, 'served': 11},
+    {'date': '2026-03-10', 'meal': 'lunch', 'dish': ' dal', 'prepared': 9, 'served': 7},
+    {'date': '2026-03-10', 'meal': 'dinner', 'dish': 'Soup', 'prepared': 5},
+    {'date': '2026-04-01', 'meal': 'lunch', 'dish': 'Dal', 'prepared': 50},
+]
+
+
+def report():
+    return waste_report('2026-03-09', '2026-03-10', COUNTS, REDEMPTIONS, PRODUCTION)
+
+
+def test_meal_totals_use_redemptions_where_scanned():
+    lunch = report()['meals']['lunch']
+    assert lunch == {
+        'prepared': 21.0,       # the largest lunch dish each day: 12 + 9
+        'booked': 18.0,
+        'redeemed': 6.0,
+        'demand': 16.0,         # booked on the 9th, redeemed on the 10th
+        'over_produced': 5.0,
+        'waste_rate': 0.238,
+        'no_show_rate': 0.25    # (8 booked - 6 redeemed) / 8, scanned days only
+    }
+    assert report()['meals']['breakfast']['prepared'] == 0.0
+
+
+def test_daily_series_skips_days_without_cooking():
+    assert report()['daily'] == [
+        {'date': '2026-03-09', 'prepared': 12.0, 'demand': 10.0, 'over_produced': 2.0},
+        {'date': '2026-03-10', 'prepared': 9.0, 'demand': 6.0, 'over_produced': 3.0},
+    ]
+
+
+def test_dishes_merge_spellings_and_rank_by_leftover():
+    dal, rice = report()['dishes']
+    assert (dal['dish'], rice['dish']) == ('Dal', 'Rice')
+    assert dal['days'] == 2
+    assert dal['prepared'] == 21.0
+    assert dal['leftover'] == 4.0      # 12 - demand 10, then measured 9 - 7
+    assert dal['waste_rate'] == 0.19
+    assert dal['trend_per_week'] == 0.389
+    assert dal['weekly'] == [{'week_start': '2026-03-09', 'prepared': 21.0, 'leftover': 4.0, 'waste_rate': 0.19}]
+    assert rice['leftover'] == 0.0
+
+
+def test_report_without_redemptions_or_production():
+    empty = waste_report('2026-03-09', '2026-03-15', COUNTS, [], [])
+    assert empty['redemptions_available'] is False
+    assert empty['totals']['redeemed'] is None
+    assert empty['totals']['no_show_rate'] is None
+    assert empty['dishes'] == [] and empty['daily'] == []
+
+
+def admin_headers():
+    import app as admin_app
+
+    admin_id = admin_app.repos.admins.create({'username': 'kitchen', 'email': 'kitchen@example.com', 'password': 'x'})
+    token = jwt.encode({'admin_id': admin_id, 'exp': datetime.utcnow() + timedelta(hours=1)},
+                       admin_app.app.config['SECRET_KEY'], algorithm='HS256')
+    return admin_app.app.test_client(), {'Authorization': f'Bearer {token}'}
+
+
+def test_production_routes_feed_the_report():
+    client, headers = admin_headers()
+    bad = client.put('/api/admin/production/2026-05-04/lunch', headers=headers,
+                     json={'dishes': [{'dish': 'Dal', 'prepared': -1}]})
+    assert bad.status_code == 400
+    assert client.put('/api/admin/production/2026-05-04/dinner', headers=headers, json={}).status_code == 400
+
+    saved = client.put('/api/admin/production/2026-05-04/lunch', headers=headers,
+                       json={'dishes': [{'dish': 'Dal', 'prepared': 40, 'served': 31}]})
+    assert saved.status_code == 200
+
+    waste = client.get('/api/admin/reports/waste?start_date=2026-05-04', headers=headers).get_json()
+    assert waste['dishes'][0]['leftover'] == 9.0
+    assert client.get('/api/admin/reports/waste', headers=headers).status_code == 400
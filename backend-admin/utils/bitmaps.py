@@ -0,0 +1,322 @@
+"""
+Roaring-style compressed bitmaps and a (date, meal) bitmap index over
+meal preferences.
+
+A bitmap splits each 32-bit value into a 16-bit container key and a 16-bit
+low part. Sparse containers hold a sorted array of low parts; once one
+passes 4096 values it becomes a 65536-bit set held in a Python int, where
+AND/OR/ANDNOT and popcount run in C over machine words.
+
+The index gives every employee a dense integer id and keeps one bitmap per
+(date, meal). Counts are popcounts and "booked lunch but not snacks" or
+"booked every day this week" are bitmap algebra instead of scans. Dates
+past their booking deadline never change, so their bitmaps are built once
+from the primary store and persisted; open dates are rebuilt when older
+than the TTL.
+"""
+from array import array
+from bisect import bisect_left
+import json
+import os
+import struct
+import sys
+import threading
+import time
+
+from repositories.base import MEALS
+
+ARRAY_LIMIT = 4096
+CONTAINER_BITS = 1 << 16
+ARRAY, BITSET = 0, 1
+MAGIC = b'PBMI\x01'
+
+
+def _to_int(container):
+    if isinstance(container, int):
+        return container
+    bits = bytearray(CONTAINER_BITS // 8)
+    for low in container:
+        bits[low >> 3] |= 1 << (low & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _positions(bits):
+    """Set bit positions of a bitset container, ascending"""
+    raw = bits.to_bytes(CONTAINER_BITS // 8, 'little')
+    return [
+        (index << 3) | bit
+        for index, byte in enumerate(raw) if byte
+        for bit in range(8) if byte >> bit & 1
+    ]
+
+
+def _from_int(bits):
+    """Smallest container for a bitset (None when empty)"""
+    if not bits:
+        return None
+    if bits.bit_count() > ARRAY_LIMIT:
+        return bits
+    return array('H', _positions(bits))
+
+
+def _little_endian(container):
+    """Array containers are stored little-endian; swap on big-endian hosts (its own inverse)"""
+    if sys.byteorder == 'big':
+        container = array('H', container)
+        container.byteswap()
+    return container
+
+
+def _cardinality(container):
+    return container.bit_count() if isinstance(container, int) else len(container)
+
+
+class RoaringBitmap:
+    """Set of non-negative 32-bit ints in array or bitset containers"""
+
+    __slots__ = ('containers',)
+
+    def __init__(self, values=()):
+        self.containers = {}
+        for value in sorted(values):
+            self.add(value)
+
+    def add(self, value):
+        key, low = value >> 16, value & 0xFFFF
+        container = self.containers.get(key)
+        if container is None:
+            self.containers[key] = array('H', [low])
+        elif isinstance(container, int):
+            self.containers[key] = container | (1 << low)
+        else:
+            index = bisect_left(container, low)
+            if index < len(container) and container[index] == low:
+                return
+            container.insert(index, low)
+            if len(container) > ARRAY_LIMIT:
+                self.containers[key] = _to_int(container)
+
+    def __contains__(self, value):
+        container = self.containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        index = bisect_left(container, low)
+        return index < len(container) and container[index] == low
+
+    def __len__(self):
+        return sum(_cardinality(container) for container in self.containers.values())
+
+    def __iter__(self):
+        for key in sorted(self.containers):
+            container = self.containers[key]
+            lows = _positions(container) if isinstance(container, int) else container
+            for low in lows:
+                yield (key << 16) | low
+
+    def _combine(self, other, op, keys):
+        result = RoaringBitmap()
+        for key in keys:
+            a, b = self.containers.get(key), other.containers.get(key)
+            if a is None or b is None:
+                # Only possible for OR, or ANDNOT with nothing to remove: copy what is there
+                container = a if a is not None else b
+                result.containers[key] = container if isinstance(container, int) else array('H', container)
+                continue
+            if not isinstance(a, int) and not isinstance(b, int):
+                # Two sparse containers: set algebra on the low parts
+                lows = {'and': set(a).intersection, 'or': set(a).union, 'andnot': set(a).difference}[op](b)
+                if len(lows) > ARRAY_LIMIT:
+                    result.containers[key] = _to_int(lows)
+                elif lows:
+                    result.containers[key] = array('H', sorted(lows))
+                continue
+            a, b = _to_int(a), _to_int(b)
+            container = _from_int(a & b if op == 'and' else a | b if op == 'or' else a & ~b)
+            if container is not None:
+                result.containers[key] = container
+        return result
+
+    def __and__(self, other):
+        return self._combine(other, 'and', self.containers.keys() & other.containers.keys())
+
+    def __or__(self, other):
+        return self._combine(other, 'or', self.containers.keys() | other.containers.keys())
+
+    def __sub__(self, other):
+        return self._combine(other, 'andnot', self.containers.keys())
+
+    def to_bytes(self):
+        """<count> then per container <key, type, cardinality> and its payload, little-endian"""
+        parts = [struct.pack('<I', len(self.containers))]
+        for key in sorted(self.containers):
+            container = self.containers[key]
+            if isinstance(container, int):
+                parts.append(struct.pack('<HBI', key, BITSET, container.bit_count()))
+                parts.append(container.to_bytes(CONTAINER_BITS // 8, 'little'))
+            else:
+                parts.append(struct.pack('<HBI', key, ARRAY, len(container)))
+                parts.append(_little_endian(container).tobytes())
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        bitmap = cls()
+        (count,), offset = struct.unpack_from('<I', data), 4
+        for _ in range(count):
+            key, kind, cardinality = struct.unpack_from('<HBI', data, offset)
+            offset += 7
+            if kind == BITSET:
+                bitmap.containers[key] = int.from_bytes(data[offset:offset + CONTAINER_BITS // 8], 'little')
+                offset += CONTAINER_BITS // 8
+            else:
+                container = array('H')
+                container.frombytes(data[offset:offset + cardinality * 2])
+                bitmap.containers[key] = _little_endian(container)
+                offset += cardinality * 2
+        return bitmap
+
+
+class PreferenceBitmapIndex:
+    """
+    Bitmaps per (date, meal) over dense employee ids. load_range(start, end)
+    yields preference rows {'date', 'employee_id', <meal>: bool}; is_closed(date)
+    says whether the date is past its booking deadline.
+    """
+
+    def __init__(self, load_range, is_closed, path=None, ttl=60):
+        self.load_range = load_range
+        self.is_closed = is_closed
+        self.path = path
+        self.ttl = ttl
+        self.ids = []        # dense id -> employee id
+        self.dense = {}      # employee id -> dense id
+        self.days = {}       # date -> {meal: RoaringBitmap}
+        self.closed = set()  # dates that will not change again
+        self.built_at = {}   # open date -> monotonic build time
+        self.lock = threading.RLock()
+        if path and os.path.exists(path):
+            self.load()
+
+    def _dense_id(self, employee_id):
+        dense = self.dense.get(employee_id)
+        if dense is None:
+            dense = self.dense[employee_id] = len(self.ids)
+            self.ids.append(employee_id)
+        return dense
+
+    def ensure(self, dates):
+        """Index any of the dates that are missing, or open and older than the TTL, in one read"""
+        with self.lock:
+            now = time.monotonic()
+            stale = {
+                date for date in dates
+                if date not in self.closed and now - self.built_at.get(date, -self.ttl - 1) > self.ttl
+            }
+            if stale:
+                self.rebuild(min(stale), max(stale), stale)
+
+    def rebuild(self, start_date, end_date, dates=None):
+        """Rebuild dates (default: every date in the range) from the primary store"""
+        with self.lock:
+            days = {}
+            for row in self.load_range(start_date, end_date):
+                if dates is not None and row['date'] not in dates:
+                    continue
+                day = days.get(row['date'])
+                if day is None:
+                    day = days[row['date']] = {meal: RoaringBitmap() for meal in MEALS}
+                dense = self._dense_id(row['employee_id'])
+                for meal in MEALS:
+                    if row.get(meal):
+                        day[meal].add(dense)
+
+            persist = False
+            now = time.monotonic()
+            for date in dates if dates is not None else days:
+                self.days[date] = days.get(date) or {meal: RoaringBitmap() for meal in MEALS}
+                if self.is_closed(date):
+                    self.closed.add(date)
+                    self.built_at.pop(date, None)
+                    persist = True
+                else:
+                    self.closed.discard(date)
+                    self.built_at[date] = now
+            if persist and self.path:
+                self.save()
+
+    def counts(self, date):
+        """{meal: booked count, 'total_employees': booked anything}"""
+        self.ensure([date])
+        day = self.days[date]
+        anyone = RoaringBitmap()
+        for meal in MEALS:
+            anyone = anyone | day[meal]
+        counts = {f"{meal}_count": len(day[meal]) for meal in MEALS}
+        counts['total_employees'] = len(anyone)
+        return counts
+
+    def query(self, dates, meals, exclude=(), every_day=True):
+        """
+        Employees who booked any of `meals` and none of `exclude`, on every one
+        of the dates (or on at least one of them with every_day=False)
+        """
+        self.ensure(dates)
+        result = None
+        for date in dates:
+            day = self.days[date]
+            matched = RoaringBitmap()
+            for meal in meals:
+                matched = matched | day[meal]
+            for meal in exclude:
+                matched = matched - day[meal]
+            if result is None:
+                result = matched
+            else:
+                result = result & matched if every_day else result | matched
+        return result if result is not None else RoaringBitmap()
+
+    def employees(self, bitmap):
+        return [self.ids[dense] for dense in bitmap]
+
+    # ---- persistence (closed dates only) ----
+    def save(self):
+        """MAGIC, a length-prefixed JSON header, then each day's bitmaps in header order"""
+        with self.lock:
+            dates = sorted(self.closed)
+            blobs, sizes = [], []
+            for date in dates:
+                day_blobs = [self.days[date][meal].to_bytes() for meal in MEALS]
+                blobs.extend(day_blobs)
+                sizes.append([date, [len(blob) for blob in day_blobs]])
+            header = json.dumps({'meals': list(MEALS), 'employees': self.ids, 'days': sizes}).encode('utf-8')
+
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(MAGIC + struct.pack('<I', len(header)) + header)
+                for blob in blobs:
+                    f.write(blob)
+            os.replace(tmp_path, self.path)
+
+    def load(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"{self.path} is not a preference bitmap index")
+        (length,) = struct.unpack_from('<I', data, len(MAGIC))
+        offset = len(MAGIC) + 4
+        header = json.loads(data[offset:offset + length])
+        offset += length
+
+        with self.lock:
+            self.ids = header['employees']
+            self.dense = {employee_id: dense for dense, employee_id in enumerate(self.ids)}
+            for date, sizes in header['days']:
+                day = {}
+                for meal, size in zip(header['meals'], sizes):
+                    day[meal] = RoaringBitmap.from_bytes(data[offset:offset + size])
+                    offset += size
+                self.days[date] = day
+                self.closed.add(date)
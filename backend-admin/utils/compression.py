@@ -0,0 +1,283 @@
+# Shared with backend-admin: edit this copy in backend-employee/utils, then run sync_utils.py
+"""
+Negotiated gzip/brotli response compression with conditional requests.
+
+Buffered responses (the usual jsonify / JSONResponse) get a weak ETag over
+the uncompressed body, answer If-None-Match with 304, and are compressed
+once per (ETag, encoding): the compressed bytes are cached, so a large
+body that many clients poll is not recompressed for each of them.
+Streamed responses are compressed chunk by chunk as they are produced.
+Bodies under the size threshold and media types that are already
+compressed (gzip exports, Parquet) go out untouched.
+
+brotli is optional; without it only gzip is offered.
+"""
+from collections import OrderedDict
+import hashlib
+import threading
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+CACHE_ENTRIES = 256
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'application/xml', 'text/')
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+
+def negotiate(accept_encoding, encodings=None):
+    """Best content-coding the client accepts (by q-value, then server preference), or None"""
+    encodings = encodings or available_encodings()
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(content_type):
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def etag_for(body):
+    """Weak validator over the uncompressed body, so it holds across encodings"""
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith('W/') else candidate) == opaque:
+            return True
+    return False
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+class StreamCompressor:
+    """Incremental encoder for streamed bodies; each chunk is flushed so clients see data as it comes"""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        if self.encoding == 'br':
+            return self.compressor.process(chunk) + self.compressor.flush()
+        return self.compressor.compress(chunk) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed by (ETag, encoding)"""
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compress(self, etag, encoding, body):
+        key = (etag, encoding)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+
+        compressed = compress(body, encoding)
+        with self.lock:
+            self.entries[key] = compressed
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return compressed
+
+
+def add_vary(value):
+    """Vary header value with Accept-Encoding added"""
+    parts = [part.strip() for part in (value or '').split(',') if part.strip()]
+    if not any(part.lower() == 'accept-encoding' for part in parts):
+        parts.append('Accept-Encoding')
+    return ', '.join(parts)
+
+
+# ============ FLASK ============
+def init_flask_compression(app, min_size=MIN_SIZE, cache_entries=CACHE_ENTRIES):
+    """Compress and ETag eligible responses of a Flask app"""
+    from flask import request
+
+    cache = CompressedBodyCache(cache_entries)
+    app.extensions['compression_cache'] = cache
+
+    def stream(chunks, compressor):
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code < 200 or response.status_code >= 300 or response.direct_passthrough
+                or 'Content-Encoding' in response.headers or not is_compressible(response.content_type)):
+            return response
+
+        response.headers['Vary'] = add_vary(response.headers.get('Vary'))
+        encoding = negotiate(request.headers.get('Accept-Encoding'))
+
+        if response.is_streamed:
+            if encoding:
+                response.response = stream(response.response, StreamCompressor(encoding))
+                response.headers.pop('Content-Length', None)
+                response.headers['Content-Encoding'] = encoding
+            return response
+
+        body = response.get_data()
+        cacheable = request.method in ('GET', 'HEAD') and response.status_code == 200
+        etag = None
+        if cacheable:
+            etag = etag_for(body)
+            response.headers['ETag'] = etag
+            if etag_matches(request.headers.get('If-None-Match'), etag):
+                response.status_code = 304
+                response.set_data(b'')
+                response.headers.pop('Content-Length', None)
+                return response
+
+        if encoding and len(body) >= min_size:
+            data = cache.get_or_compress(etag, encoding, body) if cacheable else compress(body, encoding)
+            response.set_data(data)
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    return cache
+
+
+# ============ ASGI (FastAPI) ============
+class CompressionMiddleware:
+    """
+    ASGI middleware with the same behaviour as init_flask_compression.
+    A response whose body arrives in one message is treated as buffered;
+    anything sent with more_body is compressed as a stream.
+    """
+
+    def __init__(self, app, min_size=MIN_SIZE, cache_entries=CACHE_ENTRIES):
+        self.app = app
+        self.min_size = min_size
+        self.cache = CompressedBodyCache(cache_entries)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = {key.decode('latin-1').lower(): value.decode('latin-1') for key, value in scope['headers']}
+        encoding = negotiate(request_headers.get('accept-encoding'))
+        cacheable_method = scope['method'] in ('GET', 'HEAD')
+        state = {'start': None, 'compressor': None, 'passthrough': False}
+
+        async def send_compressed(message):
+            if message['type'] == 'http.response.start':
+                headers = {key.decode('latin-1').lower(): value.decode('latin-1') for key, value in message['headers']}
+                status = message['status']
+                if (status < 200 or status >= 300 or 'content-encoding' in headers
+                        or not is_compressible(headers.get('content-type'))):
+                    state['passthrough'] = True
+                    await send(message)
+                else:
+                    state['start'] = message
+                return
+
+            if message['type'] != 'http.response.body' or state['passthrough']:
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+            if state['compressor'] is not None:
+                data = state['compressor'].compress(body)
+                if not more_body:
+                    data += state['compressor'].finish()
+                await send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+                return
+
+            start, state['start'] = state['start'], None
+            headers = [(k, v) for k, v in start['headers'] if k.lower() not in (b'content-length', b'vary')]
+            vary = next((v.decode('latin-1') for k, v in start['headers'] if k.lower() == b'vary'), None)
+            headers.append((b'vary', add_vary(vary).encode('latin-1')))
+
+            if more_body:
+                # Streaming: compress as chunks arrive
+                if encoding:
+                    state['compressor'] = StreamCompressor(encoding)
+                    headers.append((b'content-encoding', encoding.encode('latin-1')))
+                    body = state['compressor'].compress(body)
+                await send(dict(start, headers=headers))
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+                return
+
+            status = start['status']
+            etag = None
+            if cacheable_method and status == 200:
+                etag = etag_for(body)
+                headers.append((b'etag', etag.encode('latin-1')))
+                if etag_matches(request_headers.get('if-none-match'), etag):
+                    await send(dict(start, status=304, headers=headers))
+                    await send({'type': 'http.response.body', 'body': b''})
+                    return
+
+            if encoding and len(body) >= self.min_size:
+                body = self.cache.get_or_compress(etag, encoding, body) if etag else compress(body, encoding)
+                headers.append((b'content-encoding', encoding.encode('latin-1')))
+            headers.append((b'content-length', str(len(body)).encode('latin-1')))
+            await send(dict(start, headers=headers))
+            await send({'type': 'http.response.body', 'body': body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,159 @@
+"""In-memory dish catalog with word-prefix and trigram indexes for autocomplete"""
+from bisect import bisect_left, insort
+from collections import Counter
+import heapq
+import re
+import threading
+
+MEALS = ('breakfast', 'lunch', 'snacks')
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize(name):
+    return ' '.join(_WORD.findall(name.lower()))
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def dish_names(menu):
+    """Dish names in a menu document's breakfast/lunch/snacks lists"""
+    names = []
+    for meal in MEALS:
+        for dish in menu.get(meal) or []:
+            name = dish if isinstance(dish, str) else (dish or {}).get('name')
+            if name and normalize(name):
+                names.append(name.strip())
+    return names
+
+
+class DishCatalog:
+    """
+    Every dish that has appeared on a menu, with how often it was served.
+    Sources (a menu date, a menu item id) are tracked so a rewrite of one
+    menu only adjusts the dishes that actually changed.
+    """
+
+    def __init__(self):
+        self.names = {}       # normalized name -> display name
+        self.counts = {}      # normalized name -> times served
+        self.vocab = []       # sorted distinct words, for prefix ranges
+        self.words = {}       # word -> set of normalized names
+        self.grams = {}       # trigram -> set of normalized names
+        self.sources = {}     # source key -> Counter of normalized names
+        self.cache = {}       # (query, limit) -> suggestions, dropped on any change
+        self.loaded = False
+        self.lock = threading.RLock()
+
+    # ---- maintenance ----
+    def replace_source(self, key, names):
+        """Set the dishes contributed by one source (pass [] to drop it)"""
+        with self.lock:
+            new = Counter()
+            display = {}
+            for name in names:
+                norm = normalize(name)
+                if norm:
+                    new[norm] += 1
+                    display.setdefault(norm, name)
+
+            old = self.sources.pop(key, Counter())
+            if new:
+                self.sources[key] = new
+
+            for norm in old.keys() | new.keys():
+                delta = new[norm] - old[norm]
+                if delta:
+                    self._adjust(norm, display.get(norm, norm), delta)
+
+    def load(self, sources):
+        """Rebuild from (source key, dish names) pairs"""
+        with self.lock:
+            self.names, self.counts, self.vocab, self.words, self.grams, self.sources = {}, {}, [], {}, {}, {}
+            for key, names in sources:
+                self.replace_source(key, names)
+            self.loaded = True
+
+    def _adjust(self, norm, name, delta):
+        self.cache.clear()
+
+        if norm not in self.counts:
+            self.names[norm] = name
+            self.counts[norm] = 0
+            for word in norm.split():
+                if word not in self.words:
+                    insort(self.vocab, word)
+                    self.words[word] = set()
+                self.words[word].add(norm)
+            for gram in trigrams(norm):
+                self.grams.setdefault(gram, set()).add(norm)
+
+        self.counts[norm] += delta
+        if self.counts[norm] > 0:
+            return
+
+        del self.counts[norm]
+        del self.names[norm]
+        for word in norm.split():
+            bucket = self.words[word]
+            bucket.discard(norm)
+            if not bucket:
+                del self.words[word]
+                del self.vocab[bisect_left(self.vocab, word)]
+        for gram in trigrams(norm):
+            bucket = self.grams[gram]
+            bucket.discard(norm)
+            if not bucket:
+                del self.grams[gram]
+
+    # ---- lookup ----
+    def _prefix_matches(self, query):
+        """Names containing every leading word of the query and a word starting with the last"""
+        *leading, last = query.split()
+
+        matches = set()
+        i = bisect_left(self.vocab, last)
+        while i < len(self.vocab) and self.vocab[i].startswith(last):
+            matches |= self.words[self.vocab[i]]
+            i += 1
+
+        for word in leading:
+            matches &= self.words.get(word, set())
+            if not matches:
+                break
+        return matches
+
+    def suggest(self, query, limit=10):
+        """Dishes whose words start with the query, then fuzzy trigram matches, by usage"""
+        query = normalize(query or '')
+        if not query:
+            return []
+
+        with self.lock:
+            cached = self.cache.get((query, limit))
+            if cached is not None:
+                return cached
+
+            matches = self._prefix_matches(query)
+            ranked = heapq.nlargest(limit, matches, key=self.counts.__getitem__)
+            ranked.sort(key=lambda n: (-self.counts[n], n))
+
+            if len(ranked) < limit and len(query) >= 3:
+                query_grams = trigrams(query)
+                shared = Counter()
+                for gram in query_grams:
+                    shared.update(self.grams.get(gram, ()))
+                threshold = max(2, len(query_grams) // 3)
+                fuzzy = [norm for norm, hits in shared.items() if hits >= threshold and norm not in matches]
+                ranked += heapq.nsmallest(
+                    limit - len(ranked), fuzzy,
+                    key=lambda n: (-shared[n], -self.counts[n], n)
+                )
+
+            result = [{'name': self.names[norm], 'count': self.counts[norm]} for norm in ranked]
+            if len(self.cache) > 10000:
+                self.cache.clear()
+            self.cache[(query, limit)] = result
+            return result
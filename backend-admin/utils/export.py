@@ -0,0 +1,227 @@
+"""Streaming columnar export of meal history (gzip CSV and Parquet)"""
+import csv
+import io
+import os
+import zlib
+
+CHUNK_SIZE = 10000
+
+# (column, arrow type) pairs - the order is the on-disk column order
+SELECTION_SCHEMA = [
+    ('id', 'int64'),
+    ('employee_id', 'int64'),
+    ('menu_item_id', 'int64'),
+    ('menu_item_name', 'string'),
+    ('date', 'string'),
+    ('meal_type', 'string'),
+    ('status', 'string'),
+    ('created_at', 'string'),
+]
+
+MEAL_COUNT_SCHEMA = [
+    ('date', 'string'),
+    ('breakfast_count', 'int64'),
+    ('lunch_count', 'int64'),
+    ('snacks_count', 'int64'),
+    ('total_employees', 'int64'),
+    ('updated_at', 'string'),
+]
+
+PARTITIONS = {
+    'day': lambda date: date,
+    'month': lambda date: date[:7],
+    'year': lambda date: date[:4],
+    'none': lambda date: 'all',
+}
+
+FORMATS = ('csv', 'parquet')
+
+
+def columns(schema):
+    """Column names of a schema"""
+    return [name for name, _ in schema]
+
+
+# ============ SOURCES ============
+def iter_selection_chunks(conn, start_date=None, end_date=None, chunk_size=CHUNK_SIZE,
+                          source="employee_selections"):
+    """Yield employee_selections rows in date order, chunk_size rows at a time"""
+    query = f"""
+        SELECT e.id, e.employee_id, e.menu_item_id, m.name, e.date,
+               e.meal_type, e.status, e.created_at
+        FROM {source} e
+        LEFT JOIN menu_items m ON e.menu_item_id = m.id
+        WHERE 1=1
+    """
+    params = []
+
+    if start_date:
+        query += " AND e.date >= ?"
+        params.append(start_date)
+
+    if end_date:
+        query += " AND e.date <= ?"
+        params.append(end_date)
+
+    query += " ORDER BY e.date, e.id"
+
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield [tuple(row) for row in rows]
+
+
+def iter_meal_count_chunks(docs, chunk_size=CHUNK_SIZE):
+    """Turn a stream of meal_counts documents into row-tuple chunks"""
+    names = columns(MEAL_COUNT_SCHEMA)
+
+    chunk = []
+    for doc in docs:
+        chunk.append(tuple(doc.get(name) for name in names))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+# ============ WRITERS ============
+class CsvGzipEncoder:
+    """Incrementally encode row chunks as gzip-compressed CSV bytes"""
+
+    def __init__(self, schema):
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.writer.writerow(columns(schema))
+
+    def encode(self, rows):
+        self.writer.writerows(rows)
+        data = self.compressor.compress(self.buffer.getvalue().encode('utf-8'))
+        self.buffer.seek(0)
+        self.buffer.truncate(0)
+        return data
+
+    def finish(self):
+        return self.encode([]) + self.compressor.flush()
+
+
+def stream_csv_gzip(chunks, schema):
+    """Yield a gzip-compressed CSV body, one compressed block per input chunk"""
+    encoder = CsvGzipEncoder(schema)
+    for chunk in chunks:
+        data = encoder.encode(chunk)
+        if data:
+            yield data
+    yield encoder.finish()
+
+
+class CsvGzipWriter:
+    """Append row chunks to a .csv.gz file"""
+
+    def __init__(self, path, schema):
+        self.file = open(path, 'wb')
+        self.encoder = CsvGzipEncoder(schema)
+
+    def write(self, rows):
+        self.file.write(self.encoder.encode(rows))
+
+    def close(self):
+        self.file.write(self.encoder.finish())
+        self.file.close()
+
+
+class ParquetWriter:
+    """Append row chunks to a Parquet file, one row group per chunk"""
+
+    def __init__(self, path, schema):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([(name, getattr(pa, kind)()) for name, kind in schema])
+        self.writer = pq.ParquetWriter(path, self.schema, compression='snappy')
+
+    def write(self, rows):
+        if not rows:
+            return
+        arrays = [
+            self.pa.array(values, type=field.type)
+            for values, field in zip(zip(*rows), self.schema)
+        ]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {
+    'csv': (CsvGzipWriter, '.csv.gz'),
+    'parquet': (ParquetWriter, '.parquet'),
+}
+
+
+def write_file(chunks, schema, path, fmt='parquet'):
+    """Write all chunks to a single file and return the row count"""
+    writer_cls, _ = WRITERS[fmt]
+    writer = writer_cls(path, schema)
+    rows_written = 0
+    try:
+        for chunk in chunks:
+            writer.write(chunk)
+            rows_written += len(chunk)
+    finally:
+        writer.close()
+    return rows_written
+
+
+def _runs(chunk, key_of, date_index):
+    """Split a date-ordered chunk into (partition key, rows) runs"""
+    start = 0
+    for i in range(1, len(chunk) + 1):
+        if i == len(chunk) or key_of(chunk[i][date_index]) != key_of(chunk[start][date_index]):
+            yield key_of(chunk[start][date_index]), chunk[start:i]
+            start = i
+
+
+def export_partitioned(chunks, schema, out_dir, fmt='parquet', partition='month', date_column='date'):
+    """
+    Write date-ordered chunks into one file per date partition (hive layout,
+    e.g. out_dir/date_month=2024-05/part-0.parquet). Only one partition file
+    is open at a time, so memory stays bounded by the chunk size.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    if partition not in PARTITIONS:
+        raise ValueError(f"Unsupported partition: {partition}")
+
+    writer_cls, extension = WRITERS[fmt]
+    key_of = PARTITIONS[partition]
+    date_index = columns(schema).index(date_column)
+
+    written = []
+    writer = None
+
+    try:
+        for chunk in chunks:
+            for key, rows in _runs(chunk, key_of, date_index):
+                if not written or written[-1]['partition'] != key:
+                    if writer:
+                        writer.close()
+                    part_dir = out_dir if partition == 'none' else os.path.join(out_dir, f"date_{partition}={key}")
+                    os.makedirs(part_dir, exist_ok=True)
+                    path = os.path.join(part_dir, f"part-0{extension}")
+                    writer = writer_cls(path, schema)
+                    written.append({'partition': key, 'path': path, 'rows': 0})
+                writer.write(rows)
+                written[-1]['rows'] += len(rows)
+    finally:
+        if writer:
+            writer.close()
+
+    return written
@@ -0,0 +1,167 @@
+# Shared with backend-admin: edit this copy in backend-employee/utils, then run sync_utils.py
+"""
+Cached health for load balancer probes.
+
+A background thread runs the registered checks every `interval` seconds
+and keeps the last results; /live and /ready answer from them without
+touching the database. Probe traffic then costs a dict read, and a slow
+database shows up as a slow, failing or stale check instead of a pile of
+workers stuck in server_info().
+"""
+import logging
+import threading
+import time
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+OK, DEGRADED, DOWN = 'ok', 'degraded', 'down'
+SEVERITY = {OK: 0, DEGRADED: 1, DOWN: 2}
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Mongo connections open and checked out, and checkouts that failed, from pool events"""
+
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.checkout_failures = 0
+        self.reported_failures = 0
+        self.lock = threading.Lock()
+
+    def _add(self, field, amount):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def connection_created(self, event):
+        self._add('open', 1)
+
+    def connection_closed(self, event):
+        self._add('open', -1)
+
+    def connection_checked_out(self, event):
+        self._add('checked_out', 1)
+
+    def connection_checked_in(self, event):
+        self._add('checked_out', -1)
+
+    def connection_check_out_failed(self, event):
+        self._add('checkout_failures', 1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def check(self, max_pool_size, busy_ratio=0.9):
+        """Degraded once checked-out connections reach busy_ratio of the pool, or checkouts start failing"""
+        with self.lock:
+            open_, checked_out, failures = self.open, self.checked_out, self.checkout_failures
+        new_failures, self.reported_failures = failures - self.reported_failures, failures
+        busy = max_pool_size and checked_out >= max_pool_size * busy_ratio
+        return {
+            'status': DEGRADED if busy or new_failures else OK,
+            'open': open_,
+            'checked_out': checked_out,
+            'max_pool_size': max_pool_size,
+            'checkout_failures': failures
+        }
+
+
+class HealthProber:
+    """
+    Runs checks on a background thread. A check returns a dict of details
+    (with 'status': 'degraded' when it works but poorly) or raises, which
+    marks it down. A non-critical check that is down only degrades the
+    service; results older than stale_after count as down.
+    """
+
+    def __init__(self, interval=5.0, stale_after=None):
+        self.interval = interval
+        self.stale_after = stale_after or interval * 3
+        self.checks = {}
+        self.results = {}
+        self.checked_at = None
+        self.checked_wall = None
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def add(self, name, check, critical=True):
+        self.checks[name] = (check, critical)
+        return self
+
+    def run_once(self):
+        results = {}
+        for name, (check, critical) in self.checks.items():
+            started = time.perf_counter()
+            try:
+                details = dict(check() or {})
+                status = details.pop('status', OK)
+            except Exception as e:
+                details, status = {'error': f"{type(e).__name__}: {e}"}, DOWN
+            results[name] = {
+                'status': status,
+                'critical': critical,
+                'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+                **details
+            }
+            if status != OK:
+                logger.warning('health.check', extra={'event': 'health.check', 'check': name, 'status': status})
+        with self.lock:
+            self.results = results
+            self.checked_at = time.monotonic()
+            self.checked_wall = time.time()
+
+    def snapshot(self):
+        """Last results with the overall status; never touches the checked systems"""
+        with self.lock:
+            results, checked_at, checked_wall = self.results, self.checked_at, self.checked_wall
+
+        if checked_at is None:
+            return {'status': DOWN, 'reason': 'starting', 'checks': {}}
+        age = time.monotonic() - checked_at
+        status = OK
+        for result in results.values():
+            severity = result['status'] if result['critical'] else min(result['status'], DEGRADED, key=SEVERITY.get)
+            status = max(status, severity, key=SEVERITY.get)
+        snapshot = {'status': status, 'checked_at': checked_wall, 'age_seconds': round(age, 3), 'checks': results}
+        if age > self.stale_after:
+            snapshot.update(status=DOWN, reason='stale')
+        return snapshot
+
+    def live(self):
+        """The prober thread is still running (a hung check makes results stale, not the process dead)"""
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self.stopping.set()
+        if self.thread:
+            self.thread.join(timeout)
+
+    def _run(self):
+        while not self.stopping.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception('health.prober_error', extra={'event': 'health.prober_error'})
+            self.stopping.wait(self.interval)
@@ -0,0 +1,46 @@
+# Shared with backend-admin: edit this copy in backend-employee/utils, then run sync_utils.py
+"""
+Signed meal passes shown as a QR code at the serving counter.
+
+A pass is '<employee id>.<site id>.<date>.<signature>' where the signature
+is a truncated HMAC-SHA256 under MEAL_PASS_SECRET, which the employee
+backend (issuing) and the admin backend (redeeming) share. The signature
+covers the site, so a pass only works at the counters of the site it was
+issued for. Tokens are split from the right (site ids, dates and
+signatures hold no '.'), so an employee id may contain dots. The counter
+checks a pass without a database round trip; whether the employee
+actually booked the meal is decided by the redemption ledger.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+
+SIGNATURE_BYTES = 12
+
+
+def _secret():
+    return os.getenv('MEAL_PASS_SECRET', 'meal-pass-secret-change-in-production').encode('utf-8')
+
+
+def _signature(employee_id, site_id, date):
+    # Signed as a JSON list, so no choice of field values can make two passes sign alike
+    message = json.dumps([employee_id, site_id, date]).encode('utf-8')
+    digest = hmac.new(_secret(), message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:SIGNATURE_BYTES]).decode('ascii')
+
+
+def issue_pass(employee_id, site_id, date):
+    return f"{employee_id}.{site_id}.{date}.{_signature(employee_id, site_id, date)}"
+
+
+def verify_pass(token):
+    """(employee id, site id, date) of a genuine pass, or None"""
+    parts = (token or '').strip().rsplit('.', 3)
+    if len(parts) != 4 or not parts[0]:
+        return None
+    employee_id, site_id, date, signature = parts
+    if not hmac.compare_digest(signature, _signature(employee_id, site_id, date)):
+        return None
+    return employee_id, site_id, date
@@ -0,0 +1,232 @@
+# Shared with backend-admin: edit this copy in backend-employee/utils, then run sync_utils.py
+"""
+Recurring menu templates. A template stores a weekly (or n-weekly) rotation
+once; the menu for a date is derived from it at read time instead of being
+written out per date.
+
+    {
+        'name': 'standard',
+        'start_date': '2026-01-05',
+        'end_date': None,                       # open ended
+        'weeks': [                              # one entry per rotation week
+            {'monday': {'breakfast': [...], 'lunch': [...], 'snacks': [...]}, ...},
+            {...}
+        ],
+        'overrides': {'2026-01-26': None,       # holiday: no menu
+                      '2026-02-02': {...}}      # one-off menu
+    }
+
+For a date the resolution order is: a menu stored for that date, then the
+covering template's override, then its rotation day. When templates overlap
+the one with the latest start_date wins.
+"""
+from collections import OrderedDict
+from datetime import date as date_cls, datetime, timedelta
+import threading
+import time
+from repositories.base import project
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+MAX_ROTATION_WEEKS = 4
+MENU_MEALS = ('breakfast', 'lunch', 'snacks')
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date_cls):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def validate_template(template, item_type=str, meals=MENU_MEALS):
+    """
+    Error message for a malformed template, or None. Day menus list dish
+    names (item_type=str) in the Mongo stores and menu item ids
+    (item_type=int) in the SQL one, whose meals are breakfast/lunch/dinner.
+    """
+    if not template.get('name'):
+        return 'Template name is required'
+    try:
+        start = _as_date(template['start_date'])
+        if template.get('end_date') and _as_date(template['end_date']) < start:
+            return 'end_date must not be before start_date'
+        for day in template.get('overrides') or {}:
+            _as_date(day)
+    except (KeyError, TypeError, ValueError):
+        return 'start_date, end_date and override dates must be YYYY-MM-DD'
+
+    weeks = template.get('weeks')
+    if not isinstance(weeks, list) or not 1 <= len(weeks) <= MAX_ROTATION_WEEKS:
+        return f'weeks must be a list of 1 to {MAX_ROTATION_WEEKS} rotation weeks'
+    for week in weeks:
+        if not isinstance(week, dict) or set(week) - set(WEEKDAYS):
+            return f'Each rotation week maps weekday names ({", ".join(WEEKDAYS)}) to a day menu'
+        for weekday, body in week.items():
+            error = _day_error(body, item_type, meals)
+            if error:
+                return f'{weekday}: {error}'
+
+    overrides = template.get('overrides') or {}
+    if not isinstance(overrides, dict):
+        return 'overrides must map dates to a day menu or null'
+    for day, body in overrides.items():
+        error = _day_error(body, item_type, meals) if body is not None else None
+        if error:
+            return f'override {day}: {error}'
+    return None
+
+
+def _day_error(body, item_type, meals):
+    """Error message for a malformed day menu, or None"""
+    if not isinstance(body, dict):
+        return 'a day menu must be an object of meal lists'
+    unknown = set(body) - set(meals)
+    if item_type is int and unknown:
+        return f'{sorted(unknown)[0]} is not a meal ({", ".join(meals)})'
+    for meal in meals:
+        items = body.get(meal, [])
+        if not isinstance(items, list) or not all(_is_item(item, item_type) for item in items):
+            return f'{meal} must be a list of {"dish names" if item_type is str else "menu item ids"}'
+    return None
+
+
+def _is_item(item, item_type):
+    return isinstance(item, item_type) and not isinstance(item, bool)
+
+
+def covers(template, day):
+    if day < _as_date(template['start_date']):
+        return False
+    return not template.get('end_date') or day <= _as_date(template['end_date'])
+
+
+def template_day(template, day):
+    """The day body a template assigns to a date (None when it has no menu)"""
+    overrides = template.get('overrides') or {}
+    if day.isoformat() in overrides:
+        return overrides[day.isoformat()]
+
+    start = _as_date(template['start_date'])
+    anchor = start - timedelta(days=start.weekday())
+    weeks = template['weeks']
+    week = weeks[((day - anchor).days // 7) % len(weeks)]
+    return week.get(WEEKDAYS[day.weekday()])
+
+
+class TemplateExpander:
+    """
+    Resolves dates against the stored templates. The template list is
+    reloaded every `ttl` seconds (or on invalidate()), and expansions are
+    kept in an LRU keyed by date until the next reload.
+    """
+
+    def __init__(self, load_templates, build, ttl=60, max_entries=1024):
+        self.load_templates = load_templates
+        self.build = build
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.templates = None
+        self.loaded_at = 0
+        self.expansions = OrderedDict()
+        self.generation = 0  # bumped whenever the template list changes
+        self.lock = threading.Lock()
+
+    def invalidate(self):
+        with self.lock:
+            self.templates = None
+            self.expansions.clear()
+            self.generation += 1
+
+    def stale(self):
+        """The template list is due a reload"""
+        return self.templates is None or time.monotonic() - self.loaded_at > self.ttl
+
+    def load(self, templates):
+        """Install a template list fetched by the caller (an async app, whose loader can't be called here)"""
+        with self.lock:
+            self._install(templates)
+
+    def _install(self, templates):
+        self.templates = sorted(templates, key=lambda t: t['start_date'], reverse=True)
+        self.expansions.clear()
+        self.generation += 1
+        self.loaded_at = time.monotonic()
+
+    def _current_templates(self):
+        # Without a loader the caller keeps the list fresh through load()
+        if self.stale() and self.load_templates is not None:
+            self._install(self.load_templates())
+        return self.templates or []
+
+    def expand(self, value):
+        """Template-derived menu for a date, or None"""
+        day = _as_date(value)
+        with self.lock:
+            templates = self._current_templates()
+            generation = self.generation
+            if day in self.expansions:
+                self.expansions.move_to_end(day)
+                return self.expansions[day]
+
+        template = next((t for t in templates if covers(t, day)), None)
+        body = template_day(template, day) if template else None
+        menu = self.build(template, day, body) if body is not None else None
+
+        with self.lock:
+            # Built from templates replaced meanwhile: answer this caller, but don't cache it
+            if self.generation == generation:
+                self.expansions[day] = menu
+                if len(self.expansions) > self.max_entries:
+                    self.expansions.popitem(last=False)
+        return menu
+
+
+def menu_document(template, day, body):
+    """Shape a template day like a stored menu document"""
+    return {
+        'date': day.isoformat(),
+        'day': day.strftime('%A'),
+        'breakfast': body.get('breakfast', []),
+        'lunch': body.get('lunch', []),
+        'snacks': body.get('snacks', []),
+        'template': template['name']
+    }
+
+
+def resolve_menu(menus, expander, date):
+    """Stored menu for a date, else the template expansion"""
+    menu = menus.get(date)
+    if menu:
+        return menu
+    try:
+        return expander.expand(date)
+    except ValueError:
+        return None  # not a YYYY-MM-DD date, so nothing to expand
+
+
+def resolve_menus(menus, expander, start_date, end_date, fields=None):
+    """
+    Stored menus in a date range with template days filling the gaps, oldest
+    first. With fields only those are fetched (plus the date to merge on) and
+    returned.
+    """
+    return fill_menus(menus.list_range(start_date, end_date, fetch_fields(fields)), expander, start_date, end_date, fields)
+
+
+def fetch_fields(fields):
+    """The fields resolve_menus reads for a ?fields= selection: the date is needed to merge on"""
+    return fields if fields is None or 'date' in fields else ('date', *fields)
+
+
+def fill_menus(stored, expander, start_date, end_date, fields=None):
+    """Stored menus of a date range (fetched with fetch_fields) with template days filling the gaps"""
+    stored = {menu['date']: menu for menu in stored}
+    result = []
+    day, end = _as_date(start_date), _as_date(end_date)
+    while day <= end:
+        menu = stored.get(day.isoformat()) or expander.expand(day)
+        if menu:
+            result.append(project(menu, fields))
+        day += timedelta(days=1)
+    return result
@@ -0,0 +1,114 @@
+"""
+Ingredient bill of materials. Confirmed servings per dish form a
+dates x dishes matrix; recipes form a dishes x ingredients matrix of
+per-serving quantities; one matrix product gives ingredient needs per date.
+Closed dates can no longer change, so their rows are cached for as long
+as the recipes stay the same.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+import threading
+import numpy as np
+from utils.dish_index import normalize
+
+
+class RecipeMatrix:
+    """Recipes as a dense dishes x ingredients array of per-serving quantities"""
+
+    def __init__(self, rows):
+        self.dishes = {}       # normalized dish name -> row
+        self.ingredients = {}  # (ingredient, unit) -> column
+        cells = []
+        for row in rows:
+            dish = self.dishes.setdefault(normalize(row['dish']), len(self.dishes))
+            column = self.ingredients.setdefault((row['ingredient'], row['unit']), len(self.ingredients))
+            cells.append((dish, column, float(row['quantity'])))
+
+        self.matrix = np.zeros((len(self.dishes), len(self.ingredients)))
+        if cells:
+            dishes, columns, quantities = zip(*cells)
+            np.add.at(self.matrix, (list(dishes), list(columns)), quantities)
+
+        # Any recipe edit changes the version and so retires every cached row
+        self.version = hash(tuple(sorted(
+            (normalize(row['dish']), row['ingredient'], row['unit'], float(row['quantity'])) for row in rows
+        )))
+
+
+def date_range(start_date, end_date):
+    day = datetime.strptime(start_date, '%Y-%m-%d').date()
+    end = datetime.strptime(end_date, '%Y-%m-%d').date()
+    dates = []
+    while day <= end:
+        dates.append(day.isoformat())
+        day += timedelta(days=1)
+    return dates
+
+
+class ProcurementPlanner:
+    """Ingredient needs for a date range with per-date caching of closed dates"""
+
+    def __init__(self, recipes, selections):
+        self.recipes = recipes
+        self.selections = selections
+        self.version = None
+        self.closed = {}  # date -> (ingredient vector, Counter of servings without a recipe)
+        self.lock = threading.Lock()
+
+    def _compute(self, dates, recipes):
+        """Ingredient rows (dates x ingredients) and unmatched servings for uncached dates"""
+        index = {date: i for i, date in enumerate(dates)}
+        servings = np.zeros((len(dates), len(recipes.dishes)))
+        missing = {date: Counter() for date in dates}
+
+        for date, name, count in self.selections.dish_counts(dates[0], dates[-1]):
+            if date not in index:
+                continue
+            dish = recipes.dishes.get(normalize(name))
+            if dish is None:
+                missing[date][name] += count
+            else:
+                servings[index[date], dish] += count
+
+        return servings @ recipes.matrix, missing
+
+    def plan(self, start_date, end_date, closed_through):
+        """
+        Totals for [start_date, end_date]; dates up to closed_through are
+        past the selection deadline and get cached
+        """
+        recipes = RecipeMatrix(self.recipes.list_all())
+        dates = date_range(start_date, end_date)
+
+        with self.lock:
+            if recipes.version != self.version:
+                self.version = recipes.version
+                self.closed.clear()
+            cached = [self.closed[date] for date in dates if date in self.closed]
+        pending = [date for date in dates if date not in self.closed]
+
+        totals = np.zeros(len(recipes.ingredients))
+        missing = Counter()
+        for vector, unmatched in cached:
+            totals += vector
+            missing.update(unmatched)
+
+        if pending:
+            needs, unmatched = self._compute(pending, recipes)
+            totals += needs.sum(axis=0)
+            with self.lock:
+                for i, date in enumerate(pending):
+                    missing.update(unmatched[date])
+                    if date <= closed_through and recipes.version == self.version:
+                        self.closed[date] = (needs[i], unmatched[date])
+
+        return {
+            'start_date': start_date,
+            'end_date': end_date,
+            'ingredients': [
+                {'ingredient': ingredient, 'unit': unit, 'quantity': round(float(totals[column]), 3)}
+                for (ingredient, unit), column in sorted(recipes.ingredients.items())
+                if totals[column]
+            ],
+            'missing_recipes': dict(missing.most_common())
+        }
@@ -0,0 +1,385 @@
+# Shared with backend-admin: edit this copy in backend-employee/utils, then run sync_utils.py
+"""
+On-demand request profiling.
+
+Off unless configured: with neither PROFILE_TOKEN nor PROFILE_SAMPLE_RATE
+set, the init_* hooks install nothing and requests run exactly as before.
+When on, a request is profiled if it carries `X-Profile: <PROFILE_TOKEN>`
+(a secret only operators hold) or is picked at PROFILE_SAMPLE_RATE among
+requests matching PROFILE_ENDPOINTS - endpoint names such as
+save_meal_preference, or path prefixes such as /api/admin/reports.
+
+A profiled request gets a sampling thread that records the stack of the
+thread handling it (and of any thread that makes a database call for it)
+every PROFILE_INTERVAL_MS, and its database calls are timed: Mongo
+commands through a command listener, SQL through cursor hooks. Each
+profile is written to PROFILE_DIR as <id>.collapsed, one
+'frame;frame;frame count' line per stack for flamegraph.pl, inferno or
+speedscope, and <id>.json with the wall time and the per-operation
+database breakdown. The id comes back in an X-Profile-Id header.
+
+Under asyncio the handling thread is the event loop, so requests
+interleaved with the profiled one show up in its stacks too.
+"""
+from collections import Counter
+from datetime import datetime
+import contextvars
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'X-Profile'
+ID_HEADER = 'X-Profile-Id'
+
+_active = contextvars.ContextVar('request_profile', default=None)
+
+
+class ProfilingConfig:
+    """When to profile, where profiles go, and how many may run at once"""
+
+    def __init__(self, token=None, sample_rate=0.0, endpoints=(), directory='profiles', interval=0.005, max_concurrent=2):
+        self.token = token
+        self.sample_rate = sample_rate
+        self.endpoints = tuple(endpoints)
+        self.directory = directory
+        self.interval = interval
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            token=os.getenv('PROFILE_TOKEN') or None,
+            sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', 0)),
+            endpoints=[e.strip() for e in os.getenv('PROFILE_ENDPOINTS', '').split(',') if e.strip()],
+            directory=os.getenv('PROFILE_DIR', 'profiles'),
+            interval=float(os.getenv('PROFILE_INTERVAL_MS', 5)) / 1000,
+            max_concurrent=int(os.getenv('PROFILE_MAX_CONCURRENT', 2))
+        )
+
+    @property
+    def enabled(self):
+        return bool(self.token) or self.sample_rate > 0
+
+    def wanted(self, header, path, endpoint):
+        """
+        Profile this request? A valid header always does; sampling covers
+        matching requests only. endpoint may be a callable, resolved only
+        when a name has to be compared
+        """
+        if header and self.token and hmac.compare_digest(header, self.token):
+            return True
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return False
+        if not self.endpoints:
+            return True
+        if any(path == e or path.startswith(e.rstrip('/') + '/') for e in self.endpoints if e.startswith('/')):
+            return True
+        name = endpoint() if callable(endpoint) else endpoint
+        return name in self.endpoints
+
+    def begin(self, endpoint, method, path):
+        """A started RequestProfile, or None when PROFILE_MAX_CONCURRENT are already running"""
+        if not self.slots.acquire(blocking=False):
+            return None
+        return RequestProfile(self, endpoint, method, path).start()
+
+
+class StackSampler(threading.Thread):
+    """Counts the collapsed stacks of a set of threads every `interval` seconds"""
+
+    def __init__(self, threads, interval):
+        super().__init__(name='request-profiler', daemon=True)
+        self.threads = threads
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.stopping = threading.Event()
+
+    def run(self):
+        while not self.stopping.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in list(self.threads):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self.stopping.set()
+        self.join()
+
+
+class RequestProfile:
+
+    def __init__(self, config, endpoint, method, path):
+        self.config = config
+        self.endpoint = endpoint
+        self.method = method
+        self.path = path
+        self.started_at = datetime.utcnow()
+        self.id = f"{self.started_at:%Y%m%dT%H%M%S}-{re.sub(r'[^A-Za-z0-9_.-]', '_', endpoint or 'request')}-{uuid.uuid4().hex[:8]}"
+        self.threads = {threading.get_ident()}
+        self.db_calls = []   # (operation, seconds)
+        self.pending = {}    # Mongo request id -> operation, between started and succeeded
+        self.sampler = StackSampler(self.threads, config.interval)
+        self.finished = False
+
+    def start(self):
+        self.token = _active.set(self)
+        self.started = time.perf_counter()
+        self.sampler.start()
+        return self
+
+    def db(self, operation, seconds):
+        self.threads.add(threading.get_ident())
+        self.db_calls.append((operation, seconds))
+
+    def finish(self, status):
+        """Stop sampling and write the profile (once)"""
+        if self.finished:
+            return
+        self.finished = True
+        wall = time.perf_counter() - self.started
+        self.sampler.stop()
+        _active.reset(self.token)
+        self.config.slots.release()
+
+        try:
+            self._write(status, wall)
+        except OSError:
+            logger.exception('profile.write_failed', extra={'event': 'profile.write_failed', 'profile_id': self.id})
+
+    def _write(self, status, wall):
+        operations = {}
+        for operation, seconds in list(self.db_calls):
+            totals = operations.setdefault(operation, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+        db_seconds = sum(seconds for _, seconds in operations.values())
+
+        summary = {
+            'id': self.id,
+            'endpoint': self.endpoint,
+            'method': self.method,
+            'path': self.path,
+            'status': status,
+            'started_at': self.started_at.isoformat(),
+            'wall_ms': round(wall * 1000, 3),
+            'samples': self.sampler.samples,
+            'interval_ms': self.config.interval * 1000,
+            'db': {
+                'calls': sum(calls for calls, _ in operations.values()),
+                'ms': round(db_seconds * 1000, 3),
+                'share': round(db_seconds / wall, 4) if wall else None,
+                'operations': [
+                    {'operation': operation, 'calls': calls, 'ms': round(seconds * 1000, 3)}
+                    for operation, (calls, seconds) in sorted(operations.items(), key=lambda item: -item[1][1])
+                ]
+            }
+        }
+
+        os.makedirs(self.config.directory, exist_ok=True)
+        base = os.path.join(self.config.directory, self.id)
+        with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+            for stack, count in self.sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+        logger.info('profile.written', extra={
+            'event': 'profile.written', 'profile_id': self.id, 'endpoint': self.endpoint,
+            'wall_ms': summary['wall_ms'], 'db_ms': summary['db']['ms']
+        })
+
+
+def record_db(operation, seconds):
+    """Charge a database call to the request being profiled in this context, if any"""
+    profile = _active.get()
+    if profile is not None:
+        profile.db(operation, seconds)
+
+
+_SQL_TARGET = re.compile(r'\b(?:from|into|update|join)\s+["`\[]?(\w+)', re.IGNORECASE)
+
+
+def sql_operation(statement):
+    """'SELECT menu_items' from a SQL statement: the verb and the first table it names"""
+    words = statement.split(None, 1)
+    verb = words[0].upper() if words else 'SQL'
+    target = _SQL_TARGET.search(statement)
+    return f"{verb} {target.group(1)}" if target else verb
+
+
+# ============ DATABASE TIMERS ============
+def init_mongo_profiling(config):
+    """Time Mongo commands on every client created afterwards (pymongo and Motor); nothing when off"""
+    if not config.enabled:
+        return
+    from pymongo import monitoring
+
+    class CommandTimer(monitoring.CommandListener):
+
+        def started(self, event):
+            profile = _active.get()
+            if profile is not None:
+                target = event.command.get(event.command_name)
+                if not isinstance(target, str):
+                    target = event.command.get('collection')  # getMore names it separately
+                profile.pending[event.request_id] = f"{event.command_name} {target}" if target else event.command_name
+
+        def succeeded(self, event):
+            self._finished(event)
+
+        def failed(self, event):
+            self._finished(event)
+
+        def _finished(self, event):
+            profile = _active.get()
+            if profile is not None:
+                profile.db(profile.pending.pop(event.request_id, event.command_name), event.duration_micros / 1e6)
+
+    monitoring.register(CommandTimer())
+
+
+class TimedCursor(sqlite3.Cursor):
+    """sqlite3 cursor whose statements are charged to the profiled request (execution, not later fetches)"""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_db(sql_operation(sql), time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_db(sql_operation(sql), time.perf_counter() - started)
+
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3.connect(factory=TimedConnection): cursors and the conn.execute() shortcuts are timed"""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def sqlite_connection_factory(config):
+    return TimedConnection if config.enabled else sqlite3.Connection
+
+
+def init_sqlalchemy_profiling(engine, config):
+    """Time every statement an SQLAlchemy engine runs; nothing when off"""
+    if not config.enabled:
+        return
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('profile_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        record_db(sql_operation(statement), time.perf_counter() - conn.info['profile_started'].pop())
+
+
+# ============ FLASK ============
+def init_flask_profiling(app, config=None):
+    """Profile chosen Flask requests; returns the config, and installs nothing when profiling is off"""
+    config = config or ProfilingConfig.from_env()
+    if not config.enabled:
+        return config
+    from flask import g, request
+
+    @app.before_request
+    def start_profile():
+        if config.wanted(request.headers.get(HEADER), request.path, request.endpoint):
+            g.request_profile = config.begin(request.endpoint, request.method, request.path)
+
+    @app.after_request
+    def finish_profile(response):
+        profile = g.pop('request_profile', None)
+        if profile is not None:
+            profile.finish(response.status_code)
+            response.headers[ID_HEADER] = profile.id
+        return response
+
+    @app.teardown_request
+    def abandon_profile(error=None):
+        # after_request is skipped when the handler raised
+        profile = g.pop('request_profile', None)
+        if profile is not None:
+            profile.finish(500)
+
+    return config
+
+
+# ============ ASGI (FastAPI) ============
+def route_name(scope):
+    """Name of the route a request will hit (before routing has run)"""
+    from starlette.routing import Match
+
+    for route in scope['app'].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, 'name', None)
+    return None
+
+
+class ProfilingMiddleware:
+    """ASGI counterpart of init_flask_profiling; add it (outermost) only when config.enabled"""
+
+    def __init__(self, app, config):
+        self.app = app
+        self.config = config
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        header = next((value.decode('latin-1') for key, value in scope['headers'] if key == b'x-profile'), None)
+        if not self.config.wanted(header, scope['path'], lambda: route_name(scope)):
+            await self.app(scope, receive, send)
+            return
+        profile = self.config.begin(route_name(scope), scope['method'], scope['path'])
+        if profile is None:
+            await self.app(scope, receive, send)
+            return
+
+        status = {'code': 500}
+
+        async def send_with_id(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+                message['headers'] = [*message.get('headers', []), (ID_HEADER.lower().encode('latin-1'), profile.id.encode('latin-1'))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.finish(status['code'])
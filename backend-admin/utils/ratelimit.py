@@ -0,0 +1,113 @@
+# Shared with backend-admin: edit this copy in backend-employee/utils, then run sync_utils.py
+from functools import wraps
+import math
+import threading
+import time
+
+
+class MemoryBucketStore:
+    """Token buckets held in this process (also the local stand-in for Redis)"""
+
+    def __init__(self, max_keys=100000):
+        self.buckets = {}
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+
+    def take(self, key, rate, capacity, cost=1, now=None):
+        """Try to take `cost` tokens; returns (allowed, seconds until enough tokens)"""
+        now = time.monotonic() if now is None else now
+
+        with self.lock:
+            tokens, stamp, _ = self.buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - stamp) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+
+            if len(self.buckets) >= self.max_keys and key not in self.buckets:
+                self._evict_full(now)
+            # Each bucket records when it refills, as limiters sharing the store differ in rate
+            self.buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+    def _evict_full(self, now):
+        """Drop buckets that have refilled completely - they carry no state"""
+        self.buckets = {key: bucket for key, bucket in self.buckets.items() if bucket[2] > now}
+
+
+class RedisBucketStore:
+    """Token buckets in a Redis-compatible server, shared by every worker"""
+
+    SCRIPT = """
+        local rate = tonumber(ARGV[1])
+        local capacity = tonumber(ARGV[2])
+        local cost = tonumber(ARGV[3])
+        local now = tonumber(ARGV[4])
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+        local tokens = tonumber(state[1]) or capacity
+        local stamp = tonumber(state[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - stamp) * rate)
+        local allowed = 0
+        if tokens >= cost then
+            tokens = tokens - cost
+            allowed = 1
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'stamp', tostring(now))
+        redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+        return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.script = client.register_script(self.SCRIPT)
+
+    def take(self, key, rate, capacity, cost=1, now=None):
+        """Try to take `cost` tokens; returns (allowed, seconds until enough tokens)"""
+        now = time.time() if now is None else now
+        allowed, tokens = self.script(keys=[key], args=[rate, capacity, cost, now])
+        tokens = float(tokens)
+        return bool(allowed), 0.0 if allowed else (cost - tokens) / rate
+
+
+def make_bucket_store(redis_url=None):
+    """Redis-backed store when a URL is configured, in-memory otherwise"""
+    if not redis_url:
+        return MemoryBucketStore()
+
+    import redis
+    return RedisBucketStore(redis.Redis.from_url(redis_url))
+
+
+class RateLimiter:
+    """Token-bucket limiter: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, store, name, rate, capacity):
+        self.store = store
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+
+    def hit(self, key, cost=1):
+        return self.store.take(f"ratelimit:{self.name}:{key}", self.rate, self.capacity, cost)
+
+
+def rate_limited(limiter, key_func):
+    """Reject calls with 429 once the bucket for key_func(*args) is empty"""
+    from flask import jsonify
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            allowed, retry_after = limiter.hit(key_func(*args, **kwargs))
+
+            if not allowed:
+                response = jsonify({'success': False, 'error': 'Too many requests. Please try again shortly'})
+                response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                return response, 429
+
+            return f(*args, **kwargs)
+
+        return decorated
+
+    return decorator
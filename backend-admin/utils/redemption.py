@@ -0,0 +1,194 @@
+"""
+Meal redemption at the serving counter.
+
+Bookings for a date stop changing at the 9 PM deadline the evening
+before, so the first scan for a date (or an explicit load) snapshots them
+into per-meal sets of employee ids, together with anything already
+redeemed. A scan is then a couple of set/dict lookups under a lock - no
+database round trip - and its redemption is appended to a buffer that a
+background thread writes out in batches. Redemptions already on record
+are part of the snapshot, so a restart does not let anyone eat twice;
+with several admin workers the store's unique index catches a meal
+redeemed at two counters inside one flush interval.
+"""
+from datetime import datetime, timedelta
+import logging
+import threading
+
+from repositories.base import MEALS
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_HOUR = 21
+FLUSH_INTERVAL = 0.25
+BATCH_SIZE = 500
+MAX_DAYS = 3
+
+OK, ALREADY_REDEEMED, NOT_BOOKED, UNKNOWN_EMPLOYEE = 'ok', 'already_redeemed', 'not_booked', 'unknown_employee'
+
+
+class LedgerNotReady(Exception):
+    """Bookings for the date can still change"""
+
+
+class DayLedger:
+    """Snapshot of one date's bookings plus who has been served"""
+
+    def __init__(self, date, bookings, redeemed):
+        self.date = date
+        self.booked = {meal: set() for meal in MEALS}
+        self.badges = {}
+        self.names = {}
+        for booking in bookings:
+            employee_id = booking['employee_id']
+            self.names[employee_id] = booking.get('name')
+            if booking.get('badge'):
+                self.badges[booking['badge']] = employee_id
+            for meal in MEALS:
+                if booking.get(meal):
+                    self.booked[meal].add(employee_id)
+
+        self.redeemed = {meal: {} for meal in MEALS}  # meal -> {employee id: redeemed_at}
+        for row in redeemed:
+            if row['meal'] in self.redeemed:
+                self.redeemed[row['meal']].setdefault(row['employee_id'], row['redeemed_at'])
+
+
+class RedemptionDesk:
+    """In-memory ledgers per date with write-behind of redemptions"""
+
+    def __init__(self, bookings, redemptions, now, deadline_hour=DEADLINE_HOUR,
+                 flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE, max_days=MAX_DAYS):
+        self.bookings = bookings
+        self.redemptions = redemptions
+        self.now = now
+        self.deadline_hour = deadline_hour
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_days = max_days
+        self.ledgers = {}
+        self.pending = []
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.writer = None
+        self.stats = {'scans': 0, OK: 0, ALREADY_REDEEMED: 0, NOT_BOOKED: 0, UNKNOWN_EMPLOYEE: 0,
+                      'written': 0, 'conflicts': 0, 'write_errors': 0}
+
+    # ---- ledgers ----
+    def deadline(self, date):
+        """When bookings for a date close: deadline_hour on the evening before"""
+        return datetime.strptime(date, '%Y-%m-%d') - timedelta(hours=24 - self.deadline_hour)
+
+    def load(self, date, refresh=True):
+        """(Re)snapshot a date's bookings, keeping every redemption seen so far"""
+        if self.now().replace(tzinfo=None) < self.deadline(date):
+            raise LedgerNotReady(f"Bookings for {date} are open until {self.deadline(date):%Y-%m-%d %H:%M}")
+
+        with self.load_lock:
+            if not refresh and date in self.ledgers:
+                return self.ledgers[date]
+            ledger = DayLedger(date, self.bookings.booked(date), self.redemptions.list_for_date(date))
+            with self.lock:
+                previous = self.ledgers.get(date)
+                if previous is not None:
+                    for meal in MEALS:
+                        for employee_id, redeemed_at in previous.redeemed[meal].items():
+                            ledger.redeemed[meal].setdefault(employee_id, redeemed_at)
+                self.ledgers[date] = ledger
+                for stale in sorted(self.ledgers)[:-self.max_days]:
+                    del self.ledgers[stale]
+        return ledger
+
+    def ledger(self, date):
+        ledger = self.ledgers.get(date)
+        return ledger if ledger is not None else self.load(date, refresh=False)
+
+    # ---- scans ----
+    def redeem(self, date, meal, employee_id=None, badge=None, counter=None):
+        """
+        Serve one meal. Returns {'status', 'employee_id', 'name', 'meal', 'date',
+        'redeemed_at'}; for a second scan 'redeemed_at' is when it was first served.
+        """
+        if meal not in MEALS:
+            raise ValueError(f"Unknown meal: {meal}")
+        ledger = self.ledger(date)
+        if employee_id is None:
+            employee_id = ledger.badges.get(badge)
+
+        result = {'date': date, 'meal': meal, 'employee_id': employee_id,
+                  'name': ledger.names.get(employee_id), 'redeemed_at': None}
+        with self.lock:
+            self.stats['scans'] += 1
+            served = ledger.redeemed[meal]
+            if employee_id is None:
+                status = UNKNOWN_EMPLOYEE
+            elif employee_id in served:
+                status = ALREADY_REDEEMED
+                result['redeemed_at'] = served[employee_id]
+            elif employee_id not in ledger.booked[meal]:
+                status = NOT_BOOKED
+            else:
+                status = OK
+                result['redeemed_at'] = served[employee_id] = self.now().strftime('%Y-%m-%d %H:%M:%S')
+                self.pending.append({'date': date, 'meal': meal, 'employee_id': employee_id,
+                                     'redeemed_at': result['redeemed_at'], 'counter': counter})
+                if len(self.pending) >= self.batch_size:
+                    self.wakeup.set()
+            self.stats[status] += 1
+
+        result['status'] = status
+        return result
+
+    def summary(self, date):
+        ledger = self.ledger(date)
+        with self.lock:
+            meals = {
+                meal: {'booked': len(ledger.booked[meal]), 'redeemed': len(ledger.redeemed[meal])}
+                for meal in MEALS
+            }
+            return {'date': date, 'meals': meals, 'pending_writes': len(self.pending)}
+
+    # ---- write-behind ----
+    def flush(self):
+        """Write buffered redemptions; returns how many were written"""
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if not batch:
+            return 0
+        try:
+            conflicts = self.redemptions.insert_many(batch)
+        except Exception:
+            with self.lock:
+                self.pending[:0] = batch
+                self.stats['write_errors'] += 1
+            logger.exception('redemption.write_failed', extra={'event': 'redemption.write_failed', 'size': len(batch)})
+            return 0
+
+        with self.lock:
+            self.stats['written'] += len(batch) - conflicts
+            self.stats['conflicts'] += conflicts
+        if conflicts:
+            logger.warning('redemption.conflict', extra={'event': 'redemption.conflict', 'count': conflicts})
+        return len(batch) - conflicts
+
+    def start(self):
+        self.writer = threading.Thread(target=self._run, daemon=True)
+        self.writer.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self.stopping.set()
+        self.wakeup.set()
+        if self.writer:
+            self.writer.join(timeout)
+        self.flush()
+
+    def _run(self):
+        while not self.stopping.is_set():
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            if self.flush() == 0 and self.pending:
+                # The store is failing; back off before retrying the buffer
+                self.stopping.wait(self.flush_interval * 4)
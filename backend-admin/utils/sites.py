@@ -0,0 +1,27 @@
+# Shared with backend-admin: edit this copy in backend-employee/utils, then run sync_utils.py
+"""
+Per-site instances of caches and workers. Each site gets its own, built
+on first use, so one site's traffic never evicts or blocks another's.
+"""
+import threading
+
+
+class PerSite:
+    """Lazily built {site_id: factory(site_id)}"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.instances = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, site_id):
+        instance = self.instances.get(site_id)
+        if instance is None:
+            with self.lock:
+                instance = self.instances.get(site_id)
+                if instance is None:
+                    instance = self.instances[site_id] = self.factory(site_id)
+        return instance
+
+    def values(self):
+        return list(self.instances.values())
@@ -0,0 +1,65 @@
+# Shared with backend-admin: edit this copy in backend-employee/utils, then run sync_utils.py
+"""
+Delta sync: clients keep the revision of their last /sync response and
+send it back as ?since=, getting only the documents written or deleted
+after it.
+
+Revisions are wall-clock microseconds from several workers, taken before
+the write commits, so a document can land just behind a revision a client
+has already been given. Each query therefore reaches OVERLAP back; what
+is sent twice is a keyed upsert on the client. The queries go to the
+primary, since a secondary can lag by far more than OVERLAP. A client that has never
+synced, or whose revision is older than the tombstones kept, gets a full
+snapshot with reset=True and replaces what it holds.
+"""
+import os
+import time
+
+OVERLAP = int(float(os.getenv('SYNC_OVERLAP_SECONDS', 5)) * 1_000_000)
+TOMBSTONE_DAYS = int(os.getenv('SYNC_TOMBSTONE_DAYS', 30))
+
+
+def parse_since(value):
+    """?since= as a revision (0 when absent); ValueError unless a non-negative integer"""
+    if value in (None, ''):
+        return 0
+    since = int(value)
+    if since < 0:
+        raise ValueError('since must be a non-negative revision')
+    return since
+
+
+def window(since, now=None):
+    """(now, after, reset): the query time, the revision to fetch after and whether it is a full snapshot"""
+    now = now or time.time_ns() // 1000
+    reset = since <= 0 or now - since > TOMBSTONE_DAYS * 86400 * 1_000_000
+    return now, 0 if reset else max(1, since - OVERLAP), reset
+
+
+def response(now, reset, changed, deleted=None):
+    """
+    {'rev', 'reset', <kind>: [...]} from fetched {kind: docs}. The revision
+    handed back is the query time (or a newer document's), so an idle client
+    still moves forward and never falls behind the tombstones
+    """
+    result = {'reset': reset}
+    rev = now
+    for kind, docs in changed.items():
+        result[kind] = docs
+        rev = max([rev, *(doc.get('rev', 0) for doc in docs)])
+    for kind, docs in (deleted or {}).items():
+        # A reset client drops everything it has, so deletions mean nothing to it
+        result[kind] = [] if reset else docs
+        rev = max([rev, *(doc['rev'] for doc in result[kind])])
+    result['rev'] = rev
+    return result
+
+
+def delta(since, changed, deleted=None, now=None):
+    """response() for changed/deleted {kind: fetch(after)}"""
+    now, after, reset = window(since, now)
+    return response(
+        now, reset,
+        {kind: fetch(after) for kind, fetch in changed.items()},
+        {kind: [] if reset else fetch(after) for kind, fetch in (deleted or {}).items()}
+    )
@@ -0,0 +1,166 @@
+"""
+Food-waste analytics. Prepared (and, where the kitchen measured it,
+served) servings per dish are set against what was booked (meal_counts)
+and, on days the counter scanned passes, what was actually redeemed.
+
+Everything is laid out as dense dates x meals and dates x dishes arrays
+built in one pass over the daily rollups, so the per-meal totals, the
+daily series and every dish's weekly trend are a handful of array
+reductions however long the range is.
+"""
+from datetime import datetime
+import numpy as np
+from repositories.base import MEALS
+from utils.dish_index import normalize
+from utils.procurement import date_range
+
+
+def _rate(numerator, denominator):
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype=float), where=denominator > 0)
+
+
+def _round(value):
+    return round(float(value), 3)
+
+
+def waste_report(start_date, end_date, counts, redemptions, production):
+    """
+    counts: meal_counts rollups; redemptions: [(date, meal, count)];
+    production: rows {'date', 'meal', 'dish', 'prepared', 'served'}.
+    Demand for a meal is its redeemed count on days with redemptions and
+    its booked count otherwise; a dish's leftover is prepared - served when
+    served was recorded and prepared - demand otherwise.
+    """
+    dates = date_range(start_date, end_date)
+    day = {date: i for i, date in enumerate(dates)}
+    meal = {name: j for j, name in enumerate(MEALS)}
+
+    booked = np.zeros((len(dates), len(MEALS)))
+    for doc in counts:
+        if doc['date'] in day:
+            booked[day[doc['date']]] = [doc.get(f"{name}_count", 0) for name in MEALS]
+
+    redeemed = np.zeros((len(dates), len(MEALS)))
+    for date, name, count in redemptions:
+        if date in day and name in meal:
+            redeemed[day[date], meal[name]] += count
+    scanned = redeemed.sum(axis=1, keepdims=True) > 0  # the counter was in use that day
+    demand = np.where(scanned, redeemed, booked)
+
+    # Dishes are columns keyed by (meal, normalized name); the first spelling seen is shown
+    columns, labels, cells = {}, [], []
+    for row in production:
+        if row['date'] not in day or row['meal'] not in meal:
+            continue
+        key = (row['meal'], normalize(row['dish']))
+        if key not in columns:
+            columns[key] = len(labels)
+            labels.append((row['meal'], row['dish']))
+        served = row.get('served')
+        cells.append((day[row['date']], columns[key], float(row['prepared']),
+                      float(served) if served is not None else np.nan))
+
+    prepared = np.zeros((len(dates), len(labels)))
+    served = np.full((len(dates), len(labels)), np.nan)
+    if cells:
+        rows, cols, quantities, measured = (np.array(values) for values in zip(*cells))
+        rows, cols = rows.astype(int), cols.astype(int)
+        np.add.at(prepared, (rows, cols), quantities)
+        served[rows, cols] = measured
+    dish_meal = np.array([meal[name] for name, _ in labels], dtype=int)
+
+    # dates x dishes: demand of each dish's meal, leftover from measured served or from demand
+    dish_demand = demand[:, dish_meal] if labels else np.zeros_like(prepared)
+    leftover = np.where(np.isnan(served), np.maximum(prepared - dish_demand, 0), np.maximum(prepared - served, 0))
+    leftover = np.where(prepared > 0, leftover, 0)
+
+    # Meal level: a meal's servings are those of its largest dish that day
+    meal_prepared = np.zeros((len(dates), len(MEALS)))
+    if labels:
+        np.maximum.at(meal_prepared.T, dish_meal, prepared.T)
+    cooked = meal_prepared > 0
+    over = np.where(cooked, np.maximum(meal_prepared - demand, 0), 0)
+
+    def summary(prepared_, booked_, redeemed_, demand_, over_, booked_scanned):
+        return {
+            'prepared': _round(prepared_),
+            'booked': _round(booked_),
+            'redeemed': _round(redeemed_) if scanned.any() else None,
+            'demand': _round(demand_),
+            'over_produced': _round(over_),
+            'waste_rate': _round(over_ / prepared_) if prepared_ else 0.0,
+            'no_show_rate': _round((booked_scanned - redeemed_) / booked_scanned) if booked_scanned else None
+        }
+
+    # Booked/redeemed/demand only count days the meal was cooked, so they line up with prepared
+    # (no-shows only over days the counter was scanning)
+    booked_c, redeemed_c, demand_c = (np.where(cooked, values, 0) for values in (booked, redeemed, demand))
+    booked_s = np.where(cooked & scanned, booked, 0)
+    meals = {
+        name: summary(meal_prepared[:, j].sum(), booked_c[:, j].sum(), redeemed_c[:, j].sum(),
+                      demand_c[:, j].sum(), over[:, j].sum(), booked_s[:, j].sum())
+        for j, name in enumerate(MEALS)
+    }
+    totals = summary(meal_prepared.sum(), booked_c.sum(), redeemed_c.sum(), demand_c.sum(), over.sum(),
+                     booked_s.sum())
+
+    daily_prepared, daily_demand, daily_over = meal_prepared.sum(axis=1), demand_c.sum(axis=1), over.sum(axis=1)
+    daily = [
+        {'date': date, 'prepared': _round(daily_prepared[i]), 'demand': _round(daily_demand[i]),
+         'over_produced': _round(daily_over[i])}
+        for i, date in enumerate(dates) if daily_prepared[i]
+    ]
+
+    # Weekly buckets (Monday-based) and a least-squares slope of the daily waste rate per dish
+    start = datetime.strptime(dates[0], '%Y-%m-%d').date()
+    offset = start.weekday()
+    week = (np.arange(len(dates)) + offset) // 7
+    weekly_prepared = np.zeros((week[-1] + 1, len(labels)))
+    weekly_leftover = np.zeros_like(weekly_prepared)
+    np.add.at(weekly_prepared, week, prepared)
+    np.add.at(weekly_leftover, week, leftover)
+    weekly_rate = _rate(weekly_leftover, weekly_prepared)
+
+    mask = prepared > 0
+    x = np.arange(len(dates), dtype=float)[:, None]
+    y = _rate(leftover, prepared)
+    n = mask.sum(axis=0)
+    sx, sy = (mask * x).sum(axis=0), (mask * y).sum(axis=0)
+    sxx, sxy = (mask * x * x).sum(axis=0), (mask * x * y).sum(axis=0)
+    denominator = n * sxx - sx * sx
+    slope = np.divide(n * sxy - sx * sy, denominator, out=np.zeros(len(labels)), where=denominator > 0)
+
+    dish_prepared, dish_leftover = prepared.sum(axis=0), leftover.sum(axis=0)
+    dish_demand_total = np.where(mask, dish_demand, 0).sum(axis=0)
+    week_starts = [
+        dates[max(0, w * 7 - offset)] for w in range(week[-1] + 1)
+    ]
+    dishes = [
+        {
+            'meal': meal_name,
+            'dish': dish,
+            'days': int(n[k]),
+            'prepared': _round(dish_prepared[k]),
+            'demand': _round(dish_demand_total[k]),
+            'leftover': _round(dish_leftover[k]),
+            'waste_rate': _round(dish_leftover[k] / dish_prepared[k]) if dish_prepared[k] else 0.0,
+            'trend_per_week': _round(slope[k] * 7),
+            'weekly': [
+                {'week_start': week_starts[w], 'prepared': _round(weekly_prepared[w, k]),
+                 'leftover': _round(weekly_leftover[w, k]), 'waste_rate': _round(weekly_rate[w, k])}
+                for w in np.flatnonzero(weekly_prepared[:, k])
+            ]
+        }
+        for k, (meal_name, dish) in enumerate(labels)
+    ]
+    dishes.sort(key=lambda entry: entry['leftover'], reverse=True)
+
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'redemptions_available': bool(scanned.any()),
+        'totals': totals,
+        'meals': meals,
+        'daily': daily,
+        'dishes': dishes
+    }
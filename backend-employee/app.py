@@ -7,12 +7,37 @@ from functools import wraps
 from datetime import datetime, timedelta
 import pytz
 import os
+import time
 from dotenv import load_dotenv
+from repositories import get_repositories, storage_engine, DEFAULT_SITE
+from repositories.base import MEALS, MENU_FIELDS, PREFERENCE_FIELDS, department_delta, parse_fields
+from utils.ratelimit import make_bucket_store, RateLimiter, rate_limited
+from utils.idempotency import IdempotencyCache, IdempotencyConflict, fingerprint
+from utils.task_queue import TaskQueue, TaskWorkers
+from utils.reminders import make_transport, send_reminders
+from utils.meal_pass import issue_pass
+from utils.sites import PerSite
+from utils.sync import parse_since, delta
+from utils.health import HealthProber, PoolMonitor, DEGRADED, DOWN, OK
+from utils.compression import init_flask_compression
+from utils.profiling import init_flask_profiling, init_mongo_profiling
+from utils.log import setup_logging, init_flask_request_id, log_event, parse_sample_rates
+from utils.menu_templates import TemplateExpander, menu_document, resolve_menu, resolve_menus
 
 load_dotenv()
 
+# meal_counts.updated fires on every preference save - keep a sample of it by default
+logger = setup_logging(
+    'employee-backend',
+    sample_rates=parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', 'meal_counts.updated=0.1'))
+)
+
 app = Flask(__name__)
 CORS(app, origins=['http://localhost:3000', 'http://localhost:5173'])
+init_flask_request_id(app)
+init_flask_compression(app, min_size=int(os.getenv('COMPRESSION_MIN_SIZE', 1024)))
+# PROFILE_TOKEN / PROFILE_SAMPLE_RATE turn on per-request profiles (utils/profiling.py)
+profiling = init_flask_profiling(app)
 
 # Configuration
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
@@ -20,13 +45,52 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-in-pr
 # Timezone setup - India Standard Time
 IST = pytz.timezone('Asia/Kolkata')
 
-# Database connection
-client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
-db = client['canteen_system']
-employees_collection = db['employees']
-meal_preferences_collection = db['meal_preferences']
-meal_counts_collection = db['meal_counts']
-menu_collection = db['menus']
+# Database connection (STORAGE_ENGINE=memory runs without a mongod)
+STORAGE_ENGINE = storage_engine('mongo')
+pool_monitor = PoolMonitor()
+init_mongo_profiling(profiling)
+client = MongoClient(
+    os.getenv('MONGO_URI', 'mongodb://localhost:27017/'), event_listeners=[pool_monitor]
+) if STORAGE_ENGINE == 'mongo' else None
+db = client['canteen_system'] if client else None
+repos = get_repositories('mongo', mongo_db=db)
+
+# Employee accounts are shared; menus, preferences and counts belong to a site,
+# which SITE_DATABASES can route to a database of its own
+SITE_IDS = [site.strip() for site in os.getenv('SITE_IDS', DEFAULT_SITE).split(',') if site.strip()]
+
+def site_repos(site_id):
+    return get_repositories('mongo', mongo_db=db, site_id=site_id)
+
+def employee_site(employee):
+    """The canteen an employee eats at"""
+    return employee.get('site_id') or DEFAULT_SITE
+
+# Each site's preference, count and revision indexes, in whichever database it
+# is routed to (create_index is a no-op once an index exists)
+if client is not None:
+    for index_site in SITE_IDS:
+        try:
+            site_repos(index_site).ensure_indexes()
+        except Exception:
+            logger.exception('indexes.failed', extra={'event': 'indexes.failed', 'site_id': index_site})
+
+# Rate limiting - token buckets, in-process unless RATE_LIMIT_REDIS_URL is set
+rate_limit_store = make_bucket_store(os.getenv('RATE_LIMIT_REDIS_URL'))
+login_limiter = RateLimiter(
+    rate_limit_store, 'employee-login',
+    rate=float(os.getenv('LOGIN_RATE_PER_MINUTE', 10)) / 60,
+    capacity=int(os.getenv('LOGIN_BURST', 5))
+)
+preference_limiter = RateLimiter(
+    rate_limit_store, 'meal-preference',
+    rate=float(os.getenv('PREFERENCE_RATE_PER_MINUTE', 30)) / 60,
+    capacity=int(os.getenv('PREFERENCE_BURST', 10))
+)
+
+# Duplicate preference submits replay the first result instead of re-writing
+preference_writes = IdempotencyCache(ttl=int(os.getenv('IDEMPOTENCY_TTL_SECONDS', 300)))
+DUPLICATE_SUBMIT_WINDOW = int(os.getenv('DUPLICATE_SUBMIT_WINDOW_SECONDS', 10))
 
 def get_current_time():
     """Get current time in IST"""
@@ -46,7 +110,7 @@ def token_required(f):
                 token = token[7:]
             
             data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-            current_employee = employees_collection.find_one({'_id': data['employee_id']}, {'password': 0})
+            current_employee = repos.employees.get(data['employee_id'])
             
             if not current_employee:
                 return jsonify({'success': False, 'error': 'Employee not found'}), 401
@@ -72,8 +136,12 @@ def employee_register():
         if not all(field in data for field in required_fields):
             return jsonify({'success': False, 'error': 'Missing required fields'}), 400
         
+        site_id = data.get('site_id') or DEFAULT_SITE
+        if site_id not in SITE_IDS:
+            return jsonify({'success': False, 'error': f'Unknown site: {site_id}'}), 400
+        
         # Check if employee already exists
-        if employees_collection.find_one({'$or': [{'employee_id': data['employee_id']}, {'email': data['email']}]}):
+        if repos.employees.exists(data['employee_id'], data['email']):
             return jsonify({'success': False, 'error': 'Employee ID or email already exists'}), 400
         
         # Create employee
@@ -83,21 +151,28 @@ def employee_register():
             'email': data['email'],
             'password': generate_password_hash(data['password']),
             'department': data.get('department', ''),
+            'site_id': site_id,
             'created_at': get_current_time()
         }
         
-        result = employees_collection.insert_one(employee_data)
+        new_id = repos.employees.create(employee_data)
         
         return jsonify({
             'success': True,
             'message': 'Employee registered successfully',
-            '_id': str(result.inserted_id)
+            '_id': new_id
         }), 201
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def login_rate_key():
+    """Client address plus the account being tried"""
+    data = request.get_json(silent=True) or {}
+    return f"{request.remote_addr}:{str(data.get('email', '')).lower()}"
+
 @app.route('/api/employee/login', methods=['POST'])
+@rate_limited(login_limiter, login_rate_key)
 def employee_login():
     """Employee login"""
     try:
@@ -106,14 +181,14 @@ def employee_login():
         if not data.get('email') or not data.get('password'):
             return jsonify({'success': False, 'error': 'Email and password required'}), 400
         
-        employee = employees_collection.find_one({'email': data['email']})
+        employee = repos.employees.get_by_email(data['email'])
         
         if not employee or not check_password_hash(employee['password'], data['password']):
             return jsonify({'success': False, 'error': 'Invalid credentials'}), 401
         
         # Generate JWT token
         token = jwt.encode({
-            'employee_id': str(employee['_id']),
+            'employee_id': employee['id'],
             'email': employee['email'],
             'exp': datetime.utcnow() + timedelta(hours=24)
         }, app.config['SECRET_KEY'], algorithm='HS256')
@@ -125,7 +200,8 @@ def employee_login():
                 'employee_id': employee['employee_id'],
                 'name': employee['name'],
                 'email': employee['email'],
-                'department': employee.get('department', '')
+                'department': employee.get('department', ''),
+                'site_id': employee_site(employee)
             }
         }), 200
         
@@ -142,17 +218,26 @@ def get_employee_profile(current_employee):
             'employee_id': current_employee['employee_id'],
             'name': current_employee['name'],
             'email': current_employee['email'],
-            'department': current_employee.get('department', '')
+            'department': current_employee.get('department', ''),
+            'site_id': employee_site(current_employee)
         }
     }), 200
 
 # ============ MENU ACCESS ============
+# Dates without a stored menu are expanded from the admin's recurring templates
+menu_templates = PerSite(lambda site_id: TemplateExpander(
+    site_repos(site_id).templates.list_all,
+    menu_document,
+    ttl=int(os.getenv('MENU_TEMPLATE_TTL', 60))
+))
+
 @app.route('/api/employee/menu/<date>', methods=['GET'])
 @token_required
 def get_menu(current_employee, date):
     """Get menu for a specific date"""
     try:
-        menu = menu_collection.find_one({'date': date}, {'_id': 0})
+        site_id = employee_site(current_employee)
+        menu = resolve_menu(site_repos(site_id).menus, menu_templates(site_id), date)
         
         if not menu:
             return jsonify({
@@ -168,19 +253,22 @@ def get_menu(current_employee, date):
 @app.route('/api/employee/menu/week', methods=['GET'])
 @token_required
 def get_week_menu(current_employee):
-    """Get menu for the current week"""
+    """Get menu for the current week; ?fields=date,lunch returns only those fields"""
     try:
+        try:
+            fields = parse_fields(request.args.get('fields'), MENU_FIELDS)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
         # Get date range for current week
         today = datetime.now(IST).date()
         start_date = today - timedelta(days=today.weekday())
         end_date = start_date + timedelta(days=6)
         
-        menus = list(menu_collection.find({
-            'date': {
-                '$gte': start_date.isoformat(),
-                '$lte': end_date.isoformat()
-            }
-        }, {'_id': 0}).sort('date', 1))
+        site_id = employee_site(current_employee)
+        menus = resolve_menus(
+            site_repos(site_id).menus, menu_templates(site_id), start_date.isoformat(), end_date.isoformat(), fields
+        )
         
         return jsonify({
             'success': True,
@@ -194,6 +282,7 @@ def get_week_menu(current_employee):
 # ============ MEAL PREFERENCES ============
 @app.route('/api/employee/meal-preference', methods=['POST'])
 @token_required
+@rate_limited(preference_limiter, lambda current_employee: current_employee['id'])
 def save_meal_preference(current_employee):
     """Employee selects which meals they want"""
     try:
@@ -202,72 +291,100 @@ def save_meal_preference(current_employee):
         if not data or 'date' not in data:
             return jsonify({'success': False, 'error': 'Date is required'}), 400
         
-        # Check deadline (9 PM IST)
-        now = datetime.now(IST)
-        meal_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
-        
-        # Can only submit for tomorrow or later
-        if meal_date <= now.date():
-            return jsonify({
-                'success': False,
-                'error': 'Can only submit preferences for future dates'
-            }), 400
+        employee_id = f"{employee_site(current_employee)}:{current_employee['id']}"
+        request_fingerprint = fingerprint(data)
+        idempotency_key = request.headers.get('Idempotency-Key')
         
-        # Check if before 9 PM deadline
-        if now.hour >= 21 and meal_date == (now.date() + timedelta(days=1)):
-            return jsonify({
-                'success': False,
-                'error': 'Deadline passed. Selections close at 9:00 PM'
-            }), 400
-        
-        preference_data = {
-            'employee_id': str(current_employee['_id']),
-            'employee_name': current_employee['name'],
-            'employee_email': current_employee['email'],
-            'date': data.get('date'),
-            'breakfast': data.get('breakfast', False),
-            'lunch': data.get('lunch', False),
-            'snacks': data.get('snacks', False),
-            'updated_at': get_current_time()
-        }
-        
-        # Update or insert preference
-        meal_preferences_collection.update_one(
-            {
-                'employee_id': str(current_employee['_id']),
-                'date': data.get('date')
-            },
-            {'$set': preference_data},
-            upsert=True
-        )
-        
-        # Update meal counts
-        update_meal_counts(data.get('date'))
+        if idempotency_key:
+            key, ttl, replace = f"{employee_id}:key:{idempotency_key}", None, False
+        else:
+            # No key - still collapse back-to-back identical submits for the same date
+            key, ttl, replace = f"{employee_id}:date:{data['date']}", DUPLICATE_SUBMIT_WINDOW, True
         
-        return jsonify({
-            'success': True,
-            'message': 'Meal preference saved successfully',
-            'preference': preference_data
-        }), 201
+        try:
+            (body, status), replayed = preference_writes.run(
+                key, request_fingerprint,
+                lambda: write_meal_preference(current_employee, data),
+                ttl=ttl, replace_on_mismatch=replace
+            )
+        except IdempotencyConflict as e:
+            return jsonify({'success': False, 'error': str(e)}), 422
+        
+        response = jsonify(body)
+        if replayed:
+            response.headers['Idempotent-Replayed'] = 'true'
+        return response, status
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def write_meal_preference(current_employee, data):
+    """Validate and store one preference; returns (body, status)"""
+    # Check deadline (9 PM IST)
+    now = datetime.now(IST)
+    meal_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+    
+    # Can only submit for tomorrow or later
+    if meal_date <= now.date():
+        return {
+            'success': False,
+            'error': 'Can only submit preferences for future dates'
+        }, 400
+    
+    # Check if before 9 PM deadline
+    if now.hour >= 21 and meal_date == (now.date() + timedelta(days=1)):
+        return {
+            'success': False,
+            'error': 'Deadline passed. Selections close at 9:00 PM'
+        }, 400
+    
+    preference_data = {
+        'employee_id': current_employee['id'],
+        'employee_name': current_employee['name'],
+        'employee_email': current_employee['email'],
+        'department': current_employee.get('department', ''),
+        'date': data.get('date'),
+        'breakfast': data.get('breakfast', False),
+        'lunch': data.get('lunch', False),
+        'snacks': data.get('snacks', False),
+        'updated_at': get_current_time()
+    }
+    
+    # Update or insert preference; the department breakdown moves by the difference from the old one
+    site_id = employee_site(current_employee)
+    site = site_repos(site_id)
+    previous = site.preferences.upsert(preference_data)
+    site.counts.add_department_delta(data.get('date'), department_delta(previous, preference_data))
+    
+    # Recompute meal counts in the background - bursts for the same site and date share one queued task
+    task_queue.enqueue(
+        'update_meal_counts', {'date': data.get('date'), 'site_id': site_id},
+        dedup_key=f"meal_counts:{site_id}:{data.get('date')}", delay=MEAL_COUNTS_DEBOUNCE
+    )
+    
+    return {
+        'success': True,
+        'message': 'Meal preference saved successfully',
+        'preference': preference_data
+    }, 201
+
 @app.route('/api/employee/meal-preference/<date>', methods=['GET'])
 @token_required
 def get_meal_preference(current_employee, date):
     """Get employee's meal preference for a specific date"""
     try:
-        preference = meal_preferences_collection.find_one(
-            {'employee_id': str(current_employee['_id']), 'date': date},
-            {'_id': 0}
-        )
+        preferences = site_repos(employee_site(current_employee)).preferences
+        preference = preferences.get(current_employee['id'], date)
+        
+        if not preference and date < datetime.now(IST).date().isoformat():
+            # Old dates may have been moved to a monthly archive collection
+            preference = preferences.get_archived(current_employee['id'], date)
         
         if not preference:
             return jsonify({
                 'success': True,
                 'preference': {
-                    'employee_id': str(current_employee['_id']),
+                    'employee_id': current_employee['id'],
                     'date': date,
                     'breakfast': False,
                     'lunch': False,
@@ -280,15 +397,40 @@ def get_meal_preference(current_employee, date):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/employee/meal-pass/<date>', methods=['GET'])
+@token_required
+def get_meal_pass(current_employee, date):
+    """Signed pass to show (as a QR code) at the serving counter"""
+    try:
+        preference = site_repos(employee_site(current_employee)).preferences.get(current_employee['id'], date)
+        meals = [meal for meal in MEALS if preference and preference.get(meal)]
+        
+        if not meals:
+            return jsonify({'success': False, 'error': 'No meals booked for this date'}), 404
+        
+        return jsonify({
+            'success': True,
+            'date': date,
+            'meals': meals,
+            'token': issue_pass(current_employee['id'], employee_site(current_employee), date)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/employee/meal-preferences/my', methods=['GET'])
 @token_required
 def get_my_preferences(current_employee):
-    """Get all preferences for current employee"""
+    """Get all preferences for current employee; ?fields= limits the fields of each"""
     try:
-        preferences = list(meal_preferences_collection.find(
-            {'employee_id': str(current_employee['_id'])},
-            {'_id': 0}
-        ).sort('date', -1).limit(30))
+        try:
+            fields = parse_fields(request.args.get('fields'), PREFERENCE_FIELDS)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        preferences = site_repos(employee_site(current_employee)).preferences.list_for_employee(
+            current_employee['id'], limit=30, fields=fields
+        )
         
         return jsonify({
             'success': True,
@@ -300,60 +442,85 @@ def get_my_preferences(current_employee):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # ============ MEAL COUNT AGGREGATION ============
-def update_meal_counts(date):
-    """Calculate meal counts and store in database"""
+def update_meal_counts(date, site_id=DEFAULT_SITE):
+    """
+    Calculate meal counts and store in database (raises so the task queue
+    retries). The department breakdown is recounted too, so any drift in the
+    per-write deltas is gone by the next debounced recount
+    """
+    site = site_repos(site_id)
+    count_data = site.preferences.count(date)
+    count_data['departments'] = site.preferences.department_counts(date)
+    count_data['updated_at'] = get_current_time()
+    
+    # Store/update in database
+    site.counts.put(count_data)
+    
+    log_event(logger, 'meal_counts.updated',
+              site_id=site_id,
+              date=date,
+              breakfast_count=count_data['breakfast_count'],
+              lunch_count=count_data['lunch_count'],
+              snacks_count=count_data['snacks_count'])
+
+# ============ PREFERENCE REMINDERS ============
+# REMINDER_TIME (IST, e.g. 19:00) turns on a daily run that reminds everyone
+# without a preference for the next day; REMINDER_TRANSPORT is 'log',
+# smtp://host:port or a webhook URL
+REMINDER_TIME = os.getenv('REMINDER_TIME')
+reminder_transport = make_transport(os.getenv('REMINDER_TRANSPORT', 'log'), os.getenv('REMINDER_SENDER', 'canteen@localhost'))
+
+def schedule_reminders(site_id):
+    """Queue a site's next daily reminder run (no-op when one is already waiting)"""
+    hour, minute = (int(part) for part in REMINDER_TIME.split(':'))
+    now = datetime.now(IST)
+    run_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if run_at <= now:
+        run_at += timedelta(days=1)
+    date = (run_at + timedelta(days=1)).strftime('%Y-%m-%d')
+    task_queue.enqueue(
+        'send_reminders', {'date': date, 'site_id': site_id},
+        dedup_key=f"reminders:{site_id}:{date}", delay=(run_at - now).total_seconds()
+    )
+
+def send_preference_reminders(date, site_id=DEFAULT_SITE):
+    """Remind employees with no preference for a date, then queue the next day's run"""
     try:
-        # Aggregate counts for the date
-        pipeline = [
-            {'$match': {'date': date}},
-            {'$group': {
-                '_id': None,
-                'breakfast_count': {'$sum': {'$cond': ['$breakfast', 1, 0]}},
-                'lunch_count': {'$sum': {'$cond': ['$lunch', 1, 0]}},
-                'snacks_count': {'$sum': {'$cond': ['$snacks', 1, 0]}},
-                'total_employees': {'$sum': 1}
-            }}
-        ]
-        
-        result = list(meal_preferences_collection.aggregate(pipeline))
-        
-        if result:
-            counts = result[0]
-            count_data = {
-                'date': date,
-                'breakfast_count': counts.get('breakfast_count', 0),
-                'lunch_count': counts.get('lunch_count', 0),
-                'snacks_count': counts.get('snacks_count', 0),
-                'total_employees': counts.get('total_employees', 0),
-                'updated_at': get_current_time()
-            }
-        else:
-            count_data = {
-                'date': date,
-                'breakfast_count': 0,
-                'lunch_count': 0,
-                'snacks_count': 0,
-                'total_employees': 0,
-                'updated_at': get_current_time()
-            }
-        
-        # Store/update in database
-        meal_counts_collection.update_one(
-            {'date': date},
-            {'$set': count_data},
-            upsert=True
+        send_reminders(
+            site_repos(site_id), reminder_transport, date, get_current_time(),
+            batch_size=int(os.getenv('REMINDER_BATCH_SIZE', 500)),
+            rate=float(os.getenv('REMINDER_RATE_PER_SECOND', 50))
         )
-        
-        print(f"Meal counts updated for {date}: {count_data}")
-            
-    except Exception as e:
-        print(f"Error updating meal counts: {e}")
+    finally:
+        if REMINDER_TIME:
+            schedule_reminders(site_id)
+
+# Post-write work goes through a durable SQLite queue; saves for a date inside the
+# debounce window share one queued recompute. TASK_WORKER_THREADS=0 leaves draining
+# to a separate `python tasks.py work` process.
+MEAL_COUNTS_DEBOUNCE = int(os.getenv('MEAL_COUNTS_DEBOUNCE_MS', 250)) / 1000
+TASK_HANDLERS = {'update_meal_counts': update_meal_counts, 'send_reminders': send_preference_reminders}
+
+task_queue = TaskQueue(
+    os.getenv('TASK_QUEUE_PATH', 'tasks.db'),
+    max_attempts=int(os.getenv('TASK_MAX_ATTEMPTS', 5))
+)
+task_workers = TaskWorkers(task_queue, TASK_HANDLERS, threads=int(os.getenv('TASK_WORKER_THREADS', 1)))
+if task_workers.threads > 0:
+    task_workers.start()
+if REMINDER_TIME:
+    for reminder_site in SITE_IDS:
+        schedule_reminders(reminder_site)
 
 @app.route('/api/employee/meal-counts/<date>', methods=['GET'])
 def get_local_meal_counts(date):
     """Get meal counts for a specific date"""
     try:
-        counts = meal_counts_collection.find_one({'date': date}, {'_id': 0})
+        site_id = request.args.get('site') or DEFAULT_SITE
+        if site_id not in SITE_IDS:
+            return jsonify({'success': False, 'error': f'Unknown site: {site_id}'}), 400
+        
+        counts = site_repos(site_id).counts.get(date)
         
         if not counts:
             return jsonify({
@@ -372,6 +539,37 @@ def get_local_meal_counts(date):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# ============ SYNC ============
+@app.route('/api/employee/sync', methods=['GET'])
+@token_required
+def sync(current_employee):
+    """
+    What changed since ?since= (the last response's rev): the site's menus,
+    menu deletions and meal counts, and the employee's own preferences.
+    Days filled from a template are not stored menus; /menu/week has them
+    """
+    try:
+        try:
+            since = parse_since(request.args.get('since'))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'since must be a non-negative revision'}), 400
+        
+        site = site_repos(employee_site(current_employee))
+        changes = delta(
+            since,
+            {
+                'menus': site.menus.changed_since,
+                'preferences': lambda after: site.preferences.changed_since(current_employee['id'], after),
+                'counts': site.counts.changed_since
+            },
+            {'deleted_menus': site.menus.deleted_since}
+        )
+        
+        return jsonify({'success': True, **changes}), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # ============ HEALTH CHECK ============
 @app.route('/', methods=['GET'])
 def home():
@@ -382,19 +580,59 @@ def home():
         'timestamp': get_current_time()
     }), 200
 
+# Probes are answered from a background prober's last results, never from the database
+DB_SLOW_MS = float(os.getenv('HEALTH_DB_SLOW_MS', 250))
+TASK_LAG_DEGRADED = float(os.getenv('HEALTH_TASK_LAG_SECONDS', 60))
+
+def database_health():
+    started = time.perf_counter()
+    client.admin.command('ping')
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return {'status': DEGRADED if elapsed_ms > DB_SLOW_MS else OK, 'ping_ms': round(elapsed_ms, 2)}
+
+def task_queue_health():
+    totals = task_queue.stats()['total']
+    stalled = totals['lag_seconds'] > TASK_LAG_DEGRADED or (
+        task_workers.threads > 0 and not all(thread.is_alive() for thread in task_workers.workers)
+    )
+    return {
+        'status': DEGRADED if stalled else OK,
+        'queued': totals['queued'],
+        'failed': totals['failed'],
+        'lag_seconds': totals['lag_seconds']
+    }
+
+health = HealthProber(interval=float(os.getenv('HEALTH_INTERVAL_SECONDS', 5)))
+if client is not None:
+    health.add('database', database_health)
+    health.add('pool', lambda: pool_monitor.check(client.options.pool_options.max_pool_size))
+health.add('task_queue', task_queue_health)
+health.start()
+
+@app.route('/live', methods=['GET'])
+def live():
+    """The process is serving and its prober is running"""
+    alive = health.live()
+    return jsonify({'status': 'alive' if alive else 'prober_stopped'}), 200 if alive else 503
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Ready unless a critical check is down or the last probe is stale; degraded still takes traffic"""
+    snapshot = health.snapshot()
+    return jsonify(snapshot), 503 if snapshot['status'] == DOWN else 200
+
 @app.route('/api/employee/health', methods=['GET'])
 def health_check():
-    try:
-        client.server_info()
-        db_status = 'connected'
-    except:
-        db_status = 'disconnected'
-    
+    snapshot = health.snapshot()
+    database = snapshot['checks'].get('database')
     return jsonify({
-        'status': 'healthy',
+        'status': 'healthy' if snapshot['status'] == OK else snapshot['status'],
         'service': 'employee-backend',
         'timestamp': get_current_time(),
-        'database': db_status
+        'database': STORAGE_ENGINE if client is None else (
+            'unknown' if database is None else 'disconnected' if database['status'] == DOWN else 'connected'
+        ),
+        'checks': snapshot['checks']
     }), 200
 
 if __name__ == '__main__':
@@ -0,0 +1,641 @@
+"""
+Asyncio variant of the employee API in app.py: the same routes, checks and
+JSON responses, served by FastAPI on Motor. A request waiting on Mongo
+yields the event loop, so one worker keeps many requests in flight, and
+database calls a handler makes that don't depend on each other are issued
+together (menu + templates, the department delta + the count recompute
+enqueue, the four /sync reads).
+
+    uvicorn async_app:app --port 5003 --workers 4
+
+Meal count recomputes and reminders are queued exactly as app.py queues
+them; run `python tasks.py work` beside it to drain the queue.
+"""
+import asyncio
+import json
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import jwt
+import pytz
+from dotenv import load_dotenv
+from fastapi import FastAPI, Depends, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from repositories import get_async_repositories, storage_engine, DEFAULT_SITE
+from repositories.base import MEALS, MENU_FIELDS, PREFERENCE_FIELDS, department_delta, parse_fields
+from utils.ratelimit import make_bucket_store, MemoryBucketStore, RateLimiter
+from utils.idempotency import AsyncIdempotencyCache, IdempotencyConflict, fingerprint
+from utils.task_queue import TaskQueue
+from utils.meal_pass import issue_pass
+from utils.sites import PerSite
+from utils.sync import parse_since, window, response as sync_response
+from utils.health import HealthProber, PoolMonitor, DEGRADED, DOWN, OK
+from utils.compression import CompressionMiddleware
+from utils.log import setup_logging, fastapi_request_id_middleware, parse_sample_rates
+from utils.profiling import ProfilingConfig, ProfilingMiddleware, init_mongo_profiling
+from utils.menu_templates import TemplateExpander, menu_document, fetch_fields, fill_menus
+
+load_dotenv()
+
+logger = setup_logging(
+    'employee-backend-async',
+    sample_rates=parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', 'meal_counts.updated=0.1'))
+)
+
+SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
+
+# Timezone setup - India Standard Time
+IST = pytz.timezone('Asia/Kolkata')
+
+# Database connection (STORAGE_ENGINE=memory runs without a mongod)
+STORAGE_ENGINE = storage_engine('mongo')
+MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 100))
+pool_monitor = PoolMonitor()
+# PROFILE_TOKEN / PROFILE_SAMPLE_RATE turn on per-request profiles (utils/profiling.py)
+profiling = ProfilingConfig.from_env()
+init_mongo_profiling(profiling)
+if STORAGE_ENGINE == 'mongo':
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(
+        os.getenv('MONGO_URI', 'mongodb://localhost:27017/'), maxPoolSize=MAX_POOL_SIZE, event_listeners=[pool_monitor]
+    )
+else:
+    client = None
+db = client['canteen_system'] if client else None
+repos = get_async_repositories(db)
+
+SITE_IDS = [site.strip() for site in os.getenv('SITE_IDS', DEFAULT_SITE).split(',') if site.strip()]
+
+def site_repos(site_id):
+    return get_async_repositories(db, site_id)
+
+def employee_site(employee):
+    """The canteen an employee eats at"""
+    return employee.get('site_id') or DEFAULT_SITE
+
+# Rate limiting - token buckets, in-process unless RATE_LIMIT_REDIS_URL is set
+rate_limit_store = make_bucket_store(os.getenv('RATE_LIMIT_REDIS_URL'))
+login_limiter = RateLimiter(
+    rate_limit_store, 'employee-login',
+    rate=float(os.getenv('LOGIN_RATE_PER_MINUTE', 10)) / 60,
+    capacity=int(os.getenv('LOGIN_BURST', 5))
+)
+preference_limiter = RateLimiter(
+    rate_limit_store, 'meal-preference',
+    rate=float(os.getenv('PREFERENCE_RATE_PER_MINUTE', 30)) / 60,
+    capacity=int(os.getenv('PREFERENCE_BURST', 10))
+)
+
+# Duplicate preference submits replay the first result instead of re-writing
+preference_writes = AsyncIdempotencyCache(ttl=int(os.getenv('IDEMPOTENCY_TTL_SECONDS', 300)))
+DUPLICATE_SUBMIT_WINDOW = int(os.getenv('DUPLICATE_SUBMIT_WINDOW_SECONDS', 10))
+
+MEAL_COUNTS_DEBOUNCE = int(os.getenv('MEAL_COUNTS_DEBOUNCE_MS', 250)) / 1000
+task_queue = TaskQueue(
+    os.getenv('TASK_QUEUE_PATH', 'tasks.db'),
+    max_attempts=int(os.getenv('TASK_MAX_ATTEMPTS', 5))
+)
+
+def get_current_time():
+    """Get current time in IST"""
+    return datetime.now(IST).strftime('%Y-%m-%d %H:%M:%S')
+
+# ============ RESPONSES ============
+class JSONResponse(Response):
+    """Serialized as Flask's jsonify does (sorted keys, compact, trailing newline), so both apps answer alike"""
+    media_type = 'application/json'
+
+    def render(self, content):
+        return (json.dumps(content, sort_keys=True, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+
+class ErrorResponse(Exception):
+    """Raised from dependencies to answer {'success': False, 'error': ...} with a status"""
+
+    def __init__(self, status, error, headers=None):
+        super().__init__(error)
+        self.status = status
+        self.error = error
+        self.headers = headers
+
+def json_response(body, status=200, headers=None):
+    return JSONResponse(body, status_code=status, headers=headers)
+
+def failure(e):
+    return json_response({'success': False, 'error': str(e)}, 500)
+
+async def rate_limit(limiter, key):
+    """429 once the bucket for key is empty; a shared (Redis) bucket is hit off the event loop"""
+    if isinstance(limiter.store, MemoryBucketStore):
+        allowed, retry_after = limiter.hit(key)
+    else:
+        allowed, retry_after = await asyncio.to_thread(limiter.hit, key)
+
+    if not allowed:
+        raise ErrorResponse(
+            429, 'Too many requests. Please try again shortly', {'Retry-After': str(max(1, math.ceil(retry_after)))}
+        )
+
+# ============ APP ============
+# Probes are answered from a background prober's last results, never from the database
+DB_SLOW_MS = float(os.getenv('HEALTH_DB_SLOW_MS', 250))
+TASK_LAG_DEGRADED = float(os.getenv('HEALTH_TASK_LAG_SECONDS', 60))
+health = HealthProber(interval=float(os.getenv('HEALTH_INTERVAL_SECONDS', 5)))
+event_loop = None
+
+def database_health():
+    """Ping through the app's own event loop, so a blocked loop shows up as a down database"""
+    started = time.perf_counter()
+    asyncio.run_coroutine_threadsafe(client.admin.command('ping'), event_loop).result(health.stale_after)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return {'status': DEGRADED if elapsed_ms > DB_SLOW_MS else OK, 'ping_ms': round(elapsed_ms, 2)}
+
+def task_queue_health():
+    """Workers run in `python tasks.py work`; only their lag is visible from here"""
+    totals = task_queue.stats()['total']
+    return {
+        'status': DEGRADED if totals['lag_seconds'] > TASK_LAG_DEGRADED else OK,
+        'queued': totals['queued'],
+        'failed': totals['failed'],
+        'lag_seconds': totals['lag_seconds']
+    }
+
+@asynccontextmanager
+async def lifespan(app):
+    global event_loop
+    event_loop = asyncio.get_running_loop()
+    if client is not None:
+        health.add('database', database_health)
+        health.add('pool', lambda: pool_monitor.check(MAX_POOL_SIZE))
+    health.add('task_queue', task_queue_health)
+    health.start()
+    yield
+    health.stop()
+    if client is not None:
+        client.close()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CompressionMiddleware, min_size=int(os.getenv('COMPRESSION_MIN_SIZE', 1024)))
+app.middleware('http')(fastapi_request_id_middleware)
+app.add_middleware(
+    CORSMiddleware, allow_origins=['http://localhost:3000', 'http://localhost:5173'],
+    allow_methods=['*'], allow_headers=['*']
+)
+if profiling.enabled:
+    app.add_middleware(ProfilingMiddleware, config=profiling)
+
+@app.exception_handler(ErrorResponse)
+async def error_response(request, exc):
+    return json_response({'success': False, 'error': exc.error}, exc.status, exc.headers)
+
+# ============ AUTHENTICATION ============
+async def token_required(request: Request):
+    """The employee of the bearer token (dependency)"""
+    token = request.headers.get('Authorization')
+
+    if not token:
+        raise ErrorResponse(401, 'Token is missing')
+
+    try:
+        if token.startswith('Bearer '):
+            token = token[7:]
+
+        data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+    except jwt.ExpiredSignatureError:
+        raise ErrorResponse(401, 'Token has expired')
+    except jwt.InvalidTokenError:
+        raise ErrorResponse(401, 'Invalid token')
+
+    current_employee = await repos.employees.get(data['employee_id'])
+    if not current_employee:
+        raise ErrorResponse(401, 'Employee not found')
+    return current_employee
+
+async def request_json(request):
+    """The JSON body, or None when it isn't JSON (Flask's get_json(silent=True))"""
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+# ============ EMPLOYEE AUTHENTICATION ============
+@app.post('/api/employee/register')
+async def employee_register(request: Request):
+    """Register new employee"""
+    try:
+        data = await request.json()
+
+        # Validation
+        required_fields = ['employee_id', 'name', 'email', 'password']
+        if not all(field in data for field in required_fields):
+            return json_response({'success': False, 'error': 'Missing required fields'}, 400)
+
+        site_id = data.get('site_id') or DEFAULT_SITE
+        if site_id not in SITE_IDS:
+            return json_response({'success': False, 'error': f'Unknown site: {site_id}'}, 400)
+
+        # Check if employee already exists
+        if await repos.employees.exists(data['employee_id'], data['email']):
+            return json_response({'success': False, 'error': 'Employee ID or email already exists'}, 400)
+
+        # Password hashing is deliberately slow CPU work: keep it off the event loop
+        employee_data = {
+            'employee_id': data['employee_id'],
+            'name': data['name'],
+            'email': data['email'],
+            'password': await asyncio.to_thread(generate_password_hash, data['password']),
+            'department': data.get('department', ''),
+            'site_id': site_id,
+            'created_at': get_current_time()
+        }
+
+        new_id = await repos.employees.create(employee_data)
+
+        return json_response({
+            'success': True,
+            'message': 'Employee registered successfully',
+            '_id': new_id
+        }, 201)
+
+    except Exception as e:
+        return failure(e)
+
+@app.post('/api/employee/login')
+async def employee_login(request: Request):
+    """Employee login"""
+    data = await request_json(request) or {}
+    await rate_limit(login_limiter, f"{request.client.host if request.client else None}:{str(data.get('email', '')).lower()}")
+    try:
+        if not data.get('email') or not data.get('password'):
+            return json_response({'success': False, 'error': 'Email and password required'}, 400)
+
+        employee = await repos.employees.get_by_email(data['email'])
+
+        if not employee or not await asyncio.to_thread(check_password_hash, employee['password'], data['password']):
+            return json_response({'success': False, 'error': 'Invalid credentials'}, 401)
+
+        # Generate JWT token
+        token = jwt.encode({
+            'employee_id': employee['id'],
+            'email': employee['email'],
+            'exp': datetime.utcnow() + timedelta(hours=24)
+        }, SECRET_KEY, algorithm='HS256')
+
+        return json_response({
+            'success': True,
+            'token': token,
+            'employee': {
+                'employee_id': employee['employee_id'],
+                'name': employee['name'],
+                'email': employee['email'],
+                'department': employee.get('department', ''),
+                'site_id': employee_site(employee)
+            }
+        })
+
+    except Exception as e:
+        return failure(e)
+
+@app.get('/api/employee/me')
+async def get_employee_profile(current_employee: dict = Depends(token_required)):
+    """Get current employee profile"""
+    return json_response({
+        'success': True,
+        'employee': {
+            'employee_id': current_employee['employee_id'],
+            'name': current_employee['name'],
+            'email': current_employee['email'],
+            'department': current_employee.get('department', ''),
+            'site_id': employee_site(current_employee)
+        }
+    })
+
+# ============ MENU ACCESS ============
+# Dates without a stored menu are expanded from the admin's recurring templates,
+# whose list is fetched here (asynchronously) whenever it is due a reload
+menu_templates = PerSite(lambda site_id: TemplateExpander(
+    None, menu_document, ttl=int(os.getenv('MENU_TEMPLATE_TTL', 60))
+))
+
+async def fresh_templates(site_id):
+    """The site's TemplateExpander with a current template list"""
+    expander = menu_templates(site_id)
+    if expander.stale():
+        expander.load(await site_repos(site_id).templates.list_all())
+    return expander
+
+# Registered before /menu/{date}, which would otherwise match 'week'
+@app.get('/api/employee/menu/week')
+async def get_week_menu(request: Request, current_employee: dict = Depends(token_required)):
+    """Get menu for the current week; ?fields=date,lunch returns only those fields"""
+    try:
+        try:
+            fields = parse_fields(request.query_params.get('fields'), MENU_FIELDS)
+        except ValueError as e:
+            return json_response({'success': False, 'error': str(e)}, 400)
+
+        # Get date range for current week
+        today = datetime.now(IST).date()
+        start_date = (today - timedelta(days=today.weekday())).isoformat()
+        end_date = (today - timedelta(days=today.weekday()) + timedelta(days=6)).isoformat()
+
+        site_id = employee_site(current_employee)
+        stored, expander = await asyncio.gather(
+            site_repos(site_id).menus.list_range(start_date, end_date, fetch_fields(fields)),
+            fresh_templates(site_id)
+        )
+        menus = fill_menus(stored, expander, start_date, end_date, fields)
+
+        return json_response({
+            'success': True,
+            'count': len(menus),
+            'menus': menus
+        })
+
+    except Exception as e:
+        return failure(e)
+
+@app.get('/api/employee/menu/{date}')
+async def get_menu(date: str, current_employee: dict = Depends(token_required)):
+    """Get menu for a specific date"""
+    try:
+        site_id = employee_site(current_employee)
+        menu, expander = await asyncio.gather(site_repos(site_id).menus.get(date), fresh_templates(site_id))
+
+        if not menu:
+            try:
+                menu = expander.expand(date)
+            except ValueError:
+                menu = None  # not a YYYY-MM-DD date, so nothing to expand
+
+        if not menu:
+            return json_response({
+                'success': False,
+                'message': 'Menu not found for this date'
+            }, 404)
+
+        return json_response({'success': True, 'menu': menu})
+
+    except Exception as e:
+        return failure(e)
+
+# ============ MEAL PREFERENCES ============
+@app.post('/api/employee/meal-preference')
+async def save_meal_preference(request: Request, current_employee: dict = Depends(token_required)):
+    """Employee selects which meals they want"""
+    await rate_limit(preference_limiter, current_employee['id'])
+    try:
+        data = await request.json()
+
+        if not data or 'date' not in data:
+            return json_response({'success': False, 'error': 'Date is required'}, 400)
+
+        employee_id = f"{employee_site(current_employee)}:{current_employee['id']}"
+        request_fingerprint = fingerprint(data)
+        idempotency_key = request.headers.get('Idempotency-Key')
+
+        if idempotency_key:
+            key, ttl, replace = f"{employee_id}:key:{idempotency_key}", None, False
+        else:
+            # No key - still collapse back-to-back identical submits for the same date
+            key, ttl, replace = f"{employee_id}:date:{data['date']}", DUPLICATE_SUBMIT_WINDOW, True
+
+        try:
+            (body, status), replayed = await preference_writes.run(
+                key, request_fingerprint,
+                lambda: write_meal_preference(current_employee, data),
+                ttl=ttl, replace_on_mismatch=replace
+            )
+        except IdempotencyConflict as e:
+            return json_response({'success': False, 'error': str(e)}, 422)
+
+        return json_response(body, status, {'Idempotent-Replayed': 'true'} if replayed else None)
+
+    except Exception as e:
+        return failure(e)
+
+async def write_meal_preference(current_employee, data):
+    """Validate and store one preference; returns (body, status)"""
+    # Check deadline (9 PM IST)
+    now = datetime.now(IST)
+    meal_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+
+    # Can only submit for tomorrow or later
+    if meal_date <= now.date():
+        return {
+            'success': False,
+            'error': 'Can only submit preferences for future dates'
+        }, 400
+
+    # Check if before 9 PM deadline
+    if now.hour >= 21 and meal_date == (now.date() + timedelta(days=1)):
+        return {
+            'success': False,
+            'error': 'Deadline passed. Selections close at 9:00 PM'
+        }, 400
+
+    preference_data = {
+        'employee_id': current_employee['id'],
+        'employee_name': current_employee['name'],
+        'employee_email': current_employee['email'],
+        'department': current_employee.get('department', ''),
+        'date': data.get('date'),
+        'breakfast': data.get('breakfast', False),
+        'lunch': data.get('lunch', False),
+        'snacks': data.get('snacks', False),
+        'updated_at': get_current_time()
+    }
+
+    # The upsert's before-image feeds the department delta; the delta and the
+    # queued recompute don't depend on each other, so they go out together
+    site_id = employee_site(current_employee)
+    site = site_repos(site_id)
+    previous = await site.preferences.upsert(preference_data)
+    await asyncio.gather(
+        site.counts.add_department_delta(data.get('date'), department_delta(previous, preference_data)),
+        asyncio.to_thread(
+            task_queue.enqueue, 'update_meal_counts', {'date': data.get('date'), 'site_id': site_id},
+            dedup_key=f"meal_counts:{site_id}:{data.get('date')}", delay=MEAL_COUNTS_DEBOUNCE
+        )
+    )
+
+    return {
+        'success': True,
+        'message': 'Meal preference saved successfully',
+        'preference': preference_data
+    }, 201
+
+@app.get('/api/employee/meal-preference/{date}')
+async def get_meal_preference(date: str, current_employee: dict = Depends(token_required)):
+    """Get employee's meal preference for a specific date"""
+    try:
+        preferences = site_repos(employee_site(current_employee)).preferences
+        preference = await preferences.get(current_employee['id'], date)
+
+        if not preference and date < datetime.now(IST).date().isoformat():
+            # Old dates may have been moved to a monthly archive collection
+            preference = await preferences.get_archived(current_employee['id'], date)
+
+        if not preference:
+            return json_response({
+                'success': True,
+                'preference': {
+                    'employee_id': current_employee['id'],
+                    'date': date,
+                    'breakfast': False,
+                    'lunch': False,
+                    'snacks': False
+                }
+            })
+
+        return json_response({'success': True, 'preference': preference})
+
+    except Exception as e:
+        return failure(e)
+
+@app.get('/api/employee/meal-pass/{date}')
+async def get_meal_pass(date: str, current_employee: dict = Depends(token_required)):
+    """Signed pass to show (as a QR code) at the serving counter"""
+    try:
+        preference = await site_repos(employee_site(current_employee)).preferences.get(current_employee['id'], date)
+        meals = [meal for meal in MEALS if preference and preference.get(meal)]
+
+        if not meals:
+            return json_response({'success': False, 'error': 'No meals booked for this date'}, 404)
+
+        return json_response({
+            'success': True,
+            'date': date,
+            'meals': meals,
+            'token': issue_pass(current_employee['id'], employee_site(current_employee), date)
+        })
+
+    except Exception as e:
+        return failure(e)
+
+@app.get('/api/employee/meal-preferences/my')
+async def get_my_preferences(request: Request, current_employee: dict = Depends(token_required)):
+    """Get all preferences for current employee; ?fields= limits the fields of each"""
+    try:
+        try:
+            fields = parse_fields(request.query_params.get('fields'), PREFERENCE_FIELDS)
+        except ValueError as e:
+            return json_response({'success': False, 'error': str(e)}, 400)
+
+        preferences = await site_repos(employee_site(current_employee)).preferences.list_for_employee(
+            current_employee['id'], limit=30, fields=fields
+        )
+
+        return json_response({
+            'success': True,
+            'count': len(preferences),
+            'preferences': preferences
+        })
+
+    except Exception as e:
+        return failure(e)
+
+@app.get('/api/employee/meal-counts/{date}')
+async def get_local_meal_counts(date: str, request: Request):
+    """Get meal counts for a specific date"""
+    try:
+        site_id = request.query_params.get('site') or DEFAULT_SITE
+        if site_id not in SITE_IDS:
+            return json_response({'success': False, 'error': f'Unknown site: {site_id}'}, 400)
+
+        counts = await site_repos(site_id).counts.get(date)
+
+        if not counts:
+            return json_response({
+                'success': True,
+                'counts': {
+                    'date': date,
+                    'breakfast_count': 0,
+                    'lunch_count': 0,
+                    'snacks_count': 0,
+                    'total_employees': 0
+                }
+            })
+
+        return json_response({'success': True, 'counts': counts})
+
+    except Exception as e:
+        return failure(e)
+
+# ============ SYNC ============
+async def no_rows():
+    return []
+
+@app.get('/api/employee/sync')
+async def sync(request: Request, current_employee: dict = Depends(token_required)):
+    """The employee sync of app.py, its four reads issued together"""
+    try:
+        try:
+            since = parse_since(request.query_params.get('since'))
+        except ValueError:
+            return json_response({'success': False, 'error': 'since must be a non-negative revision'}, 400)
+
+        site = site_repos(employee_site(current_employee))
+        now, after, reset = window(since)
+        menus, preferences, counts, deleted_menus = await asyncio.gather(
+            site.menus.changed_since(after),
+            site.preferences.changed_since(current_employee['id'], after),
+            site.counts.changed_since(after),
+            no_rows() if reset else site.menus.deleted_since(after)
+        )
+        changes = sync_response(
+            now, reset,
+            {'menus': menus, 'preferences': preferences, 'counts': counts},
+            {'deleted_menus': deleted_menus}
+        )
+
+        return json_response({'success': True, **changes})
+
+    except Exception as e:
+        return failure(e)
+
+# ============ HEALTH CHECK ============
+@app.get('/')
+async def home():
+    return json_response({
+        'message': 'Karmic Canteen Employee Backend API',
+        'status': 'running',
+        'version': '1.0',
+        'timestamp': get_current_time()
+    })
+
+@app.get('/live')
+async def live():
+    """The process is serving and its prober is running"""
+    alive = health.live()
+    return json_response({'status': 'alive' if alive else 'prober_stopped'}, 200 if alive else 503)
+
+@app.get('/ready')
+async def ready():
+    """Ready unless a critical check is down or the last probe is stale; degraded still takes traffic"""
+    snapshot = health.snapshot()
+    return json_response(snapshot, 503 if snapshot['status'] == DOWN else 200)
+
+@app.get('/api/employee/health')
+async def health_check():
+    snapshot = health.snapshot()
+    database = snapshot['checks'].get('database')
+    return json_response({
+        'status': 'healthy' if snapshot['status'] == OK else snapshot['status'],
+        'service': 'employee-backend',
+        'timestamp': get_current_time(),
+        'database': STORAGE_ENGINE if client is None else (
+            'unknown' if database is None else 'disconnected' if database['status'] == DOWN else 'connected'
+        ),
+        'checks': snapshot['checks']
+    })
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, host='0.0.0.0', port=int(os.getenv('PORT', 5003)))
@@ -0,0 +1,117 @@
+"""
+Throughput and latency of the Flask app (app.py) against the asyncio app
+(async_app.py) at the same worker count, over HTTP, as concurrency rises.
+Both servers must share one database and SECRET_KEY; the preference rate
+limit has to be lifted or most writes come back 429.
+
+    export PREFERENCE_RATE_PER_MINUTE=1000000000 PREFERENCE_BURST=1000000000
+    gunicorn --workers 4 --bind :5002 app:app
+    uvicorn async_app:app --workers 4 --port 5003
+    python bench_concurrency.py --target flask=http://localhost:5002 \\
+        --target async=http://localhost:5003 --concurrency 1,8,32,128 --requests 20000
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+
+async def seed(base_url, employee_count, prefix):
+    """Register and log in employees through the API; returns one bearer token per employee"""
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        async def employee(i):
+            account = {
+                'employee_id': f'{prefix}-{i:06d}',
+                'name': f'Bench Employee {i}',
+                'email': f'{prefix}-{i}@bench.example.com',
+                'password': 'bench-password',
+                'department': f'dept-{i % 10}'
+            }
+            response = await client.post('/api/employee/register', json=account)
+            response.raise_for_status()
+            response = await client.post('/api/employee/login', json={'email': account['email'], 'password': account['password']})
+            response.raise_for_status()
+            return 'Bearer ' + response.json()['token']
+
+        # Password hashing is slow on purpose; a few at a time keeps the login limiter and CPU calm
+        tokens = []
+        for start in range(0, employee_count, 16):
+            tokens += await asyncio.gather(*(employee(i) for i in range(start, min(start + 16, employee_count))))
+        return tokens
+
+
+async def run(base_url, tokens, total, concurrency, days):
+    """
+    bench_handlers' mix (60% preference writes, 30% preference reads, 10%
+    menu reads) from `concurrency` clients; returns (elapsed, latencies, statuses)
+    """
+    today = datetime.now().date()
+    dates = [(today + timedelta(days=offset)).isoformat() for offset in range(2, days)]
+    latencies, statuses = [], {}
+    issued = 0
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        async def worker():
+            nonlocal issued
+            while issued < total:
+                i = issued
+                issued += 1
+                headers = {'Authorization': tokens[i % len(tokens)]}
+                date = dates[i % len(dates)]
+                kind = i % 10
+
+                started = time.perf_counter()
+                try:
+                    if kind < 6:
+                        response = await client.post('/api/employee/meal-preference', headers=headers, json={
+                            'date': date, 'breakfast': i % 2 == 0, 'lunch': True, 'snacks': i % 3 == 0
+                        })
+                    elif kind < 9:
+                        response = await client.get(f'/api/employee/meal-preference/{date}', headers=headers)
+                    else:
+                        response = await client.get(f'/api/employee/menu/{date}', headers=headers)
+                    status = response.status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started, latencies, statuses
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def bench(args):
+    targets = [target.split('=', 1) for target in args.target]
+    prefix = f"bench-{int(time.time())}"
+    tokens = await seed(targets[0][1], args.employees, prefix)
+
+    print(f"{'target':<10} {'clients':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  status codes")
+    for concurrency in [int(level) for level in args.concurrency.split(',')]:
+        for name, base_url in targets:
+            elapsed, latencies, statuses = await run(base_url, tokens, args.requests, concurrency, args.days)
+            latencies.sort()
+            print(f"{name:<10} {concurrency:>7} {len(latencies) / elapsed:>9,.0f} "
+                  f"{percentile(latencies, 0.5) * 1000:>8.1f} {percentile(latencies, 0.95) * 1000:>8.1f} "
+                  f"{percentile(latencies, 0.99) * 1000:>8.1f}  {statuses}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--target', action='append', required=True, help="name=base URL (repeatable)")
+    parser.add_argument('--concurrency', default='1,8,32,128', help="comma-separated client counts")
+    parser.add_argument('--requests', type=int, default=20000, help="requests per target and concurrency level")
+    parser.add_argument('--employees', type=int, default=200)
+    parser.add_argument('--days', type=int, default=9)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+In-process handler benchmark on the in-memory storage engine, so the
+numbers are handler CPU cost only (routing, auth, validation, JSON).
+
+    python bench_handlers.py --requests 1000000 --employees 5000 --processes 8
+
+Requests go straight to the WSGI app, not through the test client. One
+process manages about 1,200 req/s (0.8 ms a request, mostly Flask request
+and response handling, JWT decoding and the task enqueue) on a single
+vCPU, so a million requests take some 14 minutes there; --processes
+splits the run across forked copies of the seeded app, one per core.
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('STORAGE_ENGINE', 'memory')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+# Every simulated employee submits far more often than a real one would
+os.environ.setdefault('PREFERENCE_RATE_PER_MINUTE', '1000000000')
+os.environ.setdefault('PREFERENCE_BURST', '1000000000')
+os.environ.setdefault('TASK_QUEUE_PATH', os.path.join(tempfile.mkdtemp(), 'bench-tasks.db'))
+
+import jwt
+from app import app, repos
+
+
+def seed(employee_count, days):
+    """Create employees and a week of menus; returns one bearer token per employee"""
+    today = datetime.now().date()
+    for offset in range(days):
+        day = today + timedelta(days=offset)
+        repos.menus.put({
+            'date': day.isoformat(),
+            'day': day.strftime('%A'),
+            'breakfast': ['Idli', 'Poha'],
+            'lunch': ['Dal', 'Rice', 'Paneer'],
+            'snacks': ['Samosa']
+        })
+
+    tokens = []
+    for i in range(employee_count):
+        employee_id = repos.employees.create({
+            'employee_id': f'EMP{i:06d}',
+            'name': f'Employee {i}',
+            'email': f'employee{i}@example.com',
+            'password': 'not-used',
+            'department': f'dept-{i % 10}'
+        })
+        tokens.append('Bearer ' + jwt.encode(
+            {'employee_id': employee_id, 'exp': datetime.utcnow() + timedelta(hours=1)},
+            app.config['SECRET_KEY'], algorithm='HS256'
+        ))
+    return tokens
+
+
+def environ(method, path, token, body=None):
+    """
+    A bare WSGI environ; building it by hand instead of through the test
+    client's EnvironBuilder keeps the harness out of the measurement
+    """
+    data = json.dumps(body).encode() if body is not None else b''
+    return {
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_HOST': 'localhost',
+        'HTTP_AUTHORIZATION': token,
+        'CONTENT_TYPE': 'application/json' if body is not None else '',
+        'CONTENT_LENGTH': str(len(data)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(data),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+
+
+def run(tokens, total, days):
+    """Mix of 60% preference writes, 30% preference reads, 10% menu reads"""
+    today = datetime.now().date()
+    dates = [(today + timedelta(days=offset)).isoformat() for offset in range(2, days)]
+    statuses = {}
+    status = None
+
+    def start_response(status_line, headers, exc_info=None):
+        nonlocal status
+        status = int(status_line[:3])
+
+    started = time.perf_counter()
+    for i in range(total):
+        token = tokens[i % len(tokens)]
+        date = dates[i % len(dates)]
+        kind = i % 10
+
+        if kind < 6:
+            request = environ('POST', '/api/employee/meal-preference', token, {
+                'date': date, 'breakfast': i % 2 == 0, 'lunch': True, 'snacks': i % 3 == 0
+            })
+        elif kind < 9:
+            request = environ('GET', f'/api/employee/meal-preference/{date}', token)
+        else:
+            request = environ('GET', f'/api/employee/menu/{date}', token)
+
+        body = app(request, start_response)
+        b''.join(body)
+        if hasattr(body, 'close'):
+            body.close()
+        statuses[status] = statuses.get(status, 0) + 1
+
+    return time.perf_counter() - started, statuses
+
+
+def run_share(args):
+    """One forked process's part of the run (the seeded store is inherited)"""
+    return run(*args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=100000)
+    parser.add_argument('--employees', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=9)
+    parser.add_argument('--processes', type=int, default=1, help="forked processes sharing the requests")
+    args = parser.parse_args()
+
+    tokens = seed(args.employees, args.days)
+    if args.processes == 1:
+        elapsed, statuses = run(tokens, args.requests, args.days)
+    else:
+        shares = [args.requests // args.processes + (i < args.requests % args.processes) for i in range(args.processes)]
+        started = time.perf_counter()
+        with multiprocessing.get_context('fork').Pool(args.processes) as pool:
+            results = pool.map(run_share, [(tokens, share, args.days) for share in shares])
+        elapsed = time.perf_counter() - started
+        statuses = {}
+        for _, counts in results:
+            for status, count in counts.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    print(f"{args.requests} requests in {elapsed:.2f}s "
+          f"({args.requests / elapsed:,.0f} req/s, {elapsed / args.requests * 1e6:.1f} us/req)")
+    print(f"status codes: {statuses}")
+
+
+if __name__ == '__main__':
+    main()
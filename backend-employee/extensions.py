@@ -0,0 +1,10 @@
+"""
+Flask extensions of the SQLAlchemy employee app (main.py). Kept out of
+main.py so models, services and repositories can import them without
+importing the app module itself.
+"""
+from flask_sqlalchemy import SQLAlchemy
+from flask_jwt_extended import JWTManager
+
+db = SQLAlchemy()
+jwt = JWTManager()
@@ -0,0 +1,67 @@
+"""
+Bulk-register employees from a CSV (header row) or JSON roster.
+
+    python import_employees.py roster.csv
+    python import_employees.py roster.json --engine sql --dry-run
+"""
+import argparse
+import os
+import time
+from datetime import datetime
+
+import pytz
+
+from utils.bulk_import import BATCH_SIZE, parse_roster, import_employees
+
+
+def employee_repository(engine):
+    os.environ['STORAGE_ENGINE'] = engine
+    from repositories import get_repositories
+
+    if engine == 'mongo':
+        from pymongo import MongoClient
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+        return get_repositories('mongo', mongo_db=client['canteen_system']).employees
+    return get_repositories(engine).employees
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk employee onboarding")
+    parser.add_argument("roster", help="CSV or JSON file with employee_id, name, email, password[, department]")
+    parser.add_argument("--format", choices=["csv", "json"], help="defaults to the file extension")
+    parser.add_argument("--engine", choices=["mongo", "sql", "memory"], default="mongo")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, help="password hashing processes (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="validate and dedupe without writing")
+    args = parser.parse_args()
+
+    fmt = args.format or os.path.splitext(args.roster)[1].lstrip('.').lower()
+    with open(args.roster, encoding='utf-8-sig') as f:
+        rows = parse_roster(f.read(), fmt)
+
+    started = time.time()
+
+    def run(employees, created_at):
+        return import_employees(employees, rows, created_at, args.batch_size, args.workers, args.dry_run)
+
+    if args.engine == 'sql':
+        from main import create_app
+
+        with create_app().app_context():
+            report = run(employee_repository('sql'), datetime.utcnow())
+    else:
+        created_at = datetime.now(pytz.timezone('Asia/Kolkata')).strftime('%Y-%m-%d %H:%M:%S')
+        report = run(employee_repository(args.engine), created_at)
+
+    for error in report['errors']:
+        print(f"row {error['row']} ({error['employee_id'] or '-'}): {error['error']}")
+    verb = "Would create" if args.dry_run else "Created"
+    print(f"{verb} {report['created']} of {report['total']} employees, "
+          f"{report['failed']} failed, in {time.time() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,9 @@
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from config import Config
-
-db = SQLAlchemy()
-jwt = JWTManager()
+from extensions import db, jwt
+from utils.compression import init_flask_compression
+from utils.profiling import init_flask_profiling, init_sqlalchemy_profiling
 
 def create_app():
     app = Flask(__name__)
@@ -19,14 +17,18 @@ def create_app():
     # Initialize extensions
     db.init_app(app)
     jwt.init_app(app)
+    init_flask_compression(app)
+    profiling = init_flask_profiling(app)
     
     # Register blueprints
     from routes.employee_routes import employee_bp
     app.register_blueprint(employee_bp, url_prefix='/api/employee')
     
-    # Create tables
+    # Create tables (every model module, not just those the routes import)
+    import models.employee, models.meal  # noqa: F401
     with app.app_context():
         db.create_all()
+        init_sqlalchemy_profiling(db.engine, profiling)
     
     @app.route('/')
     def index():
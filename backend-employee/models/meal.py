@@ -1,4 +1,4 @@
-from app import db
+from extensions import db
 from datetime import datetime
 
 class MenuItem(db.Model):
@@ -25,4 +25,42 @@ class MenuItem(db.Model):
             'category': self.category,
             'available_date': self.available_date.isoformat(),
             'is_active': self.is_active
-        }
\ No newline at end of file
+        }
+
+
+class SyncCursor(db.Model):
+    __tablename__ = 'sync_cursors'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    seq = db.Column(db.Integer, nullable=False, default=0)  # last change applied
+    latest = db.Column(db.Integer, nullable=False, default=0)  # newest change the source reported
+    synced_at = db.Column(db.DateTime)  # last time seq caught up with latest
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'seq': self.seq,
+            'latest': self.latest,
+            'synced_at': self.synced_at.isoformat() if self.synced_at else None
+        }
+
+
+class MenuTemplate(db.Model):
+    __tablename__ = 'menu_templates'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date)
+    weeks = db.Column(db.JSON, nullable=False)  # [{weekday: {meal_type: [menu_item ids]}}]
+    overrides = db.Column(db.JSON, default=dict)  # {'YYYY-MM-DD': day or null}
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'weeks': self.weeks,
+            'overrides': self.overrides or {}
+        }
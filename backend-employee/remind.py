@@ -0,0 +1,51 @@
+"""
+Send meal preference reminders now (for cron, or to re-run a day by hand).
+Employees already reminded for the date are skipped.
+
+    python remind.py                                 # tomorrow, log only
+    python remind.py --site blr --transport smtp://localhost:1025
+    python remind.py --date 2025-06-02 --transport smtp://localhost:1025
+    python remind.py --transport https://notify.internal/hooks/canteen --rate 20
+"""
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytz
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+from repositories import get_repositories, storage_engine, DEFAULT_SITE
+from utils.reminders import BATCH_SIZE, RATE_PER_SECOND, make_transport, send_reminders
+
+IST = pytz.timezone('Asia/Kolkata')
+
+
+def main():
+    load_dotenv()
+    tomorrow = (datetime.now(IST) + timedelta(days=1)).strftime('%Y-%m-%d')
+
+    parser = argparse.ArgumentParser(description="Remind employees without a meal preference")
+    parser.add_argument("--date", default=tomorrow, help="preference date (default: tomorrow, IST)")
+    parser.add_argument("--site", default=DEFAULT_SITE, help="canteen site id")
+    parser.add_argument("--transport", default=os.getenv('REMINDER_TRANSPORT', 'log'),
+                        help="'log', smtp://host:port or a webhook URL")
+    parser.add_argument("--sender", default=os.getenv('REMINDER_SENDER', 'canteen@localhost'))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--rate", type=float, default=RATE_PER_SECOND, help="messages per second")
+    parser.add_argument("--mongo-uri", default=os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    args = parser.parse_args()
+
+    db = MongoClient(args.mongo_uri)['canteen_system'] if storage_engine('mongo') == 'mongo' else None
+    repos = get_repositories('mongo', mongo_db=db, site_id=args.site)
+    summary = send_reminders(
+        repos, make_transport(args.transport, args.sender), args.date,
+        datetime.now(IST).strftime('%Y-%m-%d %H:%M:%S'),
+        batch_size=args.batch_size, rate=args.rate
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
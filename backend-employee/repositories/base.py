@@ -0,0 +1,269 @@
+"""Storage interfaces implemented by the Mongo, SQL and in-memory engines"""
+from datetime import date as date_cls, datetime
+import threading
+import time
+
+
+def iso_date(value):
+    """Normalise a date, datetime or 'YYYY-MM-DD' string to 'YYYY-MM-DD'"""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date_cls):
+        return value.isoformat()
+    return value
+
+
+def as_date(value):
+    """Normalise a date, datetime or 'YYYY-MM-DD' string to a date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date_cls):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+MEALS = ('breakfast', 'lunch', 'snacks')
+COUNT_FIELDS = ('breakfast_count', 'lunch_count', 'snacks_count', 'total_employees')
+
+# What ?fields= may select on each list endpoint
+MENU_FIELDS = ('date', 'day', *MEALS, 'template', 'updated_at', 'updated_by')
+PREFERENCE_FIELDS = ('date', *MEALS, 'employee_id', 'employee_name', 'employee_email', 'department', 'updated_at')
+SELECTION_FIELDS = ('id', 'employee_id', 'date', 'meal_type', 'menu_item_id', 'status', 'created_at', 'updated_at')
+
+
+def department_key(name):
+    """A department as a meal_counts.departments field name ('.' and a leading '$' are not allowed)"""
+    name = (name or '').strip().replace('.', '_').lstrip('$')
+    return name or 'Unassigned'
+
+
+_revision_lock = threading.Lock()
+_last_revision = 0
+
+
+def next_revision():
+    """
+    Revision stamped on menus, preferences, counts and tombstones: microseconds
+    since the epoch, bumped past the last one this process handed out so it
+    never repeats or goes backwards. Workers share the wall clock, so their
+    revisions interleave in time order to within clock skew (see utils.sync).
+    """
+    global _last_revision
+    with _revision_lock:
+        _last_revision = max(_last_revision + 1, time.time_ns() // 1000)
+        return _last_revision
+
+
+def parse_fields(value, allowed):
+    """?fields=a,b as a tuple of field names (None when absent: every field); unknown names raise ValueError"""
+    if not value:
+        return None
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(allowed)})")
+    return fields or None
+
+
+def project(doc, fields):
+    """Only `fields` of a document, for engines with nothing to push the projection into"""
+    if fields is None:
+        return doc
+    return {field: doc[field] for field in fields if field in doc}
+
+
+def department_delta(before, after):
+    """
+    {department: {count field: change}} from the before/after images of one
+    preference. Images stored before departments were tracked carry no
+    'department' and were never counted, so there is nothing to take back.
+    """
+    delta = {}
+    for image, sign in ((before, -1), (after, 1)):
+        if not image or 'department' not in image:
+            continue
+        counts = delta.setdefault(department_key(image.get('department')), dict.fromkeys(COUNT_FIELDS, 0))
+        counts['total_employees'] += sign
+        for meal in MEALS:
+            counts[f'{meal}_count'] += sign * bool(image.get(meal))
+
+    return {
+        department: {field: change for field, change in counts.items() if change}
+        for department, counts in delta.items()
+        if any(counts.values())
+    }
+
+
+def empty_counts(date):
+    return {
+        'date': date,
+        'breakfast_count': 0,
+        'lunch_count': 0,
+        'snacks_count': 0,
+        'total_employees': 0
+    }
+
+
+class EmployeeRepository:
+    """Employee accounts. Documents carry their id as a string under 'id'."""
+
+    def get(self, employee_id):
+        """Employee by internal id, without the password hash"""
+        raise NotImplementedError
+
+    def get_by_email(self, email):
+        """Employee by email, including the password hash"""
+        raise NotImplementedError
+
+    def exists(self, employee_id, email):
+        """True if the badge id or email is already registered"""
+        raise NotImplementedError
+
+    def create(self, employee):
+        """Store a new employee and return its id"""
+        raise NotImplementedError
+
+    def existing(self, employee_ids, emails):
+        """(badge ids, emails) from the given lists that are already registered"""
+        raise NotImplementedError
+
+    def create_many(self, employees):
+        """Insert a batch; returns [(index in batch, error)] for rejected rows"""
+        raise NotImplementedError
+
+
+class MenuRepository:
+    """Menus stored as one document per date (breakfast/lunch/snacks lists)"""
+
+    def get(self, date):
+        raise NotImplementedError
+
+    def list_range(self, start_date, end_date, fields=None):
+        """Menus between two dates (inclusive), oldest first (only `fields` when given)"""
+        raise NotImplementedError
+
+    def changed_since(self, rev):
+        """Menus written after a revision (every menu for 0), oldest revision first"""
+        raise NotImplementedError
+
+    def deleted_since(self, rev):
+        """Tombstones [{'date', 'rev'}] of menus deleted after a revision"""
+        raise NotImplementedError
+
+
+class TemplateRepository:
+    """Recurring menu templates (utils.menu_templates); written by the admin side"""
+
+    def list_all(self):
+        raise NotImplementedError
+
+
+class PreferenceRepository:
+    """One preference document per (employee, date)"""
+
+    def get(self, employee_id, date):
+        raise NotImplementedError
+
+    def get_archived(self, employee_id, date):
+        """Preference moved to a monthly archive, if the engine archives"""
+        return None
+
+    def upsert(self, preference):
+        """Insert or replace the preference for (employee_id, date); returns the previous one or None"""
+        raise NotImplementedError
+
+    def list_for_employee(self, employee_id, limit=30, fields=None):
+        """Most recent preferences of one employee, newest first (only `fields` when given)"""
+        raise NotImplementedError
+
+    def count(self, date):
+        """Aggregate booked breakfast/lunch/snacks and employees for a date"""
+        raise NotImplementedError
+
+    def department_counts(self, date):
+        """
+        {department key: counts} for a date, recounted from the preferences that
+        carry a department (the ones department_delta counts)
+        """
+        raise NotImplementedError
+
+    def changed_since(self, employee_id, rev):
+        """One employee's preferences written after a revision (all of them for 0)"""
+        raise NotImplementedError
+
+    def iter_unbooked_employees(self, date, batch_size=1000):
+        """Employees ({'id', 'name', 'email', 'department'}) with no preference for a date"""
+        raise NotImplementedError
+
+
+class ReminderLogRepository:
+    """One entry per reminder sent (or attempted) to an employee for a date"""
+
+    def sent_employee_ids(self, date):
+        """Employees already reminded successfully for a date"""
+        raise NotImplementedError
+
+    def record(self, entries):
+        """Append dispatch entries ({'date', 'employee_id', 'email', 'status', 'error', 'sent_at'})"""
+        raise NotImplementedError
+
+
+class CountRepository:
+    """Per-date meal count rollups"""
+
+    def get(self, date):
+        raise NotImplementedError
+
+    def put(self, counts):
+        """Set the company-wide totals for counts['date'] (the departments breakdown is kept)"""
+        raise NotImplementedError
+
+    def add_department_delta(self, date, delta):
+        """Apply a department_delta() to the date's per-department breakdown"""
+        raise NotImplementedError
+
+    def changed_since(self, rev):
+        """Rollups written after a revision (every rollup for 0)"""
+        raise NotImplementedError
+
+
+class MenuItemRepository:
+    """Individual menu items offered on a date (SQL menu model)"""
+
+    def get(self, item_id):
+        raise NotImplementedError
+
+    def list_for_date(self, date):
+        """Active items available on a date"""
+        raise NotImplementedError
+
+    def sync_state(self, name):
+        """{'seq', 'latest', 'synced_at'} of a change-log cursor; seq is 0 before the first pull"""
+        raise NotImplementedError
+
+    def apply_changes(self, name, changes, seq, latest):
+        """
+        Apply pulled admin changes newer than the cursor and move it to seq in
+        one transaction. Upserts are keyed by the admin item id; a delete
+        deactivates the item so past selections keep their menu item.
+        """
+        raise NotImplementedError
+
+
+class SelectionRepository:
+    """One meal selection per (employee, date, meal_type)"""
+
+    def get(self, employee_id, date, meal_type):
+        raise NotImplementedError
+
+    def save(self, employee_id, date, meal_type, menu_item_id, status='confirmed'):
+        """Create or update the selection for (employee_id, date, meal_type)"""
+        raise NotImplementedError
+
+    def set_status(self, employee_id, date, meal_type, status):
+        """Change the status of an existing selection; False if there is none"""
+        raise NotImplementedError
+
+    def list_for_employee(self, employee_id, start_date, end_date, fields=None):
+        """Selections in a date range (only `fields` when given)"""
+        raise NotImplementedError
@@ -0,0 +1,393 @@
+"""
+Indexed in-memory engine for tests and benchmarks. Every lookup the
+handlers make is a dict hit or a bisect over a sorted key list, and
+per-date meal counts are maintained on write so count() is O(1).
+"""
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+import itertools
+import threading
+from repositories import DEFAULT_SITE
+from repositories.base import (
+    EmployeeRepository, MenuRepository, TemplateRepository, PreferenceRepository, CountRepository,
+    ReminderLogRepository, MenuItemRepository, SelectionRepository, MEALS, COUNT_FIELDS, department_key,
+    empty_counts, iso_date, project, next_revision
+)
+
+
+def changed(docs, rev):
+    """Copies of the documents written after a revision (all of them for 0), oldest revision first"""
+    return sorted((dict(doc) for doc in docs if not rev or doc.get('rev', 0) > rev), key=lambda doc: doc.get('rev', 0))
+
+
+class MemoryEmployeeRepository(EmployeeRepository):
+
+    def __init__(self):
+        self.docs = {}
+        self.by_email = {}
+        self.by_employee_id = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def get(self, employee_id):
+        doc = self.docs.get(str(employee_id))
+        if doc is None:
+            return None
+        doc = dict(doc)
+        doc.pop('password', None)
+        return doc
+
+    def get_by_email(self, email):
+        employee_id = self.by_email.get(email)
+        return dict(self.docs[employee_id]) if employee_id else None
+
+    def exists(self, employee_id, email):
+        return employee_id in self.by_employee_id or email in self.by_email
+
+    def create(self, employee):
+        with self.lock:
+            new_id = str(next(self.ids))
+            doc = dict(employee, id=new_id)
+            self.docs[new_id] = doc
+            self.by_email[doc['email']] = new_id
+            self.by_employee_id[doc['employee_id']] = new_id
+        return new_id
+
+    def existing(self, employee_ids, emails):
+        return (
+            {employee_id for employee_id in employee_ids if employee_id in self.by_employee_id},
+            {email for email in emails if email in self.by_email}
+        )
+
+    def create_many(self, employees):
+        rejected = []
+        for index, employee in enumerate(employees):
+            with self.lock:
+                duplicate = self.exists(employee['employee_id'], employee['email'])
+            if duplicate:
+                rejected.append((index, 'Employee ID or email already exists'))
+            else:
+                self.create(employee)
+        return rejected
+
+
+class MemoryMenuRepository(MenuRepository):
+
+    def __init__(self):
+        self.docs = {}
+        self.dates = []
+        self.tombstones = {}  # date -> revision of the deletion
+        self.lock = threading.Lock()
+
+    def put(self, menu):
+        """Seed or replace a menu (the employee app itself never writes menus)"""
+        with self.lock:
+            if menu['date'] not in self.docs:
+                insort(self.dates, menu['date'])
+            self.docs[menu['date']] = dict(menu, rev=next_revision())
+            self.tombstones.pop(menu['date'], None)
+
+    def remove(self, date):
+        """Drop a seeded menu, leaving a tombstone as the admin app would"""
+        with self.lock:
+            if self.docs.pop(date, None) is None:
+                return False
+            del self.dates[bisect_left(self.dates, date)]
+            self.tombstones[date] = next_revision()
+            return True
+
+    def get(self, date):
+        doc = self.docs.get(date)
+        return dict(doc) if doc else None
+
+    def list_range(self, start_date, end_date, fields=None):
+        with self.lock:
+            dates = self.dates[bisect_left(self.dates, start_date):bisect_right(self.dates, end_date)]
+            return [dict(project(self.docs[date], fields)) for date in dates]
+
+    def changed_since(self, rev):
+        with self.lock:
+            return changed(self.docs.values(), rev)
+
+    def deleted_since(self, rev):
+        with self.lock:
+            deleted = [{'date': date, 'rev': deleted_rev} for date, deleted_rev in self.tombstones.items() if deleted_rev > rev]
+        return sorted(deleted, key=lambda doc: doc['rev'])
+
+
+class MemoryTemplateRepository(TemplateRepository):
+
+    def __init__(self):
+        self.docs = {}
+
+    def put(self, template):
+        """Seed or replace a template"""
+        self.docs[template['name']] = dict(template)
+
+    def list_all(self):
+        return sorted((dict(doc) for doc in self.docs.values()), key=lambda doc: doc['start_date'])
+
+
+class MemoryPreferenceRepository(PreferenceRepository):
+
+    def __init__(self, employees, site_id):
+        self.employees = employees
+        self.site_id = site_id
+        self.docs = {}           # (employee_id, date) -> preference
+        self.employee_dates = {}  # employee_id -> sorted dates
+        self.date_employees = {}  # date -> employee ids with a preference
+        self.date_counts = {}    # date -> [breakfast, lunch, snacks, total]
+        self.lock = threading.Lock()
+
+    def get(self, employee_id, date):
+        doc = self.docs.get((employee_id, date))
+        return dict(doc) if doc else None
+
+    def upsert(self, preference):
+        key = (preference['employee_id'], preference['date'])
+
+        with self.lock:
+            previous = self.docs.get(key)
+            doc = {**(previous or {}), **preference, 'rev': next_revision()}
+            self.docs[key] = doc
+
+            counts = self.date_counts.setdefault(key[1], [0, 0, 0, 0])
+            if previous is None:
+                insort(self.employee_dates.setdefault(key[0], []), key[1])
+                self.date_employees.setdefault(key[1], set()).add(key[0])
+                counts[3] += 1
+            for i, meal in enumerate(MEALS):
+                counts[i] += bool(doc.get(meal)) - bool(previous and previous.get(meal))
+        return dict(previous) if previous else None
+
+    def list_for_employee(self, employee_id, limit=30, fields=None):
+        with self.lock:
+            dates = self.employee_dates.get(employee_id, [])[::-1][:limit]
+            return [dict(project(self.docs[(employee_id, date)], fields)) for date in dates]
+
+    def changed_since(self, employee_id, rev):
+        with self.lock:
+            return changed((self.docs[(employee_id, date)] for date in self.employee_dates.get(employee_id, [])), rev)
+
+    def iter_unbooked_employees(self, date, batch_size=1000):
+        booked = self.date_employees.get(date, set())
+        for employee_id in self.employees.docs.keys() - booked:
+            doc = self.employees.docs[employee_id]
+            if (doc.get('site_id') or DEFAULT_SITE) == self.site_id:
+                yield {key: doc.get(key) for key in ('id', 'name', 'email', 'department')}
+
+    def count(self, date):
+        counts = empty_counts(date)
+        breakfast, lunch, snacks, total = self.date_counts.get(date, (0, 0, 0, 0))
+        counts.update(breakfast_count=breakfast, lunch_count=lunch, snacks_count=snacks, total_employees=total)
+        return counts
+
+    def department_counts(self, date):
+        departments = {}
+        with self.lock:
+            docs = [self.docs[(employee_id, date)] for employee_id in self.date_employees.get(date, ())]
+        for doc in docs:
+            if 'department' not in doc:
+                continue
+            counts = departments.setdefault(department_key(doc['department']), dict.fromkeys(COUNT_FIELDS, 0))
+            counts['total_employees'] += 1
+            for meal in MEALS:
+                counts[f'{meal}_count'] += bool(doc.get(meal))
+        return departments
+
+
+class MemoryReminderLogRepository(ReminderLogRepository):
+
+    def __init__(self):
+        self.entries = []
+        self.lock = threading.Lock()
+
+    def sent_employee_ids(self, date):
+        with self.lock:
+            return {entry['employee_id'] for entry in self.entries if entry['date'] == date and entry['status'] == 'sent'}
+
+    def record(self, entries):
+        with self.lock:
+            self.entries.extend(dict(entry) for entry in entries)
+
+
+class MemoryCountRepository(CountRepository):
+
+    def __init__(self):
+        self.docs = {}
+        self.lock = threading.Lock()
+
+    def get(self, date):
+        doc = self.docs.get(date)
+        if not doc:
+            return None
+        doc = dict(doc)
+        if 'departments' in doc:
+            doc['departments'] = {department: dict(counts) for department, counts in doc['departments'].items()}
+        return doc
+
+    def put(self, counts):
+        with self.lock:
+            self.docs[counts['date']] = {**self.docs.get(counts['date'], {}), **counts, 'rev': next_revision()}
+
+    def add_department_delta(self, date, delta):
+        with self.lock:
+            doc = self.docs.setdefault(date, {'date': date})
+            departments = doc.setdefault('departments', {})
+            for department, changes in delta.items():
+                counts = departments.setdefault(department, {})
+                for field, change in changes.items():
+                    counts[field] = counts.get(field, 0) + change
+            doc['rev'] = next_revision()
+
+    def changed_since(self, rev):
+        with self.lock:
+            return [self.get(doc['date']) for doc in changed(self.docs.values(), rev)]
+
+
+class MemoryMenuItemRepository(MenuItemRepository):
+
+    def __init__(self):
+        self.items = {}
+        self.by_date = {}
+        self.ids = itertools.count(1)
+        self.cursors = {}
+        self.lock = threading.Lock()
+
+    def put(self, item):
+        """Seed a menu item; returns its id"""
+        with self.lock:
+            item = dict(item)
+            item.setdefault('id', next(self.ids))
+            item['available_date'] = iso_date(item['available_date'])
+            item.setdefault('is_active', True)
+            self.items[item['id']] = item
+            self.by_date.setdefault(item['available_date'], set()).add(item['id'])
+        return item['id']
+
+    def get(self, item_id):
+        item = self.items.get(item_id)
+        return dict(item) if item else None
+
+    def list_for_date(self, date):
+        ids = self.by_date.get(iso_date(date), ())
+        return [dict(self.items[i]) for i in sorted(ids) if self.items[i]['is_active']]
+
+    def sync_state(self, name):
+        return dict(self.cursors.get(name) or {'seq': 0, 'latest': 0, 'synced_at': None})
+
+    def apply_changes(self, name, changes, seq, latest):
+        with self.lock:
+            cursor = self.cursors.setdefault(name, {'seq': 0, 'latest': 0, 'synced_at': None})
+            applied = 0
+            for change in changes:
+                if change['seq'] <= cursor['seq']:
+                    continue
+                source = change['item']
+                item = self.items.get(source['id'])
+                if change['op'] == 'delete':
+                    if item is not None:
+                        item['is_active'] = False
+                else:
+                    if item is not None:
+                        self.by_date[item['available_date']].discard(item['id'])
+                    item = self.items[source['id']] = dict(
+                        item or {}, id=source['id'], name=source['name'], category=source['category'],
+                        meal_type=source['meal_type'], available_date=iso_date(source['date']),
+                        is_active=bool(source['is_available'])
+                    )
+                    self.by_date.setdefault(item['available_date'], set()).add(item['id'])
+                applied += 1
+
+            cursor['seq'] = max(cursor['seq'], seq)
+            cursor['latest'] = max(cursor['latest'], latest)
+            if cursor['seq'] >= cursor['latest']:
+                cursor['synced_at'] = datetime.utcnow().isoformat()
+            return applied
+
+
+class MemorySelectionRepository(SelectionRepository):
+
+    def __init__(self):
+        self.rows = {}            # (employee_id, date, meal_type) -> selection
+        self.employee_dates = {}  # employee_id -> sorted (date, meal_type) keys
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def get(self, employee_id, date, meal_type):
+        row = self.rows.get((employee_id, iso_date(date), meal_type))
+        return dict(row) if row else None
+
+    def save(self, employee_id, date, meal_type, menu_item_id, status='confirmed'):
+        key = (employee_id, iso_date(date), meal_type)
+        now = datetime.utcnow().isoformat()
+
+        with self.lock:
+            row = self.rows.get(key)
+            if row is None:
+                row = {
+                    'id': next(self.ids),
+                    'employee_id': employee_id,
+                    'date': key[1],
+                    'meal_type': meal_type,
+                    'created_at': now
+                }
+                self.rows[key] = row
+                insort(self.employee_dates.setdefault(employee_id, []), key[1:])
+            row.update(menu_item_id=menu_item_id, status=status, updated_at=now)
+            return dict(row)
+
+    def set_status(self, employee_id, date, meal_type, status):
+        with self.lock:
+            row = self.rows.get((employee_id, iso_date(date), meal_type))
+            if row is None:
+                return False
+            row.update(status=status, updated_at=datetime.utcnow().isoformat())
+            return True
+
+    def list_for_employee(self, employee_id, start_date, end_date, fields=None):
+        with self.lock:
+            keys = self.employee_dates.get(employee_id, [])
+            lo = bisect_left(keys, (iso_date(start_date),))
+            hi = bisect_right(keys, (iso_date(end_date), '\uffff'))
+            return [dict(project(self.rows[(employee_id,) + key], fields)) for key in keys[lo:hi]]
+
+
+class MemoryRepositories:
+    """All repositories of one site, held in process memory; `shared` lends its employee directory"""
+
+    def __init__(self, site_id=DEFAULT_SITE, shared=None):
+        self.site_id = site_id
+        self.employees = shared.employees if shared else MemoryEmployeeRepository()
+        self.menus = MemoryMenuRepository()
+        self.templates = MemoryTemplateRepository()
+        self.preferences = MemoryPreferenceRepository(self.employees, site_id)
+        self.counts = MemoryCountRepository()
+        self.reminders = MemoryReminderLogRepository()
+        self.menu_items = MemoryMenuItemRepository()
+        self.selections = MemorySelectionRepository()
+
+
+class _AwaitableRepository:
+    """A repository whose methods return awaitables; the in-memory ones never block, so they run inline"""
+
+    def __init__(self, repository):
+        self.repository = repository
+
+    def __getattr__(self, name):
+        method = getattr(self.repository, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
+
+
+class AwaitableRepositories:
+    """MemoryRepositories as the async app's get_async_repositories() hands them out"""
+
+    def __init__(self, repositories):
+        self.site_id = repositories.site_id
+        self.store = repositories
+        for name in ('employees', 'menus', 'templates', 'preferences', 'counts', 'reminders'):
+            setattr(self, name, _AwaitableRepository(getattr(repositories, name)))
@@ -0,0 +1,358 @@
+import os
+import threading
+import time
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from repositories.base import (
+    EmployeeRepository, MenuRepository, TemplateRepository, PreferenceRepository, ReminderLogRepository,
+    CountRepository, COUNT_FIELDS, department_key, empty_counts, next_revision
+)
+from utils.archive import find_archived_preference
+
+
+def object_id(value):
+    """Tokens carry ids as strings; turn them back into ObjectIds where valid"""
+    if isinstance(value, ObjectId):
+        return value
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return value
+
+
+def since_query(site_id, rev, **match):
+    """Documents of a site written after a revision (all of them, including pre-revision ones, for 0)"""
+    query = dict(match, site_id=site_id)
+    if rev:
+        query['rev'] = {'$gt': rev}
+    return query
+
+
+def projection(fields):
+    """Mongo projection for a parse_fields() result"""
+    if fields is None:
+        return {'_id': 0}
+    return {'_id': 0, **dict.fromkeys(fields, 1)}
+
+
+def with_id(doc):
+    """Expose Mongo's _id as a string 'id'"""
+    if doc is None:
+        return None
+    doc['id'] = str(doc.pop('_id'))
+    return doc
+
+
+STICKY_SECONDS = float(os.getenv('READ_STICKY_SECONDS', 5))
+
+
+class ReadRouter:
+    """
+    Sends report and menu reads to read_db (a secondary or reporting node)
+    and everything else to the primary. For `sticky` seconds after this
+    worker writes a collection its reads go back to the primary, so the
+    writer's next read sees its own write.
+    """
+
+    def __init__(self, primary, read_db=None, sticky=STICKY_SECONDS):
+        self.primary = primary
+        self.read_db = primary if read_db is None else read_db
+        self.sticky = sticky
+        self.written = {}
+        self.lock = threading.Lock()
+
+    def wrote(self, name):
+        with self.lock:
+            self.written[name] = time.monotonic()
+
+    def collection(self, name):
+        if self.read_db is not self.primary:
+            with self.lock:
+                written = self.written.get(name)
+            if written is None or time.monotonic() - written >= self.sticky:
+                return self.read_db[name]
+        return self.primary[name]
+
+
+class MongoEmployeeRepository(EmployeeRepository):
+
+    def __init__(self, db):
+        self.collection = db['employees']
+
+    def get(self, employee_id):
+        return with_id(self.collection.find_one({'_id': object_id(employee_id)}, {'password': 0}))
+
+    def get_by_email(self, email):
+        return with_id(self.collection.find_one({'email': email}))
+
+    def exists(self, employee_id, email):
+        return self.collection.find_one(
+            {'$or': [{'employee_id': employee_id}, {'email': email}]},
+            {'_id': 1}
+        ) is not None
+
+    def create(self, employee):
+        return str(self.collection.insert_one(dict(employee)).inserted_id)
+
+    def existing(self, employee_ids, emails):
+        taken_ids, taken_emails = set(), set()
+        for doc in self.collection.find(
+            {'$or': [{'employee_id': {'$in': list(employee_ids)}}, {'email': {'$in': list(emails)}}]},
+            {'_id': 0, 'employee_id': 1, 'email': 1}
+        ):
+            taken_ids.add(doc.get('employee_id'))
+            taken_emails.add(doc.get('email'))
+        return taken_ids, taken_emails
+
+    def create_many(self, employees):
+        if not employees:
+            return []
+        try:
+            self.collection.insert_many([dict(employee) for employee in employees], ordered=False)
+        except BulkWriteError as e:
+            return [(error['index'], error['errmsg']) for error in e.details.get('writeErrors', [])]
+        return []
+
+
+class MongoMenuRepository(MenuRepository):
+
+    def __init__(self, db, site_id, reads=None):
+        self.site_id = site_id
+        self.reads = reads or ReadRouter(db)
+        self.tombstones = db['tombstones']  # written by the admin app when it deletes a menu
+
+    def get(self, date):
+        return self.reads.collection('menus').find_one({'site_id': self.site_id, 'date': date}, {'_id': 0})
+
+    def list_range(self, start_date, end_date, fields=None):
+        return list(self.reads.collection('menus').find(
+            {'site_id': self.site_id, 'date': {'$gte': start_date, '$lte': end_date}},
+            projection(fields)
+        ).sort('date', 1))
+
+    def changed_since(self, rev):
+        # From the primary: a lagging secondary could hold back a write past the sync overlap
+        return list(self.reads.primary['menus'].find(since_query(self.site_id, rev), {'_id': 0}).sort('rev', 1))
+
+    def deleted_since(self, rev):
+        return [
+            {'date': doc['key'], 'rev': doc['rev']}
+            for doc in self.tombstones.find(
+                since_query(self.site_id, rev, kind='menu'), {'_id': 0, 'key': 1, 'rev': 1}
+            ).sort('rev', 1)
+        ]
+
+
+class MongoTemplateRepository(TemplateRepository):
+
+    def __init__(self, db, site_id, reads=None):
+        self.site_id = site_id
+        self.reads = reads or ReadRouter(db)
+
+    def list_all(self):
+        return list(self.reads.collection('menu_templates').find({'site_id': self.site_id}, {'_id': 0}).sort('start_date', 1))
+
+
+class MongoPreferenceRepository(PreferenceRepository):
+
+    def __init__(self, db, site_id, directory):
+        self.db = db
+        self.site_id = site_id
+        self.directory = directory  # database holding the employees collection
+        self.collection = db['meal_preferences']
+
+    def get(self, employee_id, date):
+        return self.collection.find_one({'site_id': self.site_id, 'employee_id': employee_id, 'date': date}, {'_id': 0})
+
+    def get_archived(self, employee_id, date):
+        return find_archived_preference(self.db, employee_id, date, self.site_id)
+
+    def upsert(self, preference):
+        # The before-image is what lets meal_counts be adjusted by delta instead of recounted
+        return self.collection.find_one_and_update(
+            {'site_id': self.site_id, 'employee_id': preference['employee_id'], 'date': preference['date']},
+            {'$set': dict(preference, site_id=self.site_id, rev=next_revision())},
+            projection={'_id': 0},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+
+    def list_for_employee(self, employee_id, limit=30, fields=None):
+        return list(self.collection.find(
+            {'site_id': self.site_id, 'employee_id': employee_id},
+            projection(fields)
+        ).sort('date', -1).limit(limit))
+
+    def changed_since(self, employee_id, rev):
+        return list(self.collection.find(since_query(self.site_id, rev, employee_id=employee_id), {'_id': 0}).sort('rev', 1))
+
+    def count(self, date):
+        pipeline = [
+            {'$match': {'site_id': self.site_id, 'date': date}},
+            {'$group': {
+                '_id': None,
+                'breakfast_count': {'$sum': {'$cond': ['$breakfast', 1, 0]}},
+                'lunch_count': {'$sum': {'$cond': ['$lunch', 1, 0]}},
+                'snacks_count': {'$sum': {'$cond': ['$snacks', 1, 0]}},
+                'total_employees': {'$sum': 1}
+            }}
+        ]
+
+        result = list(self.collection.aggregate(pipeline))
+        counts = empty_counts(date)
+        if result:
+            for key in ('breakfast_count', 'lunch_count', 'snacks_count', 'total_employees'):
+                counts[key] = result[0].get(key, 0)
+        return counts
+
+    def department_counts(self, date):
+        pipeline = [
+            {'$match': {'site_id': self.site_id, 'date': date, 'department': {'$exists': True}}},
+            {'$group': {
+                '_id': '$department',
+                'breakfast_count': {'$sum': {'$cond': ['$breakfast', 1, 0]}},
+                'lunch_count': {'$sum': {'$cond': ['$lunch', 1, 0]}},
+                'snacks_count': {'$sum': {'$cond': ['$snacks', 1, 0]}},
+                'total_employees': {'$sum': 1}
+            }}
+        ]
+
+        departments = {}
+        for row in self.collection.aggregate(pipeline):
+            counts = departments.setdefault(department_key(row['_id']), dict.fromkeys(COUNT_FIELDS, 0))
+            for field in COUNT_FIELDS:
+                counts[field] += row[field]
+        return departments
+
+    def iter_unbooked_employees(self, date, batch_size=1000):
+        employees = self.directory['employees']
+        if self.directory.name != self.db.name or self.directory.client is not self.db.client:
+            # The site lives in its own database, out of $lookup's reach: subtract the booked ids instead
+            booked = set(self.collection.distinct('employee_id', {'site_id': self.site_id, 'date': date}))
+            for employee in employees.find({'site_id': self.site_id}, {'name': 1, 'email': 1, 'department': 1}):
+                if str(employee['_id']) not in booked:
+                    yield {'id': str(employee.pop('_id')), **employee}
+            return
+
+        # Anti-join in one aggregation: each employee probes the (site_id, date, employee_id) index once
+        pipeline = [
+            {'$match': {'site_id': self.site_id}},
+            {'$project': {'name': 1, 'email': 1, 'department': 1, 'id': {'$toString': '$_id'}}},
+            {'$lookup': {
+                'from': 'meal_preferences',
+                'let': {'employee_id': '$id'},
+                'pipeline': [
+                    {'$match': {
+                        'site_id': self.site_id, 'date': date,
+                        '$expr': {'$eq': ['$employee_id', '$$employee_id']}
+                    }},
+                    {'$limit': 1},
+                    {'$project': {'_id': 1}}
+                ],
+                'as': 'booked'
+            }},
+            {'$match': {'booked': {'$size': 0}}},
+            {'$project': {'_id': 0, 'id': 1, 'name': 1, 'email': 1, 'department': 1}}
+        ]
+        yield from employees.aggregate(pipeline, batchSize=batch_size)
+
+
+class MongoReminderLogRepository(ReminderLogRepository):
+
+    def __init__(self, db, site_id):
+        self.collection = db['reminder_dispatches']
+        self.site_id = site_id
+
+    def sent_employee_ids(self, date):
+        return set(self.collection.distinct('employee_id', {'site_id': self.site_id, 'date': date, 'status': 'sent'}))
+
+    def record(self, entries):
+        if entries:
+            self.collection.insert_many([dict(entry, site_id=self.site_id) for entry in entries], ordered=False)
+
+
+class MongoCountRepository(CountRepository):
+
+    def __init__(self, db, site_id, reads=None):
+        self.collection = db['meal_counts']
+        self.site_id = site_id
+        self.reads = reads or ReadRouter(db)
+
+    def get(self, date):
+        return self.reads.collection('meal_counts').find_one({'site_id': self.site_id, 'date': date}, {'_id': 0})
+
+    def put(self, counts):
+        self.collection.update_one(
+            {'site_id': self.site_id, 'date': counts['date']},
+            {'$set': dict(counts, site_id=self.site_id, rev=next_revision())},
+            upsert=True
+        )
+
+    def add_department_delta(self, date, delta):
+        if not delta:
+            return
+        self.collection.update_one(
+            {'site_id': self.site_id, 'date': date},
+            {'$inc': {
+                f'departments.{department}.{field}': change
+                for department, changes in delta.items()
+                for field, change in changes.items()
+            }, '$set': {'rev': next_revision()}},
+            upsert=True
+        )
+
+    def changed_since(self, rev):
+        # From the primary: a lagging secondary could hold back a write past the sync overlap
+        return list(self.reads.primary['meal_counts'].find(since_query(self.site_id, rev), {'_id': 0}).sort('rev', 1))
+
+
+# Every site-scoped query leads with site_id, so each collection gets a site-prefixed index
+SITE_INDEXES = {
+    'menus': [('site_id', 1), ('date', 1)],
+    'menu_templates': [('site_id', 1), ('name', 1)],
+    'meal_preferences': [('site_id', 1), ('date', 1), ('employee_id', 1)],
+    'meal_counts': [('site_id', 1), ('date', 1)],
+    'reminder_dispatches': [('site_id', 1), ('date', 1), ('status', 1)]
+}
+
+# Delta sync reads by revision (tombstones are the admin app's; it owns their expiry)
+REVISION_INDEXES = {
+    'menus': [('site_id', 1), ('rev', 1)],
+    'meal_counts': [('site_id', 1), ('rev', 1)],
+    'meal_preferences': [('site_id', 1), ('employee_id', 1), ('rev', 1)],
+    'tombstones': [('site_id', 1), ('rev', 1)]
+}
+
+
+class MongoRepositories:
+    """
+    Mongo-backed repositories (employee Flask app) for one site. Employees
+    live in the default database; the site's documents in site_db, which is
+    the default database unless the site is routed elsewhere. Menus,
+    templates and counts are read through read_db when one is set;
+    preferences, where employees read their own writes, stay on the primary.
+    """
+
+    def __init__(self, db, site_id, site_db=None, read_db=None):
+        site_db = db if site_db is None else site_db
+        self.db = site_db
+        self.site_id = site_id
+        self.reads = ReadRouter(site_db, read_db)
+        self.employees = MongoEmployeeRepository(db)
+        self.menus = MongoMenuRepository(site_db, site_id, self.reads)
+        self.templates = MongoTemplateRepository(site_db, site_id, self.reads)
+        self.preferences = MongoPreferenceRepository(site_db, site_id, db)
+        self.counts = MongoCountRepository(site_db, site_id, self.reads)
+        self.reminders = MongoReminderLogRepository(site_db, site_id)
+
+    def ensure_indexes(self):
+        self.db['meal_preferences'].create_index(
+            [('site_id', 1), ('employee_id', 1), ('date', -1)], name='site_employee_date'
+        )
+        for collection, keys in SITE_INDEXES.items():
+            self.db[collection].create_index(keys)
+        for collection, keys in REVISION_INDEXES.items():
+            self.db[collection].create_index(keys)
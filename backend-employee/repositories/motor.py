@@ -0,0 +1,162 @@
+"""
+Motor (asyncio) counterparts of the Mongo repositories the employee API
+uses. Queries, projections and read routing are the same as in
+repositories.mongo; every method is a coroutine, so a request waiting on
+the database frees the event loop for other requests instead of holding
+a worker thread.
+"""
+from pymongo import ReturnDocument
+from repositories.base import next_revision
+from repositories.mongo import ReadRouter, object_id, projection, since_query, with_id
+
+
+class MotorEmployeeRepository:
+
+    def __init__(self, db):
+        self.collection = db['employees']
+
+    async def get(self, employee_id):
+        return with_id(await self.collection.find_one({'_id': object_id(employee_id)}, {'password': 0}))
+
+    async def get_by_email(self, email):
+        return with_id(await self.collection.find_one({'email': email}))
+
+    async def exists(self, employee_id, email):
+        return await self.collection.find_one(
+            {'$or': [{'employee_id': employee_id}, {'email': email}]},
+            {'_id': 1}
+        ) is not None
+
+    async def create(self, employee):
+        return str((await self.collection.insert_one(dict(employee))).inserted_id)
+
+
+class MotorMenuRepository:
+
+    def __init__(self, db, site_id, reads):
+        self.site_id = site_id
+        self.reads = reads
+        self.tombstones = db['tombstones']
+
+    async def get(self, date):
+        return await self.reads.collection('menus').find_one({'site_id': self.site_id, 'date': date}, {'_id': 0})
+
+    async def list_range(self, start_date, end_date, fields=None):
+        return await self.reads.collection('menus').find(
+            {'site_id': self.site_id, 'date': {'$gte': start_date, '$lte': end_date}},
+            projection(fields)
+        ).sort('date', 1).to_list(None)
+
+    async def changed_since(self, rev):
+        # From the primary: a lagging secondary could hold back a write past the sync overlap
+        return await self.reads.primary['menus'].find(since_query(self.site_id, rev), {'_id': 0}).sort('rev', 1).to_list(None)
+
+    async def deleted_since(self, rev):
+        return [
+            {'date': doc['key'], 'rev': doc['rev']}
+            async for doc in self.tombstones.find(
+                since_query(self.site_id, rev, kind='menu'), {'_id': 0, 'key': 1, 'rev': 1}
+            ).sort('rev', 1)
+        ]
+
+
+class MotorTemplateRepository:
+
+    def __init__(self, site_id, reads):
+        self.site_id = site_id
+        self.reads = reads
+
+    async def list_all(self):
+        return await self.reads.collection('menu_templates').find({'site_id': self.site_id}, {'_id': 0}).sort('start_date', 1).to_list(None)
+
+
+class MotorPreferenceRepository:
+
+    def __init__(self, db, site_id):
+        self.db = db
+        self.site_id = site_id
+        self.collection = db['meal_preferences']
+
+    async def get(self, employee_id, date):
+        return await self.collection.find_one({'site_id': self.site_id, 'employee_id': employee_id, 'date': date}, {'_id': 0})
+
+    async def get_archived(self, employee_id, date):
+        """utils.archive.find_archived_preference, awaited"""
+        partition = await self.db['archive_partitions'].find_one(
+            {'collection': 'meal_preferences', 'month': date[:7]},
+            {'archive_collection': 1}
+        )
+        if not partition:
+            return None
+        return await self.db[partition['archive_collection']].find_one(
+            {'employee_id': employee_id, 'date': date, 'site_id': self.site_id},
+            {'_id': 0}
+        )
+
+    async def upsert(self, preference):
+        return await self.collection.find_one_and_update(
+            {'site_id': self.site_id, 'employee_id': preference['employee_id'], 'date': preference['date']},
+            {'$set': dict(preference, site_id=self.site_id, rev=next_revision())},
+            projection={'_id': 0},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+
+    async def list_for_employee(self, employee_id, limit=30, fields=None):
+        return await self.collection.find(
+            {'site_id': self.site_id, 'employee_id': employee_id},
+            projection(fields)
+        ).sort('date', -1).limit(limit).to_list(None)
+
+    async def changed_since(self, employee_id, rev):
+        return await self.collection.find(
+            since_query(self.site_id, rev, employee_id=employee_id), {'_id': 0}
+        ).sort('rev', 1).to_list(None)
+
+
+class MotorCountRepository:
+
+    def __init__(self, db, site_id, reads):
+        self.collection = db['meal_counts']
+        self.site_id = site_id
+        self.reads = reads
+
+    async def get(self, date):
+        return await self.reads.collection('meal_counts').find_one({'site_id': self.site_id, 'date': date}, {'_id': 0})
+
+    async def add_department_delta(self, date, delta):
+        if not delta:
+            return
+        await self.collection.update_one(
+            {'site_id': self.site_id, 'date': date},
+            {'$inc': {
+                f'departments.{department}.{field}': change
+                for department, changes in delta.items()
+                for field, change in changes.items()
+            }, '$set': {'rev': next_revision()}},
+            upsert=True
+        )
+
+    async def changed_since(self, rev):
+        # From the primary: a lagging secondary could hold back a write past the sync overlap
+        return await self.reads.primary['meal_counts'].find(since_query(self.site_id, rev), {'_id': 0}).sort('rev', 1).to_list(None)
+
+
+class MotorRepositories:
+    """
+    The repositories the async employee app uses, for one site, laid out as
+    MongoRepositories: employees in the default database, the site's
+    documents in site_db, menus, templates and counts read through read_db.
+    Meal count recomputes and reminders run in the task workers, on pymongo.
+    """
+
+    def __init__(self, db, site_id, site_db=None, read_db=None):
+        site_db = db if site_db is None else site_db
+        self.db = site_db
+        self.site_id = site_id
+        self.reads = ReadRouter(site_db, read_db)
+        self.employees = MotorEmployeeRepository(db)
+        self.menus = MotorMenuRepository(site_db, site_id, self.reads)
+        self.templates = MotorTemplateRepository(site_id, self.reads)
+        self.preferences = MotorPreferenceRepository(site_db, site_id)
+        self.counts = MotorCountRepository(site_db, site_id, self.reads)
@@ -0,0 +1,241 @@
+from datetime import datetime
+from repositories.base import EmployeeRepository, MenuItemRepository, TemplateRepository, SelectionRepository, as_date
+
+IN_CHUNK = 500  # keep IN (...) lists under SQLite's bound-parameter limit
+MEALS = ('breakfast', 'lunch', 'dinner')
+
+
+class SqlEmployeeRepository(EmployeeRepository):
+
+    def __init__(self):
+        from extensions import db
+        from models.employee import Employee
+        self.session = db.session
+        self.model = Employee
+        self.columns = set(Employee.__table__.columns.keys())
+
+    def _row(self, employee):
+        # The SQL stack serves one site; site_id and other Mongo-only fields are dropped
+        return self.model(**{key: value for key, value in employee.items() if key in self.columns})
+
+    def get(self, employee_id):
+        employee = self.model.query.get(employee_id)
+        return employee.to_dict() if employee else None
+
+    def get_by_email(self, email):
+        employee = self.model.query.filter_by(email=email).first()
+        return dict(employee.to_dict(), password=employee.password) if employee else None
+
+    def exists(self, employee_id, email):
+        return self.model.query.filter(
+            (self.model.employee_id == employee_id) | (self.model.email == email)
+        ).first() is not None
+
+    def create(self, employee):
+        row = self._row(employee)
+        self.session.add(row)
+        self.session.commit()
+        return row.id
+
+    def existing(self, employee_ids, emails):
+        employee_ids, emails = list(employee_ids), list(emails)
+        taken_ids, taken_emails = set(), set()
+        for start in range(0, max(len(employee_ids), len(emails)), IN_CHUNK):
+            rows = self.session.query(self.model.employee_id, self.model.email).filter(
+                self.model.employee_id.in_(employee_ids[start:start + IN_CHUNK])
+                | self.model.email.in_(emails[start:start + IN_CHUNK])
+            ).all()
+            for employee_id, email in rows:
+                taken_ids.add(employee_id)
+                taken_emails.add(email)
+        return taken_ids, taken_emails
+
+    def create_many(self, employees):
+        from sqlalchemy.exc import IntegrityError
+
+        rows = [self._row(employee) for employee in employees]
+        try:
+            self.session.add_all(rows)
+            self.session.commit()
+            return []
+        except IntegrityError:
+            self.session.rollback()
+
+        # Something in the batch collided; retry row by row to find which
+        rejected = []
+        for index, employee in enumerate(employees):
+            try:
+                self.create(employee)
+            except IntegrityError:
+                self.session.rollback()
+                rejected.append((index, 'Employee ID or email already exists'))
+        return rejected
+
+
+class SqlMenuItemRepository(MenuItemRepository):
+
+    def __init__(self):
+        from extensions import db
+        from models.meal import MenuItem, SyncCursor
+        self.session = db.session
+        self.model = MenuItem
+        self.cursors = SyncCursor
+
+    def get(self, item_id):
+        item = self.model.query.get(item_id)
+        return item.to_dict() if item else None
+
+    def list_for_date(self, date):
+        items = self.model.query.filter_by(
+            available_date=as_date(date),
+            is_active=True
+        ).all()
+        return [item.to_dict() for item in items]
+
+    def sync_state(self, name):
+        cursor = self.cursors.query.get(name)
+        return cursor.to_dict() if cursor else {'seq': 0, 'latest': 0, 'synced_at': None}
+
+    def apply_changes(self, name, changes, seq, latest):
+        cursor = self.cursors.query.get(name)
+        if cursor is None:
+            cursor = self.cursors(name=name, seq=0, latest=0)
+            self.session.add(cursor)
+
+        applied = 0
+        try:
+            for change in changes:
+                if change['seq'] <= cursor.seq:
+                    continue  # a retried batch overlapping what is already applied
+                source = change['item']
+                item = self.model.query.get(source['id'])
+                if change['op'] == 'delete':
+                    if item is not None:
+                        item.is_active = False
+                else:
+                    if item is None:
+                        item = self.model(id=source['id'])
+                        self.session.add(item)
+                    item.name = source['name']
+                    item.category = source['category']
+                    item.meal_type = source['meal_type']
+                    item.available_date = as_date(source['date'])
+                    item.is_active = bool(source['is_available'])
+                applied += 1
+
+            cursor.seq = max(cursor.seq, seq)
+            cursor.latest = max(cursor.latest, latest)
+            if cursor.seq >= cursor.latest:
+                cursor.synced_at = datetime.utcnow()
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return applied
+
+
+class SqlTemplateRepository(TemplateRepository):
+
+    def __init__(self):
+        from extensions import db
+        from models.meal import MenuTemplate
+        self.session = db.session
+        self.model = MenuTemplate
+
+    def put(self, template):
+        """Validate and insert or replace a template whose days list menu item ids"""
+        from utils.menu_templates import validate_template
+
+        error = validate_template(template, item_type=int, meals=MEALS)
+        if error:
+            raise ValueError(error)
+
+        row = self.model.query.filter_by(name=template['name']).first()
+        if row is None:
+            row = self.model(name=template['name'])
+            self.session.add(row)
+        row.start_date = as_date(template['start_date'])
+        row.end_date = as_date(template['end_date']) if template.get('end_date') else None
+        row.weeks = template['weeks']
+        row.overrides = template.get('overrides') or {}
+        self.session.commit()
+        return row.to_dict()
+
+    def list_all(self):
+        return [template.to_dict() for template in self.model.query.order_by(self.model.start_date).all()]
+
+
+class SqlSelectionRepository(SelectionRepository):
+
+    def __init__(self):
+        from extensions import db
+        from models.employee import MealSelection
+        self.session = db.session
+        self.model = MealSelection
+
+    def _find(self, employee_id, date, meal_type):
+        return self.model.query.filter_by(
+            employee_id=employee_id,
+            date=as_date(date),
+            meal_type=meal_type
+        ).first()
+
+    def get(self, employee_id, date, meal_type):
+        selection = self._find(employee_id, date, meal_type)
+        return selection.to_dict() if selection else None
+
+    def save(self, employee_id, date, meal_type, menu_item_id, status='confirmed'):
+        selection = self._find(employee_id, date, meal_type)
+
+        if selection:
+            selection.menu_item_id = menu_item_id
+            selection.status = status
+            selection.updated_at = datetime.utcnow()
+        else:
+            selection = self.model(
+                employee_id=employee_id,
+                date=as_date(date),
+                meal_type=meal_type,
+                menu_item_id=menu_item_id,
+                status=status
+            )
+            self.session.add(selection)
+
+        self.session.commit()
+        return selection.to_dict()
+
+    def set_status(self, employee_id, date, meal_type, status):
+        selection = self._find(employee_id, date, meal_type)
+        if not selection:
+            return False
+
+        selection.status = status
+        selection.updated_at = datetime.utcnow()
+        self.session.commit()
+        return True
+
+    def list_for_employee(self, employee_id, start_date, end_date, fields=None):
+        criteria = (
+            self.model.employee_id == employee_id,
+            self.model.date >= as_date(start_date),
+            self.model.date <= as_date(end_date)
+        )
+        if fields is None:
+            return [selection.to_dict() for selection in self.model.query.filter(*criteria).all()]
+
+        # Only the requested columns are selected; dates render as to_dict() renders them
+        rows = self.session.query(*(getattr(self.model, field) for field in fields)).filter(*criteria).all()
+        return [
+            {field: value.isoformat() if hasattr(value, 'isoformat') else value for field, value in zip(fields, row)}
+            for row in rows
+        ]
+
+
+class SqlRepositories:
+    """SQLAlchemy-backed repositories (EmployeeService)"""
+
+    def __init__(self):
+        self.employees = SqlEmployeeRepository()
+        self.menu_items = SqlMenuItemRepository()
+        self.templates = SqlTemplateRepository()
+        self.selections = SqlSelectionRepository()
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.employee_service import EmployeeService
+from repositories.base import SELECTION_FIELDS, parse_fields
 from datetime import datetime, timedelta
 
 employee_bp = Blueprint('employee', __name__)
@@ -89,6 +90,17 @@ def get_menu():
     }), 200
 
 
+@employee_bp.route('/menu/sync-status', methods=['GET'])
+def get_menu_sync_status():
+    """Cursor and lag of the admin menu sync"""
+    status, error = EmployeeService.get_menu_sync_status()
+    
+    if error:
+        return jsonify({'error': error}), 500
+    
+    return jsonify(status), 200
+
+
 @employee_bp.route('/meal/confirm', methods=['POST'])
 @jwt_required()
 def confirm_meal():
@@ -170,10 +182,16 @@ def get_selections():
         except ValueError:
             return jsonify({'error': 'Invalid end_date format'}), 400
     
+    try:
+        fields = parse_fields(request.args.get('fields'), SELECTION_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     selections, error = EmployeeService.get_my_selections(
         employee_id=int(employee_id),
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        fields=fields
     )
     
     if error:
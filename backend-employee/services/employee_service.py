@@ -1,11 +1,37 @@
-from app import db
-from models.employee import Employee, MealSelection
-from models.meal import MenuItem
+from extensions import db
+from models.employee import Employee
+from repositories import get_repositories
+from repositories.sql import MEALS
 from utils.auth import hash_password, verify_password, generate_token
+from utils.menu_templates import TemplateExpander
+from utils.bulk_import import import_employees
+from utils.menu_sync import lag
 from datetime import datetime, timedelta, time
+import os
 
 class EmployeeService:
     
+    # Menu items and selections go through the repository layer (STORAGE_ENGINE)
+    repos = get_repositories('sql')
+    
+    # Template days list menu item ids; dates without their own items fall back to them
+    menu_templates = TemplateExpander(
+        repos.templates.list_all,
+        lambda template, day, body: EmployeeService.template_items(body),
+        ttl=int(os.getenv('MENU_TEMPLATE_TTL', 60))
+    )
+    
+    @staticmethod
+    def template_items(body):
+        """Menu items referenced by a template day"""
+        items = []
+        for meal_type, item_ids in body.items():
+            for item_id in item_ids:
+                item = EmployeeService.repos.menu_items.get(item_id)
+                if item:
+                    items.append(dict(item, meal_type=meal_type))
+        return items
+    
     @staticmethod
     def register_employee(employee_id, name, email, password, department):
         """Register a new employee"""
@@ -28,6 +54,12 @@ class EmployeeService:
         
         return employee, None
     
+    @staticmethod
+    def bulk_register_employees(rows, dry_run=False):
+        """Register a roster of employees; per-row problems are in the report"""
+        report = import_employees(EmployeeService.repos.employees, rows, datetime.utcnow(), dry_run=dry_run)
+        return report, None
+    
     @staticmethod
     def login_employee(employee_id, password):
         """Login employee and return token"""
@@ -53,22 +85,22 @@ class EmployeeService:
         if date is None:
             date = (datetime.now() + timedelta(days=1)).date()
         
-        menu_items = MenuItem.query.filter_by(
-            available_date=date,
-            is_active=True
-        ).all()
+        menu_items = EmployeeService.repos.menu_items.list_for_date(date)
+        if not menu_items:
+            menu_items = EmployeeService.menu_templates.expand(date) or []
         
-        menu = {
-            'breakfast': [],
-            'lunch': [],
-            'dinner': []
-        }
+        menu = {meal: [] for meal in MEALS}
         
         for item in menu_items:
-            menu[item.meal_type].append(item.to_dict())
+            menu[item['meal_type']].append(item)
         
         return menu, None
     
+    @staticmethod
+    def get_menu_sync_status():
+        """How far the menu items trail the admin store's change log"""
+        return lag(EmployeeService.repos.menu_items), None
+    
     @staticmethod
     def confirm_meal(employee_id, date, meal_type, menu_item_id):
         """Confirm meal selection"""
@@ -80,34 +112,12 @@ class EmployeeService:
             return None, "Deadline passed. Cannot confirm meal after 9:00 PM"
         
         # Check if menu item exists
-        menu_item = MenuItem.query.get(menu_item_id)
+        menu_item = EmployeeService.repos.menu_items.get(menu_item_id)
         if not menu_item:
             return None, "Menu item not found"
         
-        # Check if already confirmed
-        existing = MealSelection.query.filter_by(
-            employee_id=employee_id,
-            date=date,
-            meal_type=meal_type
-        ).first()
-        
-        if existing:
-            # Update existing selection
-            existing.menu_item_id = menu_item_id
-            existing.status = 'confirmed'
-            existing.updated_at = datetime.utcnow()
-        else:
-            # Create new selection
-            selection = MealSelection(
-                employee_id=employee_id,
-                date=date,
-                meal_type=meal_type,
-                menu_item_id=menu_item_id,
-                status='confirmed'
-            )
-            db.session.add(selection)
-        
-        db.session.commit()
+        # Create or update the selection
+        EmployeeService.repos.selections.save(employee_id, date, meal_type, menu_item_id, 'confirmed')
         return {'message': 'Meal confirmed successfully'}, None
     
     @staticmethod
@@ -120,33 +130,19 @@ class EmployeeService:
         if now.time() > deadline and date.date() == (now + timedelta(days=1)).date():
             return None, "Deadline passed. Cannot cancel meal after 9:00 PM"
         
-        selection = MealSelection.query.filter_by(
-            employee_id=employee_id,
-            date=date,
-            meal_type=meal_type
-        ).first()
-        
-        if not selection:
+        if not EmployeeService.repos.selections.set_status(employee_id, date, meal_type, 'cancelled'):
             return None, "No meal selection found"
         
-        selection.status = 'cancelled'
-        selection.updated_at = datetime.utcnow()
-        db.session.commit()
-        
         return {'message': 'Meal cancelled successfully'}, None
     
     @staticmethod
-    def get_my_selections(employee_id, start_date=None, end_date=None):
-        """Get employee's meal selections"""
+    def get_my_selections(employee_id, start_date=None, end_date=None, fields=None):
+        """Get employee's meal selections (only `fields` of each when given)"""
         if start_date is None:
             start_date = datetime.now().date()
         if end_date is None:
             end_date = start_date + timedelta(days=7)
         
-        selections = MealSelection.query.filter(
-            MealSelection.employee_id == employee_id,
-            MealSelection.date >= start_date,
-            MealSelection.date <= end_date
-        ).all()
+        selections = EmployeeService.repos.selections.list_for_employee(employee_id, start_date, end_date, fields)
         
-        return [selection.to_dict() for selection in selections], None
\ No newline at end of file
+        return selections, None
\ No newline at end of file
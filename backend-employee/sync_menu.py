@@ -0,0 +1,49 @@
+"""
+Pull admin menu item changes into the employee menu store. Only changes
+after the stored cursor are fetched; rerunning after a failure resumes.
+
+    python sync_menu.py                       # pull once
+    python sync_menu.py --interval 30         # keep pulling every 30s
+    python sync_menu.py --status              # cursor and lag only
+"""
+import argparse
+import json
+import os
+import time
+
+from utils.menu_sync import BATCH_SIZE, http_source, lag, pull
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental admin -> employee menu sync")
+    parser.add_argument("--url", default=os.getenv('ADMIN_MENU_CHANGES_URL', 'http://localhost:8000/menu/changes'))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--interval", type=float, default=0, help="seconds between pulls (default: pull once)")
+    parser.add_argument("--status", action="store_true", help="print the cursor and lag without pulling")
+    args = parser.parse_args()
+
+    from main import create_app
+    from repositories import get_repositories
+
+    with create_app().app_context():
+        menu_items = get_repositories('sql').menu_items
+        if args.status:
+            print(json.dumps(lag(menu_items), indent=2))
+            return
+
+        fetch = http_source(args.url)
+        while True:
+            try:
+                summary = pull(menu_items, fetch, batch_size=args.batch_size)
+                print(json.dumps(dict(summary, **lag(menu_items))))
+            except Exception as e:
+                if not args.interval:
+                    raise
+                print(f"Pull failed, retrying in {args.interval}s: {e}")
+            if not args.interval:
+                break
+            time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
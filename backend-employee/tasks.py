@@ -0,0 +1,63 @@
+"""
+Inspect and drain the background task queue.
+
+    python tasks.py stats
+    python tasks.py failed --limit 20
+    python tasks.py retry [--id 42]
+    python tasks.py purge --days 7
+    python tasks.py work --threads 2
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+from utils.task_queue import TaskQueue, FAILED
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Background task queue")
+    parser.add_argument("--path", default=os.getenv('TASK_QUEUE_PATH', 'tasks.db'))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("stats", help="queue depth and lag per task name")
+    failed = commands.add_parser("failed", help="tasks that ran out of attempts")
+    failed.add_argument("--limit", type=int, default=50)
+    retry = commands.add_parser("retry", help="requeue failed tasks")
+    retry.add_argument("--id", type=int, help="only this task (default: all failed)")
+    purge = commands.add_parser("purge", help="delete finished tasks")
+    purge.add_argument("--days", type=float, default=7)
+    work = commands.add_parser("work", help="run workers in this process")
+    work.add_argument("--threads", type=int, default=2)
+    args = parser.parse_args()
+
+    queue = TaskQueue(args.path)
+
+    if args.command == "stats":
+        print(json.dumps(queue.stats(), indent=2))
+    elif args.command == "failed":
+        for task in queue.list(FAILED, args.limit):
+            finished = datetime.fromtimestamp(task['finished_at']).isoformat(timespec='seconds')
+            print(f"#{task['id']} {task['name']} {task['payload']} attempts={task['attempts']} "
+                  f"at {finished}: {task['last_error']}")
+    elif args.command == "retry":
+        print(f"Requeued {queue.retry(args.id)} task(s)")
+    elif args.command == "purge":
+        print(f"Deleted {queue.purge(args.days * 86400)} finished task(s)")
+    else:
+        # The app owns the handlers; keep it from starting its own workers
+        os.environ['TASK_WORKER_THREADS'] = '0'
+        from app import TASK_HANDLERS, TaskWorkers
+
+        workers = TaskWorkers(queue, TASK_HANDLERS, threads=args.threads).start()
+        print(f"Working {args.path} with {args.threads} thread(s); Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            workers.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# Tests import the app's packages (utils, repositories) the way the app does, from backend-employee/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tests that import app.py run it on the in-memory store with two sites and no background workers
+os.environ.setdefault('STORAGE_ENGINE', 'memory')
+os.environ.setdefault('SITE_IDS', 'main,north')
+os.environ.setdefault('TASK_WORKER_THREADS', '0')
+os.environ.setdefault('TASK_QUEUE_PATH', os.path.join(tempfile.mkdtemp(), 'tasks.db'))
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
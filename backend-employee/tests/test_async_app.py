@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as flask_app
+import async_app
+
+DATE = (datetime.now().date() + timedelta(days=6)).isoformat()
+
+
+@pytest.fixture(scope='module')
+def clients():
+    with TestClient(async_app.app) as client:
+        yield client, flask_app.app.test_client()
+
+
+def register(client, number, site_id='main'):
+    return client.post('/api/employee/register', json={
+        'employee_id': f'AS{number:04d}', 'name': f'Async {number}', 'email': f'async-{number}@example.com',
+        'password': 'pw-async', 'department': 'ops', 'site_id': site_id
+    })
+
+
+def payload(response):
+    """The JSON body of a Flask or an httpx test response"""
+    return response.get_json() if hasattr(response, 'get_json') else response.json()
+
+
+def login(client, number):
+    response = client.post('/api/employee/login', json={'email': f'async-{number}@example.com', 'password': 'pw-async'})
+    assert response.status_code == 200
+    return {'Authorization': f"Bearer {payload(response)['token']}"}
+
+
+def test_register_login_and_profile(clients):
+    client, _ = clients
+    assert register(client, 1).status_code == 201
+    assert register(client, 1).json() == {'success': False, 'error': 'Employee ID or email already exists'}
+    assert register(client, 2, site_id='atlantis').status_code == 400
+
+    profile = client.get('/api/employee/me', headers=login(client, 1)).json()
+    assert profile['employee'] == {'employee_id': 'AS0001', 'name': 'Async 1', 'email': 'async-1@example.com',
+                                   'department': 'ops', 'site_id': 'main'}
+    assert client.get('/api/employee/me').status_code == 401
+
+
+def test_both_apps_share_the_store_and_answer_alike(clients):
+    client, flask_client = clients
+    assert register(flask_client, 3).status_code == 201
+    async_headers, flask_headers = login(client, 3), login(flask_client, 3)
+
+    saved = client.post('/api/employee/meal-preference', headers=async_headers, json={'date': DATE, 'lunch': True})
+    assert saved.status_code == 201
+
+    path = f'/api/employee/meal-preference/{DATE}'
+    from_async, from_flask = client.get(path, headers=async_headers), flask_client.get(path, headers=flask_headers)
+    assert from_async.json()['preference']['lunch'] is True
+    assert from_async.content == from_flask.data
+
+    for path in (f'/api/employee/meal-counts/{DATE}', f'/api/employee/meal-counts/{DATE}?site=atlantis'):
+        from_async, from_flask = client.get(path), flask_client.get(path)
+        assert from_async.status_code == from_flask.status_code
+        assert from_async.content == from_flask.data
+
+
+def test_duplicate_submits_are_replayed(clients):
+    client, _ = clients
+    assert register(client, 4).status_code == 201
+    headers = dict(login(client, 4), **{'Idempotency-Key': 'async-1'})
+    first = client.post('/api/employee/meal-preference', headers=headers, json={'date': DATE, 'snacks': True})
+    again = client.post('/api/employee/meal-preference', headers=headers, json={'date': DATE, 'snacks': True})
+    assert first.status_code == again.status_code == 201
+    assert again.headers['Idempotent-Replayed'] == 'true'
+    assert client.post('/api/employee/meal-preference', headers=headers,
+                       json={'date': DATE, 'snacks': False}).status_code == 422
+
+
+def test_login_is_rate_limited(clients):
+    client, _ = clients
+    credentials = {'email': 'nobody-async@example.com', 'password': 'wrong'}
+    burst = async_app.login_limiter.capacity
+    statuses = [client.post('/api/employee/login', json=credentials).status_code for _ in range(burst + 1)]
+    assert statuses == [401] * burst + [429]
+    assert client.post('/api/employee/login', json=credentials).headers['Retry-After']
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+from repositories.base import department_delta, department_key
+
+DATE = (datetime.now().date() + timedelta(days=4)).isoformat()
+
+
+def preference(department, **meals):
+    return {'employee_id': 'e1', 'date': DATE, 'department': department, **meals}
+
+
+def test_department_key_is_a_safe_field_name():
+    assert department_key('R&D.labs') == 'R&D_labs'
+    assert department_key('$ops') == 'ops'
+    assert department_key('  ') == 'Unassigned'
+
+
+def test_first_booking_adds_one_employee():
+    assert department_delta(None, preference('eng', lunch=True)) == {
+        'eng': {'total_employees': 1, 'lunch_count': 1}
+    }
+
+
+def test_changed_meals_move_only_their_counts():
+    assert department_delta(preference('eng', lunch=True), preference('eng', lunch=False, snacks=True)) == {
+        'eng': {'lunch_count': -1, 'snacks_count': 1}
+    }
+
+
+def test_department_move_takes_back_from_the_old_one():
+    assert department_delta(preference('eng', lunch=True), preference('ops', lunch=True)) == {
+        'eng': {'total_employees': -1, 'lunch_count': -1},
+        'ops': {'total_employees': 1, 'lunch_count': 1}
+    }
+
+
+def test_untracked_before_image_is_not_taken_back():
+    before = {'employee_id': 'e1', 'date': DATE, 'lunch': True}
+    assert department_delta(before, preference('eng', lunch=True)) == {
+        'eng': {'total_employees': 1, 'lunch_count': 1}
+    }
+
+
+def test_unchanged_preference_has_no_delta():
+    assert department_delta(preference('eng', lunch=True), preference('eng', lunch=True)) == {}
+
+
+def test_recount_repairs_drift_and_bumps_the_revision():
+    import app as employee_app
+
+    site = employee_app.site_repos('main')
+    for number, department in enumerate(('eng', 'eng', 'ops')):
+        site.preferences.upsert({'employee_id': f'dept-{number}', 'date': DATE, 'department': department,
+                                 'lunch': True, 'snacks': number == 2})
+
+    # A preference write whose $inc never landed
+    site.counts.add_department_delta(DATE, {'eng': {'total_employees': 1, 'lunch_count': 1}})
+    drifted_rev = site.counts.get(DATE)['rev']
+
+    employee_app.update_meal_counts(DATE, 'main')
+    counts = site.counts.get(DATE)
+    assert counts['departments'] == {
+        'eng': {'breakfast_count': 0, 'lunch_count': 2, 'snacks_count': 0, 'total_employees': 2},
+        'ops': {'breakfast_count': 0, 'lunch_count': 1, 'snacks_count': 1, 'total_employees': 1}
+    }
+    assert counts['lunch_count'] == 3
+    assert counts['rev'] > drifted_rev
@@ -0,0 +1,152 @@
+from datetime import date
+
+import pytest
+
+from utils.menu_templates import TemplateExpander, fill_menus, menu_document, resolve_menu, template_day, validate_template
+
+MONDAY = {'breakfast': ['Idli'], 'lunch': ['Dal', 'Rice'], 'snacks': ['Samosa']}
+TUESDAY = {'breakfast': ['Poha'], 'lunch': ['Rajma'], 'snacks': []}
+
+
+def make_template(**changes):
+    template = {
+        'name': 'standard',
+        'start_date': '2026-01-05',  # a Monday
+        'end_date': None,
+        'weeks': [{'monday': MONDAY}, {'monday': TUESDAY, 'tuesday': TUESDAY}],
+        'overrides': {'2026-01-26': None, '2026-01-27': MONDAY}
+    }
+    template.update(changes)
+    return template
+
+
+def test_valid_template():
+    assert validate_template(make_template()) is None
+
+
+@pytest.mark.parametrize('changes, error', [
+    ({'name': ''}, 'Template name is required'),
+    ({'start_date': '05/01/2026'}, 'YYYY-MM-DD'),
+    ({'end_date': '2026-01-01'}, 'end_date must not be before start_date'),
+    ({'overrides': {'someday': None}}, 'YYYY-MM-DD'),
+    ({'weeks': []}, 'weeks must be a list'),
+    ({'weeks': [{}] * 5}, 'weeks must be a list'),
+    ({'weeks': [{'funday': MONDAY}]}, 'Each rotation week'),
+    ({'weeks': [{'monday': ['Idli']}]}, 'monday: a day menu must be an object'),
+    ({'weeks': [{'monday': 'Idli'}]}, 'monday: a day menu must be an object'),
+    ({'weeks': [{'monday': {'lunch': 'Dal'}}]}, 'monday: lunch must be a list'),
+    ({'weeks': [{'monday': {'snacks': [1]}}]}, 'monday: snacks must be a list'),
+    ({'overrides': ['2026-01-26']}, 'overrides must map dates'),
+    ({'overrides': {'2026-01-26': 7}}, 'override 2026-01-26: a day menu must be an object'),
+    ({'overrides': {'2026-01-26': {'breakfast': None}}}, 'override 2026-01-26: breakfast must be a list'),
+])
+def test_invalid_templates(changes, error):
+    assert error in validate_template(make_template(**changes))
+
+
+def test_rotation_and_overrides():
+    template = make_template()
+    assert template_day(template, date(2026, 1, 5)) == MONDAY
+    assert template_day(template, date(2026, 1, 12)) == TUESDAY       # second rotation week
+    assert template_day(template, date(2026, 1, 19)) == MONDAY        # and back to the first
+    assert template_day(template, date(2026, 1, 6)) is None           # no tuesday in week one
+    assert template_day(template, date(2026, 1, 26)) is None          # holiday override
+    assert template_day(template, date(2026, 1, 27)) == MONDAY        # one-off override
+
+
+def make_expander(*templates, ttl=60):
+    loads = []
+
+    def load():
+        loads.append(1)
+        return list(templates)
+
+    return TemplateExpander(load, menu_document, ttl=ttl), loads
+
+
+def test_expand_builds_menu_documents():
+    expander, _ = make_expander(make_template())
+    assert expander.expand('2026-01-05') == {
+        'date': '2026-01-05', 'day': 'Monday', 'template': 'standard', **MONDAY
+    }
+    assert expander.expand('2026-01-04') is None                      # before the template starts
+
+
+def test_latest_starting_template_wins():
+    later = make_template(name='spring', start_date='2026-03-02', weeks=[{'monday': TUESDAY}], overrides={})
+    expander, _ = make_expander(make_template(), later)
+    assert expander.expand('2026-02-23')['template'] == 'standard'
+    assert expander.expand('2026-03-02')['template'] == 'spring'
+
+
+def test_templates_are_loaded_once_until_invalidated():
+    expander, loads = make_expander(make_template())
+    expander.expand('2026-01-05')
+    expander.expand('2026-01-12')
+    assert len(loads) == 1
+    expander.invalidate()
+    expander.expand('2026-01-05')
+    assert len(loads) == 2
+
+
+def test_expander_without_loader_uses_load():
+    expander = TemplateExpander(None, menu_document)
+    assert expander.stale()
+    expander.load([make_template()])
+    assert not expander.stale()
+    assert expander.expand('2026-01-05')['template'] == 'standard'
+
+
+class Menus:
+
+    def __init__(self, *menus):
+        self.menus = {menu['date']: menu for menu in menus}
+
+    def get(self, date):
+        return self.menus.get(date)
+
+
+def test_stored_menu_beats_the_template():
+    stored = {'date': '2026-01-05', 'day': 'Monday', 'breakfast': ['Upma'], 'lunch': [], 'snacks': []}
+    expander, _ = make_expander(make_template())
+    assert resolve_menu(Menus(stored), expander, '2026-01-05') == stored
+    assert resolve_menu(Menus(), expander, '2026-01-05')['template'] == 'standard'
+    assert resolve_menu(Menus(), expander, 'not-a-date') is None
+
+
+def test_fill_menus_fills_gaps_and_projects_fields():
+    stored = [{'date': '2026-01-06', 'day': 'Tuesday', 'breakfast': ['Upma'], 'lunch': [], 'snacks': []}]
+    expander, _ = make_expander(make_template())
+    menus = fill_menus(stored, expander, '2026-01-05', '2026-01-07', fields=('date', 'breakfast'))
+    assert menus == [
+        {'date': '2026-01-05', 'breakfast': ['Idli']},
+        {'date': '2026-01-06', 'breakfast': ['Upma']}
+    ]
+
+
+def test_expansion_built_across_an_invalidate_is_not_cached():
+    expander, loads = make_expander(make_template())
+    build = expander.build
+
+    def build_then_invalidate(template, day, body):
+        expander.invalidate()    # an admin template write lands mid-expansion
+        return build(template, day, body)
+
+    expander.build = build_then_invalidate
+    assert expander.expand('2026-01-05')['template'] == 'standard'
+    assert date(2026, 1, 5) not in expander.expansions
+
+
+def test_sql_templates_list_menu_item_ids():
+    day = {'breakfast': [1], 'lunch': [2, 3], 'dinner': []}
+    template = make_template(weeks=[{'monday': day}], overrides={})
+    sql_meals = ('breakfast', 'lunch', 'dinner')
+    assert validate_template(template, item_type=int, meals=sql_meals) is None
+    assert 'list of dish names' in validate_template(template)
+    assert 'snacks is not a meal' in validate_template(make_template(), item_type=int, meals=sql_meals)
+    assert 'menu item ids' in validate_template(
+        make_template(weeks=[{'monday': {'lunch': ['Dal']}}], overrides={}), item_type=int, meals=sql_meals
+    )
+    assert 'menu item ids' in validate_template(
+        make_template(weeks=[{'monday': {'lunch': [True]}}], overrides={}), item_type=int, meals=sql_meals
+    )
@@ -0,0 +1,140 @@
+import json
+import sqlite3
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from flask import Flask
+
+from utils.profiling import (
+    ID_HEADER, ProfilingConfig, ProfilingMiddleware, TimedConnection, init_flask_profiling,
+    init_sqlalchemy_profiling, record_db, sql_operation
+)
+
+
+def make_config(tmp_path, **options):
+    return ProfilingConfig(**dict({'token': 'secret', 'directory': str(tmp_path), 'interval': 0.001}, **options))
+
+
+def read_profile(tmp_path, profile_id):
+    with open(tmp_path / f'{profile_id}.json') as f:
+        summary = json.load(f)
+    return summary, (tmp_path / f'{profile_id}.collapsed').read_text()
+
+
+def test_off_unless_configured():
+    assert not ProfilingConfig().enabled
+    assert ProfilingConfig(token='t').enabled and ProfilingConfig(sample_rate=0.1).enabled
+
+
+def test_which_requests_are_wanted():
+    config = ProfilingConfig(token='secret', sample_rate=1.0, endpoints=['save_meal_preference', '/api/admin/reports'])
+    assert config.wanted('secret', '/anything', 'home')
+    assert config.wanted(None, '/api/admin/reports/waste', None)
+    assert not config.wanted(None, '/api/admin/reportsx', 'home')
+    assert config.wanted('wrong', '/api/employee/meal-preference', lambda: 'save_meal_preference')
+    assert not ProfilingConfig(token='secret').wanted('wrong', '/', 'home')
+
+    resolved = []
+    ProfilingConfig(sample_rate=1.0, endpoints=['/api']).wanted(None, '/api/x', lambda: resolved.append(1))
+    assert resolved == []     # the path matched; the endpoint name was never needed
+
+
+def test_sql_operation_names():
+    assert sql_operation('SELECT * FROM menu_items WHERE id = ?') == 'SELECT menu_items'
+    assert sql_operation('insert into "tasks" (kind) values (?)') == 'INSERT tasks'
+    assert sql_operation('UPDATE sync_cursors SET seq = 1') == 'UPDATE sync_cursors'
+    assert sql_operation('PRAGMA journal_mode=WAL') == 'PRAGMA'
+
+
+def test_profile_writes_stacks_and_db_breakdown(tmp_path):
+    config = make_config(tmp_path)
+    profile = config.begin('report', 'GET', '/report')
+    conn = sqlite3.connect(':memory:', factory=TimedConnection)
+    conn.execute('CREATE TABLE counts (date TEXT)')
+    conn.executemany('INSERT INTO counts VALUES (?)', [('2026-03-09',), ('2026-03-10',)])
+    record_db('find meal_counts', 0.002)
+    deadline = time.perf_counter() + 0.03
+    while time.perf_counter() < deadline:
+        pass
+    profile.finish(200)
+    profile.finish(200)     # a second finish is a no-op
+
+    summary, collapsed = read_profile(tmp_path, profile.id)
+    assert summary['status'] == 200 and summary['endpoint'] == 'report'
+    assert summary['samples'] > 0
+    assert {op['operation'] for op in summary['db']['operations']} == {'CREATE', 'INSERT counts', 'find meal_counts'}
+    assert summary['db']['calls'] == 3
+    assert 'test_profile_writes_stacks_and_db_breakdown' in collapsed
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in collapsed.splitlines())
+
+    record_db('find after', 1.0)    # nothing is charged once the profile has finished
+    assert len(profile.db_calls) == 3
+
+
+def test_concurrent_profiles_are_capped(tmp_path):
+    config = make_config(tmp_path, max_concurrent=1)
+    first = config.begin('a', 'GET', '/a')
+    assert config.begin('b', 'GET', '/b') is None
+    first.finish(200)
+    second = config.begin('b', 'GET', '/b')
+    assert second is not None
+    second.finish(200)
+
+
+def test_sqlalchemy_statements_are_timed(tmp_path):
+    from sqlalchemy import create_engine, text
+
+    config = make_config(tmp_path)
+    engine = create_engine('sqlite://')
+    init_sqlalchemy_profiling(engine, config)
+    profile = config.begin('sql', 'GET', '/sql')
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+    profile.finish(200)
+    assert [operation for operation, _ in profile.db_calls] == ['SELECT']
+
+
+def test_flask_requests_carry_the_profile_id(tmp_path):
+    app = Flask(__name__)
+    config = init_flask_profiling(app, make_config(tmp_path, max_concurrent=1))
+
+    @app.route('/ok')
+    def ok():
+        return {'success': True}
+
+    @app.route('/boom')
+    def boom():
+        raise RuntimeError('handler failed')
+
+    client = app.test_client()
+    assert ID_HEADER not in client.get('/ok').headers
+    profile_id = client.get('/ok', headers={'X-Profile': 'secret'}).headers[ID_HEADER]
+    assert read_profile(tmp_path, profile_id)[0]['endpoint'] == 'ok'
+
+    assert client.get('/boom', headers={'X-Profile': 'secret'}).status_code == 500
+    # The failed request still released its slot
+    assert config.slots.acquire(blocking=False)
+    config.slots.release()
+
+
+def test_flask_hooks_are_not_installed_when_off():
+    app = Flask(__name__)
+    init_flask_profiling(app, ProfilingConfig())
+    assert not app.before_request_funcs
+
+
+def test_asgi_middleware(tmp_path):
+    api = FastAPI()
+
+    @api.get('/items/{item_id}')
+    async def get_item(item_id: int):
+        return {'id': item_id}
+
+    api.add_middleware(ProfilingMiddleware, config=make_config(tmp_path))
+    client = TestClient(api)
+    assert ID_HEADER not in client.get('/items/1').headers
+    response = client.get('/items/2', headers={'X-Profile': 'secret'})
+    assert response.json() == {'id': 2}
+    summary, _ = read_profile(tmp_path, response.headers[ID_HEADER])
+    assert (summary['endpoint'], summary['status']) == ('get_item', 200)
@@ -0,0 +1,171 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+from flask import Flask
+
+import app as employee_app
+from utils.idempotency import AsyncIdempotencyCache, IdempotencyCache, IdempotencyConflict, fingerprint
+from utils.ratelimit import MemoryBucketStore, RateLimiter, rate_limited
+
+DATE = (datetime.now().date() + timedelta(days=5)).isoformat()
+
+
+def test_bucket_allows_a_burst_then_refills():
+    store = MemoryBucketStore()
+    assert [store.take('k', rate=1, capacity=3, now=0)[0] for _ in range(3)] == [True, True, True]
+    assert store.take('k', rate=1, capacity=3, now=0) == (False, 1.0)
+    assert store.take('k', rate=1, capacity=3, now=0.5) == (False, 0.5)
+    assert store.take('k', rate=1, capacity=3, now=1.0) == (True, 0.0)
+
+
+def test_bucket_never_fills_past_capacity():
+    store = MemoryBucketStore()
+    store.take('k', rate=1, capacity=2, now=0)
+    assert store.take('k', rate=1, capacity=2, cost=2, now=1000)[0]
+    assert not store.take('k', rate=1, capacity=2, now=1000)[0]
+
+
+def test_full_buckets_are_evicted_first():
+    store = MemoryBucketStore(max_keys=2)
+    store.take('idle', rate=1, capacity=1, now=0)
+    store.take('busy', rate=0.001, capacity=1, now=0)
+    store.take('new', rate=1, capacity=1, now=10)
+    assert set(store.buckets) == {'busy', 'new'}
+
+
+def test_limiters_keep_separate_buckets_per_name_and_key():
+    store = MemoryBucketStore()
+    login = RateLimiter(store, 'login', rate=0.001, capacity=1)
+    writes = RateLimiter(store, 'writes', rate=0.001, capacity=1)
+    assert login.hit('a')[0] and login.hit('b')[0] and writes.hit('a')[0]
+    assert not login.hit('a')[0]
+
+
+def test_rate_limited_answers_429_with_retry_after():
+    app = Flask(__name__)
+    limiter = RateLimiter(MemoryBucketStore(), 'test', rate=0.5, capacity=1)
+
+    @app.route('/ping')
+    @rate_limited(limiter, lambda: 'client')
+    def ping():
+        return {'success': True}
+
+    client = app.test_client()
+    assert client.get('/ping').status_code == 200
+    response = client.get('/ping')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '2'
+    assert response.get_json()['success'] is False
+
+
+def test_fingerprint_ignores_key_order():
+    assert fingerprint({'date': DATE, 'lunch': True}) == fingerprint({'lunch': True, 'date': DATE})
+    assert fingerprint({'lunch': True}) != fingerprint({'lunch': False})
+
+
+def test_duplicates_replay_the_first_result():
+    cache, calls = IdempotencyCache(), []
+    write = lambda: calls.append(1) or ({'saved': len(calls)}, 201)
+    assert cache.run('k', 'f', write) == (({'saved': 1}, 201), False)
+    assert cache.run('k', 'f', write) == (({'saved': 1}, 201), True)
+    assert len(calls) == 1
+
+
+def test_reused_key_with_another_payload():
+    cache = IdempotencyCache()
+    cache.run('k', 'f1', lambda: ({}, 201))
+    with pytest.raises(IdempotencyConflict):
+        cache.run('k', 'f2', lambda: ({}, 201))
+    assert cache.run('k', 'f2', lambda: ({'second': True}, 201), replace_on_mismatch=True) == (({'second': True}, 201), False)
+
+
+def test_failed_writes_are_not_replayed():
+    cache = IdempotencyCache()
+    assert cache.run('k', 'f', lambda: ({'error': 'late'}, 400))[1] is False
+    assert cache.run('k', 'f', lambda: ({}, 201)) == (({}, 201), False)
+
+    with pytest.raises(RuntimeError):
+        cache.run('boom', 'f', lambda: (_ for _ in ()).throw(RuntimeError('store down')))
+    assert 'boom' not in cache.entries
+
+
+def test_results_expire_after_the_ttl():
+    cache = IdempotencyCache(ttl=0.05)
+    cache.run('k', 'f', lambda: ({}, 201))
+    assert cache.run('k', 'f', lambda: ({}, 201))[1] is True
+    time.sleep(0.06)
+    assert cache.run('k', 'f', lambda: ({}, 201))[1] is False
+
+
+def test_concurrent_duplicates_wait_for_one_write():
+    cache, calls, started = IdempotencyCache(), [], threading.Event()
+
+    def slow_write():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return {}, 201
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.run('k', 'f', slow_write)))
+    first.start()
+    started.wait()
+    results.append(cache.run('k', 'f', slow_write))
+    first.join()
+    assert len(calls) == 1
+    assert sorted(replayed for _, replayed in results) == [False, True]
+
+
+def test_async_duplicates_await_one_write():
+    cache, calls = AsyncIdempotencyCache(), []
+
+    async def write():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {}, 201
+
+    async def submit_twice():
+        return await asyncio.gather(cache.run('k', 'f', write), cache.run('k', 'f', write))
+
+    results = asyncio.run(submit_twice())
+    assert len(calls) == 1
+    assert sorted(replayed for _, replayed in results) == [False, True]
+
+
+def auth_headers(number):
+    employee_id = employee_app.repos.employees.create({
+        'employee_id': f'RL{number:04d}',
+        'name': f'Employee {number}',
+        'email': f'rl-{number}@example.com',
+        'password': 'not-used',
+        'department': 'engineering',
+        'site_id': 'main'
+    })
+    token = jwt.encode({'employee_id': employee_id, 'exp': datetime.utcnow() + timedelta(hours=1)},
+                       employee_app.app.config['SECRET_KEY'], algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_preference_submit_with_a_key_is_replayed():
+    client, headers = employee_app.app.test_client(), dict(auth_headers(1), **{'Idempotency-Key': 'submit-1'})
+    first = client.post('/api/employee/meal-preference', headers=headers, json={'date': DATE, 'lunch': True})
+    again = client.post('/api/employee/meal-preference', headers=headers, json={'date': DATE, 'lunch': True})
+    assert first.status_code == again.status_code == 201
+    assert 'Idempotent-Replayed' not in first.headers
+    assert again.headers['Idempotent-Replayed'] == 'true'
+
+    other = client.post('/api/employee/meal-preference', headers=headers, json={'date': DATE, 'lunch': False})
+    assert other.status_code == 422
+
+
+def test_login_is_limited_per_address_and_account():
+    client = employee_app.app.test_client()
+    credentials = {'email': 'nobody-rl@example.com', 'password': 'wrong'}
+    burst = employee_app.login_limiter.capacity
+    statuses = [client.post('/api/employee/login', json=credentials).status_code for _ in range(burst + 1)]
+    assert statuses == [401] * burst + [429]
+    assert client.post('/api/employee/login', json=dict(credentials, email='someone-else@example.com')).status_code == 401
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+
+import app as employee_app
+from utils.sites import PerSite
+
+DATE = (datetime.now().date() + timedelta(days=3)).isoformat()
+
+
+@pytest.fixture
+def client():
+    return employee_app.app.test_client()
+
+
+def login(site_id, number):
+    employee_id = employee_app.repos.employees.create({
+        'employee_id': f'{site_id.upper()}{number:04d}',
+        'name': f'Employee {number}',
+        'email': f'{site_id}-{number}@sites.example.com',
+        'password': 'not-used',
+        'department': 'engineering',
+        'site_id': site_id
+    })
+    token = jwt.encode(
+        {'employee_id': employee_id, 'exp': datetime.utcnow() + timedelta(hours=1)},
+        employee_app.app.config['SECRET_KEY'], algorithm='HS256'
+    )
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_per_site_builds_each_site_once():
+    built = []
+    per_site = PerSite(lambda site_id: built.append(site_id) or object())
+    assert per_site('main') is per_site('main')
+    assert per_site('north') is not per_site('main')
+    assert built == ['main', 'north']
+
+
+def test_sites_keep_their_own_preferences(client):
+    main, north = login('main', 1), login('north', 1)
+    assert client.post('/api/employee/meal-preference', headers=main, json={'date': DATE, 'lunch': True}).status_code == 201
+
+    assert client.get(f'/api/employee/meal-preference/{DATE}', headers=main).get_json()['preference']['lunch'] is True
+    assert employee_app.site_repos('north').preferences.count(DATE)['lunch_count'] == 0
+    assert employee_app.site_repos('main').preferences.count(DATE)['lunch_count'] >= 1
+    assert client.get(f'/api/employee/meal-preference/{DATE}', headers=north).get_json()['preference']['lunch'] is False
+
+
+def test_register_rejects_unknown_site(client):
+    response = client.post('/api/employee/register', json={
+        'employee_id': 'X1', 'name': 'X', 'email': 'x@sites.example.com', 'password': 'pw', 'site_id': 'atlantis'
+    })
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Unknown site: atlantis'
+
+
+def test_public_counts_reject_unknown_site(client):
+    assert client.get(f'/api/employee/meal-counts/{DATE}?site=north').status_code == 200
+
+    before = dict(employee_app.get_repositories.__globals__['_instances'])
+    response = client.get(f'/api/employee/meal-counts/{DATE}?site=atlantis')
+    assert response.status_code == 400
+    assert employee_app.get_repositories.__globals__['_instances'] == before
+
+
+def test_meal_pass_is_bound_to_the_employee_site(client):
+    from utils.meal_pass import verify_pass
+
+    north = login('north', 2)
+    client.post('/api/employee/meal-preference', headers=north, json={'date': DATE, 'snacks': True})
+    token = client.get(f'/api/employee/meal-pass/{DATE}', headers=north).get_json()['token']
+    employee_id, site_id, date = verify_pass(token)
+    assert (site_id, date) == ('north', DATE)
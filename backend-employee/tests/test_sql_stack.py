@@ -0,0 +1,126 @@
+from datetime import date, datetime
+
+import pytest
+
+from repositories.memory import MemoryMenuItemRepository
+from utils.bulk_import import import_employees
+from utils.menu_sync import lag, pull
+from utils.menu_templates import TemplateExpander
+
+
+@pytest.fixture
+def sql(tmp_path, monkeypatch):
+    from config import Config
+    from main import create_app
+    from repositories.sql import SqlRepositories
+
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'canteen.db'}")
+    app = create_app()
+    with app.app_context():
+        yield app, SqlRepositories()
+
+
+def item(item_id, name, meal_type='lunch', day='2026-03-10', available=True):
+    return {'id': item_id, 'name': name, 'category': 'veg', 'meal_type': meal_type,
+            'date': day, 'is_available': available}
+
+
+def admin_log(*changes):
+    """fetch(since, limit) over a fixed change log, paged like GET /menu/changes"""
+    log = [dict(change, seq=seq) for seq, change in enumerate(changes, start=1)]
+
+    def fetch(since, limit):
+        page = [change for change in log if change['seq'] > since][:limit]
+        return {'changes': page, 'next': page[-1]['seq'] if page else max(since, len(log)), 'latest': len(log)}
+
+    return fetch
+
+
+def test_register_and_login_on_the_sql_app(sql):
+    app, _ = sql
+    client = app.test_client()
+    employee = {'employee_id': 'E1', 'name': 'Asha', 'email': 'asha@example.com', 'password': 'secret1'}
+    assert client.post('/api/employee/register', json=employee).status_code == 201
+    assert client.post('/api/employee/register', json=employee).status_code == 400
+    response = client.post('/api/employee/login', json={'employee_id': 'E1', 'password': 'secret1'})
+    assert response.status_code == 200
+    assert response.get_json()['employee']['email'] == 'asha@example.com'
+
+
+@pytest.mark.parametrize('store', ['sql', 'memory'])
+def test_menu_pull_applies_each_change_once(sql, store):
+    menu_items = sql[1].menu_items if store == 'sql' else MemoryMenuItemRepository()
+    fetch = admin_log(
+        {'op': 'upsert', 'item': item(1, 'Dal')},
+        {'op': 'upsert', 'item': item(2, 'Rice')},
+        {'op': 'upsert', 'item': item(1, 'Dal Tadka')},
+        {'op': 'delete', 'item': {'id': 2}},
+    )
+
+    assert pull(menu_items, fetch, batch_size=3) == {'applied': 4, 'batches': 2, 'seq': 4, 'latest': 4}
+    assert [entry['name'] for entry in menu_items.list_for_date('2026-03-10')] == ['Dal Tadka']
+    assert pull(menu_items, fetch)['applied'] == 0
+    status = lag(menu_items)
+    assert status['pending_changes'] == 0
+    assert status['synced_at'] is not None
+
+
+def test_menu_pull_resumes_after_a_failed_batch(sql):
+    menu_items = sql[1].menu_items
+    fetch = admin_log(*({'op': 'upsert', 'item': item(n, f'Dish {n}')} for n in range(1, 6)))
+    calls = []
+
+    def flaky(since, limit):
+        calls.append(since)
+        if len(calls) == 2:
+            raise ConnectionError('admin down')
+        return fetch(since, limit)
+
+    with pytest.raises(ConnectionError):
+        pull(menu_items, flaky, batch_size=2)
+    assert menu_items.sync_state('admin_menu')['seq'] == 2
+
+    assert pull(menu_items, flaky, batch_size=2)['applied'] == 3
+    assert len(menu_items.list_for_date('2026-03-10')) == 5
+
+
+def test_sql_templates_hold_menu_item_ids(sql, monkeypatch):
+    from services.employee_service import EmployeeService
+
+    _, repos = sql
+    pull(repos.menu_items, admin_log(
+        {'op': 'upsert', 'item': item(1, 'Idli', 'breakfast', '2026-01-01')},
+        {'op': 'upsert', 'item': item(2, 'Dal', 'lunch', '2026-01-01')},
+    ))
+    with pytest.raises(ValueError, match='menu item ids'):
+        repos.templates.put({'name': 'standard', 'start_date': '2026-01-05', 'weeks': [{'monday': {'lunch': ['Dal']}}]})
+    with pytest.raises(ValueError, match='snacks is not a meal'):
+        repos.templates.put({'name': 'standard', 'start_date': '2026-01-05', 'weeks': [{'monday': {'snacks': [1]}}]})
+    repos.templates.put({'name': 'standard', 'start_date': '2026-01-05',
+                         'weeks': [{'monday': {'breakfast': [1], 'lunch': [2, 99]}}]})
+
+    monkeypatch.setattr(EmployeeService, 'repos', repos)
+    monkeypatch.setattr(EmployeeService, 'menu_templates', TemplateExpander(
+        repos.templates.list_all, lambda template, day, body: EmployeeService.template_items(body)
+    ))
+    menu, error = EmployeeService.get_daily_menu(date(2026, 1, 5))
+    assert error is None
+    assert [entry['name'] for entry in menu['breakfast']] == ['Idli']
+    assert [entry['name'] for entry in menu['lunch']] == ['Dal']    # unknown id 99 is skipped
+    assert menu['dinner'] == []
+
+
+def test_bulk_import_into_sql(sql):
+    _, repos = sql
+    rows = [
+        {'employee_id': 'E1', 'name': 'Asha', 'email': 'asha@example.com', 'password': 'pw', 'department': 'eng'},
+        {'employee_id': 'E2', 'name': 'Ravi', 'email': 'ravi@example.com', 'password': 'pw'},
+        {'employee_id': 'E1', 'name': 'Asha again', 'email': 'other@example.com', 'password': 'pw'},
+    ]
+    report = import_employees(repos.employees, rows, datetime(2026, 3, 1), workers=1)
+    assert (report['created'], report['failed']) == (2, 1)
+    assert repos.employees.get_by_email('ravi@example.com')['employee_id'] == 'E2'
+
+    again = import_employees(repos.employees, rows[:2], datetime(2026, 3, 1), workers=1)
+    assert again['created'] == 0
+    assert {error['error'] for error in again['errors']} == {'Employee ID already exists'}
@@ -0,0 +1,70 @@
+import pytest
+
+from utils.sync import OVERLAP, TOMBSTONE_DAYS, delta, parse_since, response, window
+
+NOW = 1_800_000_000_000_000
+DAY = 86400 * 1_000_000
+
+
+@pytest.mark.parametrize('value, expected', [(None, 0), ('', 0), ('0', 0), ('1799999999000000', 1799999999000000)])
+def test_parse_since(value, expected):
+    assert parse_since(value) == expected
+
+
+@pytest.mark.parametrize('value', ['-1', 'yesterday', '1.5'])
+def test_parse_since_rejects_non_revisions(value):
+    with pytest.raises(ValueError):
+        parse_since(value)
+
+
+def test_window_reaches_back_by_the_overlap():
+    since = NOW - 60 * 1_000_000
+    assert window(since, NOW) == (NOW, since - OVERLAP, False)
+
+
+def test_window_never_asks_for_revision_zero_on_a_delta():
+    # An early revision minus the overlap would go to zero or below, which means "everything"
+    _, after, reset = window(OVERLAP // 2, OVERLAP)
+    assert after == 1 and not reset
+
+
+@pytest.mark.parametrize('since', [0, NOW - TOMBSTONE_DAYS * DAY - 1])
+def test_window_resets_new_and_expired_clients(since):
+    assert window(since, NOW) == (NOW, 0, True)
+
+
+def test_response_hands_back_the_newest_revision():
+    result = response(NOW, False, {'menus': [{'date': '2026-01-05', 'rev': NOW + 5}]}, {'deleted_menus': [{'date': '2026-01-06', 'rev': NOW + 9}]})
+    assert result['rev'] == NOW + 9
+    assert result['menus'] == [{'date': '2026-01-05', 'rev': NOW + 5}]
+    assert result['deleted_menus'] == [{'date': '2026-01-06', 'rev': NOW + 9}]
+
+
+def test_idle_client_still_moves_forward():
+    assert response(NOW, False, {'menus': []})['rev'] == NOW
+
+
+def test_reset_drops_deletions():
+    result = response(NOW, True, {'menus': []}, {'deleted_menus': [{'date': '2026-01-06', 'rev': NOW + 9}]})
+    assert result['reset'] is True
+    assert result['deleted_menus'] == []
+    assert result['rev'] == NOW
+
+
+def test_delta_fetches_after_the_window():
+    asked = []
+
+    def fetch(after):
+        asked.append(after)
+        return []
+
+    since = NOW - 1_000_000
+    delta(since, {'menus': fetch}, {'deleted_menus': fetch}, now=NOW)
+    assert asked == [since - OVERLAP, since - OVERLAP]
+
+
+def test_full_snapshot_skips_the_tombstone_fetch():
+    asked = []
+    result = delta(0, {'menus': lambda after: asked.append(after) or []}, {'deleted_menus': lambda after: asked.append('tombstones')}, now=NOW)
+    assert asked == [0]
+    assert result['reset'] is True
@@ -0,0 +1,162 @@
+import threading
+import time
+
+import pytest
+
+from utils.task_queue import TaskQueue, TaskWorkers, QUEUED, RUNNING, DONE, FAILED
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return TaskQueue(str(tmp_path / 'tasks.db'), max_attempts=2, backoff_base=0.01)
+
+
+def test_dedup_key_collapses_waiting_tasks(queue):
+    assert queue.enqueue('update_meal_counts', {'date': '2026-01-05'}, dedup_key='meal_counts:main:2026-01-05')
+    assert not queue.enqueue('update_meal_counts', {'date': '2026-01-05'}, dedup_key='meal_counts:main:2026-01-05')
+    assert queue.enqueue('update_meal_counts', {'date': '2026-01-06'}, dedup_key='meal_counts:main:2026-01-06')
+    assert queue.stats()['total'][QUEUED] == 2
+
+
+def test_enqueue_while_running_is_kept(queue):
+    queue.enqueue('update_meal_counts', dedup_key='k')
+    task = queue.claim('w1')
+    assert queue.enqueue('update_meal_counts', dedup_key='k')
+    assert queue.stats()['total'][RUNNING] == 1
+    assert queue.stats()['total'][QUEUED] == 1
+    queue.complete(task['id'])
+
+
+def test_claim_skips_a_key_with_a_run_in_progress(queue):
+    queue.enqueue('update_meal_counts', {'n': 1}, dedup_key='k')
+    first = queue.claim('w1')
+    queue.enqueue('update_meal_counts', {'n': 2}, dedup_key='k')
+    queue.enqueue('send_reminder', {'n': 3})
+
+    assert queue.claim('w2')['name'] == 'send_reminder'
+    assert queue.claim('w2') is None
+
+    queue.complete(first['id'])
+    second = queue.claim('w2')
+    assert second['payload'] == {'n': 2}
+
+
+def test_claim_skips_delayed_tasks(queue):
+    queue.enqueue('send_reminder', delay=60)
+    assert queue.claim('w1') is None
+    assert 59 < queue.seconds_until_next() <= 60
+
+
+def test_fail_retries_then_gives_up(queue):
+    queue.enqueue('flaky')
+    task = queue.claim('w1')
+    assert queue.fail(task, 'boom') == QUEUED
+
+    time.sleep(0.02)
+    task = queue.claim('w1')
+    assert task['attempts'] == 2
+    assert queue.fail(task, 'boom again') == FAILED
+    assert queue.list(FAILED)[0]['last_error'] == 'boom again'
+
+    assert queue.retry() == 1
+    assert queue.claim('w1')['attempts'] == 1
+
+
+def test_requeue_is_superseded_by_a_waiting_duplicate(queue):
+    queue.enqueue('update_meal_counts', dedup_key='k')
+    task = queue.claim('w1')
+    queue.enqueue('update_meal_counts', dedup_key='k')
+
+    assert queue.fail(task, 'boom') == QUEUED
+    totals = queue.stats()['total']
+    assert totals[QUEUED] == 1
+    assert totals[DONE] == 1
+
+
+def test_recover_expired_puts_abandoned_runs_back(tmp_path):
+    queue = TaskQueue(str(tmp_path / 'tasks.db'), lease_seconds=0)
+    queue.enqueue('update_meal_counts')
+    queue.claim('crashed-worker')
+    time.sleep(0.01)
+    assert queue.recover_expired() == 1
+    assert queue.claim('w1') is not None
+
+
+def test_each_thread_reuses_its_connection(queue):
+    assert queue._connect() is queue._connect()
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(queue._connect()))
+    thread.start()
+    thread.join()
+    assert other[0] is not queue._connect()
+
+
+def test_workers_never_overlap_runs_of_one_key(queue):
+    active, overlaps, runs = set(), [], []
+    lock = threading.Lock()
+
+    def recount(date):
+        with lock:
+            if date in active:
+                overlaps.append(date)
+            active.add(date)
+        time.sleep(0.02)
+        with lock:
+            active.discard(date)
+            runs.append(date)
+
+    workers = TaskWorkers(queue, {'update_meal_counts': recount}, threads=4, poll_interval=0.01).start()
+    try:
+        for _ in range(10):
+            queue.enqueue('update_meal_counts', {'date': '2026-01-05'}, dedup_key='meal_counts:main:2026-01-05')
+            time.sleep(0.005)
+        deadline = time.time() + 5
+        while time.time() < deadline and (queue.stats()['total'][QUEUED] or queue.stats()['total'][RUNNING]):
+            time.sleep(0.01)
+    finally:
+        workers.stop()
+
+    assert runs
+    assert overlaps == []
+
+
+def test_lag_counts_from_when_a_task_became_due(tmp_path):
+    queue = TaskQueue(str(tmp_path / 'tasks.db'), backoff_base=60)
+    queue.enqueue('send_reminder', delay=1.0)
+    time.sleep(1.1)
+    assert 0 < queue.stats()['total']['lag_seconds'] < 0.6    # not the 1.1s since enqueue
+
+    task = queue.claim('w1')
+    queue.fail(task, 'boom')
+    assert queue.stats()['total']['lag_seconds'] == 0.0    # backing off, not late
+
+
+def test_renew_extends_the_lease_of_its_own_worker_only(queue):
+    queue.enqueue('update_meal_counts')
+    task = queue.claim('w1')
+    assert queue.renew(task['id'], 'w1')
+    assert not queue.renew(task['id'], 'w2')
+    queue.complete(task['id'])
+    assert not queue.renew(task['id'], 'w1')
+
+
+def test_slow_handler_outlives_its_lease_without_running_twice(tmp_path):
+    queue = TaskQueue(str(tmp_path / 'tasks.db'), lease_seconds=0.3)
+    runs = []
+
+    def slow():
+        runs.append(1)
+        time.sleep(0.8)
+
+    queue.enqueue('slow', dedup_key='slow')
+    workers = TaskWorkers(queue, {'slow': slow}, threads=1, poll_interval=0.01).start()
+    try:
+        time.sleep(0.5)
+        assert queue.recover_expired() == 0
+        assert queue.claim('other-worker') is None
+        time.sleep(0.5)
+    finally:
+        workers.stop()
+    assert runs == [1]
+    assert queue.stats()['total'][DONE] == 1
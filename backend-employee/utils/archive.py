@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+from pymongo import ReplaceOne
+import os
+
+ARCHIVE_HORIZON_DAYS = int(os.getenv('ARCHIVE_HORIZON_DAYS', 90))
+ARCHIVE_BATCH_SIZE = 5000
+
+
+def archive_collection_name(month):
+    """meal_preferences_archive_YYYY_MM for a YYYY-MM month"""
+    return f"meal_preferences_archive_{month.replace('-', '_')}"
+
+
+def _ensure_archive_index(archive):
+    """Unique per site, employee and date; the site-less index of older archives would collide across sites"""
+    for name, info in archive.index_information().items():
+        if info.get('unique') and info['key'][0][0] != 'site_id':
+            archive.drop_index(name)
+    archive.create_index([('site_id', 1), ('employee_id', 1), ('date', 1)], unique=True, name='site_employee_date')
+
+
+def archive_preferences(db, site_id, horizon_days=ARCHIVE_HORIZON_DAYS, today=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Move one site's meal_preferences older than the horizon into per-month
+    archive collections of db, the database the site is routed to. meal_counts
+    rollups are left untouched, and only closed dates are moved because
+    preferences can't be written for past dates.
+    """
+    today = today or datetime.utcnow().date()
+    cutoff = (today - timedelta(days=max(horizon_days, 1))).isoformat()
+    preferences = db['meal_preferences']
+
+    months = sorted({date[:7] for date in preferences.distinct('date', {'site_id': site_id, 'date': {'$lt': cutoff}})})
+
+    archived = []
+    for month in months:
+        name = archive_collection_name(month)
+        archive = db[name]
+        _ensure_archive_index(archive)
+
+        query = {'site_id': site_id, 'date': {'$lt': cutoff, '$gte': f"{month}-01", '$lte': f"{month}-31"}}
+        moved = 0
+
+        while True:
+            batch = list(preferences.find(query).limit(batch_size))
+            if not batch:
+                break
+
+            # Replace by key so a re-run after a partial failure stays idempotent
+            archive.bulk_write([
+                ReplaceOne({'site_id': site_id, 'employee_id': doc['employee_id'], 'date': doc['date']}, doc, upsert=True)
+                for doc in batch
+            ], ordered=False)
+            preferences.delete_many({'_id': {'$in': [doc['_id'] for doc in batch]}})
+            moved += len(batch)
+
+        first = archive.find_one({}, {'date': 1}, sort=[('date', 1)])
+        last = archive.find_one({}, {'date': 1}, sort=[('date', -1)])
+        db['archive_partitions'].update_one(
+            {'collection': 'meal_preferences', 'month': month},
+            {'$set': {
+                'archive_collection': name,
+                'first_date': first['date'] if first else None,
+                'last_date': last['date'] if last else None,
+                'row_count': archive.estimated_document_count(),
+                'archived_at': datetime.utcnow().isoformat()
+            }},
+            upsert=True
+        )
+        archived.append({'site_id': site_id, 'month': month, 'collection': name, 'moved': moved})
+
+    return archived
+
+
+def find_archived_preference(db, employee_id, date, site_id=None):
+    """Look up a single preference in its month's archive, if that month was archived"""
+    partition = db['archive_partitions'].find_one(
+        {'collection': 'meal_preferences', 'month': date[:7]},
+        {'archive_collection': 1}
+    )
+    if not partition:
+        return None
+    query = {'employee_id': employee_id, 'date': date}
+    if site_id is not None:
+        query['site_id'] = site_id
+    return db[partition['archive_collection']].find_one(
+        query,
+        {'_id': 0}
+    )
+
+
+if __name__ == '__main__':
+    from pymongo import MongoClient
+    from dotenv import load_dotenv
+    from repositories import get_repositories, DEFAULT_SITE
+
+    load_dotenv()
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    # Every configured site, each in the database SITE_DATABASES routes it to
+    for site_id in [site.strip() for site in os.getenv('SITE_IDS', DEFAULT_SITE).split(',') if site.strip()]:
+        site_db = get_repositories('mongo', mongo_db=client['canteen_system'], site_id=site_id).db
+        for entry in archive_preferences(site_db, site_id):
+            print(f"{site_id} {entry['month']}: moved {entry['moved']} preferences into {entry['collection']}")
@@ -0,0 +1,135 @@
+# Shared with backend-admin: edit this copy in backend-employee/utils, then run sync_utils.py
+"""
+Bulk employee onboarding. A roster (CSV with a header row, or a JSON list)
+is validated row by row, checked against existing accounts with one lookup
+for the whole file, hashed across a process pool and inserted in batches.
+Rows that cannot be imported are reported with their position; the rest
+still go in.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import io
+import json
+from werkzeug.security import generate_password_hash
+from repositories import DEFAULT_SITE
+
+REQUIRED_FIELDS = ('employee_id', 'name', 'email', 'password')
+BATCH_SIZE = 500
+HASH_CHUNK = 64
+
+
+def parse_roster(content, fmt):
+    """Rows of a CSV or JSON roster as dicts"""
+    if fmt == 'csv':
+        return list(csv.DictReader(io.StringIO(content)))
+    if fmt == 'json':
+        data = json.loads(content)
+        if isinstance(data, dict):
+            data = data.get('employees')
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise ValueError('JSON roster must be a list of employee objects')
+        return data
+    raise ValueError(f"Unsupported roster format: {fmt}")
+
+
+def _hash_chunk(passwords):
+    return [generate_password_hash(password) for password in passwords]
+
+
+def hash_passwords(passwords, workers=None):
+    """werkzeug hashes in input order, spread over a process pool for large rosters"""
+    if workers == 1 or len(passwords) <= HASH_CHUNK:
+        return _hash_chunk(passwords)
+
+    chunks = [passwords[i:i + HASH_CHUNK] for i in range(0, len(passwords), HASH_CHUNK)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [hashed for chunk in pool.map(_hash_chunk, chunks) for hashed in chunk]
+
+
+def _clean(row):
+    return {key: str(value).strip() for key, value in row.items() if key and value is not None}
+
+
+def validate_rows(rows):
+    """([(position, cleaned row)], [error]) after field checks and in-file duplicates"""
+    valid, errors = [], []
+    seen_ids, seen_emails = {}, {}
+
+    for position, raw in enumerate(rows, start=1):
+        row = _clean(raw)
+        missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+        if missing:
+            errors.append({'row': position, 'employee_id': row.get('employee_id'),
+                           'error': f"Missing required fields: {', '.join(missing)}"})
+            continue
+
+        if '@' not in row['email']:
+            errors.append({'row': position, 'employee_id': row['employee_id'], 'error': 'Invalid email'})
+            continue
+
+        duplicate = seen_ids.get(row['employee_id']) or seen_emails.get(row['email'])
+        if duplicate:
+            errors.append({'row': position, 'employee_id': row['employee_id'],
+                           'error': f"Duplicate of row {duplicate} in this file"})
+            continue
+
+        seen_ids[row['employee_id']] = seen_emails[row['email']] = position
+        valid.append((position, row))
+
+    return valid, errors
+
+
+def import_employees(employees, rows, created_at, batch_size=BATCH_SIZE, workers=None, dry_run=False):
+    """
+    Register every importable row through an EmployeeRepository and return
+    {'total', 'created', 'failed', 'errors': [{'row', 'employee_id', 'error'}]}.
+    With dry_run nothing is hashed or written and 'created' counts the rows
+    that would have been.
+    """
+    valid, errors = validate_rows(rows)
+
+    taken_ids, taken_emails = employees.existing(
+        [row['employee_id'] for _, row in valid],
+        [row['email'] for _, row in valid]
+    )
+    pending = []
+    for position, row in valid:
+        if row['employee_id'] in taken_ids:
+            errors.append({'row': position, 'employee_id': row['employee_id'], 'error': 'Employee ID already exists'})
+        elif row['email'] in taken_emails:
+            errors.append({'row': position, 'employee_id': row['employee_id'], 'error': 'Email already registered'})
+        else:
+            pending.append((position, row))
+
+    created = 0
+    if pending and not dry_run:
+        hashes = hash_passwords([row['password'] for _, row in pending], workers)
+
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            docs = [
+                {
+                    'employee_id': row['employee_id'],
+                    'name': row['name'],
+                    'email': row['email'],
+                    'password': hashed,
+                    'department': row.get('department', ''),
+                    'site_id': row.get('site_id') or DEFAULT_SITE,
+                    'created_at': created_at
+                }
+                for (_, row), hashed in zip(batch, hashes[start:start + batch_size])
+            ]
+            # Where the store enforces uniqueness, rows registered since the lookup come back rejected
+            rejected = employees.create_many(docs)
+            for index, error in rejected:
+                position, row = batch[index]
+                errors.append({'row': position, 'employee_id': row['employee_id'], 'error': error})
+            created += len(docs) - len(rejected)
+
+    errors.sort(key=lambda error: error['row'])
+    return {
+        'total': len(rows),
+        'created': len(pending) if dry_run else created,
+        'failed': len(errors),
+        'errors': errors
+    }
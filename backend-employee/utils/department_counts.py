@@ -0,0 +1,81 @@
+from datetime import datetime
+from pymongo import UpdateMany, UpdateOne
+from repositories.base import COUNT_FIELDS, department_key, next_revision
+
+
+def backfill_preference_departments(db):
+    """Stamp each employee's department on their preferences saved before departments were tracked"""
+    requests = [
+        UpdateMany(
+            {'employee_id': str(employee['_id']), 'department': {'$exists': False}},
+            {'$set': {'department': employee.get('department', '')}}
+        )
+        for employee in db['employees'].find({}, {'department': 1})
+    ]
+    if not requests:
+        return 0
+    return db['meal_preferences'].bulk_write(requests, ordered=False).modified_count
+
+
+def rebuild_department_counts(db, start_date=None, end_date=None):
+    """
+    Recount meal_counts.departments, per site, from meal_preferences.
+    Preference writes keep the breakdown current by delta, and the
+    update_meal_counts task recounts a date after each burst of writes, so
+    drift heals on its own for any date still being booked. Run this once
+    after backfill_preference_departments, and to repair dates nobody
+    writes to any more. Rebuilt documents get a new rev, so /sync clients
+    pick up the corrected counts.
+    """
+    match = {}
+    if start_date or end_date:
+        match['date'] = {key: value for key, value in (('$gte', start_date), ('$lte', end_date)) if value}
+
+    pipeline = [
+        {'$match': match},
+        {'$group': {
+            '_id': {'site_id': '$site_id', 'date': '$date', 'department': '$department'},
+            'breakfast_count': {'$sum': {'$cond': ['$breakfast', 1, 0]}},
+            'lunch_count': {'$sum': {'$cond': ['$lunch', 1, 0]}},
+            'snacks_count': {'$sum': {'$cond': ['$snacks', 1, 0]}},
+            'total_employees': {'$sum': 1}
+        }}
+    ]
+
+    by_date = {}
+    for row in db['meal_preferences'].aggregate(pipeline):
+        departments = by_date.setdefault((row['_id'].get('site_id'), row['_id']['date']), {})
+        counts = departments.setdefault(department_key(row['_id'].get('department')), dict.fromkeys(COUNT_FIELDS, 0))
+        for field in COUNT_FIELDS:
+            counts[field] += row[field]
+
+    if by_date:
+        db['meal_counts'].bulk_write([
+            UpdateOne(
+                {'site_id': site_id, 'date': date},
+                {'$set': {'departments': departments, 'rev': next_revision()}},
+                upsert=True
+            )
+            for (site_id, date), departments in by_date.items()
+        ], ordered=False)
+    return len(by_date)
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+    from pymongo import MongoClient
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Backfill and recount per-department meal counts")
+    parser.add_argument('--start-date', help='YYYY-MM-DD (inclusive)')
+    parser.add_argument('--end-date', help='YYYY-MM-DD (inclusive)')
+    args = parser.parse_args()
+
+    load_dotenv()
+    client = MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    db = client['canteen_system']
+    started = datetime.utcnow()
+    print(f"Stamped departments on {backfill_preference_departments(db)} preferences")
+    dates = rebuild_department_counts(db, args.start_date, args.end_date)
+    print(f"Rebuilt department counts for {dates} dates in {(datetime.utcnow() - started).total_seconds():.2f}s")
@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+
+
+class IdempotencyConflict(Exception):
+    """An idempotency key was reused with a different request payload"""
+
+
+class _Entry:
+    __slots__ = ('fingerprint', 'event', 'result', 'expires_at')
+
+    def __init__(self, fingerprint, event):
+        self.fingerprint = fingerprint
+        self.event = event
+        self.result = None
+        self.expires_at = None
+
+
+def fingerprint(payload):
+    """Stable hash of a JSON-able request payload"""
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class IdempotencyCache:
+    """
+    Coalesce duplicate writes. The first call for a key runs the write;
+    concurrent duplicates wait for it and get the same result, and later
+    duplicates within the TTL replay the stored result without touching
+    the database.
+    """
+
+    def __init__(self, ttl=300, max_entries=100000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def run(self, key, request_fingerprint, fn, ttl=None, replace_on_mismatch=False):
+        """
+        Run fn() at most once per (key, fingerprint) and return (result, replayed).
+        fn returns (body, status); only results with status < 400 are kept.
+        """
+        entry, owner = self._claim(key, request_fingerprint, replace_on_mismatch, threading.Event)
+
+        if not owner:
+            entry.event.wait()
+            if entry.result is not None:
+                return entry.result, True
+            # The original attempt failed; fall through and try ourselves
+            return self.run(key, request_fingerprint, fn, ttl, replace_on_mismatch)
+
+        try:
+            result = fn()
+        except Exception:
+            self._abandon(key, entry)
+            raise
+
+        self._settle(key, entry, result, ttl)
+        return result, False
+
+    def _claim(self, key, request_fingerprint, replace_on_mismatch, make_event):
+        """(entry, owner): the live entry for the key, or a new one this caller must fill"""
+        now = time.monotonic()
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry and entry.expires_at is not None and entry.expires_at <= now:
+                entry = None
+
+            if entry and entry.fingerprint != request_fingerprint:
+                if not replace_on_mismatch:
+                    raise IdempotencyConflict('Idempotency key reused with a different payload')
+                entry = None
+
+            owner = entry is None
+            if owner:
+                if len(self.entries) >= self.max_entries:
+                    self._evict(now)
+                entry = _Entry(request_fingerprint, make_event())
+                self.entries[key] = entry
+        return entry, owner
+
+    def _abandon(self, key, entry):
+        with self.lock:
+            if self.entries.get(key) is entry:
+                del self.entries[key]
+        entry.event.set()
+
+    def _settle(self, key, entry, result, ttl):
+        with self.lock:
+            if result[1] < 400:
+                entry.result = result
+                entry.expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+            elif self.entries.get(key) is entry:
+                del self.entries[key]
+        entry.event.set()
+
+    def _evict(self, now):
+        """Drop expired entries; if still full, drop the oldest half"""
+        self.entries = {
+            key: entry for key, entry in self.entries.items()
+            if entry.expires_at is None or entry.expires_at > now
+        }
+        if len(self.entries) >= self.max_entries:
+            keep = list(self.entries.items())[len(self.entries) // 2:]
+            self.entries = dict(keep)
+
+
+class AsyncIdempotencyCache(IdempotencyCache):
+    """IdempotencyCache for one asyncio event loop: duplicates await the first write instead of blocking a thread"""
+
+    async def run(self, key, request_fingerprint, fn, ttl=None, replace_on_mismatch=False):
+        """As IdempotencyCache.run, with fn() returning an awaitable"""
+        entry, owner = self._claim(key, request_fingerprint, replace_on_mismatch, asyncio.Event)
+
+        if not owner:
+            await entry.event.wait()
+            if entry.result is not None:
+                return entry.result, True
+            return await self.run(key, request_fingerprint, fn, ttl, replace_on_mismatch)
+
+        try:
+            result = await fn()
+        except BaseException:
+            # Cancelled with the client's request too: let a waiting duplicate retry
+            self._abandon(key, entry)
+            raise
+
+        self._settle(key, entry, result, ttl)
+        return result, False
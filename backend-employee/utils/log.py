@@ -0,0 +1,178 @@
+# Shared with backend-admin: edit this copy in backend-employee/utils, then run sync_utils.py
+"""Structured JSON logging with a queue-backed, non-blocking handler"""
+from contextvars import ContextVar
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+
+request_id_var = ContextVar('request_id', default=None)
+
+# Attributes every LogRecord has - anything else came in through `extra`
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+def get_request_id():
+    return request_id_var.get()
+
+
+def new_request_id(incoming=None):
+    """Adopt the caller's X-Request-ID or mint one, and bind it to this context"""
+    request_id = incoming or uuid.uuid4().hex
+    request_id_var.set(request_id)
+    return request_id
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, event, request id and extra fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            'level': record.levelname,
+            'logger': record.name,
+            'event': getattr(record, 'event', None) or record.getMessage(),
+        }
+        if getattr(record, 'event', None) and record.msg != record.event:
+            entry['message'] = record.getMessage()
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+
+        for key, value in vars(record).items():
+            if key not in _RESERVED and key not in ('event', 'request_id') and not key.startswith('_'):
+                entry[key] = value
+
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+
+        return json.dumps(entry, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """Stamp the current request id on the record in the emitting thread"""
+
+    def filter(self, record):
+        if not getattr(record, 'request_id', None):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of high-volume events; warnings and errors always pass"""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, 'event', None), 1.0)
+        if rate >= 1.0:
+            return True
+        if random.random() >= rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+def parse_sample_rates(spec):
+    """'meal_counts.updated=0.01,foo=0.5' -> {'meal_counts.updated': 0.01, 'foo': 0.5}"""
+    rates = {}
+    for part in (spec or '').split(','):
+        if '=' in part:
+            event, rate = part.split('=', 1)
+            rates[event.strip()] = float(rate)
+    return rates
+
+
+def setup_logging(service, level=None, sample_rates=None, stream=None):
+    """
+    Route the root logger through a QueueHandler: the request thread only
+    enqueues the record, and a background listener thread does the JSON
+    encoding and the blocking write.
+    """
+    global _listener
+
+    if _listener is not None:
+        return logging.getLogger(service)
+
+    level = level or os.getenv('LOG_LEVEL', 'INFO')
+    if sample_rates is None:
+        sample_rates = parse_sample_rates(os.getenv('LOG_SAMPLE_RATES'))
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+
+    log_queue = queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', 10000)))
+    handler = _DroppingQueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+    handler.addFilter(SamplingFilter(sample_rates))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    logger = logging.getLogger(service)
+    logger.info('logging.configured', extra={'event': 'logging.configured', 'service': service})
+    return logger
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never block the caller: drop the record if the queue is full"""
+
+    def prepare(self, record):
+        # Keep the raw record (msg/args/extra) - formatting happens on the listener thread
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def log_event(logger, event, level=logging.INFO, **fields):
+    """Log a named event with structured fields"""
+    if logger.isEnabledFor(level):
+        fields['event'] = event
+        logger.log(level, event, extra=fields)
+
+
+def init_flask_request_id(app):
+    """Bind an X-Request-ID to every Flask request and echo it on the response"""
+    from flask import request
+
+    @app.before_request
+    def bind_request_id():
+        new_request_id(request.headers.get('X-Request-ID'))
+
+    @app.after_request
+    def echo_request_id(response):
+        response.headers['X-Request-ID'] = request_id_var.get() or ''
+        return response
+
+
+async def fastapi_request_id_middleware(request, call_next):
+    """FastAPI/Starlette counterpart of init_flask_request_id"""
+    request_id = new_request_id(request.headers.get('x-request-id'))
+    response = await call_next(request)
+    response.headers['X-Request-ID'] = request_id
+    return response
@@ -0,0 +1,74 @@
+"""
+Incremental pull of the admin menu change log into the employee menu store.
+
+The admin store stamps every menu item write with a monotonic seq
+(GET /menu/changes). This side keeps a cursor - the last seq applied -
+next to the items it writes and asks only for what came after it. Each
+batch commits together with its cursor move and items are upserted by
+id, so a pull can be interrupted, retried or run twice without applying
+anything twice or skipping anything.
+"""
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+CURSOR = 'admin_menu'
+BATCH_SIZE = 500
+
+
+def http_source(url, timeout=10):
+    """fetch(since, limit) against the admin GET /menu/changes endpoint"""
+    import requests
+
+    session = requests.Session()
+
+    def fetch(since, limit):
+        response = session.get(url, params={'since': since, 'limit': limit}, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    return fetch
+
+
+def pull(menu_items, fetch, name=CURSOR, batch_size=BATCH_SIZE):
+    """Apply batches until caught up with the source; returns the pull's summary"""
+    seq = menu_items.sync_state(name)['seq']
+    applied = batches = 0
+    latest = seq
+    while True:
+        page = fetch(seq, batch_size)
+        latest = page['latest']
+        if latest < seq:
+            # The admin log restarted (new database): leave the cursor for an operator to reset
+            logger.error('menu_sync.source_reset', extra={'event': 'menu_sync.source_reset', 'seq': seq, 'latest': latest})
+            break
+        applied += menu_items.apply_changes(name, page['changes'], page['next'], latest)
+        batches += 1
+        seq = max(seq, page['next'])
+        if not page['changes'] or seq >= latest:
+            break
+
+    summary = {'applied': applied, 'batches': batches, 'seq': seq, 'latest': latest}
+    logger.info('menu_sync.pulled', extra=dict(summary, event='menu_sync.pulled'))
+    return summary
+
+
+def lag(menu_items, name=CURSOR, now=None):
+    """
+    How far the employee store trails the admin log: log entries not yet
+    applied (an upper bound - some may be superseded) and seconds since the
+    store last matched the source
+    """
+    state = menu_items.sync_state(name)
+    synced_at = state['synced_at']
+    if isinstance(synced_at, str):
+        synced_at = datetime.fromisoformat(synced_at)
+    now = now or datetime.utcnow()
+    return {
+        'seq': state['seq'],
+        'latest': state['latest'],
+        'pending_changes': max(0, state['latest'] - state['seq']),
+        'synced_at': synced_at.isoformat() if synced_at else None,
+        'lag_seconds': round((now - synced_at).total_seconds(), 3) if synced_at else None
+    }
@@ -0,0 +1,183 @@
+"""
+Evening reminders for employees who have not set tomorrow's meal
+preference.
+
+The unbooked set is one anti-join in the store (employees minus those with
+a preference for the date), streamed in batches rather than loaded whole.
+Each batch goes out through a pluggable transport - SMTP on one connection
+per batch, a webhook POST per batch, or the log for dry runs - under a
+token bucket so a large roster does not flood the mail relay. Every
+attempt lands in a dispatch log, and employees already reminded for the
+date are skipped, so a rerun after a crash only sends what is missing.
+"""
+from email.message import EmailMessage
+import logging
+import smtplib
+import time
+from urllib.parse import urlparse
+
+from utils.ratelimit import MemoryBucketStore, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+RATE_PER_SECOND = 50
+SUBJECT = 'Set your meal preference for {date}'
+BODY = (
+    "Hi {name},\n\n"
+    "You have not chosen your meals for {date} yet. Please set your preference "
+    "in the Karmic Canteen app before the cutoff so the kitchen can plan.\n"
+)
+
+
+class LogTransport:
+    """Writes reminders to the log instead of sending them (dry runs)"""
+
+    def send(self, date, employees):
+        for employee in employees:
+            logger.info('reminder.dry_run', extra={
+                'event': 'reminder.dry_run', 'date': date, 'employee_id': employee['id'], 'email': employee['email']
+            })
+        return {}
+
+
+class SmtpTransport:
+    """
+    One SMTP session per batch. For local testing point it at a debug
+    server: `python -m aiosmtpd -n -l localhost:1025`.
+    """
+
+    def __init__(self, host='localhost', port=25, sender='canteen@localhost', username=None, password=None,
+                 starttls=False, timeout=30):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def message(self, date, employee):
+        msg = EmailMessage()
+        msg['From'] = self.sender
+        msg['To'] = employee['email']
+        msg['Subject'] = SUBJECT.format(date=date)
+        msg.set_content(BODY.format(date=date, name=employee.get('name') or 'there'))
+        return msg
+
+    def send(self, date, employees):
+        failures = {}
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            for employee in employees:
+                try:
+                    smtp.send_message(self.message(date, employee))
+                except smtplib.SMTPRecipientsRefused as e:
+                    failures[employee['id']] = str(e)
+        return failures
+
+
+class WebhookTransport:
+    """POSTs each batch as JSON to a notification service"""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, date, employees):
+        import requests
+
+        response = requests.post(self.url, json={
+            'type': 'meal_preference_reminder',
+            'date': date,
+            'recipients': [
+                {'employee_id': e['id'], 'name': e.get('name'), 'email': e['email'], 'department': e.get('department')}
+                for e in employees
+            ]
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        body = response.json() if response.content else {}
+        # The service may report per-recipient failures as {"failed": {employee_id: reason}}
+        return dict(body.get('failed') or {}) if isinstance(body, dict) else {}
+
+
+def make_transport(spec, sender='canteen@localhost'):
+    """Transport from a spec: 'log', 'smtp://host:port', or an http(s) webhook URL"""
+    if not spec or spec == 'log':
+        return LogTransport()
+    parsed = urlparse(spec)
+    if parsed.scheme in ('smtp', 'smtps'):
+        return SmtpTransport(
+            host=parsed.hostname or 'localhost', port=parsed.port or 25, sender=sender,
+            username=parsed.username, password=parsed.password, starttls=parsed.scheme == 'smtps'
+        )
+    if parsed.scheme in ('http', 'https'):
+        return WebhookTransport(spec)
+    raise ValueError(f"Unsupported reminder transport: {spec}")
+
+
+def _batches(employees, batch_size):
+    batch = []
+    for employee in employees:
+        batch.append(employee)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def send_reminders(repos, transport, date, sent_at, batch_size=BATCH_SIZE, rate=RATE_PER_SECOND):
+    """
+    Remind every employee without a preference for `date` and return
+    {'date', 'unbooked', 'skipped', 'sent', 'failed', 'batches', 'seconds'}.
+    A batch whose transport call raises is logged as failed for each
+    recipient and the run carries on with the next batch.
+    """
+    started = time.monotonic()
+    already_sent = repos.reminders.sent_employee_ids(date)
+    # Bursts up to one batch, then `rate` messages per second on average
+    limiter = RateLimiter(MemoryBucketStore(), 'reminders', rate, max(rate, batch_size))
+    summary = {'date': date, 'unbooked': 0, 'skipped': 0, 'sent': 0, 'failed': 0, 'batches': 0}
+
+    for batch in _batches(repos.preferences.iter_unbooked_employees(date, batch_size), batch_size):
+        summary['unbooked'] += len(batch)
+        pending = [employee for employee in batch if employee['id'] not in already_sent and employee.get('email')]
+        summary['skipped'] += len(batch) - len(pending)
+        if not pending:
+            continue
+
+        allowed, retry_after = limiter.hit('all', cost=len(pending))
+        while not allowed:
+            time.sleep(retry_after)
+            allowed, retry_after = limiter.hit('all', cost=len(pending))
+
+        try:
+            failures = transport.send(date, pending)
+        except Exception as e:
+            logger.warning('reminder.batch_failed', exc_info=True, extra={
+                'event': 'reminder.batch_failed', 'date': date, 'size': len(pending)
+            })
+            failures = {employee['id']: f"{type(e).__name__}: {e}" for employee in pending}
+
+        repos.reminders.record([
+            {
+                'date': date,
+                'employee_id': employee['id'],
+                'email': employee['email'],
+                'status': 'failed' if employee['id'] in failures else 'sent',
+                'error': failures.get(employee['id']),
+                'sent_at': sent_at
+            }
+            for employee in pending
+        ])
+        summary['batches'] += 1
+        summary['failed'] += len(failures)
+        summary['sent'] += len(pending) - len(failures)
+
+    summary['seconds'] = round(time.monotonic() - started, 3)
+    logger.info('reminder.run', extra=dict(summary, event='reminder.run'))
+    return summary
@@ -0,0 +1,318 @@
+"""
+Durable background task queue on a local SQLite file.
+
+Request handlers enqueue follow-up work and return; worker threads (in the
+app process, or in a separate `python tasks.py work` process) claim tasks,
+run the registered handler and retry failures with exponential backoff.
+Tasks survive restarts, and a task left 'running' by a crashed worker is
+put back on the queue once its lease expires. A live worker renews the
+lease while its handler runs, so a slow handler is never run twice.
+
+A dedup key collapses repeated enqueues while a task is still waiting:
+only one queued task per key exists at a time. Once it starts running a
+new enqueue is accepted again, so work requested mid-run is never lost,
+but that task is not claimed until the running one finishes, so two runs
+for one key never overlap.
+"""
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+class TaskQueue:
+
+    def __init__(self, path, max_attempts=5, backoff_base=1.0, backoff_max=300.0, lease_seconds=300):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+        self.wakeup = threading.Event()
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self):
+        """This thread's connection, opened once (and again in a forked child)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                dedup_key TEXT,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                run_at REAL NOT NULL,
+                enqueued_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                worker TEXT,
+                last_error TEXT
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_dedup
+                ON tasks (dedup_key) WHERE status = 'queued';
+            CREATE INDEX IF NOT EXISTS idx_tasks_runnable
+                ON tasks (status, run_at);
+        """)
+
+    # ---- producer side ----
+    def enqueue(self, name, payload=None, dedup_key=None, delay=0.0):
+        """Queue a task; False if an identical dedup_key is already waiting"""
+        now = time.time()
+        cursor = self._connect().execute(
+            "INSERT OR IGNORE INTO tasks (name, payload, dedup_key, run_at, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+            (name, json.dumps(payload or {}), dedup_key, now + delay, now)
+        )
+        inserted = cursor.rowcount > 0
+        if inserted:
+            self.wakeup.set()
+        return inserted
+
+    # ---- worker side ----
+    def claim(self, worker):
+        """Lease the next runnable task whose dedup key has no run in progress, or None"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("""
+                SELECT * FROM tasks
+                WHERE status = 'queued' AND run_at <= ?
+                  AND (dedup_key IS NULL OR dedup_key NOT IN (
+                      SELECT dedup_key FROM tasks WHERE status = 'running' AND dedup_key IS NOT NULL
+                  ))
+                ORDER BY run_at, id LIMIT 1
+            """, (now,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = 'running', started_at = ?, worker = ?, attempts = attempts + 1 WHERE id = ?",
+                (now, worker, row['id'])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        task = dict(row)
+        task['payload'] = json.loads(task['payload'])
+        task['attempts'] += 1
+        task['started_at'] = now
+        return task
+
+    def renew(self, task_id, worker):
+        """Extend a running task's lease (started_at is the lease's start); False once it was taken back"""
+        cursor = self._connect().execute(
+            "UPDATE tasks SET started_at = ? WHERE id = ? AND status = 'running' AND worker = ?",
+            (time.time(), task_id, worker)
+        )
+        return cursor.rowcount > 0
+
+    def complete(self, task_id):
+        self._connect().execute(
+            "UPDATE tasks SET status = 'done', finished_at = ?, last_error = NULL WHERE id = ?",
+            (time.time(), task_id)
+        )
+
+    def fail(self, task, error):
+        """Schedule a retry with backoff, or give up after max_attempts"""
+        now = time.time()
+        if task['attempts'] >= self.max_attempts:
+            self._set(task['id'], status=FAILED, finished_at=now, last_error=error)
+            return FAILED
+
+        backoff = min(self.backoff_max, self.backoff_base * 2 ** (task['attempts'] - 1))
+        run_at = now + backoff * random.uniform(0.5, 1.0)
+        self._requeue(task['id'], run_at, error)
+        return QUEUED
+
+    def _set(self, task_id, **fields):
+        self._connect().execute(
+            f"UPDATE tasks SET {', '.join(f'{column} = ?' for column in fields)} WHERE id = ?",
+            (*fields.values(), task_id)
+        )
+
+    def _requeue(self, task_id, run_at, error):
+        try:
+            self._set(task_id, status=QUEUED, run_at=run_at, worker=None, last_error=error)
+        except sqlite3.IntegrityError:
+            # A newer task with the same dedup key is already waiting and covers this one
+            self._set(task_id, status=DONE, finished_at=time.time(), last_error=f"superseded: {error}")
+
+    def seconds_until_next(self):
+        """Time until the earliest queued task becomes runnable (None when the queue is empty)"""
+        row = self._connect().execute("SELECT MIN(run_at) FROM tasks WHERE status = 'queued'").fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def recover_expired(self):
+        """Put tasks whose worker died mid-run back on the queue"""
+        cutoff = time.time() - self.lease_seconds
+        rows = self._connect().execute(
+            "SELECT id FROM tasks WHERE status = 'running' AND started_at < ?", (cutoff,)
+        ).fetchall()
+        for row in rows:
+            self._requeue(row['id'], time.time(), 'lease expired')
+        return len(rows)
+
+    # ---- inspection ----
+    def stats(self):
+        """
+        Depth per status and lag of the oldest runnable task, overall and per
+        task name. Lag runs from when a task became due (run_at), so a delayed
+        or backing-off task is not late until its time has come
+        """
+        now = time.time()
+        rows = self._connect().execute("""
+            SELECT name, status, COUNT(*) AS depth,
+                   MIN(CASE WHEN status = 'queued' AND run_at <= ? THEN run_at END) AS oldest
+            FROM tasks
+            GROUP BY name, status
+        """, (now,)).fetchall()
+
+        names = {}
+        for row in rows:
+            entry = names.setdefault(row['name'], {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0, 'lag_seconds': 0.0})
+            entry[row['status']] = row['depth']
+            if row['oldest'] is not None:
+                entry['lag_seconds'] = max(entry['lag_seconds'], round(now - row['oldest'], 3))
+
+        totals = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0, 'lag_seconds': 0.0}
+        for entry in names.values():
+            for key in (QUEUED, RUNNING, DONE, FAILED):
+                totals[key] += entry[key]
+            totals['lag_seconds'] = max(totals['lag_seconds'], entry['lag_seconds'])
+        return {'total': totals, 'tasks': names}
+
+    def list(self, status, limit=50):
+        rows = self._connect().execute(
+            "SELECT * FROM tasks WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def retry(self, task_id=None):
+        """Put one failed task (or every failed task) back on the queue"""
+        conn = self._connect()
+        if task_id is None:
+            rows = conn.execute("SELECT id FROM tasks WHERE status = 'failed'").fetchall()
+        else:
+            rows = conn.execute("SELECT id FROM tasks WHERE status = 'failed' AND id = ?", (task_id,)).fetchall()
+        for row in rows:
+            self._set(row['id'], attempts=0)
+            self._requeue(row['id'], time.time(), None)
+        if rows:
+            self.wakeup.set()
+        return len(rows)
+
+    def purge(self, older_than_seconds):
+        """Delete finished tasks older than the given age"""
+        cursor = self._connect().execute(
+            "DELETE FROM tasks WHERE status = 'done' AND finished_at < ?", (time.time() - older_than_seconds,)
+        )
+        return cursor.rowcount
+
+
+class TaskWorkers:
+    """Threads that drain a TaskQueue with {task name: handler(payload)}"""
+
+    def __init__(self, queue, handlers, threads=1, poll_interval=1.0):
+        self.queue = queue
+        self.handlers = handlers
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.stopping = threading.Event()
+        self.recovered_at = time.monotonic()
+        self.workers = []
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+    def start(self):
+        self.queue.recover_expired()
+        for i in range(self.threads):
+            thread = threading.Thread(target=self._run, args=(f"{self.worker_id}-{i}",), daemon=True)
+            thread.start()
+            self.workers.append(thread)
+        return self
+
+    def stop(self, timeout=5.0):
+        self.stopping.set()
+        self.queue.wakeup.set()
+        for thread in self.workers:
+            thread.join(timeout)
+
+    def run_once(self, worker):
+        """Claim and run one task; False when nothing was runnable"""
+        task = self.queue.claim(worker)
+        if task is None:
+            return False
+
+        handler = self.handlers.get(task['name'])
+        started = time.monotonic()
+        done = threading.Event()
+        renewer = threading.Thread(target=self._renew, args=(task['id'], worker, done), daemon=True)
+        renewer.start()
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for task {task['name']}")
+            handler(**task['payload'])
+        except Exception as e:
+            status = self.queue.fail(task, f"{type(e).__name__}: {e}")
+            logger.warning('task.failed', exc_info=status == FAILED, extra={
+                'event': 'task.failed', 'task': task['name'], 'task_id': task['id'],
+                'attempts': task['attempts'], 'status': status
+            })
+        else:
+            self.queue.complete(task['id'])
+            logger.debug('task.done', extra={
+                'event': 'task.done', 'task': task['name'], 'task_id': task['id'],
+                'lag_ms': round((task['started_at'] - task['run_at']) * 1000, 1),
+                'duration_ms': round((time.monotonic() - started) * 1000, 1)
+            })
+        finally:
+            done.set()
+            renewer.join()
+        return True
+
+    def _renew(self, task_id, worker, done):
+        """Keep a running task's lease alive until its handler returns"""
+        while not done.wait(max(0.05, self.queue.lease_seconds / 3)):
+            try:
+                self.queue.renew(task_id, worker)
+            except Exception:
+                logger.exception('task.renew_failed', extra={'event': 'task.renew_failed', 'task_id': task_id})
+
+    def _run(self, worker):
+        while not self.stopping.is_set():
+            wait = self.poll_interval
+            try:
+                if self.run_once(worker):
+                    continue
+                if time.monotonic() - self.recovered_at > self.queue.lease_seconds / 2:
+                    self.recovered_at = time.monotonic()
+                    self.queue.recover_expired()
+                # Sleep until the next delayed task is due, an enqueue, or the poll interval
+                due = self.queue.seconds_until_next()
+                if due is not None:
+                    wait = min(wait, due)
+            except Exception:
+                logger.exception('task.worker_error', extra={'event': 'task.worker_error'})
+            self.queue.wakeup.wait(wait)
+            self.queue.wakeup.clear()
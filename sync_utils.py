@@ -0,0 +1,70 @@
+"""
+Utils modules both backends run. backend-employee/utils holds the source;
+the backend-admin copies are generated from it and must stay byte-identical
+(each app imports `utils.*` from its own directory).
+
+    python sync_utils.py            # copy the shared modules to backend-admin
+    python sync_utils.py --check    # list copies that drifted, exit 1 if any
+"""
+import argparse
+import os
+import shutil
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SOURCE = os.path.join(ROOT, 'backend-employee', 'utils')
+COPIES = (os.path.join(ROOT, 'backend-admin', 'utils'),)
+
+SHARED = (
+    'bulk_import.py',
+    'compression.py',
+    'health.py',
+    'log.py',
+    'meal_pass.py',
+    'menu_templates.py',
+    'profiling.py',
+    'ratelimit.py',
+    'sites.py',
+    'sync.py',
+)
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def drifted():
+    """Paths of copies missing or differing from their source"""
+    paths = []
+    for name in SHARED:
+        source = _read(os.path.join(SOURCE, name))
+        for directory in COPIES:
+            copy = os.path.join(directory, name)
+            if not os.path.exists(copy) or _read(copy) != source:
+                paths.append(copy)
+    return paths
+
+
+def sync():
+    """Overwrite the drifted copies from the source; returns their paths"""
+    paths = drifted()
+    for copy in paths:
+        shutil.copyfile(os.path.join(SOURCE, os.path.basename(copy)), copy)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep the shared utils modules identical in both backends")
+    parser.add_argument("--check", action="store_true", help="report drifted copies without writing")
+    args = parser.parse_args()
+
+    paths = drifted() if args.check else sync()
+    for path in paths:
+        print(f"{'drifted' if args.check else 'updated'}: {os.path.relpath(path, ROOT)}")
+    if args.check and paths:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()